@@ -20,6 +20,7 @@ from typing import Dict, Tuple, Optional
 from decimal import Decimal
 
 from mex_api import MexAPI
+from cache.market_data_cache import get_market_data_cache
 from config import TELEGRAM_BOT_TOKEN, TELEGRAM_CHAT_ID
 from portfolio_balancer import PortfolioBalancer
 
@@ -32,12 +33,14 @@ logger = logging.getLogger(__name__)
 class Active5050Balancer:
     """Активный балансировщик 50/50 Альты vs BTC/ETH за USDC"""
     
-    def __init__(self):
+    def __init__(self, market_data=None):
         ############################################################
         # ⚙️ ИНИЦИАЛИЗАЦИЯ
         # Назначение: клиенты API, параметры, лимиты, статистика
         ############################################################
         self.mex_api = MexAPI()
+        # Цены, стакан и 24h тикеры - через общий кэш рыночных данных процесса
+        self.market_data = (market_data or get_market_data_cache(self.mex_api)).client('balancer_5050')
         self.bot_token = TELEGRAM_BOT_TOKEN
         self.chat_id = TELEGRAM_CHAT_ID
         
@@ -69,7 +72,7 @@ class Active5050Balancer:
         
         # Контроль частоты отчетов (уменьшаем спам в 2 раза)
         self.report_counter = 0
-        self.btc_eth_balancer = PortfolioBalancer()
+        self.btc_eth_balancer = PortfolioBalancer(market_data=self.market_data)
         
     ############################################################
     # ✉️ TELEGRAM: отправка сообщений
@@ -163,6 +166,7 @@ class Active5050Balancer:
             
             if order and 'orderId' in order:
                 logger.info(f"✅ Куплен USDC за USDT: ${qty:.2f}")
+                self.market_data.invalidate('USDCUSDT')
                 try:
                     self.send_telegram_message(f"💱 Куплен USDC за USDT на ${qty:.2f} для балансировки")
                 except Exception:
@@ -247,9 +251,9 @@ class Active5050Balancer:
             btceth_value = 0.0
             
             # Получаем цены
-            btc_price = self.mex_api.get_ticker_price('BTCUSDC')
-            eth_price = self.mex_api.get_ticker_price('ETHUSDC')
-            usdc_usdt_price = self.mex_api.get_ticker_price('USDCUSDT')
+            btc_price = self.market_data.get_ticker_price('BTCUSDC')
+            eth_price = self.market_data.get_ticker_price('ETHUSDC')
+            usdc_usdt_price = self.market_data.get_ticker_price('USDCUSDT')
             
             btc_price_value = float(btc_price['price']) if btc_price else 0.0
             eth_price_value = float(eth_price['price']) if eth_price else 0.0
@@ -272,7 +276,7 @@ class Active5050Balancer:
                     # Получаем цену в USDT
                     symbol = f"{asset}USDT"
                     try:
-                        price_info = self.mex_api.get_ticker_price(symbol)
+                        price_info = self.market_data.get_ticker_price(symbol)
                         if price_info and 'price' in price_info:
                             price = float(price_info['price'])
                             alts_value += total_amount * price
@@ -569,6 +573,7 @@ class Active5050Balancer:
                 )
                 if btc_order and 'orderId' in btc_order:
                     logger.info(f"✅ Куплен BTC на ${btc_amount:.2f} USDC")
+                    self.market_data.invalidate('BTCUSDC')
                     success_count += 1
                 else:
                     logger.error(f"❌ Ошибка покупки BTC")
@@ -582,6 +587,7 @@ class Active5050Balancer:
                 )
                 if eth_order and 'orderId' in eth_order:
                     logger.info(f"✅ Куплен ETH на ${eth_amount:.2f} USDC")
+                    self.market_data.invalidate('ETHUSDC')
                     success_count += 1
                 else:
                     logger.error(f"❌ Ошибка покупки ETH")
@@ -642,6 +648,7 @@ class Active5050Balancer:
                     
                     if order and 'orderId' in order:
                         logger.info(f"✅ Куплен {symbol} на ${amount_per_alt:.2f} USDC")
+                        self.market_data.invalidate(symbol)
                         success_count += 1
                     else:
                         logger.error(f"❌ Ошибка покупки {symbol}")
@@ -16,11 +16,16 @@ from decimal import Decimal, ROUND_UP
 from typing import Dict, List
 
 from mex_api import MexAPI
+from cache.market_data_cache import get_market_data_cache
 from mexc_advanced_api import MexAdvancedAPI
 from pnl_monitor import PnLMonitor
+from position_engine import get_position_engine
+from portfolio_pnl import PortfolioPnL
 from anti_hype_filter import AntiHypeFilter
+from verdict_table import get_verdict_table
 from post_sale_balancer import PostSaleBalancer
 from active_50_50_balancer import Active5050Balancer
+from universe_manager import get_universe
 
 
 logger = logging.getLogger(__name__)
@@ -32,19 +37,49 @@ CHECK_INTERVAL_SEC = 60
 NOTIFY_INTERVAL_SEC = 3600  # 1 час (изменено с 300 сек на 3600 сек)
 
 class AltsMonitor:
-    def __init__(self):
+    def __init__(self, market_data=None):
         ############################################################
         # ⚙️ ИНИЦИАЛИЗАЦИЯ
         # Назначение: клиенты API, фильтры, параметры
         ############################################################
         self.mex = MexAPI()
+        # Свечи фильтра, цены и стакан - через общий кэш рыночных данных процесса
+        self.market_data = (market_data or get_market_data_cache(self.mex)).client('alts')
         self.adv = MexAdvancedAPI()
-        self.anti_hype_filter = AntiHypeFilter()
-        self.balancer = Active5050Balancer()
+        self.positions = get_position_engine()  # Позиции по средней цене закупа (общие для мониторов)
+        self.portfolio_pnl = PortfolioPnL(self.market_data, self.positions)  # PnL всех альтов за один проход
+        self.anti_hype_filter = AntiHypeFilter(kline_source=self.market_data)
+        self.verdicts = get_verdict_table()  # Готовые вердикты фильтра (фоновый пересчет)
+        self.balancer = Active5050Balancer(market_data=self.market_data)
+        self.pnl_monitor = None  # Отправка в Telegram (создается при первом сообщении)
+        # Торгуемые пары и правила из общей вселенной (exchangeInfo читается один раз)
+        self.universe = get_universe(self.mex)
         self.keep_assets = {'BTC', 'ETH', 'USDT', 'USDC'}
         self.last_action_time = 0
         self.last_notify_time = 0
 
+    ############################################################
+    # 🌐 ТОРГУЕМЫЕ ПАРЫ (вселенная)
+    ############################################################
+    def _resolve_symbol(self, asset: str, quotes=('USDT', 'USDC')):
+        """Торгуемая пара актива: сначала USDT, затем USDC"""
+        self.universe.ensure_loaded()
+        return self.universe.resolve(asset, quotes)
+
+    def _symbol_rules(self, symbol: str) -> Dict:
+        """Правила пары из вселенной (запрос к бирже - только если их там нет)"""
+        self.universe.ensure_loaded()
+        return self.universe.symbol_rules(symbol) or self.adv.get_symbol_rules(symbol) or {}
+
+    ############################################################
+    # ✉️ TELEGRAM
+    ############################################################
+    def _send_telegram(self, message: str):
+        """Сообщение в Telegram через один PnLMonitor (а не новый на каждое сообщение)"""
+        if self.pnl_monitor is None:
+            self.pnl_monitor = PnLMonitor(market_data=self.market_data)
+        self.pnl_monitor.send_telegram_message(message)
+
     ############################################################
     # 💰 БАЛАНСЫ
     ############################################################
@@ -66,7 +101,7 @@ class AltsMonitor:
     ############################################################
     def _get_best_bid_ask(self, symbol: str):
         try:
-            depth = self.mex.get_depth(symbol, 5)
+            depth = self.market_data.get_depth(symbol, 5)
             bids = depth.get('bids', [])
             asks = depth.get('asks', [])
             best_bid = float(bids[0][0]) if bids else None
@@ -79,62 +114,31 @@ class AltsMonitor:
     # 🧮 PnL AVG-COST ДЛЯ АЛЬТА
     ############################################################
     def _avg_cost_pnl(self, symbol: str, portfolio_qty: float) -> Dict:
-        base = symbol.rstrip('USDT').rstrip('USDC').replace('USDT','').replace('USDC','')
-        quote = 'USDT' if symbol.endswith('USDT') else ('USDC' if symbol.endswith('USDC') else 'USDT')
-        trades = self.adv.get_my_trades(symbol, limit=500) or []
-
-        position_qty = 0.0
-        cost_basis_total = 0.0
-        realized = 0.0
-
-        def fee_in_quote(t):
-            fee = float(t.get('commission', 0) or 0)
-            fa = t.get('commissionAsset')
-            price = float(t.get('price', 0) or 0)
-            if fee <= 0:
-                return 0.0
-            if fa == quote:
-                return fee
-            if fa == base and price > 0:
-                return fee * price
-            return 0.0
-
-        for t in sorted(trades, key=lambda x: x.get('time', 0)):
-            qty = float(t.get('qty', 0) or 0)
-            quote_qty = float(t.get('quoteQty', 0) or 0)
-            is_buyer = bool(t.get('isBuyer', False))
-            fee_q = fee_in_quote(t)
-            if is_buyer:
-                total_cost = quote_qty + fee_q
-                new_pos = position_qty + qty
-                if new_pos > 0:
-                    cost_basis_total += total_cost
-                    position_qty = new_pos
-            else:
-                if position_qty <= 0:
-                    continue
-                avg = cost_basis_total / position_qty if position_qty > 0 else 0.0
-                revenue = quote_qty - fee_q
-                realized += revenue - (avg * qty)
-                cost_basis_total -= avg * qty
-                position_qty -= qty
-                if position_qty < 1e-12:
-                    position_qty = 0.0
-                    cost_basis_total = 0.0
-
-        avg_price = (cost_basis_total / position_qty) if position_qty > 0 else 0.0
-        px_info = self.mex.get_ticker_price(symbol)
+        px_info = self.market_data.get_ticker_price(symbol)
         cur_px = float(px_info['price']) if 'price' in px_info else 0.0
-        qty_for_pnl = min(portfolio_qty, position_qty) if position_qty > 0 else 0.0
-        unreal = (cur_px - avg_price) * qty_for_pnl
+        pnl = self.positions.pnl(symbol, cur_px, portfolio_qty)
         return {
-            'avg_buy_price': avg_price,
+            'avg_buy_price': pnl['avg_buy_price'],
             'current_price': cur_px,
-            'position_qty': position_qty,
-            'unrealized_pnl': unreal,
-            'realized_pnl': realized,
+            'position_qty': pnl['position_qty'],
+            'unrealized_pnl': pnl['unrealized_pnl'],
+            'realized_pnl': pnl['realized_pnl'],
         }
 
+    def _alt_items(self, balances: Dict[str, Dict]) -> List[Dict]:
+        """PnL всех альтов портфеля: один снимок цен, решения о продаже по порогу"""
+        alts = {asset: data for asset, data in balances.items() if asset not in self.keep_assets}
+        symbols = {asset: self._resolve_symbol(asset) for asset in alts}
+        actions = self.portfolio_pnl.evaluate(alts, symbols, threshold_usd=SELL_THRESHOLD_USD)
+        return [{
+            'asset': it['asset'],
+            'symbol': it['symbol'],
+            'quantity': it['quantity'],
+            'current_price': it['current_price'],
+            'pnl': it['unrealized_pnl'],
+            'sell': it['sell'],
+        } for it in actions]
+
     ############################################################
     # 🧾 ЛИМИТНАЯ ПРОДАЖА БЛИЗКО К РЫНКУ
     ############################################################
@@ -142,11 +146,11 @@ class AltsMonitor:
         best_bid, best_ask = self._get_best_bid_ask(symbol)
         price = best_bid * 0.999 if best_bid else None
         if price is None:
-            px_info = self.mex.get_ticker_price(symbol)
+            px_info = self.market_data.get_ticker_price(symbol)
             price = float(px_info['price']) * 0.999 if 'price' in px_info else None
         if price is None:
             return {'success': False, 'error': 'no_price'}
-        return self.mex.place_order(symbol=symbol, side='SELL', quantity=quantity, price=price)
+        return self._place_order(symbol=symbol, side='SELL', quantity=quantity, price=price)
 
     ############################################################
     # 🛒 ЛИМИТНАЯ ПОКУПКА БЛИЗКО К РЫНКУ
@@ -155,11 +159,11 @@ class AltsMonitor:
         best_bid, best_ask = self._get_best_bid_ask(symbol)
         price = best_ask * 1.001 if best_ask else None
         if price is None:
-            px_info = self.mex.get_ticker_price(symbol)
+            px_info = self.market_data.get_ticker_price(symbol)
             price = float(px_info['price']) * 1.001 if 'price' in px_info else None
         if price is None or price <= 0:
             return {'success': False, 'error': 'no_price'}
-        rules = self.adv.get_symbol_rules(symbol)
+        rules = self._symbol_rules(symbol)
         step = float(rules.get('stepSize', 1e-6)) if rules else 1e-6
         qty = usdt_amount / price
         # round down to step
@@ -170,7 +174,14 @@ class AltsMonitor:
         qty = float((quant * d_step).normalize())
         if qty <= 0:
             return {'success': False, 'error': 'qty_too_small'}
-        return self.mex.place_order(symbol=symbol, side='BUY', quantity=qty, price=price)
+        return self._place_order(symbol=symbol, side='BUY', quantity=qty, price=price)
+
+    def _place_order(self, symbol: str, side: str, quantity: float, price: float) -> Dict:
+        """Ордер на бирже; после размещения цены и стакан символа в кэше устарели"""
+        res = self.mex.place_order(symbol=symbol, side=side, quantity=quantity, price=price)
+        if res and 'orderId' in res:
+            self.market_data.invalidate(symbol)
+        return res
 
     ############################################################
     # 💵 ОБЩИЙ ДЕПОЗИТ (USDT/USDC/АЛЬТЫ)
@@ -181,7 +192,7 @@ class AltsMonitor:
             info = self.mex.get_account_info() or {}
             usdc_usdt = 1.0
             try:
-                px = self.mex.get_ticker_price('USDCUSDT') or {}
+                px = self.market_data.get_ticker_price('USDCUSDT') or {}
                 if 'price' in px:
                     usdc_usdt = float(px['price'])
             except Exception:
@@ -200,14 +211,14 @@ class AltsMonitor:
                     # сначала пробуем USDT-пару
                     price = None
                     try:
-                        px = self.mex.get_ticker_price(f"{asset}USDT") or {}
+                        px = self.market_data.get_ticker_price(f"{asset}USDT") or {}
                         if 'price' in px:
                             price = float(px['price'])
                     except Exception:
                         price = None
                     if price is None:
                         try:
-                            px = self.mex.get_ticker_price(f"{asset}USDC") or {}
+                            px = self.market_data.get_ticker_price(f"{asset}USDC") or {}
                             if 'price' in px:
                                 price = float(px['price']) * usdc_usdt
                         except Exception:
@@ -224,14 +235,14 @@ class AltsMonitor:
     def _get_min_lot_usdt(self, symbol: str) -> float:
         """Минимальный лот в долларах по правилам биржи."""
         try:
-            rules = self.adv.get_symbol_rules(symbol) or {}
+            rules = self._symbol_rules(symbol)
             min_qty = float(rules.get('minQty', 0) or 0)
             step = float(rules.get('stepSize', 0) or 0)
             # Текущая цена (лучший аск)
             best_bid, best_ask = self._get_best_bid_ask(symbol)
             price = best_ask if best_ask else None
             if price is None:
-                px = self.mex.get_ticker_price(symbol) or {}
+                px = self.market_data.get_ticker_price(symbol) or {}
                 if 'price' in px:
                     price = float(px['price'])
             if not price or price <= 0:
@@ -302,7 +313,7 @@ class AltsMonitor:
                     total_portfolio += total
                 else:
                     try:
-                        px = self.mex.get_ticker_price(f"{asset}USDT")
+                        px = self.market_data.get_ticker_price(f"{asset}USDT")
                         if px and 'price' in px:
                             total_portfolio += total * float(px['price'])
                     except Exception:
@@ -337,38 +348,19 @@ class AltsMonitor:
             lines.append("   🚫 Нет открытых\n")
         
         lines.append(f"\n⏰ {datetime.now().strftime('%H:%M:%S')}")
-        PnLMonitor().send_telegram_message("".join(lines))
+        self._send_telegram("".join(lines))
 
     ############################################################
     # 🔄 ОДИН ЗАПУСК ЦИКЛА (SELL → BUY → REPORT)
     ############################################################
     def run_once(self):
         balances = self._get_balances()
-        # Collect ALT status first
-        alt_items: List[Dict] = []
-        alt_symbols: List[str] = []
-        for asset, data in balances.items():
-            if asset in self.keep_assets:
-                continue
-            symbol = f"{asset}USDT"
-            rules = self.adv.get_symbol_rules(symbol)
-            if not rules:
-                symbol = f"{asset}USDC"
-                rules = self.adv.get_symbol_rules(symbol)
-            if not rules:
-                continue
-            pnl = self._avg_cost_pnl(symbol, data['total'])
-            alt_items.append({
-                'asset': asset,
-                'symbol': symbol,
-                'quantity': data['total'],
-                'current_price': pnl['current_price'],
-                'pnl': pnl['unrealized_pnl']
-            })
-            alt_symbols.append(symbol)
-        # SELL phase
+        # Collect ALT status first (один снимок цен, PnL всех альтов за один проход)
+        alt_items = self._alt_items(balances)
+        alt_symbols = [it['symbol'] for it in alt_items]
+        # SELL phase (список уже отсортирован: сначала активы выше порога)
         for it in alt_items:
-            if it['pnl'] > SELL_THRESHOLD_USD and balances[it['asset']]['free'] > 0:
+            if it['sell'] and balances[it['asset']]['free'] > 0:
                 logger.info(f"Selling {it['asset']}: qty={balances[it['asset']]['free']}")
                 res = self._place_limit_sell_near_market(it['symbol'], balances[it['asset']]['free'])
                 logger.info(f"SELL result: {res}")
@@ -383,7 +375,7 @@ class AltsMonitor:
                         f"🆔 Ордер: <code>{res['orderId']}</code>\n"
                         f"⏰ Время: {datetime.now().strftime('%H:%M:%S')}"
                     )
-                    PnLMonitor().send_telegram_message(sell_message)
+                    self._send_telegram(sell_message)
                     
                     # Триггер пост-продажного балансировщика 50/50
                     try:
@@ -401,15 +393,15 @@ class AltsMonitor:
             # 1% от депозита
             deposit_usd = self._get_total_deposit_usd()
             base_amount = deposit_usd * 0.01 if deposit_usd > 0 else 0.0
+            # Кандидаты: не держим и есть USDT-пара; вердикты фильтра - из готового снимка
+            candidates = [(alt, self._resolve_symbol(alt, ('USDT',))) for alt in TOP5_ALTS if alt not in balances]
+            candidates = [(alt, sym) for alt, sym in candidates if sym]
+            verdicts = self.verdicts.check_buy_permission_batch([sym for _, sym in candidates],
+                                                                fallback=self.anti_hype_filter)
             # выбираем первый доступный альт из списка
-            for alt in TOP5_ALTS:
-                if alt in balances:  # уже держим; пропускаем
-                    continue
-                sym = f"{alt}USDT"
-                if not self.adv.get_symbol_rules(sym):
-                    continue
+            for alt, sym in candidates:
                 # Проверяем анти-хайп фильтр для альта
-                alt_filter = self.anti_hype_filter.check_buy_permission(sym)
+                alt_filter = verdicts[sym]
                 if not alt_filter['allowed']:
                     logger.warning(f"🚫 {alt} покупка заблокирована анти-хайп фильтром: {alt_filter['reason']}")
                     continue
@@ -436,7 +428,7 @@ class AltsMonitor:
                     f"⚖️ <b>Ожидаем ответ от балансировщика...</b>\n\n"
                     f"⏰ Время: {datetime.now().strftime('%H:%M:%S')}"
                 )
-                PnLMonitor().send_telegram_message(request_message)
+                self._send_telegram(request_message)
                 
                 permission = self.balancer.check_purchase_permission(spend_amount, "ALTS")
                 
@@ -454,7 +446,7 @@ class AltsMonitor:
                         f"BTC/ETH: {permission['current_btceth_ratio']*100:.1f}%\n\n"
                         f"⏰ Время: {datetime.now().strftime('%H:%M:%S')}"
                     )
-                    PnLMonitor().send_telegram_message(blocked_message)
+                    self._send_telegram(blocked_message)
                     continue
                 
                 logger.info(f"✅ Балансировщик разрешил покупку {alt}: {permission['reason']}")
@@ -472,7 +464,7 @@ class AltsMonitor:
                         f"🆔 Ордер: <code>{res['orderId']}</code>\n"
                         f"⏰ Время: {datetime.now().strftime('%H:%M:%S')}"
                     )
-                    PnLMonitor().send_telegram_message(buy_message)
+                    self._send_telegram(buy_message)
                 # совершаем только одну покупку за цикл
                 break
         
@@ -489,27 +481,8 @@ class AltsMonitor:
     def send_status_report_once(self):
         """Send one Telegram status report for alts without trading."""
         balances = self._get_balances()
-        alt_items: List[Dict] = []
-        alt_symbols: List[str] = []
-        for asset, data in balances.items():
-            if asset in self.keep_assets:
-                continue
-            symbol = f"{asset}USDT"
-            rules = self.adv.get_symbol_rules(symbol)
-            if not rules:
-                symbol = f"{asset}USDC"
-                rules = self.adv.get_symbol_rules(symbol)
-            if not rules:
-                continue
-            pnl = self._avg_cost_pnl(symbol, data['total'])
-            alt_items.append({
-                'asset': asset,
-                'symbol': symbol,
-                'quantity': data['total'],
-                'current_price': pnl['current_price'],
-                'pnl': pnl['unrealized_pnl']
-            })
-            alt_symbols.append(symbol)
+        alt_items = self._alt_items(balances)
+        alt_symbols = [it['symbol'] for it in alt_items]
         orders_map = self._fetch_open_orders_map(alt_symbols)
         self._send_telegram_report(alt_items, orders_map)
 
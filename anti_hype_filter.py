@@ -5,17 +5,95 @@
 """
 
 import numpy as np
-from typing import Dict, List, Optional
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterable, List, Optional, Tuple
 from mex_api import MexAPI
 from technical_indicators import TechnicalIndicators
+from cache.kline_store import KlineWindow, as_window, get_kline_store
+from cache.ttl_cache import TTLCache
+from cache.daily_extremes import get_daily_extremes
+from config import KLINE_CACHE_CONFIG
+from filter_decision_log import get_decision_log
+import indicator_kernels as kernels
 import logging
 
 logger = logging.getLogger(__name__)
 
+# Коды решений пакетной проверки (порядок = порядок лестницы check_buy_permission)
+(_NO_DATA, _ERROR, _DAILY_HIGH_BLOCK, _IMPULSE, _OVERBOUGHT, _BEAR,
+ _DCA, _NORMAL, _NEUTRAL) = range(9)
+
+# Пороги лестницы решений (атрибуты AntiHypeFilter)
+DECISION_PARAMS = ('atr_impulse_multiplier', 'atr_dca_multiplier', 'rsi_overbought', 'rsi_oversold',
+                   'rsi_neutral', 'ema_deviation', 'daily_high_safety_margin', 'daily_high_block_threshold')
+
+
+def _finite(value) -> Optional[float]:
+    """Число для журнала решений: NaN и отсутствие значения -> None"""
+    if value is None:
+        return None
+    value = float(value)
+    return value if np.isfinite(value) else None
+
+
+def decide(columns: Dict[str, np.ndarray], params: Dict[str, float]) -> Dict[str, np.ndarray]:
+    """Лестница решений check_buy_permission по массивам признаков (векторно).
+
+    Args:
+        columns: price, daily_high (NaN - нет часовых свечей), atr, rsi, ema20,
+            ema200, change (изменение за 4h, %), has_data (bool)
+        params: Пороги DECISION_PARAMS
+    """
+    has_data = columns['has_data']
+    price, daily_high = columns['price'], columns['daily_high']
+    atr, rsi, change = columns['atr'], columns['rsi'], columns['change']
+    ema20, ema200 = columns['ema20'], columns['ema200']
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        has_hourly = ~np.isnan(daily_high)
+        daily_error = has_hourly & (daily_high == 0)  # Деление на ноль в одиночной проверке
+        daily_valid = has_hourly & ~daily_error
+        distance = (daily_high - price) / daily_high
+        full_block = daily_valid & (distance < params['daily_high_block_threshold'])
+        restriction = daily_valid & (distance < params['daily_high_safety_margin'])
+        daily_multiplier = np.where(restriction, 0.3, 1.0)
+
+        atr_threshold = (atr / price) * 100 * params['atr_impulse_multiplier']
+        atr_dca_threshold = (atr / price) * 100 * params['atr_dca_multiplier']
+        impulse = change > atr_threshold
+        overbought = (rsi > params['rsi_overbought']) & (price > ema20 * (1 + params['ema_deviation']))
+        bear = price < ema200
+        dca = (change < -atr_dca_threshold) & (rsi < params['rsi_oversold'])
+        normal = rsi < params['rsi_neutral']
+
+    # Нулевая цена: одиночная проверка падает на ATR-пороге -> error_fallback
+    error = has_data & (price == 0) & ~full_block
+    decision = np.select(
+        [~has_data, full_block, error, impulse, overbought, bear, dca, normal],
+        [_NO_DATA, _DAILY_HIGH_BLOCK, _ERROR, _IMPULSE, _OVERBOUGHT, _BEAR, _DCA, _NORMAL],
+        default=_NEUTRAL)
+    base_multiplier = np.select([decision == _DCA, decision == _NORMAL, decision == _NEUTRAL],
+                                [2.0, 1.0, 0.7], default=0.0)
+    return {
+        'decision': decision, 'allowed': decision >= _DCA, 'multiplier': base_multiplier * daily_multiplier,
+        'price': price, 'daily_high': np.where(daily_valid, daily_high, np.nan),
+        'distance_percent': distance * 100, 'rsi': rsi, 'change': change,
+    }
+
+
 class AntiHypeFilter:
-    def __init__(self):
+    def __init__(self, kline_source=None):
+        """
+        Args:
+            kline_source: Источник свечей с методом get_klines (по умолчанию MexAPI);
+                например ResamplingKlineSource, строящий 1h/4h из одной базовой загрузки
+        """
         self.mex_api = MexAPI()
+        self.kline_source = kline_source or self.mex_api
         self.tech_indicators = TechnicalIndicators()
+        self.kline_store = get_kline_store()  # Общее хранилище свечей процесса
+        self.daily_extremes = get_daily_extremes()  # Дневные хай/лоу из потока цен
+        self.decision_log = get_decision_log()  # Журнал решений (None - выключен)
         
         # Параметры фильтра - УСИЛЕНЫ НА 10% ДЛЯ АЛЬТ-СЕЗОНА
         self.atr_impulse_multiplier = 2.7  # Усилено с 3.0 (более строгая блокировка импульса)
@@ -29,69 +107,64 @@ class AntiHypeFilter:
         self.daily_high_safety_margin = 0.01  # 1% безопасная дистанция от дневного хая
         self.daily_high_block_threshold = 0.002  # 0.2% от хая = полная блокировка
         
-        # Кэш для избежания повторных запросов
-        self.cache = {}
-        self.cache_ttl = 300  # 5 минут
+        # Кэш окон свечей: TTL, устаревание на границе свечи, LRU-лимит, одна загрузка на ключ
+        self.cache_ttl = KLINE_CACHE_CONFIG['ttl_sec']
+        self.cache = TTLCache(KLINE_CACHE_CONFIG['max_entries'], self.cache_ttl)
         
         # Кэш результатов проверки
         self.result_cache = {}
         self.result_cache_ttl = 120  # 2 минуты кэш результатов
     
-    def _get_klines_cached(self, symbol: str, interval: str, limit: int = 100) -> List:
-        """Получить свечи с кэшированием"""
-        cache_key = f"{symbol}_{interval}_{limit}"
-        
-        if cache_key in self.cache:
-            return self.cache[cache_key]
-        
-        klines = self.mex_api.get_klines(symbol, interval, limit)
-        self.cache[cache_key] = klines
-        return klines
+    def _get_klines_cached(self, symbol: str, interval: str, limit: int = 100) -> Optional[KlineWindow]:
+        """Получить свечи с кэшированием (окно общего хранилища свечей)"""
+        return self.cache.get_or_load((symbol, interval, limit),
+                                      lambda: self._fetch_window(symbol, interval, limit), interval)
+    
+    def _fetch_window(self, symbol: str, interval: str, limit: int) -> Optional[KlineWindow]:
+        """Загрузить свечи из источника и вернуть окно общего хранилища"""
+        klines = self.kline_source.get_klines(symbol, interval, limit)
+        if isinstance(klines, KlineWindow):
+            return klines
+        if isinstance(klines, list) and klines:
+            # Парсим один раз при загрузке, дальше работаем с массивами
+            self.kline_store.ingest(symbol, interval, klines)
+            return self.kline_store.window(symbol, interval, len(klines))
+        return None
     
-    def _calculate_atr(self, klines: List, period: int = 14) -> float:
+    def _calculate_atr(self, klines, period: int = 14) -> float:
         """Рассчитать ATR (Average True Range)"""
-        if len(klines) < period + 1:
+        window = as_window(klines)
+        if window is None or len(window) < period + 1:
             return 0.0
         
         try:
-            highs = [float(k[2]) for k in klines[-period-1:]]
-            lows = [float(k[3]) for k in klines[-period-1:]]
-            closes = [float(k[4]) for k in klines[-period-1:]]
+            highs = window.high[-period-1:]
+            lows = window.low[-period-1:]
+            closes = window.close[-period-1:]
             
-            true_ranges = []
-            for i in range(1, len(highs)):
-                tr1 = highs[i] - lows[i]
-                tr2 = abs(highs[i] - closes[i-1])
-                tr3 = abs(lows[i] - closes[i-1])
-                true_ranges.append(max(tr1, tr2, tr3))
+            true_ranges = np.maximum(
+                highs[1:] - lows[1:],
+                np.maximum(np.abs(highs[1:] - closes[:-1]), np.abs(lows[1:] - closes[:-1]))
+            )
             
-            return sum(true_ranges) / len(true_ranges) if true_ranges else 0.0
+            return float(true_ranges.mean()) if true_ranges.size else 0.0
         except Exception as e:
             logger.error(f"Ошибка расчета ATR: {e}")
             return 0.0
     
-    def _calculate_rsi(self, klines: List, period: int = 14) -> float:
+    def _calculate_rsi(self, klines, period: int = 14) -> float:
         """Рассчитать RSI"""
-        if len(klines) < period + 1:
+        window = as_window(klines)
+        if window is None or len(window) < period + 1:
             return 50.0
         
         try:
-            closes = [float(k[4]) for k in klines[-period-1:]]
+            changes = np.diff(window.close[-period-1:])
+            gains = np.where(changes > 0, changes, 0.0)
+            losses = np.where(changes > 0, 0.0, -changes)
             
-            gains = []
-            losses = []
-            
-            for i in range(1, len(closes)):
-                change = closes[i] - closes[i-1]
-                if change > 0:
-                    gains.append(change)
-                    losses.append(0)
-                else:
-                    gains.append(0)
-                    losses.append(abs(change))
-            
-            avg_gain = sum(gains) / len(gains) if gains else 0
-            avg_loss = sum(losses) / len(losses) if losses else 0
+            avg_gain = float(gains.mean()) if gains.size else 0
+            avg_loss = float(losses.mean()) if losses.size else 0
             
             if avg_loss == 0:
                 return 100.0
@@ -103,32 +176,28 @@ class AntiHypeFilter:
             logger.error(f"Ошибка расчета RSI: {e}")
             return 50.0
     
-    def _calculate_ema(self, klines: List, period: int) -> float:
+    def _calculate_ema(self, klines, period: int) -> float:
         """Рассчитать EMA"""
-        if len(klines) < period:
+        window = as_window(klines)
+        if window is None or len(window) < period:
             return 0.0
         
         try:
-            closes = [float(k[4]) for k in klines[-period:]]
-            multiplier = 2 / (period + 1)
-            ema = closes[0]
-            
-            for close in closes[1:]:
-                ema = (close * multiplier) + (ema * (1 - multiplier))
-            
-            return ema
+            # Старт с первой цены окна, рекурсия - в ядре (numba/numpy)
+            return float(kernels.ema_seeded(window.close[-period:], period)[-1])
         except Exception as e:
             logger.error(f"Ошибка расчета EMA: {e}")
             return 0.0
     
-    def _get_price_change_4h(self, klines_4h: List) -> float:
+    def _get_price_change_4h(self, klines_4h) -> float:
         """Получить изменение цены за 4 часа в %"""
-        if len(klines_4h) < 2:
+        window = as_window(klines_4h)
+        if window is None or len(window) < 2:
             return 0.0
         
         try:
-            current_price = float(klines_4h[-1][4])  # Последняя цена закрытия
-            price_4h_ago = float(klines_4h[-2][4])   # Цена 4 часа назад
+            current_price = float(window.close[-1])  # Последняя цена закрытия
+            price_4h_ago = float(window.close[-2])   # Цена 4 часа назад
             
             change_percent = ((current_price - price_4h_ago) / price_4h_ago) * 100
             return change_percent
@@ -154,27 +223,36 @@ class AntiHypeFilter:
         cache_key = f"result_{symbol}"
         self.result_cache[cache_key] = (time.time(), result)
     
+    def _get_daily_high(self, symbol: str) -> Optional[float]:
+        """Хай текущих UTC-суток из трекера; если символ не отслеживается -
+        засеваем трекер часовыми свечами за 24 часа (None - свечей нет)"""
+        daily_high = self.daily_extremes.high(symbol)
+        if daily_high is not None:
+            return daily_high
+        hourly_klines = self._get_klines_cached(symbol, '1h', 24)
+        if not hourly_klines or len(hourly_klines) < 1:
+            return None
+        if self.daily_extremes.seed(symbol, hourly_klines):
+            daily_high = self.daily_extremes.high(symbol)
+        # Свечи не текущие (история, тесты) - максимум окна, как раньше
+        return daily_high if daily_high is not None else float(hourly_klines.high.max())
+    
     def _check_daily_high_protection(self, symbol: str, current_price: float) -> Dict:
         """Проверка защиты от покупок близко к дневному хаю"""
         try:
-            # Получаем часовые свечи для расчета СЕГОДНЯШНЕГО дневного хая
-            hourly_klines = self._get_klines_cached(symbol, '1h', 24)
-            if not hourly_klines or len(hourly_klines) < 1:
+            # СЕГОДНЯШНИЙ дневной хай: из трекера, без трекера - из часовых свечей
+            daily_high = self._get_daily_high(symbol)
+            if daily_high is None:
                 logger.warning(f"⚠️ Нет часовых свечей для {symbol}")
                 return {'blocked': False, 'reason': 'no_hourly_data'}
             
-            # Находим СЕГОДНЯШНИЙ дневной хай из часовых свечей
-            daily_high = max([float(k[2]) for k in hourly_klines])  # high price
-            
             # Рассчитываем расстояние от хая
             distance_from_high = (daily_high - current_price) / daily_high
             distance_percent = distance_from_high * 100
             
-            logger.info(f"📊 {symbol}: дневной хай=${daily_high:.4f}, текущая цена=${current_price:.4f}, дистанция={distance_percent:.2f}%")
-            
             # Полная блокировка если слишком близко к хаю
             if distance_from_high < self.daily_high_block_threshold:
-                logger.warning(f"🚫 {symbol}: ПОЛНАЯ БЛОКИРОВКА! Слишком близко к дневному хаю: {distance_percent:.2f}% < {self.daily_high_block_threshold*100:.1f}%")
+                logger.debug(f"🚫 {symbol}: ПОЛНАЯ БЛОКИРОВКА! Слишком близко к дневному хаю: {distance_percent:.2f}% < {self.daily_high_block_threshold*100:.1f}%")
                 return {
                     'blocked': True, 
                     'reason': f'daily_high_too_close_{distance_percent:.1f}%',
@@ -186,7 +264,7 @@ class AntiHypeFilter:
             
             # Ограничение если близко к хаю
             if distance_from_high < self.daily_high_safety_margin:
-                logger.warning(f"⚠️ {symbol}: ОГРАНИЧЕНИЕ! Близко к дневному хаю: {distance_percent:.2f}% < {self.daily_high_safety_margin*100:.1f}%")
+                logger.debug(f"⚠️ {symbol}: ОГРАНИЧЕНИЕ! Близко к дневному хаю: {distance_percent:.2f}% < {self.daily_high_safety_margin*100:.1f}%")
                 return {
                     'blocked': False, 
                     'reason': f'daily_high_close_{distance_percent:.1f}%',
@@ -198,7 +276,6 @@ class AntiHypeFilter:
                 }
             
             # Безопасная зона
-            logger.info(f"✅ {symbol}: Безопасная зона от дневного хая: {distance_percent:.2f}%")
             return {
                 'blocked': False, 
                 'reason': f'daily_high_safe_{distance_percent:.1f}%',
@@ -218,12 +295,45 @@ class AntiHypeFilter:
         # Проверяем кэш результатов
         cached_result = self._get_cached_result(symbol)
         if cached_result:
-            logger.info(f"📋 Используем кэшированный результат для {symbol}")
+            logger.debug(f"📋 Используем кэшированный результат для {symbol}")
             return cached_result
         
+        trace: Dict = {}
+        result = self._evaluate(symbol, trace)
+        self._record_decision(symbol, trace, result)
+        return result
+    
+    def _decision_rules(self, trace: Dict) -> List[tuple]:
+        """Значение, порог и сравнение каждого правила (порядок RULES['anti_hype'] журнала)"""
+        price, daily_high = trace.get('price'), trace.get('daily_high')
+        atr, rsi, ema20, ema200 = trace.get('atr'), trace.get('rsi'), trace.get('ema20'), trace.get('ema200')
+        change = trace.get('change_4h')
+        distance = (daily_high - price) / daily_high if price and daily_high else None
+        atr_percent = atr / price * 100 if price and atr is not None else None
+        return [
+            (distance, self.daily_high_block_threshold, '<'),
+            (distance, self.daily_high_safety_margin, '<'),
+            (change, atr_percent * self.atr_impulse_multiplier if atr_percent is not None else None, '>'),
+            (rsi, self.rsi_overbought, '>'),
+            (price / ema20 - 1 if price and ema20 else None, self.ema_deviation, '>'),
+            (price, ema200, '<'),
+            (change, -atr_percent * self.atr_dca_multiplier if atr_percent is not None else None, '<'),
+            (rsi, self.rsi_oversold, '<'),
+            (rsi, self.rsi_neutral, '<'),
+        ]
+    
+    def _record_decision(self, symbol: str, trace: Dict, result: Dict):
+        """Записать решение в журнал решений фильтров"""
+        if self.decision_log is None:
+            return
+        try:
+            self.decision_log.record('anti_hype', symbol, result, trace, self._decision_rules(trace))
+        except Exception as e:
+            logger.error(f"❌ Ошибка записи решения фильтра для {symbol}: {e}")
+    
+    def _evaluate(self, symbol: str, trace: Dict) -> Dict:
+        """Проверка правил; trace заполняется входными данными для журнала решений"""
         try:
-            logger.info(f"🔍 Проверка анти-хайп фильтра для {symbol}")
-            
             # Получаем данные (используем поддерживаемые интервалы)
             klines_1h = self._get_klines_cached(symbol, '1h', 50)
             klines_4h = self._get_klines_cached(symbol, '4h', 50)  # Используем 4h
@@ -241,12 +351,14 @@ class AntiHypeFilter:
                 return result
             
             # Текущая цена
-            current_price = float(klines_1h[-1][4])
+            current_price = float(klines_1h.close[-1])
+            trace['price'] = current_price
             
             # Проверяем защиту от покупок близко к дневному хаю
             daily_high_protection = self._check_daily_high_protection(symbol, current_price)
+            trace['daily_high'] = daily_high_protection.get('daily_high')
             if daily_high_protection['blocked']:
-                logger.warning(f"🚫 {symbol}: {daily_high_protection['reason']}")
+                logger.debug(f"🚫 {symbol}: {daily_high_protection['reason']}")
                 # Формируем результат с информацией о дневном хае для Telegram
                 result = {
                     'allowed': False, 
@@ -271,9 +383,7 @@ class AntiHypeFilter:
             
             # Изменение цены за 4 часа
             price_change_4h = self._get_price_change_4h(klines_4h)
-            
-            logger.info(f"📊 {symbol}: цена=${current_price:.4f}, ATR={atr_4h:.4f}, RSI={rsi_1h:.1f}")
-            logger.info(f"📊 {symbol}: изменение 4ч={price_change_4h:.2f}%, EMA20=${ema20_1h:.4f}")
+            trace.update(atr=atr_4h, rsi=rsi_1h, ema20=ema20_1h, ema200=ema200_4h, change_4h=price_change_4h)
             
             # 1. ПРОВЕРКА ИМПУЛЬСА ВВЕРХ (блокировка)
             atr_threshold = (atr_4h / current_price) * 100 * self.atr_impulse_multiplier
@@ -287,7 +397,7 @@ class AntiHypeFilter:
                     'distance_percent': daily_high_protection.get('distance_percent'),
                     'block_type': 'impulse_block'
                 }
-                logger.warning(f"🚫 {symbol}: Импульс вверх {price_change_4h:.2f}% > {atr_threshold:.2f}% (3×ATR)")
+                logger.debug(f"🚫 {symbol}: Импульс вверх {price_change_4h:.2f}% > {atr_threshold:.2f}% (3×ATR)")
                 self._cache_result(symbol, result)
                 return result
             
@@ -302,7 +412,7 @@ class AntiHypeFilter:
                     'distance_percent': daily_high_protection.get('distance_percent'),
                     'block_type': 'overbought_block'
                 }
-                logger.warning(f"🚫 {symbol}: Перекупленность RSI={rsi_1h:.1f} и цена выше EMA20+3%")
+                logger.debug(f"🚫 {symbol}: Перекупленность RSI={rsi_1h:.1f} и цена выше EMA20+3%")
                 self._cache_result(symbol, result)
                 return result
             
@@ -317,7 +427,7 @@ class AntiHypeFilter:
                     'distance_percent': daily_high_protection.get('distance_percent'),
                     'block_type': 'bear_trend_block'
                 }
-                logger.warning(f"🚫 {symbol}: Цена ниже EMA200 (медвежий тренд)")
+                logger.debug(f"🚫 {symbol}: Цена ниже EMA200 (медвежий тренд)")
                 self._cache_result(symbol, result)
                 return result
             
@@ -334,7 +444,7 @@ class AntiHypeFilter:
                     'distance_percent': daily_high_protection.get('distance_percent'),
                     'block_type': 'dca_boost'
                 }
-                logger.info(f"🚀 {symbol}: DCA усиление! Падение {price_change_4h:.2f}% и RSI={rsi_1h:.1f}, множитель={final_multiplier:.2f}")
+                logger.debug(f"🚀 {symbol}: DCA усиление! Падение {price_change_4h:.2f}% и RSI={rsi_1h:.1f}, множитель={final_multiplier:.2f}")
                 self._cache_result(symbol, result)
                 return result
             
@@ -350,13 +460,13 @@ class AntiHypeFilter:
                     'distance_percent': daily_high_protection.get('distance_percent'),
                     'block_type': 'normal_buy'
                 }
-                logger.info(f"✅ {symbol}: Нормальная покупка, RSI={rsi_1h:.1f}, множитель={final_multiplier:.2f}")
+                logger.debug(f"✅ {symbol}: Нормальная покупка, RSI={rsi_1h:.1f}, множитель={final_multiplier:.2f}")
                 self._cache_result(symbol, result)
                 return result
             
             # 6. НЕЙТРАЛЬНАЯ ЗОНА (небольшое ограничение)
             final_multiplier = 0.7 * daily_high_multiplier
-            logger.info(f"⚠️ {symbol}: Нейтральная зона, RSI={rsi_1h:.1f}, множитель={final_multiplier:.2f}")
+            logger.debug(f"⚠️ {symbol}: Нейтральная зона, RSI={rsi_1h:.1f}, множитель={final_multiplier:.2f}")
             result = {
                 'allowed': True, 
                 'multiplier': final_multiplier, 
@@ -383,9 +493,166 @@ class AntiHypeFilter:
             self._cache_result(symbol, result)
             return result
     
+    ############################################################
+    # 📦 ПАКЕТНАЯ ПРОВЕРКА
+    ############################################################
+    def _prefetch_windows(self, keys: Iterable[Tuple[str, str, int]], max_workers: int):
+        """Параллельно загрузить окна свечей, которых еще нет в кэше"""
+        missing = [key for key in dict.fromkeys(keys) if key not in self.cache]
+        if not missing:
+            return 0
+
+        def fetch(key):
+            try:
+                self._get_klines_cached(*key)
+            except Exception as e:
+                # Ошибку повторит чтение окна при расчете признаков -> error_fallback
+                logger.error(f"Ошибка загрузки свечей {key[0]} {key[1]}: {e}")
+
+        workers = max(1, min(max_workers, len(missing)))
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='anti-hype') as executor:
+            list(executor.map(fetch, missing))
+        return len(missing)
+
+    def _symbol_features(self, symbol: str) -> Optional[Dict]:
+        """Признаки символа из кэша окон (те же расчеты, что в check_buy_permission)"""
+        klines_1h = self._get_klines_cached(symbol, '1h', 50) or self._get_klines_cached(symbol, '15m', 50)
+        klines_4h = self._get_klines_cached(symbol, '4h', 50) or self._get_klines_cached(symbol, '60m', 50)
+        if not klines_1h or not klines_4h:
+            return None
+        return {
+            'price': float(klines_1h.close[-1]),
+            'daily_high': np.nan,  # Заполняется после загрузки часовых свечей дня
+            'atr': self._calculate_atr(klines_4h, 14),
+            'rsi': self._calculate_rsi(klines_1h, 14),
+            'ema20': self._calculate_ema(klines_1h, 20),
+            'ema200': self._calculate_ema(klines_4h, 200),
+            'change': self._get_price_change_4h(klines_4h),
+        }
+
+    def decision_params(self) -> Dict[str, float]:
+        """Текущие пороги лестницы решений (для офлайн-перебора в anti_hype_sweep)"""
+        return {name: getattr(self, name) for name in DECISION_PARAMS}
+
+    def _decide_batch(self, features: List[Optional[Dict]]) -> Dict[str, np.ndarray]:
+        """Лестница решений по массивам признаков (векторно, в порядке одиночной проверки)"""
+        columns = {name: np.array([f[name] if f is not None else np.nan for f in features], dtype=np.float64)
+                   for name in ('price', 'daily_high', 'atr', 'rsi', 'ema20', 'ema200', 'change')}
+        columns['has_data'] = np.array([f is not None for f in features], dtype=bool)
+        return decide(columns, self.decision_params())
+
+    @staticmethod
+    def _batch_result(decision: int, i: int, arrays: Dict[str, np.ndarray]) -> Dict:
+        """Словарь результата в формате check_buy_permission"""
+        if decision == _NO_DATA:
+            return {'allowed': True, 'multiplier': 1.0, 'reason': 'no_data'}
+        if decision == _ERROR:
+            return {'allowed': True, 'multiplier': 1.0, 'reason': 'error_fallback', 'daily_high': None,
+                    'current_price': None, 'distance_percent': None, 'block_type': 'error_fallback'}
+
+        price = float(arrays['price'][i])
+        daily_high = float(arrays['daily_high'][i])
+        has_daily = not np.isnan(daily_high)
+        distance_percent = float(arrays['distance_percent'][i]) if has_daily else None
+        rsi, change = float(arrays['rsi'][i]), float(arrays['change'][i])
+        if decision == _DAILY_HIGH_BLOCK:
+            return {'allowed': False, 'multiplier': 0.0, 'reason': f'daily_high_too_close_{distance_percent:.1f}%',
+                    'daily_high': daily_high, 'current_price': price, 'distance_percent': distance_percent,
+                    'block_type': 'daily_high_full_block'}
+
+        reason, block_type = {
+            _IMPULSE: (f'hype_block_impulse_{change:.1f}%', 'impulse_block'),
+            _OVERBOUGHT: (f'hype_block_overbought_RSI{rsi:.0f}', 'overbought_block'),
+            _BEAR: ('bear_trend_below_ema200', 'bear_trend_block'),
+            _DCA: (f'dca_boost_fall_{abs(change):.1f}%', 'dca_boost'),
+            _NORMAL: (f'normal_buy_RSI{rsi:.0f}', 'normal_buy'),
+            _NEUTRAL: (f'neutral_zone_RSI{rsi:.0f}', 'neutral_zone'),
+        }[decision]
+        return {
+            'allowed': decision >= _DCA,
+            'multiplier': float(arrays['multiplier'][i]),
+            'reason': reason,
+            'daily_high': daily_high if has_daily else None,
+            'current_price': price,
+            'distance_percent': distance_percent,
+            'block_type': block_type
+        }
+
+    def check_buy_permission_batch(self, symbols: List[str], max_workers: int = 8) -> Dict[str, Dict]:
+        """Пакетная проверка разрешения на покупку.
+
+        Загрузки свечей всех символов объединяются и выполняются параллельно,
+        стадии фильтра считаются векторно по массивам признаков. Результаты
+        совпадают с check_buy_permission для каждого символа и попадают в
+        тот же кэш результатов.
+
+        Args:
+            symbols: Символы для проверки
+            max_workers: Потоков загрузки свечей
+
+        Returns:
+            {symbol: результат в формате check_buy_permission}
+        """
+        results = {}
+        pending = []
+        for symbol in dict.fromkeys(symbols):
+            cached_result = self._get_cached_result(symbol)
+            if cached_result:
+                results[symbol] = cached_result
+            else:
+                pending.append(symbol)
+        if not pending:
+            return results
+
+        # Загрузки в том же порядке зависимостей, что и в одиночной проверке
+        fetched = self._prefetch_windows(((s, i, 50) for s in pending for i in ('1h', '4h')), max_workers)
+        fallback = []
+        for symbol in pending:
+            if not self.cache.get((symbol, '1h', 50)):
+                fallback.append((symbol, '15m', 50))
+            if not self.cache.get((symbol, '4h', 50)):
+                fallback.append((symbol, '60m', 50))
+        fetched += self._prefetch_windows(fallback, max_workers)
+
+        features = []
+        for symbol in pending:
+            try:
+                features.append(self._symbol_features(symbol))
+            except Exception as e:
+                logger.error(f"❌ Ошибка анти-хайп фильтра для {symbol}: {e}")
+                features.append({'price': 0.0, 'daily_high': np.nan, 'atr': 0.0, 'rsi': 50.0,
+                                 'ema20': 0.0, 'ema200': 0.0, 'change': 0.0})  # -> error_fallback
+        with_data = [symbol for symbol, f in zip(pending, features) if f is not None]
+        # Часовые свечи дня - только символам, которых нет в трекере дневных экстремумов
+        untracked = [s for s in with_data if self.daily_extremes.high(s) is None]
+        fetched += self._prefetch_windows(((s, '1h', 24) for s in untracked), max_workers)
+        for i, symbol in enumerate(pending):
+            if features[i] is not None:
+                try:
+                    daily_high = self._get_daily_high(symbol)
+                    features[i]['daily_high'] = np.nan if daily_high is None else daily_high
+                except Exception as e:
+                    logger.error(f"❌ Ошибка проверки дневного хая для {symbol}: {e}")
+                    features[i]['daily_high'] = np.nan
+
+        arrays = self._decide_batch(features)
+        blocked = 0
+        for i, symbol in enumerate(pending):
+            result = self._batch_result(int(arrays['decision'][i]), i, arrays)
+            if not result['allowed']:
+                blocked += 1
+            self._cache_result(symbol, result)
+            results[symbol] = result
+            f = features[i] or {}
+            # NaN признаков пакета -> None, как у одиночной проверки
+            self._record_decision(symbol, {
+                'price': _finite(f.get('price')) or None, 'daily_high': _finite(f.get('daily_high')),
+                'atr': _finite(f.get('atr')), 'rsi': _finite(f.get('rsi')), 'ema20': _finite(f.get('ema20')),
+                'ema200': _finite(f.get('ema200')), 'change_4h': _finite(f.get('change'))}, result)
+        logger.info(f"🔍 Анти-хайп пакетом: {len(pending)} пар (из кэша {len(results) - len(pending)}), "
+                    f"загрузок свечей {fetched}, заблокировано {blocked}")
+        return {symbol: results[symbol] for symbol in dict.fromkeys(symbols)}
+
     def get_filter_status(self, symbols: List[str]) -> Dict:
         """Получить статус фильтра для нескольких символов"""
-        results = {}
-        for symbol in symbols:
-            results[symbol] = self.check_buy_permission(symbol)
-        return results
\ No newline at end of file
+        return self.check_buy_permission_batch(symbols)
\ No newline at end of file
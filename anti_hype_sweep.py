@@ -0,0 +1,342 @@
+#!/usr/bin/env python3
+"""
+Офлайн-перебор порогов анти-хайп фильтра
+Пороги AntiHypeFilter (множители ATR, RSI, отклонение от EMA20, дистанция
+до дневного хая) подобраны вручную. Здесь записанная история 1h свечей
+проигрывается через лестницу решений фильтра для сетки наборов порогов,
+и для каждого набора считаются доля блокировок и форвардная доходность
+разрешенных и заблокированных входов.
+
+Признаки фильтра (цена, хай UTC-суток, ATR/изменение по 4h, RSI, EMA20) от
+порогов не зависят: они считаются один раз векторно по матрицам
+(символы x часы) и кэшируются колонками в .npz рядом с историей. Перебор
+прогоняет только decide() фильтра по этим колонкам в пуле процессов.
+
+Запуск: utils/sweep_anti_hype.py
+"""
+
+import itertools
+import logging
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Iterable, List, Optional, Sequence
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+from anti_hype_filter import DECISION_PARAMS, decide
+from cache.kline_store import INTERVAL_MS, as_window
+from config import ANTI_HYPE_SWEEP_CONFIG
+
+logger = logging.getLogger(__name__)
+
+HOUR_MS = INTERVAL_MS['1h']
+DAY_MS = INTERVAL_MS['1d']
+FEATURES = ('price', 'daily_high', 'atr', 'rsi', 'ema20', 'ema200', 'change')
+HISTORY_COLUMNS = ('ts', 'open', 'high', 'low', 'close', 'volume')
+FEATURES_VERSION = 2  # Меняется при изменении расчета признаков - кэш пересчитывается
+
+
+############################################################
+# 📼 ИСТОРИЯ СВЕЧЕЙ
+############################################################
+def history_from_klines(klines_by_symbol: Dict[str, Sequence]) -> Dict[str, np.ndarray]:
+    """Матрицы истории (символы x часы) из 1h свечей REST.
+
+    Ряды выровнены по последней свече; недостающее начало - NaN (ts - 0).
+    """
+    windows = {s: as_window(k, s, '1h') for s, k in klines_by_symbol.items()}
+    windows = {s: w for s, w in windows.items() if w is not None}
+    symbols = list(windows)
+    n = max((len(w) for w in windows.values()), default=0)
+    history = {'symbols': np.array(symbols, dtype=str), 'ts': np.zeros((len(symbols), n), dtype=np.int64)}
+    for column in HISTORY_COLUMNS[1:]:
+        history[column] = np.full((len(symbols), n), np.nan)
+    for row, symbol in enumerate(symbols):
+        window = windows[symbol]
+        for column in HISTORY_COLUMNS:
+            history[column][row, n - len(window):] = getattr(window, column)
+    return history
+
+
+def save_history(history: Dict[str, np.ndarray], path: str):
+    np.savez(path, **history)
+
+
+def load_history(path: str) -> Dict[str, np.ndarray]:
+    with np.load(path) as data:
+        return {key: data[key] for key in data.files}
+
+
+def record_history(path: Optional[str] = None, count: Optional[int] = None,
+                   limit: Optional[int] = None) -> Dict[str, np.ndarray]:
+    """Записать историю с биржи: 1h свечи топ-N USDT пар по объему"""
+    from mex_api import MexAPI
+    path = path or ANTI_HYPE_SWEEP_CONFIG['history_path']
+    count = count or ANTI_HYPE_SWEEP_CONFIG.get('record_symbols', 200)
+    limit = limit or ANTI_HYPE_SWEEP_CONFIG.get('record_limit', 1000)
+    api = MexAPI()
+    tickers = api.get_24hr_ticker() or []
+    symbols = [t['symbol'] for t in sorted(
+        (t for t in tickers if t['symbol'].endswith('USDT')),
+        key=lambda t: float(t.get('quoteVolume', 0) or 0), reverse=True)][:count]
+    klines = {}
+    for i, symbol in enumerate(symbols, 1):
+        klines[symbol] = api.get_klines(symbol, '1h', limit)
+        if i % 20 == 0:
+            logger.info(f"📼 История свечей: {i}/{len(symbols)}")
+    history = history_from_klines(klines)
+    save_history(history, path)
+    logger.info(f"✅ Записано {len(history['symbols'])} пар x {history['close'].shape[1]} свечей в {path}")
+    return history
+
+
+############################################################
+# 🧮 ПРИЗНАКИ ФИЛЬТРА
+############################################################
+def _shift(values: np.ndarray, k: int) -> np.ndarray:
+    """values[:, t - k] в позиции t (NaN левее начала)"""
+    if k == 0:
+        return values
+    out = np.full(values.shape, np.nan)
+    out[:, k:] = values[:, :-k]
+    return out
+
+
+def _rolling(values: np.ndarray, window: int, reduce) -> np.ndarray:
+    """Скользящая свертка по последней оси; NaN для первых window-1 позиций"""
+    out = np.full(values.shape, np.nan)
+    if values.shape[1] >= window:
+        out[:, window - 1:] = reduce(sliding_window_view(values, window, axis=1), axis=-1)
+    return out
+
+
+def _utc_day_high(ts: np.ndarray, high: np.ndarray) -> np.ndarray:
+    """Хай текущих UTC-суток на каждой часовой свече, как у DailyExtremesTracker:
+    максимум свечей тех же суток до текущей включительно (NaN - начала суток нет в истории)"""
+    hour = (ts % DAY_MS) // HOUR_MS
+    day_high = high.copy()
+    for k in range(1, 24):
+        day_high = np.where(hour >= k, np.fmax(day_high, _shift(high, k)), day_high)
+    first = np.arange(ts.shape[1])[None, :] - hour
+    covered = (first >= 0) & np.isfinite(np.take_along_axis(high, np.maximum(first, 0), axis=1))
+    return np.where(covered, day_high, np.nan)
+
+
+def _seeded_ema_last(close: np.ndarray, period: int) -> np.ndarray:
+    """Последнее значение EMA окна из period цен со стартом с первой (как ema_seeded)"""
+    alpha = 2.0 / (period + 1)
+    weights = alpha * (1 - alpha) ** np.arange(period - 1, -1, -1)
+    weights[0] = (1 - alpha) ** (period - 1)
+    return _rolling(close, period, lambda view, axis: view @ weights)
+
+
+def compute_features(history: Dict[str, np.ndarray]) -> Dict[str, np.ndarray]:
+    """Признаки фильтра на закрытии каждой часовой свечи (матрицы символы x часы).
+
+    Повторяет расчеты AntiHypeFilter по окнам, которые фильтр видел бы в
+    этот момент: 1h x 50, 4h x 50 с формирующейся последней 4h свечой,
+    хай текущих UTC-суток из трекера дневных экстремумов (как в работе бота,
+    а не максимум 24 часовых свечей). Свечи считаются непрерывными (без
+    пропусков часов).
+    """
+    ts, high, low, close = history['ts'], history['high'], history['low'], history['close']
+    with np.errstate(divide='ignore', invalid='ignore'):
+        # RSI(14) по часовым: средние роста/падения последних 14 изменений
+        delta = close - _shift(close, 1)
+        gains = np.where(delta > 0, delta, 0.0)
+        losses = np.where(delta > 0, 0.0, -delta)
+        gains[np.isnan(delta)] = np.nan
+        avg_gain, avg_loss = _rolling(gains, 14, np.mean), _rolling(losses, 14, np.mean)
+        rsi = np.where(avg_loss == 0, 100.0, 100 - 100 / (1 + avg_gain / avg_loss))
+        rsi[np.isnan(avg_loss)] = np.nan
+
+        # 4h свечи: phase - номер часа внутри 4h бакета; последняя 4h свеча формируется
+        phase = (ts % INTERVAL_MS['4h']) // HOUR_MS
+        run_high, run_low = high.copy(), low.copy()
+        for k in range(1, 4):
+            inside = phase >= k
+            run_high = np.where(inside, np.maximum(run_high, _shift(high, k)), run_high)
+            run_low = np.where(inside, np.minimum(run_low, _shift(low, k)), run_low)
+        # Закрытые 4h свечи: значения в позиции последнего часа бакета
+        high_4h = np.maximum.reduce([_shift(high, k) for k in range(4)])
+        low_4h = np.minimum.reduce([_shift(low, k) for k in range(4)])
+        prev_close_4h = _shift(close, 4)
+        tr_4h = np.maximum(high_4h - low_4h, np.maximum(np.abs(high_4h - prev_close_4h),
+                                                        np.abs(low_4h - prev_close_4h)))
+        tr_sum_13 = sum(_shift(tr_4h, 4 * j) for j in range(13))  # 13 закрытых 4h свечей
+
+        # Конец предыдущего закрытого 4h бакета для каждого часа
+        last_closed = np.arange(close.shape[1])[None, :] - phase - 1
+        valid_idx = last_closed >= 0
+        idx = np.where(valid_idx, last_closed, 0)
+        close_4h_prev = np.where(valid_idx, np.take_along_axis(close, idx, axis=1), np.nan)
+        tr_sum_prev = np.where(valid_idx, np.take_along_axis(tr_sum_13, idx, axis=1), np.nan)
+        tr_partial = np.maximum(run_high - run_low, np.maximum(np.abs(run_high - close_4h_prev),
+                                                               np.abs(run_low - close_4h_prev)))
+        features = {
+            'price': close,
+            'daily_high': _utc_day_high(ts, high),
+            'atr': (tr_partial + tr_sum_prev) / 14,
+            'rsi': rsi,
+            'ema20': _seeded_ema_last(close, 20),
+            # Окно 4h из 50 свечей короче периода EMA200 - фильтр получает 0.0
+            'ema200': np.zeros(close.shape),
+            'change': (close - close_4h_prev) / close_4h_prev * 100,
+        }
+    features['has_data'] = np.logical_and.reduce([np.isfinite(features[name]) for name in FEATURES])
+    return features
+
+
+def build_entries(history: Dict[str, np.ndarray], horizons: Sequence[int]) -> Dict[str, np.ndarray]:
+    """Колонки входов: признаки и форвардные доходности по точкам с полными данными"""
+    features = compute_features(history)
+    close = history['close']
+    forward = {}
+    with np.errstate(divide='ignore', invalid='ignore'):
+        for h in horizons:
+            future = np.full(close.shape, np.nan)
+            future[:, :-h] = close[:, h:]
+            forward[h] = future / close - 1
+    mask = features.pop('has_data')
+    rows, cols = np.nonzero(mask)
+    entries = {name: values[mask] for name, values in features.items()}
+    entries['symbol'] = rows.astype(np.int32)
+    entries['ts'] = history['ts'][mask]
+    entries['symbols'] = history['symbols']
+    entries['horizons'] = np.array(horizons, dtype=np.int64)
+    entries['version'] = np.array(FEATURES_VERSION)
+    for h, values in forward.items():
+        entries[f'forward_{h}'] = values[mask]
+    return entries
+
+
+def load_entries(history_path: Optional[str] = None,
+                 horizons: Optional[Sequence[int]] = None) -> Dict[str, np.ndarray]:
+    """Колонки входов из кэша <история>.features.npz (пересчет, если история новее)"""
+    history_path = history_path or ANTI_HYPE_SWEEP_CONFIG['history_path']
+    horizons = tuple(horizons or ANTI_HYPE_SWEEP_CONFIG.get('horizons', (4, 24)))
+    cache_path = f"{os.path.splitext(history_path)[0]}.features.npz"
+    if os.path.exists(cache_path) and os.path.getmtime(cache_path) >= os.path.getmtime(history_path):
+        entries = load_history(cache_path)
+        if tuple(entries['horizons']) == horizons and int(entries.get('version', 1)) == FEATURES_VERSION:
+            return entries
+    started = time.time()
+    entries = build_entries(load_history(history_path), horizons)
+    save_history(entries, cache_path)
+    logger.info(f"🧮 Признаки фильтра: {len(entries['price'])} входов за {time.time() - started:.1f}с -> {cache_path}")
+    return entries
+
+
+############################################################
+# 🔁 ПЕРЕБОР
+############################################################
+def evaluate(entries: Dict[str, np.ndarray], params: Dict[str, float]) -> Dict:
+    """Прогнать входы через лестницу решений фильтра с порогами params.
+
+    Returns:
+        {'params', 'entries', 'blocked', 'block_rate', 'horizons': {h: {
+            'allowed_mean', 'blocked_mean', 'weighted_mean', 'allowed_win_rate', 'edge'}}}
+    """
+    columns = {name: entries[name] for name in FEATURES}
+    columns['has_data'] = np.ones(len(entries['price']), dtype=bool)
+    arrays = decide(columns, params)
+    allowed, multiplier = arrays['allowed'], arrays['multiplier']
+    total = int(len(allowed))
+    blocked = total - int(np.count_nonzero(allowed))
+    result = {'params': dict(params), 'entries': total, 'blocked': blocked,
+              'block_rate': blocked / total if total else 0.0, 'horizons': {}}
+    for h in entries['horizons']:
+        returns = entries[f'forward_{int(h)}']
+        known = np.isfinite(returns)
+        ok, bad = known & allowed, known & ~allowed
+        allowed_mean = float(returns[ok].mean()) if ok.any() else np.nan
+        blocked_mean = float(returns[bad].mean()) if bad.any() else np.nan
+        weights = multiplier[ok]
+        result['horizons'][int(h)] = {
+            'allowed_mean': allowed_mean,
+            'blocked_mean': blocked_mean,
+            'weighted_mean': float(np.average(returns[ok], weights=weights)) if weights.sum() > 0 else np.nan,
+            'allowed_win_rate': float((returns[ok] > 0).mean()) if ok.any() else np.nan,
+            'edge': allowed_mean - blocked_mean,  # > 0 - блокировки отсекают худшие входы
+        }
+    return result
+
+
+def parameter_grid(grid: Dict[str, Iterable[float]], base_params: Dict[str, float]) -> List[Dict[str, float]]:
+    """Наборы порогов: декартово произведение grid поверх base_params"""
+    unknown = set(grid) - set(DECISION_PARAMS)
+    if unknown:
+        raise ValueError(f"Неизвестные параметры фильтра: {', '.join(sorted(unknown))}")
+    names = list(grid)
+    return [{**base_params, **dict(zip(names, values))} for values in itertools.product(*grid.values())]
+
+
+_worker_entries: Optional[Dict[str, np.ndarray]] = None
+
+
+def _init_worker(entries: Dict[str, np.ndarray]):
+    global _worker_entries
+    _worker_entries = entries
+
+
+def _evaluate_chunk(chunk: List[Dict[str, float]]) -> List[Dict]:
+    return [evaluate(_worker_entries, params) for params in chunk]
+
+
+def sweep(entries: Dict[str, np.ndarray], grid: Optional[Dict[str, Iterable[float]]] = None,
+          base_params: Optional[Dict[str, float]] = None, workers: Optional[int] = None) -> List[Dict]:
+    """Оценить все наборы порогов сетки.
+
+    Args:
+        entries: Колонки входов (load_entries / build_entries)
+        grid: {параметр: значения} (по умолчанию из ANTI_HYPE_SWEEP_CONFIG)
+        base_params: Пороги вне сетки (по умолчанию текущие пороги AntiHypeFilter)
+        workers: Процессов (1 - в текущем процессе)
+
+    Returns:
+        Результаты evaluate в порядке сетки
+    """
+    if base_params is None:
+        from anti_hype_filter import AntiHypeFilter
+        base_params = AntiHypeFilter().decision_params()
+    param_sets = parameter_grid(grid or ANTI_HYPE_SWEEP_CONFIG['grid'], base_params)
+    workers = workers or ANTI_HYPE_SWEEP_CONFIG.get('workers') or os.cpu_count() or 1
+    workers = max(1, min(workers, len(param_sets)))
+    started = time.time()
+    if workers == 1:
+        results = [evaluate(entries, params) for params in param_sets]
+    else:
+        # Входы передаются процессу один раз, задачи - только пачки порогов
+        size = max(1, len(param_sets) // (workers * 4))
+        chunks = [param_sets[i:i + size] for i in range(0, len(param_sets), size)]
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(entries,)) as executor:
+            results = [result for chunk in executor.map(_evaluate_chunk, chunks) for result in chunk]
+    logger.info(f"🔁 Перебор порогов: {len(results)} наборов x {len(entries['price'])} входов "
+                f"за {time.time() - started:.1f}с ({workers} процессов)")
+    return results
+
+
+def format_results(results: List[Dict], baseline: Optional[Dict] = None, top: int = 10,
+                   horizon: Optional[int] = None) -> str:
+    """Таблица лучших наборов по edge на горизонте horizon (по умолчанию первый)"""
+    if not results:
+        return "📭 Нет результатов перебора"
+    horizon = horizon or next(iter(results[0]['horizons']))
+    varied = [name for name in DECISION_PARAMS if len({r['params'][name] for r in results}) > 1]
+
+    def line(r: Dict) -> str:
+        stats = r['horizons'][horizon]
+        params = ' '.join(f"{name}={r['params'][name]:g}" for name in varied)
+        return (f"   {params} | блок {r['block_rate'] * 100:5.1f}% | разреш. {stats['allowed_mean'] * 100:+.2f}% "
+                f"| заблок. {stats['blocked_mean'] * 100:+.2f}% | edge {stats['edge'] * 100:+.2f}% "
+                f"| win {stats['allowed_win_rate'] * 100:.0f}%")
+
+    ranked = sorted(results, key=lambda r: np.nan_to_num(r['horizons'][horizon]['edge'], nan=-np.inf), reverse=True)
+    lines = [f"🔁 Наборов: {len(results)}, входов: {results[0]['entries']}, горизонт {horizon}ч"]
+    if baseline is not None:
+        lines += ["\n📌 Текущие пороги:", line(baseline)]
+    lines.append(f"\n🏆 Лучшие {min(top, len(ranked))} по edge (разрешенные минус заблокированные):")
+    lines += [line(r) for r in ranked[:top]]
+    return "\n".join(lines)
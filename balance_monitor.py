@@ -18,6 +18,7 @@ from typing import Dict, List, Optional, Tuple
 from decimal import Decimal
 
 from mex_api import MexAPI
+from cache.market_data_cache import get_market_data_cache
 from config import TELEGRAM_BOT_TOKEN, TELEGRAM_CHAT_ID
 from anti_hype_filter import AntiHypeFilter
 from rebalancer_anti_hype_filter import RebalancerAntiHypeFilter
@@ -35,16 +36,18 @@ logger = logging.getLogger(__name__)
 class BalanceMonitor:
     """Монитор баланса для автоматических покупок BTC/ETH за USDC"""
     
-    def __init__(self):
+    def __init__(self, market_data=None):
         ############################################################
         # ⚙️ ИНИЦИАЛИЗАЦИЯ
         # Назначение: клиенты API, Telegram, фильтры, основные настройки
         ############################################################
         self.mex_api = MexAPI()
+        # Свечи фильтров, цены и стакан - через общий кэш рыночных данных процесса
+        self.market_data = (market_data or get_market_data_cache(self.mex_api)).client('balance_monitor')
         self.bot_token = TELEGRAM_BOT_TOKEN
         self.chat_id = TELEGRAM_CHAT_ID
-        self.anti_hype_filter = AntiHypeFilter()
-        self.rebalancer_filter = RebalancerAntiHypeFilter()
+        self.anti_hype_filter = AntiHypeFilter(kline_source=self.market_data)
+        self.rebalancer_filter = RebalancerAntiHypeFilter(kline_source=self.market_data)
         
         # Настройки мониторинга - ПЕРЕВОД НА USDC!
         self.min_balance_threshold = 10.0  # Минимальный баланс для покупки ($10 USDC)
@@ -189,7 +192,7 @@ class BalanceMonitor:
     def get_current_price(self, symbol: str) -> Optional[float]:
         """Получить текущую цену символа"""
         try:
-            ticker = self.mex_api.get_ticker_price(symbol)
+            ticker = self.market_data.get_ticker_price(symbol)
             if 'price' in ticker:
                 return float(ticker['price'])
             return None
@@ -491,7 +494,7 @@ class BalanceMonitor:
     def get_orderbook_data(self, symbol: str) -> Optional[Dict]:
         """Получить данные стакана заявок"""
         try:
-            orderbook = self.mex_api.get_depth(symbol, limit=20)
+            orderbook = self.market_data.get_depth(symbol, limit=20)
             
             if 'bids' in orderbook and 'asks' in orderbook:
                 bids = orderbook['bids'][:10]  # Топ-10 покупок
@@ -936,7 +939,7 @@ class BalanceMonitor:
                                 total_portfolio += total
                             else:
                                 try:
-                                    ticker = self.mex_api.get_ticker_price(f"{asset}USDT")
+                                    ticker = self.market_data.get_ticker_price(f"{asset}USDT")
                                     if ticker and 'price' in ticker:
                                         total_portfolio += total * float(ticker['price'])
                                 except:
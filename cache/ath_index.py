@@ -0,0 +1,180 @@
+"""
+Постоянный индекс исторических экстремумов (ATH/ATL) по символам
+RebalancerAntiHypeFilter раньше на каждую проверку загружал до 1000 дневных
+свечей ради одного максимума. Индекс хранит ATH/ATL в SQLite и в памяти:
+символ загружается из дневной истории один раз, дальше экстремумы
+обновляются из свечей, которые фильтр и так получает (часовые окна), и
+небольшой дозагрузкой дневных свечей, пропущенных с прошлого обновления.
+Чтение - словарь в памяти, без сети.
+"""
+
+import logging
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+from typing import Dict, Optional
+
+import numpy as np
+
+from cache.kline_store import INTERVAL_MS, as_window
+from config import ATH_INDEX_CONFIG
+
+logger = logging.getLogger(__name__)
+
+DAY_MS = INTERVAL_MS['1d']
+
+
+@dataclass
+class Extremes:
+    """Экстремумы символа"""
+    symbol: str
+    ath: float
+    ath_time: int           # мс, время свечи с ATH
+    atl: float
+    atl_time: int
+    last_day: int           # мс, открытие последней учтенной дневной свечи
+    bootstrap_days: int     # Сколько дневных свечей было в начальной загрузке
+    updated_at: float
+
+
+class AthIndex:
+    """Индекс ATH/ATL: SQLite на диске, словарь в памяти"""
+
+    def __init__(self, path: Optional[str] = None):
+        """
+        Args:
+            path: Файл SQLite (':memory:' - без диска); по умолчанию ATH_INDEX_CONFIG['path']
+        """
+        self.path = path or ATH_INDEX_CONFIG.get('path', 'ath_index.db')
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(self.path, check_same_thread=False)
+        self._db.execute("""
+            CREATE TABLE IF NOT EXISTS extremes (
+                symbol TEXT PRIMARY KEY,
+                ath REAL NOT NULL,
+                ath_time INTEGER NOT NULL,
+                atl REAL NOT NULL,
+                atl_time INTEGER NOT NULL,
+                last_day INTEGER NOT NULL,
+                bootstrap_days INTEGER NOT NULL,
+                updated_at REAL NOT NULL
+            )
+        """)
+        self._db.commit()
+        self._entries: Dict[str, Extremes] = {
+            row[0]: Extremes(*row) for row in self._db.execute(
+                "SELECT symbol, ath, ath_time, atl, atl_time, last_day, bootstrap_days, updated_at FROM extremes")
+        }
+        self.stats = {'bootstraps': 0, 'daily_updates': 0, 'live_updates': 0, 'writes': 0}
+
+    def _save(self, entry: Extremes):
+        """Записать экстремумы символа (вызывается под self._lock)"""
+        entry.updated_at = time.time()
+        self._entries[entry.symbol] = entry
+        self._db.execute(
+            "INSERT OR REPLACE INTO extremes VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            (entry.symbol, entry.ath, entry.ath_time, entry.atl, entry.atl_time,
+             entry.last_day, entry.bootstrap_days, entry.updated_at))
+        self._db.commit()
+        self.stats['writes'] += 1
+
+    ############################################################
+    # 📥 ОБНОВЛЕНИЕ
+    ############################################################
+    def bootstrap(self, symbol: str, daily_klines) -> Optional[Extremes]:
+        """Начальная загрузка символа из дневной истории (заменяет прежние значения)"""
+        window = as_window(daily_klines, symbol, '1d')
+        if window is None or not len(window):
+            return None
+        top, bottom = int(np.argmax(window.high)), int(np.argmin(window.low))
+        entry = Extremes(symbol, float(window.high[top]), int(window.ts[top]),
+                         float(window.low[bottom]), int(window.ts[bottom]),
+                         int(window.ts[-1]), len(window), 0.0)
+        with self._lock:
+            self._save(entry)
+            self.stats['bootstraps'] += 1
+        return entry
+
+    def apply_klines(self, symbol: str, klines, daily: bool = False) -> bool:
+        """Учесть свечи любого интервала (максимум/минимум реально торговались).
+
+        Args:
+            daily: Дневные свечи - сдвигают отметку last_day
+
+        Returns:
+            True, если экстремумы изменились
+        """
+        window = as_window(klines, symbol, '1d' if daily else '')
+        with self._lock:
+            entry = self._entries.get(symbol)
+            if entry is None or window is None or not len(window):
+                return False
+            top, bottom = int(np.argmax(window.high)), int(np.argmin(window.low))
+            changed = False
+            if window.high[top] > entry.ath:
+                entry.ath, entry.ath_time, changed = float(window.high[top]), int(window.ts[top]), True
+            if 0 < window.low[bottom] < entry.atl:
+                entry.atl, entry.atl_time, changed = float(window.low[bottom]), int(window.ts[bottom]), True
+            if daily and int(window.ts[-1]) > entry.last_day:
+                entry.last_day, changed = int(window.ts[-1]), True
+            self.stats['daily_updates' if daily else 'live_updates'] += 1
+            if changed:
+                self._save(entry)
+            return changed
+
+    def update_price(self, symbol: str, price: float, ts: Optional[int] = None) -> bool:
+        """Учесть живую цену (сделка/тикер)"""
+        ts = int(time.time() * 1000) if ts is None else int(ts)
+        return self.apply_klines(symbol, [[ts, price, price, price, price, 0.0]])
+
+    def missing_days(self, symbol: str, now: Optional[float] = None) -> int:
+        """Сколько дневных свечей не учтено с прошлого обновления (-1 - символа нет)"""
+        entry = self._entries.get(symbol)
+        if entry is None:
+            return -1
+        now_ms = int((time.time() if now is None else now) * 1000)
+        today = now_ms - now_ms % DAY_MS
+        return max(0, (today - entry.last_day) // DAY_MS)
+
+    ############################################################
+    # 🔍 ЧТЕНИЕ
+    ############################################################
+    def get(self, symbol: str) -> Optional[Extremes]:
+        return self._entries.get(symbol)
+
+    def ath(self, symbol: str) -> float:
+        entry = self._entries.get(symbol)
+        return entry.ath if entry else 0.0
+
+    def atl(self, symbol: str) -> float:
+        entry = self._entries.get(symbol)
+        return entry.atl if entry else 0.0
+
+    def __contains__(self, symbol: str) -> bool:
+        return symbol in self._entries
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get_stats(self) -> Dict:
+        stats = dict(self.stats)
+        stats['symbols'] = len(self._entries)
+        return stats
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+
+_ath_index: Optional[AthIndex] = None
+_ath_index_lock = threading.Lock()
+
+
+def get_ath_index() -> AthIndex:
+    """Получить общий индекс ATH/ATL процесса"""
+    global _ath_index
+    with _ath_index_lock:
+        if _ath_index is None:
+            _ath_index = AthIndex()
+        return _ath_index
@@ -0,0 +1,192 @@
+"""
+Потоковый трекер дневных максимумов/минимумов по символам (UTC-сутки)
+Защита от покупок у дневного хая раньше на каждую проверку загружала свечи
+(1h x 24 у анти-хайп фильтра, 1d x 7 у ребалансировщика). Трекер хранит
+максимум и минимум каждых UTC-суток за последние дни и обновляется из
+потока сделок/bookTicker, из цен и снимка 24h тикеров общего кэша рынка.
+Новые сутки начинаются с новой записи - сброс на границе дня без таймеров.
+
+Ответ есть, только если символ покрыт непрерывно: трекер засеян свечами с
+начала запрошенного периода и обновлялся не реже max_gap_sec. Иначе high()
+возвращает None, и фильтр один раз засевает трекер из свечей.
+"""
+
+import threading
+import time
+from typing import Dict, Iterable, Optional
+
+from cache.kline_store import INTERVAL_MS, as_window
+from config import DAILY_EXTREMES_CONFIG
+
+DAY_MS = INTERVAL_MS['1d']
+
+
+def day_start(ts_ms: int) -> int:
+    """Начало UTC-суток для времени в мс"""
+    return ts_ms - ts_ms % DAY_MS
+
+
+class _SymbolExtremes:
+    __slots__ = ('days', 'covered_since', 'last_update')
+
+    def __init__(self, covered_since: int, last_update: int):
+        self.days: Dict[int, list] = {}  # начало суток -> [high, low]
+        self.covered_since = covered_since
+        self.last_update = last_update
+
+
+class DailyExtremesTracker:
+    """Максимумы/минимумы UTC-суток по символам за последние days_kept дней"""
+
+    def __init__(self, days_kept: Optional[int] = None, max_gap_sec: Optional[float] = None,
+                 clock=time.time):
+        """
+        Args:
+            days_kept: Сколько суток хранить (ребалансировщику нужно 7)
+            max_gap_sec: Максимальный перерыв в обновлениях, после которого данные не используются
+            clock: Источник времени в секундах (подменяется в тестах)
+        """
+        self.days_kept = days_kept or DAILY_EXTREMES_CONFIG.get('days_kept', 7)
+        self.max_gap_ms = int((max_gap_sec or DAILY_EXTREMES_CONFIG.get('max_gap_sec', 300)) * 1000)
+        self.clock = clock
+        self._symbols: Dict[str, _SymbolExtremes] = {}
+        self._lock = threading.Lock()
+        self.stats = {'updates': 0, 'seeds': 0, 'hits': 0, 'misses': 0}
+
+    def _now_ms(self) -> int:
+        return int(self.clock() * 1000)
+
+    def _merge(self, state: _SymbolExtremes, ts: int, high: float, low: float):
+        """Учесть максимум/минимум в сутках ts (вызывается под self._lock)"""
+        day = day_start(ts)
+        bucket = state.days.get(day)
+        if bucket is None:
+            state.days[day] = [high, low]
+            oldest = day - (self.days_kept - 1) * DAY_MS
+            for old in [d for d in state.days if d < oldest]:
+                del state.days[old]
+        else:
+            if high > bucket[0]:
+                bucket[0] = high
+            if low < bucket[1]:
+                bucket[1] = low
+
+    ############################################################
+    # 📥 ОБНОВЛЕНИЕ
+    ############################################################
+    def update(self, symbol: str, high: float, low: Optional[float] = None, ts: Optional[int] = None):
+        """Учесть цену сделки (или high/low агрегата)"""
+        low = high if low is None else low
+        if not high or high <= 0 or not low or low <= 0:
+            return
+        now = self._now_ms() if ts is None else int(ts)
+        with self._lock:
+            state = self._symbols.get(symbol)
+            if state is None:
+                state = self._symbols[symbol] = _SymbolExtremes(now, now)
+            elif now - state.last_update > self.max_gap_ms:
+                state.covered_since = now  # Перерыв: экстремумы за пропуск неизвестны
+            self._merge(state, now, high, low)
+            state.last_update = max(state.last_update, now)
+            self.stats['updates'] += 1
+
+    def update_book_ticker(self, symbol: str, bid: float, ask: float, ts: Optional[int] = None):
+        """Учесть лучшие цены bookTicker (середина спреда, как цена сделки)"""
+        bid, ask = float(bid or 0), float(ask or 0)
+        if bid > 0 and ask > 0:
+            self.update(symbol, (bid + ask) / 2, ts=ts)
+
+    def update_from_tickers(self, tickers: Iterable[Dict]):
+        """Учесть снимок 24h тикеров (lastPrice; highPrice/lowPrice - для непокрытых символов)"""
+        now = self._now_ms()
+        for ticker in tickers or []:
+            try:
+                symbol, last = ticker['symbol'], float(ticker['lastPrice'])
+                high, low = float(ticker.get('highPrice') or 0), float(ticker.get('lowPrice') or 0)
+            except (KeyError, TypeError, ValueError):
+                continue
+            if high > 0 and low > 0 and self._range(symbol, 1, count=False) is None:
+                # Скользящие 24 часа покрывают текущие сутки (с запасом, как 1h x 24)
+                with self._lock:
+                    state = self._symbols[symbol] = _SymbolExtremes(now - DAY_MS, now)
+                    self._merge(state, now, high, low)
+            self.update(symbol, last, ts=now)
+
+    def seed(self, symbol: str, klines, interval: str = '') -> bool:
+        """Засеять трекер свечами (окно или список REST) интервала не больше суток
+
+        Returns:
+            True, если символ теперь покрыт с начала окна до текущей свечи
+        """
+        window = as_window(klines, symbol, interval)
+        if window is None or not len(window):
+            return False
+        step = INTERVAL_MS.get(window.interval) or (int(window.ts[-1] - window.ts[-2]) if len(window) > 1 else 0)
+        now = self._now_ms()
+        first, last_close = int(window.ts[0]), int(window.ts[-1]) + step
+        with self._lock:
+            state = self._symbols.get(symbol)
+            fresh = now - last_close <= self.max_gap_ms or now < last_close
+            if state is None:
+                state = self._symbols[symbol] = _SymbolExtremes(now, 0)
+            for ts, high, low in zip(window.ts, window.high, window.low):
+                self._merge(state, int(ts), float(high), float(low))
+            if fresh and step:
+                gap_ok = state.last_update and now - state.last_update <= self.max_gap_ms
+                state.covered_since = min(state.covered_since, first) if gap_ok else first
+                state.last_update = max(state.last_update, min(now, last_close))
+            self.stats['seeds'] += 1
+        return fresh
+
+    ############################################################
+    # 🔍 ЧТЕНИЕ
+    ############################################################
+    def _range(self, symbol: str, days: int, count: bool = True) -> Optional[list]:
+        now = self._now_ms()
+        start = day_start(now) - (days - 1) * DAY_MS
+        with self._lock:
+            state = self._symbols.get(symbol)
+            covered = (state is not None and state.covered_since <= start
+                       and now - state.last_update <= self.max_gap_ms and days <= self.days_kept)
+            buckets = [b for d, b in state.days.items() if d >= start] if covered else []
+            if count:
+                self.stats['hits' if buckets else 'misses'] += 1
+        return buckets or None
+
+    def high(self, symbol: str, days: int = 1) -> Optional[float]:
+        """Максимум за текущие UTC-сутки (days > 1 - вместе с предыдущими) или None"""
+        buckets = self._range(symbol, days)
+        return max(b[0] for b in buckets) if buckets else None
+
+    def low(self, symbol: str, days: int = 1) -> Optional[float]:
+        buckets = self._range(symbol, days)
+        return min(b[1] for b in buckets) if buckets else None
+
+    def forget(self, symbol: Optional[str] = None):
+        with self._lock:
+            if symbol is None:
+                self._symbols.clear()
+            else:
+                self._symbols.pop(symbol, None)
+
+    def __len__(self) -> int:
+        return len(self._symbols)
+
+    def get_stats(self) -> Dict:
+        with self._lock:
+            stats = dict(self.stats)
+            stats['symbols'] = len(self._symbols)
+        return stats
+
+
+_daily_extremes: Optional[DailyExtremesTracker] = None
+_daily_extremes_lock = threading.Lock()
+
+
+def get_daily_extremes() -> DailyExtremesTracker:
+    """Получить общий трекер дневных экстремумов процесса"""
+    global _daily_extremes
+    with _daily_extremes_lock:
+        if _daily_extremes is None:
+            _daily_extremes = DailyExtremesTracker()
+        return _daily_extremes
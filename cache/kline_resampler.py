@@ -0,0 +1,263 @@
+"""
+Локальный ресэмплинг свечей в старшие таймфреймы
+Базовый интервал (например 15m) загружается один раз, а 1h/4h/1d
+строятся из него с выравниванием по границам UTC, как это делает биржа.
+"""
+
+import threading
+import time
+import logging
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+
+from cache.kline_store import (INTERVAL_MS, KlineStore, KlineWindow, get_kline_store,
+                               normalize_interval)
+
+logger = logging.getLogger(__name__)
+
+
+def can_resample(base_interval: str, target_interval: str) -> bool:
+    """Можно ли построить target из base (кратность длительностей, без недель)"""
+    base = normalize_interval(base_interval)
+    target = normalize_interval(target_interval)
+    if base not in INTERVAL_MS or target not in INTERVAL_MS or target == '1w':
+        return False
+    base_ms, target_ms = INTERVAL_MS[base], INTERVAL_MS[target]
+    return target_ms >= base_ms and target_ms % base_ms == 0
+
+
+def resample(window: KlineWindow, target_interval: str, drop_partial_first: bool = True) -> Optional[KlineWindow]:
+    """Построить свечи target_interval из окна базового интервала.
+
+    Бакеты выравниваются по эпохе UTC (openTime // period * period), что
+    совпадает с разбиением MEXC для 1h/4h/1d. Первый бакет отбрасывается,
+    если окно начинается с его середины; последний (формирующийся) бакет
+    сохраняется - у биржи он тоже незакрыт.
+    """
+    if window is None or len(window) == 0:
+        return None
+    target = normalize_interval(target_interval)
+    if not can_resample(window.interval, target):
+        return None
+    if target == window.interval:
+        return window
+
+    period = INTERVAL_MS[target]
+    buckets = (window.ts // period) * period
+    starts = np.flatnonzero(np.r_[True, buckets[1:] != buckets[:-1]])
+
+    if drop_partial_first and window.ts[0] != buckets[0]:
+        starts = starts[1:]
+        if starts.size == 0:
+            return None
+    first = starts[0]
+    idx = starts - first
+    ends = np.r_[starts[1:], len(window)] - 1
+
+    high = np.maximum.reduceat(window.high[first:], idx)
+    low = np.minimum.reduceat(window.low[first:], idx)
+    volume = np.add.reduceat(window.volume[first:], idx)
+    return KlineWindow(window.symbol, target, buckets[starts], window.open[starts].copy(),
+                       high, low, window.close[ends].copy(), volume)
+
+
+class ResamplingKlineSource:
+    """Источник свечей с интерфейсом MexAPI.get_klines.
+
+    Для каждого символа загружается только базовый интервал (в общее
+    хранилище свечей); кратные ему интервалы строятся локально. Запросы,
+    которые нельзя покрыть ресэмплингом (например 1d x 1000), уходят в API.
+
+    Повторные обновления базового окна дозагружают только свечи начиная с
+    последней сохраненной (startTime) и вливают их в окно; полная загрузка
+    выполняется при первом обращении, после forget() и при разрыве данных.
+    """
+
+    def __init__(self, mex_api, base_interval: str = '15m', base_limit: int = 1000,
+                 refresh_sec: float = 60.0, kline_store: Optional[KlineStore] = None,
+                 delta_refresh: bool = True):
+        """
+        Args:
+            mex_api: Клиент с методом get_klines(symbol, interval, limit)
+            base_interval: Базовый интервал, который загружается с биржи
+            base_limit: Сколько базовых свечей загружать (лимит MEXC - 1000)
+            refresh_sec: Через сколько секунд базовое окно считается устаревшим
+            kline_store: Хранилище свечей (по умолчанию - общее для процесса)
+            delta_refresh: Дозагружать только новые свечи вместо полного окна
+        """
+        self.mex_api = mex_api
+        self.base_interval = normalize_interval(base_interval)
+        self.base_limit = base_limit
+        self.refresh_sec = refresh_sec
+        self.kline_store = kline_store or get_kline_store()
+        self.delta_refresh = delta_refresh
+        self._interval_ms = INTERVAL_MS[self.base_interval]
+        self._bytes_per_candle = 0.0  # По последней полной загрузке - для оценки экономии
+
+        self._fetched_at: Dict[str, float] = {}
+        self._resampled: Dict[tuple, tuple] = {}
+        self._locks: Dict[str, threading.Lock] = {}
+        self._locks_guard = threading.Lock()
+        self._stats_lock = threading.Lock()
+
+        self.reset_stats()
+
+    def reset_stats(self):
+        """Сбросить счетчики (вызывается в начале каждого скана)"""
+        self.stats = {
+            'requests_made': 0,       # Фактические запросы свечей к API
+            'base_fetches': 0,        # Из них загрузок базового интервала
+            'passthrough': 0,         # Запросы, не покрываемые ресэмплингом
+            'served_local': 0,        # Ответы из памяти (без запроса)
+            'full_fetches': 0,        # Полные загрузки базового окна
+            'delta_fetches': 0,       # Дозагрузки новых свечей (startTime)
+            'gap_refetches': 0,       # Полные перезагрузки из-за разрыва
+            'bytes_downloaded': 0,    # Байт ответов на запросы свечей
+            'bytes_full_equivalent': 0,  # Оценка байт, если бы все обновления были полными
+            'stream_candles': 0,      # Закрытые свечи из потока (без запроса)
+        }
+
+    def _count(self, *keys: str, nbytes: int = 0, full_bytes: int = 0):
+        with self._stats_lock:
+            for key in keys:
+                self.stats[key] += 1
+            self.stats['bytes_downloaded'] += nbytes
+            self.stats['bytes_full_equivalent'] += full_bytes or nbytes
+
+    def _response_bytes(self) -> int:
+        """Размер последнего ответа API в этом потоке (0, если клиент не считает трафик)"""
+        counter = getattr(self.mex_api, 'last_response_bytes', None)
+        return int(counter()) if callable(counter) else 0
+
+    def get_stats(self) -> Dict:
+        """Счетчики запросов; requests_eliminated - сколько запросов не понадобилось"""
+        with self._stats_lock:
+            stats = dict(self.stats)
+        stats['requests_eliminated'] = max(0, stats['served_local'] - stats['base_fetches'])
+        return stats
+
+    def _symbol_lock(self, symbol: str) -> threading.Lock:
+        with self._locks_guard:
+            lock = self._locks.get(symbol)
+            if lock is None:
+                lock = self._locks[symbol] = threading.Lock()
+            return lock
+
+    def _ensure_base(self, symbol: str) -> Optional[KlineWindow]:
+        """Загрузить (или переиспользовать) базовое окно символа"""
+        with self._symbol_lock(symbol):
+            fetched_at = self._fetched_at.get(symbol)
+            if fetched_at is None or time.time() - fetched_at >= self.refresh_sec:
+                if fetched_at is None or not self._delta_fetch(symbol):
+                    self._full_fetch(symbol)
+            return self.kline_store.window(symbol, self.base_interval)
+
+    def _full_fetch(self, symbol: str):
+        """Полная загрузка base_limit базовых свечей"""
+        klines = self.mex_api.get_klines(symbol, self.base_interval, self.base_limit)
+        nbytes = self._response_bytes()
+        self._count('requests_made', 'base_fetches', 'full_fetches', nbytes=nbytes)
+        if isinstance(klines, list) and klines:
+            if nbytes:
+                self._bytes_per_candle = nbytes / len(klines)
+            self.kline_store.ingest(symbol, self.base_interval, klines)
+            self._fetched_at[symbol] = time.time()
+
+    def _delta_fetch(self, symbol: str) -> bool:
+        """Дозагрузить свечи с последней сохраненной (включительно) и влить в окно.
+
+        Returns:
+            False, если нужна полная загрузка (нет окна, разрыв, ошибка API)
+        """
+        if not self.delta_refresh:
+            return False
+        last_ts = self.kline_store.last_open_time(symbol, self.base_interval)
+        if last_ts is None:
+            return False
+        # Последняя сохраненная свеча могла быть незакрытой - запрашиваем с нее
+        try:
+            klines = self.mex_api.get_klines(symbol, self.base_interval, self.base_limit, start_time=last_ts)
+        except TypeError:
+            # Клиент без поддержки startTime - дальше только полные загрузки
+            logger.warning("⚠️ Источник свечей не поддерживает startTime, дозагрузка отключена")
+            self.delta_refresh = False
+            return False
+        nbytes = self._response_bytes()
+        self._count('requests_made', 'base_fetches', 'delta_fetches', nbytes=nbytes,
+                    full_bytes=int(self._bytes_per_candle * self.base_limit))
+        if not isinstance(klines, list) or not klines:
+            return False
+
+        klines = [k for k in klines if int(k[0]) >= last_ts]
+        ts = np.array([int(k[0]) for k in klines], dtype=np.int64)
+        # Разрыв: нет перекрытия с сохраненной свечой, пропуски внутри ответа
+        # или ответ упёрся в лимит (новых свечей больше, чем вернула биржа)
+        if (ts.size == 0 or ts[0] != last_ts or ts.size >= self.base_limit
+                or np.any(np.diff(ts) != self._interval_ms)):
+            self._count('gap_refetches')
+            return False
+
+        self.kline_store.ingest(symbol, self.base_interval, klines)
+        self._fetched_at[symbol] = time.time()
+        return True
+
+    def _resampled_window(self, symbol: str, base: KlineWindow, interval: str) -> Optional[KlineWindow]:
+        """Ресэмплинг с мемоизацией по (последняя базовая свеча, close, длина)"""
+        key = (symbol, interval)
+        stamp = (int(base.ts[-1]), float(base.close[-1]), len(base))
+        cached = self._resampled.get(key)
+        if cached and cached[0] == stamp:
+            return cached[1]
+        window = resample(base, interval)
+        self._resampled[key] = (stamp, window)
+        return window
+
+    def get_window(self, symbol: str, interval: str = '1h', limit: int = 100) -> Optional[KlineWindow]:
+        """Окно последних `limit` свечей интервала (None, если данных нет)"""
+        interval = normalize_interval(interval)
+        if can_resample(self.base_interval, interval):
+            base = self._ensure_base(symbol)
+            if base is not None:
+                window = base if interval == self.base_interval else self._resampled_window(symbol, base, interval)
+                if window is not None and len(window) >= limit:
+                    self._count('served_local')
+                    return window.tail(limit)
+
+        # Не покрывается базовым окном - прямой запрос к API
+        klines = self.mex_api.get_klines(symbol, interval, limit)
+        self._count('requests_made', 'passthrough')
+        if not isinstance(klines, list) or not klines:
+            return None
+        self.kline_store.ingest(symbol, interval, klines)
+        return self.kline_store.window(symbol, interval, len(klines))
+
+    def get_klines(self, symbol: str, interval: str = '1m', limit: int = 100) -> Optional[KlineWindow]:
+        """Совместимый с MexAPI.get_klines вызов; возвращает KlineWindow"""
+        return self.get_window(symbol, interval, limit)
+
+    def apply_closed_candle(self, symbol: str, kline: Sequence) -> bool:
+        """Влить закрытую базовую свечу из потока без запроса к API.
+
+        Returns:
+            False, если свеча не продолжает сохраненное окно (нужна загрузка)
+        """
+        with self._symbol_lock(symbol):
+            last_ts = self.kline_store.last_open_time(symbol, self.base_interval)
+            ts = int(kline[0])
+            if last_ts is None or ts not in (last_ts, last_ts + self._interval_ms):
+                return False
+            self.kline_store.ingest(symbol, self.base_interval, [list(kline)])
+            self._fetched_at[symbol] = time.time()
+        self._count('stream_candles')
+        return True
+
+    def expire(self, symbol: str):
+        """Считать базовое окно устаревшим (следующий вызов дозагрузит новые свечи)"""
+        with self._symbol_lock(symbol):
+            if symbol in self._fetched_at:
+                self._fetched_at[symbol] = 0.0
+
+    def forget(self, symbol: str):
+        """Сбросить метку свежести символа (следующий вызов загрузит базу полностью)"""
+        self._fetched_at.pop(symbol, None)
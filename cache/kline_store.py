@@ -0,0 +1,363 @@
+"""
+Колоночное in-memory хранилище свечей
+Кольцевые буферы NumPy фиксированной емкости на каждую пару (symbol, interval).
+
+Свечи REST API приходят списками строк и раньше заново парсились каждым
+потребителем. Хранилище парсит их один раз при загрузке (ingest) и отдает
+окна (KlineWindow) как представления NumPy без копирования.
+"""
+
+import threading
+import logging
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Sequence, Union
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Длительность интервалов в миллисекундах (ключи - нормализованные имена)
+INTERVAL_MS = {
+    '1m': 60_000,
+    '5m': 5 * 60_000,
+    '15m': 15 * 60_000,
+    '30m': 30 * 60_000,
+    '1h': 60 * 60_000,
+    '4h': 4 * 60 * 60_000,
+    '8h': 8 * 60 * 60_000,
+    '1d': 24 * 60 * 60_000,
+    '1w': 7 * 24 * 60 * 60_000,
+}
+
+# Синонимы интервалов MEXC (v3 '60m', v2 '240m' и т.п.)
+_INTERVAL_ALIASES = {
+    '60m': '1h', 'Min60': '1h',
+    '240m': '4h', 'Hour4': '4h',
+    '480m': '8h', 'Hour8': '8h',
+    'Min1': '1m', 'Min5': '5m', 'Min15': '15m', 'Min30': '30m',
+    'Day1': '1d', 'Week1': '1w',
+}
+
+DEFAULT_CAPACITY = 1000  # Максимальный limit у /api/v3/klines
+
+
+def normalize_interval(interval: str) -> str:
+    """Привести имя интервала к единому виду ('60m' -> '1h')"""
+    return _INTERVAL_ALIASES.get(interval, interval)
+
+
+@dataclass(frozen=True)
+class KlineWindow:
+    """Окно свечей: представления (views) колонок кольцевого буфера.
+
+    Массивы доступны только на чтение, но это не копии: replace_last()
+    меняет последнюю свечу окна на месте, а дописанные свечи перезаписывают
+    самые старые слоты буфера. Окно из n свечей остается неизменным, пока
+    дописано не больше `capacity - n` свечей (окно на всю емкость портится
+    уже следующей свечой). Пакет-эталон и разрыв в свечах не трогают старые
+    окна: хранилище заводит под символ новый буфер, а прежние массивы живут,
+    пока на них есть ссылки. Кэши окон (TTLCache фильтров) держат их не дольше
+    текущей свечи; для более долгого хранения используйте copy().
+    """
+    symbol: str
+    interval: str
+    ts: np.ndarray
+    open: np.ndarray
+    high: np.ndarray
+    low: np.ndarray
+    close: np.ndarray
+    volume: np.ndarray
+
+    def __len__(self) -> int:
+        return int(self.ts.shape[0])
+
+    def __bool__(self) -> bool:
+        return len(self) > 0
+
+    def tail(self, n: int) -> 'KlineWindow':
+        """Последние n свечей (тоже без копирования)"""
+        if n >= len(self):
+            return self
+        return KlineWindow(self.symbol, self.interval, self.ts[-n:], self.open[-n:],
+                           self.high[-n:], self.low[-n:], self.close[-n:], self.volume[-n:])
+
+    def copy(self) -> 'KlineWindow':
+        """Независимая копия окна"""
+        return KlineWindow(self.symbol, self.interval, self.ts.copy(), self.open.copy(),
+                           self.high.copy(), self.low.copy(), self.close.copy(), self.volume.copy())
+
+    def to_klines(self) -> List[List]:
+        """Обратное преобразование в формат REST [openTime, open, high, low, close, volume]"""
+        return [[int(t), float(o), float(h), float(l), float(c), float(v)]
+                for t, o, h, l, c, v in zip(self.ts, self.open, self.high,
+                                             self.low, self.close, self.volume)]
+
+
+def parse_klines(klines: Sequence[Sequence]) -> Optional[np.ndarray]:
+    """Разобрать свечи REST (строки или числа) в матрицу float64 (N x 6).
+
+    Строки с нечисловыми значениями отбрасываются. Возвращает None, если
+    разбирать нечего.
+    """
+    if not klines:
+        return None
+    try:
+        return np.array([k[:6] for k in klines], dtype=np.float64)
+    except (ValueError, TypeError, IndexError):
+        # Медленный путь: пропускаем битые строки
+        rows = []
+        for k in klines:
+            try:
+                rows.append([float(x) for x in k[:6]])
+            except (ValueError, TypeError, IndexError):
+                continue
+            if len(rows[-1]) < 6:
+                rows.pop()
+        return np.array(rows, dtype=np.float64) if rows else None
+
+
+def as_window(klines: Union[KlineWindow, Sequence[Sequence], None],
+              symbol: str = '', interval: str = '') -> Optional[KlineWindow]:
+    """Получить KlineWindow из окна или из списка свечей REST (без сохранения в хранилище)"""
+    if klines is None:
+        return None
+    if isinstance(klines, KlineWindow):
+        return klines
+    data = parse_klines(klines)
+    if data is None or data.shape[0] == 0:
+        return None
+    return KlineWindow(symbol, normalize_interval(interval), data[:, 0].astype(np.int64),
+                       data[:, 1], data[:, 2], data[:, 3], data[:, 4], data[:, 5])
+
+
+class _RingBuffer:
+    """Кольцевой буфер с двойной записью.
+
+    Каждое значение пишется в позиции i и i + capacity, поэтому любое окно
+    длиной <= capacity - непрерывный срез и отдается без копирования.
+    """
+
+    def __init__(self, capacity: int):
+        self.capacity = capacity
+        self.ts = np.zeros(2 * capacity, dtype=np.int64)
+        self.ohlcv = np.zeros((5, 2 * capacity), dtype=np.float64)
+        self.count = 0   # Сколько свечей записано всего
+        self.size = 0    # Сколько доступно (<= capacity)
+
+    @property
+    def nbytes(self) -> int:
+        return self.ts.nbytes + self.ohlcv.nbytes
+
+    def last_ts(self) -> Optional[int]:
+        if self.size == 0:
+            return None
+        return int(self.ts[(self.count - 1) % self.capacity])
+
+    def first_ts(self) -> Optional[int]:
+        if self.size == 0:
+            return None
+        return int(self.ts[(self.count - self.size) % self.capacity])
+
+    def _write(self, pos: int, ts: int, row: np.ndarray):
+        self.ts[pos] = ts
+        self.ts[pos + self.capacity] = ts
+        self.ohlcv[:, pos] = row
+        self.ohlcv[:, pos + self.capacity] = row
+
+    def append(self, ts: np.ndarray, ohlcv: np.ndarray):
+        """Дописать свечи (ts по возрастанию). ohlcv - матрица 5 x N"""
+        n = ts.shape[0]
+        if n > self.capacity:
+            ts = ts[-self.capacity:]
+            ohlcv = ohlcv[:, -self.capacity:]
+            n = self.capacity
+        start = self.count % self.capacity
+        first = min(n, self.capacity - start)
+        # Два куска: до конца первой половины и с начала
+        for lo, hi, dst in ((0, first, start), (first, n, 0)):
+            if hi <= lo:
+                continue
+            span = hi - lo
+            self.ts[dst:dst + span] = ts[lo:hi]
+            self.ts[dst + self.capacity:dst + self.capacity + span] = ts[lo:hi]
+            self.ohlcv[:, dst:dst + span] = ohlcv[:, lo:hi]
+            self.ohlcv[:, dst + self.capacity:dst + self.capacity + span] = ohlcv[:, lo:hi]
+        self.count += n
+        self.size = min(self.capacity, self.size + n)
+
+    def replace_last(self, ts: int, row: np.ndarray):
+        """Обновить последнюю (еще не закрытую) свечу"""
+        self._write((self.count - 1) % self.capacity, ts, row)
+
+    def view(self, limit: Optional[int] = None):
+        n = self.size if limit is None else max(0, min(limit, self.size))
+        end = (self.count % self.capacity) or self.capacity
+        if end < self.size:
+            end += self.capacity
+        start = end - n
+        ts = self.ts[start:end]
+        cols = self.ohlcv[:, start:end]
+        return ts, cols
+
+
+class KlineStore:
+    """Общее для процесса хранилище свечей по (symbol, interval)"""
+
+    def __init__(self, default_capacity: int = DEFAULT_CAPACITY,
+                 capacities: Optional[Dict[str, int]] = None):
+        """
+        Args:
+            default_capacity: Емкость буфера по умолчанию (свечей)
+            capacities: Переопределение емкости для отдельных интервалов
+        """
+        self.default_capacity = default_capacity
+        self.capacities = {normalize_interval(k): v for k, v in (capacities or {}).items()}
+        self._buffers: Dict[tuple, _RingBuffer] = {}
+        self._lock = threading.RLock()
+
+        # Статистика
+        self.rows_ingested = 0
+        self.ingest_calls = 0
+        self.gap_resets = 0
+
+    def _new_buffer(self, symbol: str, interval: str, ts: np.ndarray, ohlcv: np.ndarray) -> int:
+        """Начать историю символа заново с пакета.
+
+        Новый буфер вместо перезаписи старого с нулевого слота: выданные ранее
+        окна продолжают указывать на прежние свечи.
+        """
+        buf = _RingBuffer(self.capacities.get(interval, self.default_capacity))
+        buf.append(ts, ohlcv)
+        self._buffers[(symbol, interval)] = buf
+        written = min(ts.shape[0], buf.capacity)
+        self.rows_ingested += written
+        return written
+
+    def _get_buffer(self, symbol: str, interval: str) -> Optional[_RingBuffer]:
+        return self._buffers.get((symbol, interval))
+
+    def ingest(self, symbol: str, interval: str, klines: Sequence[Sequence]) -> int:
+        """Загрузить свечи REST в хранилище (парсинг выполняется один раз).
+
+        Returns:
+            Количество новых или обновленных свечей
+        """
+        data = parse_klines(klines)
+        if data is None or data.shape[0] == 0:
+            return 0
+        return self.ingest_arrays(symbol, interval, data[:, 0].astype(np.int64), data[:, 1:6].T)
+
+    def ingest_arrays(self, symbol: str, interval: str, ts: np.ndarray, ohlcv: np.ndarray) -> int:
+        """Загрузить уже разобранные свечи: ts (N,) и ohlcv (5 x N), ts по возрастанию"""
+        interval = normalize_interval(interval)
+        if ts.shape[0] == 0:
+            return 0
+        with self._lock:
+            buf = self._get_buffer(symbol, interval)
+            self.ingest_calls += 1
+            first_ts = buf.first_ts() if buf is not None else None
+            last_ts = buf.last_ts() if buf is not None else None
+
+            # Пакет длиннее истории в буфере (или буфер пуст) - считаем его эталоном
+            if last_ts is None or int(ts[0]) < first_ts:
+                return self._new_buffer(symbol, interval, ts, ohlcv)
+
+            newer = ts > last_ts
+            step = INTERVAL_MS.get(interval)
+            if step and newer.any() and int(ts[newer][0]) > last_ts + step:
+                # Разрыв после последней сохраненной свечи: окно было бы несплошным -
+                # буфер начинается заново с пакета
+                self.gap_resets += 1
+                logger.warning(f"⚠️ Разрыв свечей {symbol} {interval} после {last_ts}: окно начато заново")
+                return self._new_buffer(symbol, interval, ts, ohlcv)
+
+            written = 0
+            # Обновление последней свечи (она могла быть незакрытой)
+            same = np.nonzero(ts == last_ts)[0]
+            if same.size:
+                buf.replace_last(last_ts, ohlcv[:, same[-1]])
+                written += 1
+            if newer.any():
+                buf.append(ts[newer], ohlcv[:, newer])
+                written += int(newer.sum())
+            self.rows_ingested += written
+            return written
+
+    def window(self, symbol: str, interval: str, limit: Optional[int] = None) -> Optional[KlineWindow]:
+        """Окно последних `limit` свечей без копирования (None, если данных нет)"""
+        interval = normalize_interval(interval)
+        with self._lock:
+            buf = self._get_buffer(symbol, interval)
+            if buf is None or buf.size == 0:
+                return None
+            ts, cols = buf.view(limit)
+        ts = ts.view()
+        ts.flags.writeable = False
+        cols = cols.view()
+        cols.flags.writeable = False
+        return KlineWindow(symbol, interval, ts, cols[0], cols[1], cols[2], cols[3], cols[4])
+
+    def size(self, symbol: str, interval: str) -> int:
+        """Сколько свечей хранится для пары"""
+        with self._lock:
+            buf = self._get_buffer(symbol, normalize_interval(interval))
+            return buf.size if buf else 0
+
+    def last_open_time(self, symbol: str, interval: str) -> Optional[int]:
+        """Время открытия последней свечи (мс) или None"""
+        with self._lock:
+            buf = self._get_buffer(symbol, normalize_interval(interval))
+            return buf.last_ts() if buf else None
+
+    def symbols(self) -> List[str]:
+        """Символы, по которым есть данные"""
+        with self._lock:
+            return sorted({s for s, _ in self._buffers})
+
+    def memory_usage(self) -> Dict[str, int]:
+        """Память буферов по символам (байт)"""
+        usage: Dict[str, int] = {}
+        with self._lock:
+            for (symbol, _), buf in self._buffers.items():
+                usage[symbol] = usage.get(symbol, 0) + buf.nbytes
+        return usage
+
+    def total_memory(self) -> int:
+        """Суммарная память буферов (байт)"""
+        return sum(self.memory_usage().values())
+
+    def drop(self, symbol: str, interval: Optional[str] = None):
+        """Удалить данные символа (все интервалы или один)"""
+        with self._lock:
+            if interval:
+                self._buffers.pop((symbol, normalize_interval(interval)), None)
+            else:
+                for key in [k for k in self._buffers if k[0] == symbol]:
+                    del self._buffers[key]
+
+    def clear(self):
+        """Очистить хранилище"""
+        with self._lock:
+            self._buffers.clear()
+
+    def get_stats(self) -> Dict:
+        """Статистика хранилища"""
+        with self._lock:
+            series = len(self._buffers)
+        return {
+            'symbols': len(self.symbols()),
+            'series': series,
+            'rows_ingested': self.rows_ingested,
+            'ingest_calls': self.ingest_calls,
+            'gap_resets': self.gap_resets,
+            'memory_bytes': self.total_memory(),
+        }
+
+
+# Глобальный экземпляр, общий для всех сервисов процесса
+kline_store = KlineStore()
+
+
+def get_kline_store() -> KlineStore:
+    """Получение глобального хранилища свечей"""
+    return kline_store
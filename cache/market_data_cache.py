@@ -0,0 +1,238 @@
+"""
+Общий кэш рыночных данных процесса
+Сканер, фильтры, балансировщики и мониторы раньше держали по своему MexAPI
+и своим кэшам, поэтому одни и те же свечи и цены запрашивались с биржи
+несколько раз за минуту. MarketDataCache - единая точка чтения свечей, цен,
+24h тикеров и стакана с TTL под каждый тип данных. Сервисы получают его
+через get_market_data_cache() (или явно в конструкторе) и читают через
+именованного клиента client('имя'), чтобы отчет показывал, сколько запросов
+каждого сервиса обслужено без обращения к бирже.
+
+Ордера, балансы и история сделок через кэш не идут.
+"""
+
+import threading
+from typing import Any, Callable, Dict, List, Optional
+
+from cache.daily_extremes import get_daily_extremes
+from cache.kline_store import normalize_interval
+from cache.ttl_cache import TTLCache
+from config import MARKET_DATA_CACHE_CONFIG
+
+KINDS = ('klines', 'price', 'ticker_24h', 'depth')
+
+
+def _is_ok(value: Any) -> bool:
+    """Ответ без ошибки (ошибки не кэшируются)"""
+    if isinstance(value, dict):
+        return bool(value) and 'error' not in value and 'code' not in value
+    return bool(value)
+
+
+class MarketDataCache:
+    """Кэш свечей, цен, 24h тикеров и стакана поверх одного клиента API"""
+
+    def __init__(self, mex_api=None, config: Optional[Dict] = None):
+        """
+        Args:
+            mex_api: Клиент биржи (по умолчанию MexAPI)
+            config: TTL и размеры кэшей (по умолчанию MARKET_DATA_CACHE_CONFIG)
+        """
+        if mex_api is None:
+            from mex_api import MexAPI
+            mex_api = MexAPI()
+        self.mex_api = mex_api
+        self.config = config or MARKET_DATA_CACHE_CONFIG
+        max_entries = self.config.get('max_entries', 4096)
+        self._klines = TTLCache(max_entries, self.config.get('klines_ttl_sec', 60))
+        self._prices = TTLCache(max_entries, self.config.get('price_ttl_sec', 3))
+        self._tickers = TTLCache(64, self.config.get('ticker_ttl_sec', 3))
+        self._depth = TTLCache(max_entries, self.config.get('depth_ttl_sec', 1))
+        self.daily_extremes = get_daily_extremes()  # Цены с биржи обновляют дневные хай/лоу
+        self._stats_lock = threading.Lock()
+        self._thread_state = threading.local()
+        self.reset_stats()
+
+    def reset_stats(self):
+        with self._stats_lock:
+            self.stats: Dict[str, Dict[str, Dict[str, int]]] = {}  # consumer -> kind -> счетчики
+
+    def _count(self, consumer: str, kind: str, key: str):
+        with self._stats_lock:
+            entry = self.stats.setdefault(consumer, {}).setdefault(kind, {'calls': 0, 'fetches': 0})
+            entry[key] += 1
+
+    def _loader(self, consumer: str, kind: str, fn: Callable, *args, **kwargs) -> Callable:
+        """Загрузка с биржи с учетом запроса за сервисом, который ее вызвал"""
+        def load():
+            self._count(consumer, kind, 'fetches')
+            self._thread_state.fetched = True
+            return fn(*args, **kwargs)
+        return load
+
+    def client(self, consumer: str) -> 'MarketDataClient':
+        """Клиент с интерфейсом MexAPI для чтения рыночных данных от имени сервиса"""
+        return MarketDataClient(self, consumer)
+
+    ############################################################
+    # 📈 РЫНОЧНЫЕ ДАННЫЕ
+    ############################################################
+    def get_klines(self, symbol: str, interval: str = '1m', limit: int = 100,
+                   start_time: Optional[int] = None, consumer: str = 'default') -> List:
+        """Свечи; окно большего limit обслуживает и меньшие запросы до закрытия свечи"""
+        self._count(consumer, 'klines', 'calls')
+        self._thread_state.fetched = False
+        if start_time is not None:
+            # Дозагрузка по startTime у каждого источника своя - без кэша
+            return self._loader(consumer, 'klines', self.mex_api.get_klines,
+                                symbol, interval, limit, start_time=start_time)()
+        entry = self._klines.get_or_load(
+            (symbol, normalize_interval(interval)),
+            lambda: (limit, self._loader(consumer, 'klines', self.mex_api.get_klines, symbol, interval, limit)()),
+            interval, accept=lambda value: value[0] >= limit and _is_ok(value[1]))
+        klines = entry[1]
+        return klines[-limit:] if isinstance(klines, list) else klines
+
+    def get_ticker_price(self, symbol: str, consumer: str = 'default') -> Dict:
+        """Цена символа; свежий снимок всех 24h тикеров обслуживает без запроса"""
+        self._count(consumer, 'price', 'calls')
+        self._thread_state.fetched = False
+        snapshot = self._tickers.get(None)
+        if isinstance(snapshot, list):
+            for ticker in snapshot:
+                if ticker.get('symbol') == symbol and ticker.get('lastPrice') is not None:
+                    return {'symbol': symbol, 'price': str(ticker['lastPrice'])}
+        return self._prices.get_or_load(
+            symbol, self._loader(consumer, 'price', self._fetch_price, symbol),
+            accept=lambda value: isinstance(value, dict) and 'price' in value)
+
+    def _fetch_price(self, symbol: str) -> Dict:
+        result = self.mex_api.get_ticker_price(symbol)
+        if isinstance(result, dict) and 'price' in result:
+            self.daily_extremes.update(symbol, float(result['price']))
+        return result
+
+    def get_24hr_ticker(self, symbol: Optional[str] = None, consumer: str = 'default'):
+        """24h статистика символа или всех символов (symbol=None)"""
+        self._count(consumer, 'ticker_24h', 'calls')
+        self._thread_state.fetched = False
+        return self._tickers.get_or_load(
+            symbol, self._loader(consumer, 'ticker_24h', self._fetch_24hr_ticker, symbol), accept=_is_ok)
+
+    def _fetch_24hr_ticker(self, symbol: Optional[str]):
+        result = self.mex_api.get_24hr_ticker(symbol)
+        if _is_ok(result):
+            self.daily_extremes.update_from_tickers(result if isinstance(result, list) else [result])
+        return result
+
+    def get_depth(self, symbol: str, limit: int = 100, consumer: str = 'default') -> Dict:
+        """Стакан заявок (короткий TTL: используется для цены лимитных ордеров)"""
+        self._count(consumer, 'depth', 'calls')
+        self._thread_state.fetched = False
+        return self._depth.get_or_load(
+            (symbol, limit), self._loader(consumer, 'depth', self.mex_api.get_depth, symbol, limit),
+            accept=lambda value: isinstance(value, dict) and 'bids' in value)
+
+    def last_response_bytes(self) -> int:
+        """Размер последнего ответа API в этом потоке (0 - ответ из кэша)"""
+        if not getattr(self._thread_state, 'fetched', False):
+            return 0
+        counter = getattr(self.mex_api, 'last_response_bytes', None)
+        return int(counter()) if callable(counter) else 0
+
+    def invalidate(self, symbol: Optional[str] = None):
+        """Сбросить цены и стакан символа или весь кэш.
+
+        Сервисы вызывают после размещения ордера (MarketDataClient.invalidate),
+        чтобы следующее решение не опиралось на цену и стакан до сделки.
+        """
+        if symbol is None:
+            for cache in (self._klines, self._prices, self._tickers, self._depth):
+                cache.invalidate()
+            return
+        self._prices.invalidate(symbol)
+        self._depth.invalidate()
+        self._tickers.invalidate()  # В снимке всех тикеров есть и этот символ
+
+    ############################################################
+    # 📊 ОТЧЕТ
+    ############################################################
+    def get_stats(self) -> Dict:
+        """Запросы сервисов и фактические запросы к бирже по типам данных"""
+        with self._stats_lock:
+            by_consumer = {consumer: {kind: dict(entry) for kind, entry in kinds.items()}
+                           for consumer, kinds in self.stats.items()}
+        by_kind = {kind: {'calls': 0, 'fetches': 0} for kind in KINDS}
+        for kinds in by_consumer.values():
+            for kind, entry in kinds.items():
+                by_kind[kind]['calls'] += entry['calls']
+                by_kind[kind]['fetches'] += entry['fetches']
+        for entry in list(by_kind.values()) + [e for kinds in by_consumer.values() for e in kinds.values()]:
+            entry['deduplicated'] = max(0, entry['calls'] - entry['fetches'])
+        calls = sum(entry['calls'] for entry in by_kind.values())
+        fetches = sum(entry['fetches'] for entry in by_kind.values())
+        return {
+            'calls': calls,
+            'fetches': fetches,
+            'deduplicated': max(0, calls - fetches),
+            'by_kind': by_kind,
+            'by_consumer': by_consumer,
+        }
+
+    def format_report(self) -> str:
+        """Текстовый отчет: сколько запросов обслужено без биржи (по типам и сервисам)"""
+        stats = self.get_stats()
+        share = stats['deduplicated'] / stats['calls'] * 100 if stats['calls'] else 0.0
+        lines = [f"📦 Кэш рыночных данных: запросов {stats['calls']}, к бирже {stats['fetches']}, "
+                 f"без запроса {stats['deduplicated']} ({share:.0f}%)\n"]
+        for kind, entry in stats['by_kind'].items():
+            if entry['calls']:
+                lines.append(f"   • {kind}: {entry['calls']} → {entry['fetches']}\n")
+        for consumer, kinds in sorted(stats['by_consumer'].items()):
+            calls = sum(entry['calls'] for entry in kinds.values())
+            fetches = sum(entry['fetches'] for entry in kinds.values())
+            lines.append(f"   👤 {consumer}: {calls} → {fetches}\n")
+        return "".join(lines)
+
+
+class MarketDataClient:
+    """Чтение рыночных данных от имени сервиса (интерфейс совпадает с MexAPI)"""
+
+    def __init__(self, cache: MarketDataCache, consumer: str):
+        self.cache = cache
+        self.consumer = consumer
+
+    def client(self, consumer: str) -> 'MarketDataClient':
+        return self.cache.client(consumer)
+
+    def get_klines(self, symbol: str, interval: str = '1m', limit: int = 100,
+                   start_time: Optional[int] = None) -> List:
+        return self.cache.get_klines(symbol, interval, limit, start_time, consumer=self.consumer)
+
+    def get_ticker_price(self, symbol: str) -> Dict:
+        return self.cache.get_ticker_price(symbol, consumer=self.consumer)
+
+    def get_24hr_ticker(self, symbol: Optional[str] = None):
+        return self.cache.get_24hr_ticker(symbol, consumer=self.consumer)
+
+    def get_depth(self, symbol: str, limit: int = 100) -> Dict:
+        return self.cache.get_depth(symbol, limit, consumer=self.consumer)
+
+    def last_response_bytes(self) -> int:
+        return self.cache.last_response_bytes()
+
+    def invalidate(self, symbol: Optional[str] = None):
+        self.cache.invalidate(symbol)
+
+
+_market_data: Optional[MarketDataCache] = None
+_market_data_lock = threading.Lock()
+
+
+def get_market_data_cache(mex_api=None) -> MarketDataCache:
+    """Получить общий кэш рыночных данных (mex_api - клиент при первом создании)"""
+    global _market_data
+    with _market_data_lock:
+        if _market_data is None:
+            _market_data = MarketDataCache(mex_api)
+        return _market_data
@@ -0,0 +1,145 @@
+"""
+Потокобезопасный TTL+LRU кэш с загрузкой по ключу
+Используется анти-хайп фильтрами для окон свечей.
+
+Запись живет до TTL, но не дольше границы следующей свечи своего интервала:
+после закрытия свечи окно устарело, даже если TTL еще не истек. Размер
+ограничен max_entries - при переполнении вытесняются давно не читанные
+записи. Одновременные промахи по одному ключу выполняют одну загрузку:
+остальные потоки ждут на замке ключа и получают ее результат.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Hashable, Optional
+
+from cache.kline_store import INTERVAL_MS, normalize_interval
+
+_MISSING = object()
+
+
+class TTLCache:
+    """TTL+LRU кэш с замками на ключ"""
+
+    def __init__(self, max_entries: int = 2048, ttl_sec: float = 300.0,
+                 clock: Callable[[], float] = time.time):
+        """
+        Args:
+            max_entries: Максимум записей (LRU-вытеснение сверх лимита)
+            ttl_sec: Максимальный возраст записи
+            clock: Источник времени в секундах (подменяется в тестах)
+        """
+        self.max_entries = max(1, int(max_entries))
+        self.ttl_sec = ttl_sec
+        self.clock = clock
+        self._entries: 'OrderedDict[Hashable, tuple]' = OrderedDict()  # key -> (expires_at, value)
+        self._lock = threading.Lock()
+        self._key_locks: Dict[Hashable, list] = {}  # key -> [Lock, число ожидающих]
+        self.reset_stats()
+
+    def reset_stats(self):
+        self.stats = {'hits': 0, 'misses': 0, 'loads': 0, 'shared_loads': 0, 'expired': 0, 'evicted': 0}
+
+    def expires_at(self, now: float, interval: Optional[str] = None) -> float:
+        """Момент устаревания записи: TTL или граница следующей свечи интервала"""
+        expires = now + self.ttl_sec
+        step_ms = INTERVAL_MS.get(normalize_interval(interval)) if interval else None
+        if step_ms:
+            now_ms = int(now * 1000)
+            expires = min(expires, (now_ms - now_ms % step_ms + step_ms) / 1000)
+        return expires
+
+    def _lookup(self, key: Hashable) -> Any:
+        """Свежее значение или _MISSING (вызывается под self._lock)"""
+        entry = self._entries.get(key)
+        if entry is None:
+            return _MISSING
+        if self.clock() >= entry[0]:
+            del self._entries[key]
+            self.stats['expired'] += 1
+            return _MISSING
+        self._entries.move_to_end(key)
+        return entry[1]
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """Свежее значение без загрузки"""
+        with self._lock:
+            value = self._lookup(key)
+        return default if value is _MISSING else value
+
+    def __contains__(self, key: Hashable) -> bool:
+        with self._lock:
+            return self._lookup(key) is not _MISSING
+
+    def set(self, key: Hashable, value: Any, interval: Optional[str] = None):
+        """Сохранить значение; interval - интервал свечей для привязки к границе"""
+        with self._lock:
+            self._entries[key] = (self.expires_at(self.clock(), interval), value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.stats['evicted'] += 1
+
+    @contextmanager
+    def _key_lock(self, key: Hashable):
+        with self._lock:
+            holder = self._key_locks.get(key)
+            if holder is None:
+                holder = self._key_locks[key] = [threading.Lock(), 0]
+            holder[1] += 1
+        try:
+            with holder[0]:
+                yield
+        finally:
+            with self._lock:
+                holder[1] -= 1
+                if holder[1] == 0:
+                    self._key_locks.pop(key, None)
+
+    def get_or_load(self, key: Hashable, loader: Callable[[], Any], interval: Optional[str] = None,
+                    accept: Optional[Callable[[Any], bool]] = None) -> Any:
+        """Значение из кэша или результат loader() (одна загрузка на ключ)
+
+        Args:
+            accept: Проверка значения: неподходящая запись считается промахом,
+                неподходящий результат loader() возвращается, но не кэшируется
+        """
+        with self._lock:
+            value = self._lookup(key)
+            if value is not _MISSING and (accept is None or accept(value)):
+                self.stats['hits'] += 1
+                return value
+            self.stats['misses'] += 1
+
+        with self._key_lock(key):
+            # Пока ждали замок, ключ мог загрузить другой поток
+            with self._lock:
+                value = self._lookup(key)
+                if value is not _MISSING and (accept is None or accept(value)):
+                    self.stats['shared_loads'] += 1
+                    return value
+            value = loader()
+            with self._lock:
+                self.stats['loads'] += 1
+            if accept is None or accept(value):
+                self.set(key, value, interval)
+            return value
+
+    def invalidate(self, key: Optional[Hashable] = None):
+        """Удалить запись (без ключа - все записи)"""
+        with self._lock:
+            if key is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(key, None)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get_stats(self) -> Dict:
+        with self._lock:
+            stats = dict(self.stats)
+            stats['entries'] = len(self._entries)
+        return stats
@@ -0,0 +1,184 @@
+#!/usr/bin/env python3
+"""
+Событийный скан по закрытию свечей
+Вместо фиксированной паузы между сканами пара переоценивается сразу после
+закрытия ее свечи. Источник событий - локальные часы границ свечей
+(все отслеживаемые пары закрываются на одной границе) или поток свечей
+биржи: StreamCandleBuilder по обновлениям текущей свечи определяет момент,
+когда окно сменилось, и отдает закрытую свечу целиком (она вливается в
+хранилище без REST-запроса). Debounce-этап собирает пары, закрывшиеся на
+одной границе, в одну пачку для конвейера скана.
+"""
+
+import asyncio
+import logging
+import time
+from dataclasses import dataclass
+from typing import Awaitable, Callable, Dict, Iterable, List, Optional
+
+from cache.kline_store import INTERVAL_MS, normalize_interval
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class CandleClose:
+    """Событие закрытия свечи"""
+    symbol: str
+    interval: str
+    open_time: int                  # мс
+    close_time: int                 # мс, граница (= open_time следующей свечи)
+    kline: Optional[List] = None    # [open_time, open, high, low, close, volume] из потока
+
+
+def _to_ms(value) -> int:
+    """Время потока в мс (MEXC отдает windowstart в секундах)"""
+    value = int(float(value))
+    return value * 1000 if value < 10 ** 11 else value
+
+
+class StreamCandleBuilder:
+    """Определение закрытия свечей по потоку обновлений текущей свечи"""
+
+    def __init__(self, interval: str = '15m'):
+        self.interval = normalize_interval(interval)
+        self.interval_ms = INTERVAL_MS[self.interval]
+        self._current: Dict[str, List] = {}
+
+    def on_update(self, kline_data: Dict) -> Optional[CandleClose]:
+        """Обновление свечи (формат MEXCWebSocketClient._handle_klines).
+
+        Returns:
+            Закрытая свеча, если обновление открыло новое окно
+        """
+        try:
+            symbol = kline_data['symbol']
+            open_time = _to_ms(kline_data['start_time'])
+            row = [open_time, float(kline_data['open']), float(kline_data['high']),
+                   float(kline_data['low']), float(kline_data['close']), float(kline_data['volume'])]
+        except (KeyError, TypeError, ValueError):
+            return None
+
+        current = self._current.get(symbol)
+        if current is not None and open_time < current[0]:
+            return None  # Запоздавшее обновление прошлого окна
+        self._current[symbol] = row
+        if current is None or open_time == current[0]:
+            return None
+        return CandleClose(symbol, self.interval, current[0], current[0] + self.interval_ms, current)
+
+    def forget(self, symbol: str):
+        self._current.pop(symbol, None)
+
+
+class CandleClock:
+    """Локальные часы границ свечей: закрытие для всех отслеживаемых пар сразу"""
+
+    def __init__(self, interval: str = '15m', settle_sec: float = 3.0):
+        """
+        Args:
+            interval: Интервал свечей
+            settle_sec: Пауза после границы, чтобы биржа успела закрыть свечу
+        """
+        self.interval = normalize_interval(interval)
+        self.interval_ms = INTERVAL_MS[self.interval]
+        self.settle_sec = settle_sec
+        self._last_boundary: Optional[int] = None
+
+    def boundary(self, now: Optional[float] = None) -> int:
+        """Последняя прошедшая граница свечей (мс)"""
+        now_ms = int((time.time() if now is None else now) * 1000)
+        return now_ms - now_ms % self.interval_ms
+
+    def seconds_until_next(self, now: Optional[float] = None) -> float:
+        """Сколько ждать до следующей границы с учетом settle_sec"""
+        now = time.time() if now is None else now
+        return max(0.0, (self.boundary(now) + self.interval_ms) / 1000 + self.settle_sec - now)
+
+    def due_events(self, symbols: Iterable[str], now: Optional[float] = None) -> List[CandleClose]:
+        """События закрытия, если с прошлого вызова пройдена новая граница"""
+        now = time.time() if now is None else now
+        boundary = self.boundary(now - self.settle_sec)
+        if self._last_boundary is not None and boundary <= self._last_boundary:
+            return []
+        first_call = self._last_boundary is None
+        self._last_boundary = boundary
+        if first_call:
+            return []  # Первая граница - только точка отсчета
+        return [CandleClose(symbol, self.interval, boundary - self.interval_ms, boundary) for symbol in symbols]
+
+
+class CandleEventDebouncer:
+    """Сбор событий одной границы в пачку"""
+
+    def __init__(self, handler: Callable[[List[CandleClose]], Awaitable], debounce_sec: float = 2.0,
+                 max_batch: int = 200):
+        """
+        Args:
+            handler: Корутина обработки пачки событий
+            debounce_sec: Сколько ждать остальные пары границы после первого события
+            max_batch: Размер пачки, при котором она отправляется без ожидания
+        """
+        self.handler = handler
+        self.debounce_sec = debounce_sec
+        self.max_batch = max_batch
+        self._pending: Dict[int, Dict[str, CandleClose]] = {}
+        self._timers: Dict[int, asyncio.Task] = {}
+        self._inflight: set = set()
+        self._handler_lock = asyncio.Lock()  # Пачки разных границ обрабатываются по очереди
+        self.stats = {'events': 0, 'duplicates': 0, 'batches': 0, 'symbols': 0,
+                      'max_latency_sec': 0.0, 'last_latency_sec': 0.0,  # Закрытие свечи -> отправка пачки
+                      'last_action_sec': 0.0}  # Закрытие свечи -> пачка обработана
+
+    def submit(self, event: CandleClose):
+        """Принять событие (вызывается из цикла событий)"""
+        self.stats['events'] += 1
+        batch = self._pending.setdefault(event.close_time, {})
+        if event.symbol in batch:
+            self.stats['duplicates'] += 1
+        batch[event.symbol] = event
+        if len(batch) >= self.max_batch:
+            self._start_flush(event.close_time)
+        elif event.close_time not in self._timers:
+            self._timers[event.close_time] = asyncio.ensure_future(self._delayed_flush(event.close_time))
+
+    async def _delayed_flush(self, boundary: int):
+        await asyncio.sleep(self.debounce_sec)
+        self._timers.pop(boundary, None)
+        await self._flush(boundary)
+
+    def _start_flush(self, boundary: int):
+        timer = self._timers.pop(boundary, None)
+        if timer is not None:
+            timer.cancel()
+        task = asyncio.ensure_future(self._flush(boundary))
+        self._inflight.add(task)
+        task.add_done_callback(self._inflight.discard)
+
+    async def _flush(self, boundary: int):
+        batch = self._pending.pop(boundary, None)
+        if not batch:
+            return
+        latency = max(0.0, time.time() - boundary / 1000)
+        self.stats['batches'] += 1
+        self.stats['symbols'] += len(batch)
+        self.stats['last_latency_sec'] = latency
+        self.stats['max_latency_sec'] = max(self.stats['max_latency_sec'], latency)
+        async with self._handler_lock:
+            try:
+                await self.handler(list(batch.values()))
+            except Exception as e:
+                logger.error(f"Ошибка обработки закрытия свечей: {e}")
+        self.stats['last_action_sec'] = max(0.0, time.time() - boundary / 1000)
+
+    async def flush_all(self):
+        """Отправить все накопленные пачки (остановка, тесты)"""
+        for boundary in sorted(self._pending):
+            self._start_flush(boundary)
+        if self._inflight:
+            await asyncio.gather(*list(self._inflight), return_exceptions=True)
+
+    def get_stats(self) -> Dict:
+        stats = dict(self.stats)
+        stats['pending'] = sum(len(batch) for batch in self._pending.values())
+        return stats
@@ -59,6 +59,52 @@ EXCLUDED_SYMBOLS = [
     'WBTUSDT', 'XAIUSDT', 'CROUSDT', 'TRUMPUSDT', 'ENAUSDT'
 ]
 
+# Universe Configuration (кэш торговых пар из exchangeInfo + 24h тикеров)
+UNIVERSE_CONFIG = {
+    'exchange_info_ttl_sec': 3600,                      # exchangeInfo перечитывается раз в час
+    'quotes': ('USDT', 'USDC', 'BTC', 'ETH'),           # Котировки для разбора символа без exchangeInfo
+    'trading_statuses': ('1', 'TRADING', 'ENABLED'),    # Статусы активной торговли
+}
+
+# Kline Cache Configuration (кэш окон свечей анти-хайп фильтров)
+KLINE_CACHE_CONFIG = {
+    'max_entries': 2048,   # LRU-вытеснение сверх лимита
+    'ttl_sec': 300,        # Максимальный возраст окна; раньше - при закрытии свечи интервала
+}
+
+# Market Data Cache Configuration (общий кэш рыночных данных процесса)
+MARKET_DATA_CACHE_CONFIG = {
+    'max_entries': 4096,
+    'klines_ttl_sec': 60,   # Не дольше закрытия свечи интервала
+    'price_ttl_sec': 3,     # Цена и снимок 24h тикеров
+    'ticker_ttl_sec': 3,
+    'depth_ttl_sec': 1,     # Стакан - для цены лимитных ордеров
+}
+
+# ATH Index Configuration (постоянный индекс ATH/ATL для ребалансировщика)
+ATH_INDEX_CONFIG = {
+    'path': os.getenv('ATH_INDEX_FILE', 'ath_index.db'),  # SQLite; загружается в память при старте
+}
+
+# Daily Extremes Configuration (дневные хай/лоу для защиты от покупок у хая)
+DAILY_EXTREMES_CONFIG = {
+    'days_kept': 7,        # Ребалансировщик смотрит на максимум за 7 суток
+    'max_gap_sec': 300,    # Дольше без обновлений - трекер засевается заново из свечей
+}
+
+# Position Engine Configuration (позиции по средней цене закупа для всех расчетов PnL)
+POSITION_ENGINE_CONFIG = {
+    'path': os.getenv('POSITIONS_FILE', 'positions.json'),  # Снимок позиций
+    'sync_interval_sec': 60,  # Догрузка сделок пары не чаще
+    'initial_limit': 500,     # Первая загрузка истории сделок пары
+    'delta_limit': 100,       # Последующие загрузки (если все новые - полная догрузка)
+}
+
+# Portfolio PnL Configuration (PnL всех активов портфеля за один проход)
+PORTFOLIO_PNL_CONFIG = {
+    'trades_sync_sec': 300,  # Догрузка сделок пары при оценке портфеля не чаще
+}
+
 # PnL Monitor Configuration
 PNL_MONITOR_CONFIG = {
     'profit_threshold': 0.07,  # долларовый фоллбэк (сохранен для совместимости)
@@ -70,4 +116,186 @@ PNL_MONITOR_CONFIG = {
     'telegram_notifications': True,
     'file_logging': True,
     'log_file': 'pnl_monitor.log'
-}
\ No newline at end of file
+}
+# Indicator Kernels Configuration
+INDICATOR_KERNELS_CONFIG = {
+    'backend': os.getenv('INDICATOR_BACKEND', 'auto'),  # auto | numba | numpy
+    'precompile_on_startup': True,  # Компиляция JIT-ядер в фоне при запуске
+}
+
+# Market Scan Pipeline Configuration
+MARKET_SCAN_PIPELINE_CONFIG = {
+    'enabled': True,  # False - старый скан через ThreadPoolExecutor(10)
+    'stages': {
+        # concurrency - параллельных задач этапа, timeout - секунд на одну задачу
+        'universe': {'concurrency': 1, 'timeout': 20.0},
+        'fetch': {'concurrency': 32, 'timeout': 15.0},
+        'indicators': {'concurrency': 4, 'timeout': 5.0},
+        'filter': {'concurrency': 8, 'timeout': 15.0},
+        'score': {'concurrency': 64, 'timeout': 1.0},
+    },
+    'fetch_attempts': 3,   # Попыток загрузки свечей на символ
+    'retry_delay': 0.4,    # Пауза между попытками (asyncio.sleep, без блокировки)
+    'min_klines': 20,      # Минимум свечей для анализа
+    # Расчет индикаторов в отдельных процессах (не держит GIL потоков мониторов)
+    'process_pool': {
+        'enabled': False,
+        'workers': 2,
+        'start_method': 'spawn',
+    },
+}
+
+# Scoring Rules Configuration (декларативный скоринг пар сканера)
+# fields: поле результата -> (ключ в индикаторах, значение по умолчанию)
+# rules: правила одной группы образуют цепочку if/elif (срабатывает первое),
+# условия when объединяются по И; name попадает в reasons, explain - в объяснение сделки
+SCORING_RULES_CONFIG = {
+    'fields': {
+        'rsi': ('rsi', 50),
+        'volume_ratio': ('volume_ratio', 1.0),
+        'macd_signal': ('macd_signal', 'NEUTRAL'),
+        'bb_position': ('bb_position', 0.5),
+        'stoch_rsi_signal': ('stoch_rsi_signal', 'neutral'),
+        'keltner_signal': ('keltner_signal', 'inside'),
+        'adx': ('adx', 0.0),
+        'vwap_deviation': ('vwap_deviation', 0.0),
+    },
+    'rules': [
+        {'name': 'перепродано', 'group': 'rsi', 'when': [('rsi', '<', 30)], 'weight': 3,
+         'explain': 'RSI < 30 — перепроданность, ожидаем технический отскок'},
+        {'name': 'низкий_rsi', 'group': 'rsi', 'when': [('rsi', '<', 45)], 'weight': 2,
+         'explain': 'RSI в нижней зоне — преимущество покупателей при развороте'},
+        {'name': 'перекуплено', 'group': 'rsi', 'when': [('rsi', '>', 70)], 'weight': -1},
+        {'name': 'высокий_объем', 'group': 'volume', 'when': [('volume_ratio', '>', 1.5)], 'weight': 2,
+         'explain': 'Объемы выше нормы — повышенная вероятность импульса'},
+        {'name': 'нормальный_объем', 'group': 'volume', 'when': [('volume_ratio', '>', 1.2)], 'weight': 1,
+         'explain': 'Объемы нормализуются — ликвидность достаточна для входа'},
+        {'name': 'macd_buy', 'group': 'macd', 'when': [('macd_signal', '==', 'BUY')], 'weight': 2,
+         'explain': 'MACD подает сигнал BUY — подтверждение смены импульса'},
+        {'name': 'macd_sell', 'group': 'macd', 'when': [('macd_signal', '==', 'SELL')], 'weight': -1,
+         'explain': 'MACD SELL — вход только как контртренд с малым риском'},
+        {'name': 'bb_нижняя', 'group': 'bb', 'when': [('bb_position', '<', 0.2)], 'weight': 2,
+         'explain': 'Цена у нижней границы Bollinger — вероятен отскок к средней'},
+        {'name': 'bb_верхняя', 'group': 'bb', 'when': [('bb_position', '>', 0.8)], 'weight': -1},
+        # Stoch RSI, Keltner, ADX и VWAP доступны как поля, но в скор не входят:
+        # правила для них добавляются отдельно, после проверки на истории
+    ],
+    'block_score': -10,            # Скор при блокировке анти-хайп фильтром
+    'block_reason_prefix': 'блокирован_',
+    'confidence': {'offset': 5, 'scale': 10, 'min': 0.1, 'max': 0.9},
+}
+
+# Scan Metrics Configuration (тайминги этапов скана)
+SCAN_METRICS_CONFIG = {
+    'top_n': 5,  # Самых медленных символов в сводке
+    'history_file': os.getenv('SCAN_METRICS_HISTORY', ''),  # JSONL: строка на скан (пусто - выкл.)
+    'metrics_file': os.getenv('SCAN_METRICS_FILE', ''),     # Prometheus textfile (пусто - выкл.)
+}
+
+# Scan History Configuration (колоночная история сканов и сравнение с предыдущим)
+SCAN_HISTORY_CONFIG = {
+    'enabled': True,
+    'path': os.getenv('SCAN_HISTORY_DIR', 'scan_history'),
+    'buy_threshold': 2,        # Скор выше - возможность покупки
+    'scheduled_lookback': 30,  # Частичные сканы планировщика: сравнение с последним появлением пары
+}
+
+# Verdict Table Configuration (фоновый пересчет вердиктов анти-хайп фильтра)
+VERDICT_TABLE_CONFIG = {
+    'enabled': True,
+    'interval': '15m',       # Пересчет на каждой границе свечи
+    'settle_sec': 5.0,       # Пауза после границы; снимок действует до следующей границы + 2 паузы
+    'universe_limit': 100,   # Топ вселенной по объему
+    'quote': 'USDT',
+    'max_watched': 500,      # Символы путей покупки, не попавшие в топ
+}
+
+# Filter Decision Log Configuration (журнал решений анти-хайп фильтров)
+FILTER_DECISION_LOG_CONFIG = {
+    'enabled': True,
+    'path': os.getenv('FILTER_DECISIONS_DIR', 'filter_decisions'),
+    'flush_records': 256,  # Записи копятся в памяти и дописываются пачкой
+    'flush_sec': 10,
+}
+
+# Anti-Hype Sweep Configuration (офлайн-перебор порогов анти-хайп фильтра)
+ANTI_HYPE_SWEEP_CONFIG = {
+    'history_path': os.getenv('ANTI_HYPE_HISTORY', 'anti_hype_history.npz'),  # 1h свечи топа вселенной
+    'record_symbols': 200,   # Сколько пар записывать (топ USDT по объему)
+    'record_limit': 1000,    # 1h свечей на пару (максимум одного запроса)
+    'horizons': (4, 24),     # Горизонты форвардной доходности, часов
+    'workers': None,         # Процессов перебора (None - по числу ядер)
+    'grid': {                # Значения по умолчанию включают текущие пороги фильтра
+        'atr_impulse_multiplier': (2.1, 2.4, 2.7, 3.0, 3.3),
+        'rsi_overbought': (54, 58, 62, 66),
+        'ema_deviation': (0.02, 0.027, 0.035),
+        'daily_high_block_threshold': (0.001, 0.002, 0.005),
+        'daily_high_safety_margin': (0.005, 0.01, 0.02),
+    },
+}
+
+# Scan Scheduler Configuration (адаптивные интервалы пересканирования пар)
+SCAN_SCHEDULER_CONFIG = {
+    'enabled': True,               # False - полный скан каждые scan_interval секунд
+    'tick_sec': 60,                # Как часто планировщик выбирает пары к скану
+    'base_interval_sec': 600,      # Интервал для обычной пары
+    'min_interval_sec': 120,
+    'max_interval_sec': 3600,
+    # Глобальный бюджет анализов (запросов свечей) в минуту; None - по числу пар:
+    # пары * 60 / base_interval_sec * budget_headroom (запас на ускоренные пары)
+    'request_budget_per_min': None,
+    'budget_headroom': 1.5,
+    'burst_ticks': 2,              # Сколько тиков бюджета можно накопить
+    'held_refresh_sec': 600,       # Как часто обновлять список открытых позиций
+    'report_interval_sec': 1200,   # Отчет в Telegram не чаще
+    # Пороги признаков
+    'high_score': 2,               # Недавний скор выше - пара интересна
+    'near_threshold_score': 2,     # Скор до блокировки фильтром - может скоро разблокироваться
+    'volatility_z': 2.0,           # Всплеск |изменения за 24ч| относительно остальных пар
+    'illiquid_volume_z': -1.5,     # Низкий объем относительно остальных пар
+    'stale_scans': 3,              # Подряд сканов без сигнала - пара "застыла"
+    # Множители частоты сканирования
+    'boosts': {
+        'high_score': 3.0,
+        'held': 2.0,
+        'volatility_spike': 2.0,
+        'near_threshold': 2.0,
+        'stale': 0.5,
+        'illiquid': 0.25,
+    },
+}
+
+# Candle Events Configuration (событийный скан по закрытию свечей)
+CANDLE_EVENTS_CONFIG = {
+    'enabled': False,              # True - вместо паузы между сканами переоценка по закрытию свечей
+    'source': 'clock',             # clock - локальные часы границ, stream - поток свечей биржи
+    'interval': '15m',             # Интервал свечей индикаторов скана
+    'settle_sec': 3.0,             # clock: пауза после границы, чтобы биржа закрыла свечу
+    'debounce_sec': 2.0,           # Сбор пар одной границы в пачку
+    'max_batch': 200,              # Пачка такого размера отправляется без ожидания
+    'max_symbols': 80,             # Отслеживаемых пар (отбор префильтром + открытые позиции)
+    'universe_refresh_sec': 600,   # Как часто обновлять список отслеживаемых пар
+}
+
+# Market Scan Prefilter Configuration (этап 1: отбор по bulk 24h тикерам)
+MARKET_SCAN_PREFILTER_CONFIG = {
+    'enabled': True,
+    'top_k': 80,                  # Сколько пар отправлять в полный анализ
+    # Жесткая отсечка - только там, где анти-хайп фильтр блокирует полностью:
+    # ближе daily_high_block_threshold (0.2%) к хаю. Хай 24h тикера не ниже хая
+    # UTC-суток фильтра, поэтому расстояние по тикеру не меньше, чем у фильтра.
+    'min_dist_to_high_pct': 0.2,
+    # Остальные признаки фильтр не проверяет (у него изменение за 4h против ATR) -
+    # они только ранжируют; число включает отсечку (None - выключена)
+    'max_range_position': None,   # Например 0.9 - верхние 10% дневного диапазона
+    'min_change_pct': None,       # Обвал за 24ч
+    'max_change_pct': None,       # Памп за 24ч
+    'min_volume_z': None,         # Аномально низкий объем относительно остальных пар
+    # Веса ранжирования: ниже в диапазоне и больше объем - выше в очереди
+    'weights': {
+        'range_position': -2.0,
+        'change_pct': -0.05,
+        'volume_z': 0.5,
+        'dist_to_high_pct': 0.05,
+    },
+}
@@ -0,0 +1,242 @@
+#!/usr/bin/env python3
+"""
+Журнал решений анти-хайп фильтров
+Каждая проверка покупки - одна запись фиксированной ширины: входные данные
+(цена, дневной хай, ATR, RSI, EMA...), значение и порог каждого правила,
+маски проверенных и сработавших правил, вердикт и множитель. Записи копятся
+в памяти и дописываются в файл суток (UTC) пачкой, а не форматируются в
+строки лога на каждой проверке. Строки (символы, типы блокировок) хранятся
+в append-only словаре, как в истории сканов.
+
+Разбор: FilterDecisionLog.summarize(days) или utils/query_filter_decisions.py.
+"""
+
+import atexit
+import logging
+import os
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from config import FILTER_DECISION_LOG_CONFIG
+
+logger = logging.getLogger(__name__)
+
+FILTERS = ('anti_hype', 'rebalancer')
+INPUTS = ('price', 'daily_high', 'atr', 'rsi', 'ema20', 'ema200', 'change_4h', 'ath', 'recent_high', 'volume_ratio')
+# Правила в порядке проверки; значение и порог каждого правила пишутся в слот с его номером
+RULES = {
+    'anti_hype': ('daily_high_block', 'daily_high_limit', 'impulse', 'overbought_rsi', 'overbought_ema',
+                  'bear_trend', 'dca_fall', 'dca_rsi', 'normal_rsi'),
+    'rebalancer': ('daily_high_block', 'daily_high_limit', 'ath', 'recent_high', 'volume_hype', 'impulse',
+                   'overbought_rsi', 'overbought_ema', 'bear_trend', 'dca_fall', 'dca_rsi', 'normal_rsi'),
+}
+MAX_RULES = 16
+
+RECORD = np.dtype([
+    ('ts', '<i8'),
+    ('filter', 'u1'),
+    ('allowed', 'u1'),
+    ('evaluated', '<u2'),   # Битовая маска правил, для которых были данные
+    ('fired', '<u2'),       # Битовая маска сработавших условий правил
+    ('symbol', '<u4'),      # Индекс строки в словаре
+    ('block_type', '<u4'),
+    ('multiplier', '<f4'),
+    ('inputs', '<f4', (len(INPUTS),)),
+    ('values', '<f4', (MAX_RULES,)),
+    ('thresholds', '<f4', (MAX_RULES,)),
+])
+
+Rule = Tuple[Optional[float], Optional[float], str]  # (значение, порог, '<' или '>')
+
+
+def _day_file(path: str, day: str) -> str:
+    return os.path.join(path, f"{day}.bin")
+
+
+def _utc_day(ts_ms: int) -> str:
+    return datetime.fromtimestamp(ts_ms / 1000, tz=timezone.utc).strftime('%Y-%m-%d')
+
+
+class FilterDecisionLog:
+    """Буферизованный append-only журнал решений фильтров"""
+
+    def __init__(self, path: Optional[str] = None, flush_records: Optional[int] = None,
+                 flush_sec: Optional[float] = None):
+        """
+        Args:
+            path: Каталог журнала (<YYYY-MM-DD>.bin + strings.txt)
+            flush_records: Сбрасывать буфер на диск при таком числе записей
+            flush_sec: ...или если с прошлого сброса прошло столько секунд
+        """
+        self.path = path or FILTER_DECISION_LOG_CONFIG.get('path', 'filter_decisions')
+        self.flush_records = flush_records or FILTER_DECISION_LOG_CONFIG.get('flush_records', 256)
+        self.flush_sec = flush_sec or FILTER_DECISION_LOG_CONFIG.get('flush_sec', 10)
+        self.strings_file = os.path.join(self.path, 'strings.txt')
+        self._lock = threading.Lock()
+        self._buffer = np.zeros(self.flush_records, dtype=RECORD)
+        self._pending = 0
+        self._new_strings: List[str] = []
+        self._last_flush = time.time()
+        self._strings: List[str] = ['']
+        self._string_index: Dict[str, int] = {'': 0}
+        os.makedirs(self.path, exist_ok=True)
+        if os.path.exists(self.strings_file):
+            with open(self.strings_file, encoding='utf-8') as f:
+                for line in f:
+                    self._string_index[line.rstrip('\n')] = len(self._strings)
+                    self._strings.append(line.rstrip('\n'))
+
+    def _intern(self, value: str) -> int:
+        """Индекс строки в словаре (вызывается под self._lock)"""
+        value = (value or '').replace('\n', ' ')
+        idx = self._string_index.get(value)
+        if idx is None:
+            idx = len(self._strings)
+            self._string_index[value] = idx
+            self._strings.append(value)
+            self._new_strings.append(value)
+        return idx
+
+    ############################################################
+    # ✍️ ЗАПИСЬ
+    ############################################################
+    def record(self, filter_name: str, symbol: str, result: Dict, inputs: Dict[str, float],
+               rules: Sequence[Rule], ts_ms: Optional[int] = None):
+        """Добавить решение фильтра в буфер.
+
+        Args:
+            inputs: Значения из INPUTS (отсутствующие - NaN)
+            rules: (значение, порог, сравнение) в порядке RULES[filter_name];
+                None в значении или пороге - правило не проверялось
+        """
+        ts_ms = int(time.time() * 1000) if ts_ms is None else ts_ms
+        with self._lock:
+            row = self._buffer[self._pending]
+            row['ts'] = ts_ms
+            row['filter'] = FILTERS.index(filter_name)
+            row['allowed'] = bool(result.get('allowed', True))
+            row['multiplier'] = result.get('multiplier') or 0.0
+            row['symbol'] = self._intern(symbol)
+            row['block_type'] = self._intern(result.get('block_type') or result.get('reason') or '')
+            row['inputs'] = [np.nan if inputs.get(name) is None else inputs[name] for name in INPUTS]
+            values = np.full(MAX_RULES, np.nan, dtype=np.float32)
+            thresholds = np.full(MAX_RULES, np.nan, dtype=np.float32)
+            evaluated = fired = 0
+            for i, (value, threshold, op) in enumerate(rules):
+                if value is None or threshold is None or not np.isfinite(value) or not np.isfinite(threshold):
+                    continue
+                values[i], thresholds[i] = value, threshold
+                evaluated |= 1 << i
+                if (value < threshold) if op == '<' else (value > threshold):
+                    fired |= 1 << i
+            row['values'], row['thresholds'] = values, thresholds
+            row['evaluated'], row['fired'] = evaluated, fired
+            self._pending += 1
+            if self._pending >= len(self._buffer) or time.time() - self._last_flush >= self.flush_sec:
+                self._flush_locked()
+
+    def flush(self):
+        """Дописать буфер на диск"""
+        with self._lock:
+            self._flush_locked()
+
+    def _flush_locked(self):
+        self._last_flush = time.time()
+        if not self._pending:
+            return
+        try:
+            # Сначала словарь строк, затем записи - записи не ссылаются на незаписанные строки
+            if self._new_strings:
+                with open(self.strings_file, 'a', encoding='utf-8') as f:
+                    f.write(''.join(f"{value}\n" for value in self._new_strings))
+                self._new_strings = []
+            rows = self._buffer[:self._pending]
+            days = np.array([_utc_day(int(ts)) for ts in rows['ts']])
+            for day in dict.fromkeys(days):
+                with open(_day_file(self.path, day), 'ab') as f:
+                    f.write(rows[days == day].tobytes())
+        except OSError as e:
+            logger.error(f"❌ Ошибка записи журнала решений фильтров: {e}")
+        self._pending = 0
+
+    ############################################################
+    # 📖 ЧТЕНИЕ
+    ############################################################
+    def load(self, days: int = 1, now: Optional[float] = None) -> np.ndarray:
+        """Записи за последние days суток (UTC), включая несброшенный буфер"""
+        self.flush()
+        today = datetime.fromtimestamp(time.time() if now is None else now, tz=timezone.utc)
+        chunks = []
+        for back in range(days - 1, -1, -1):
+            path = _day_file(self.path, (today - timedelta(days=back)).strftime('%Y-%m-%d'))
+            if os.path.exists(path):
+                raw = np.fromfile(path, dtype=np.uint8)
+                usable = len(raw) - len(raw) % RECORD.itemsize  # Недописанный хвост отбрасывается
+                chunks.append(raw[:usable].view(RECORD))
+        return np.concatenate(chunks) if chunks else np.zeros(0, dtype=RECORD)
+
+    def string(self, idx: int) -> str:
+        return self._strings[idx] if 0 <= idx < len(self._strings) else ''
+
+    def summarize(self, days: int = 1, filter_name: Optional[str] = None, symbol: Optional[str] = None,
+                  now: Optional[float] = None) -> Dict:
+        """Сводка за days суток: вердикты, причины блокировок, срабатывания правил.
+
+        Returns:
+            {'total', 'allowed', 'blocked', 'block_types': {тип: число},
+             'rules': {фильтр: {правило: {'evaluated', 'fired', 'hit_rate'}}},
+             'blocked_symbols': {символ: число}}
+        """
+        records = self.load(days, now)
+        if filter_name is not None:
+            records = records[records['filter'] == FILTERS.index(filter_name)]
+        if symbol is not None:
+            records = records[records['symbol'] == self._string_index.get(symbol, -1)]
+        blocked = records[records['allowed'] == 0]
+
+        def counts(column) -> Dict[str, int]:
+            ids, n = np.unique(column, return_counts=True)
+            order = np.argsort(-n, kind='stable')
+            return {self.string(int(ids[i])): int(n[i]) for i in order}
+
+        rules = {}
+        for f_idx, name in enumerate(FILTERS):
+            rows = records[records['filter'] == f_idx]
+            if not len(rows):
+                continue
+            stats = {}
+            for bit, rule in enumerate(RULES[name]):
+                evaluated = int(np.count_nonzero(rows['evaluated'] & (1 << bit)))
+                fired = int(np.count_nonzero(rows['fired'] & (1 << bit)))
+                stats[rule] = {'evaluated': evaluated, 'fired': fired,
+                               'hit_rate': fired / evaluated if evaluated else 0.0}
+            rules[name] = stats
+        return {
+            'total': int(len(records)),
+            'allowed': int(len(records) - len(blocked)),
+            'blocked': int(len(blocked)),
+            'block_types': counts(blocked['block_type']),
+            'rules': rules,
+            'blocked_symbols': counts(blocked['symbol']),
+        }
+
+
+# Глобальный журнал решений
+_decision_log: Optional[FilterDecisionLog] = None
+_decision_log_lock = threading.Lock()
+
+
+def get_decision_log() -> Optional[FilterDecisionLog]:
+    """Получить журнал решений процесса (None - журнал выключен в конфиге)"""
+    global _decision_log
+    if not FILTER_DECISION_LOG_CONFIG.get('enabled', True):
+        return None
+    with _decision_log_lock:
+        if _decision_log is None:
+            _decision_log = FilterDecisionLog()
+            atexit.register(_decision_log.flush)
+        return _decision_log
@@ -0,0 +1,412 @@
+"""
+Вычислительные ядра рекурсивных индикаторов
+EMA, сглаживание Уайлдера (RSI/ATR), скользящее среднее и VPT.
+
+Два бэкенда с одинаковыми результатами:
+- numpy: векторизованная линейная рекуррентность (блочная закрытая форма)
+- numba: JIT-компиляция простых циклов, если numba установлена
+
+JIT-ядра компилируются в фоне (warmup при старте); пока компиляция не
+завершена, вызовы обслуживает numpy, поэтому первый скан не ждет компилятор.
+Время выполнения каждого ядра собирается отдельно по бэкендам.
+"""
+
+import logging
+import threading
+import time
+from typing import Dict, Optional
+
+import numpy as np
+
+from config import INDICATOR_KERNELS_CONFIG
+
+try:
+    import numba
+except ImportError:  # numba - необязательная зависимость
+    numba = None
+
+logger = logging.getLogger(__name__)
+
+
+# ---------------------------------------------------------------------------
+# NumPy бэкенд
+# ---------------------------------------------------------------------------
+
+def _linear_recurrence(u: np.ndarray, decay: float, init: float = 0.0) -> np.ndarray:
+    """y[t] = decay * y[t-1] + u[t], y[-1] = init.
+
+    Внутри блока y[s+j] = decay^j * (decay*y[s-1] + sum_i u[s+i] * decay^-i);
+    длина блока ограничена так, чтобы decay^-i не переполнялся.
+    """
+    n = u.size
+    out = np.empty(n)
+    if n == 0:
+        return out
+    if decay == 0.0:
+        out[:] = u
+        return out
+
+    block = min(n, max(1, int(100 / -np.log10(decay))))
+    k = np.arange(block)
+    grow = decay ** -k.astype(float)
+    shrink = decay ** k.astype(float)
+
+    prev = init
+    for start in range(0, n, block):
+        m = min(block, n - start)
+        out[start:start + m] = shrink[:m] * (decay * prev + np.cumsum(u[start:start + m] * grow[:m]))
+        prev = out[start + m - 1]
+    return out
+
+
+def _ema_adjusted_np(x: np.ndarray, alpha: float) -> np.ndarray:
+    decay = 1.0 - alpha
+    num = _linear_recurrence(x, decay)
+    if decay == 0.0:
+        return num
+    den = (1.0 - decay ** np.arange(1, x.size + 1)) / alpha
+    return num / den
+
+
+def _ema_seeded_np(x: np.ndarray, alpha: float) -> np.ndarray:
+    if x.size == 0:
+        return x.copy()
+    u = x * alpha
+    u[0] = x[0]
+    return _linear_recurrence(u, 1.0 - alpha)
+
+
+def _first_finite(x: np.ndarray) -> int:
+    finite = np.isfinite(x)
+    return int(np.argmax(finite)) if finite.any() else x.size
+
+
+def _wilder_np(x: np.ndarray, period: int) -> np.ndarray:
+    out = np.full(x.size, np.nan)
+    start = _first_finite(x)
+    seed_end = start + period
+    if seed_end > x.size:
+        return out
+    seed = x[start:seed_end].mean()
+    out[seed_end - 1] = seed
+    out[seed_end:] = _linear_recurrence(x[seed_end:] / period, (period - 1) / period, seed)
+    return out
+
+
+def _rolling_mean_np(x: np.ndarray, window: int) -> np.ndarray:
+    out = np.full(x.size, np.nan)
+    if x.size >= window:
+        out[window - 1:] = np.lib.stride_tricks.sliding_window_view(x, window).mean(axis=1)
+    return out
+
+
+def _vpt_np(close: np.ndarray, volume: np.ndarray) -> np.ndarray:
+    out = np.full(close.size, np.nan)
+    if close.size < 2:
+        return out
+    terms = volume[1:] * (np.diff(close) / close[:-1])
+    out[1:] = np.where(np.isnan(terms), np.nan, np.nancumsum(terms))
+    return out
+
+
+# ---------------------------------------------------------------------------
+# Циклы для numba (без numba не используются)
+# ---------------------------------------------------------------------------
+
+def _ema_adjusted_loop(x, alpha):
+    n = x.size
+    out = np.empty(n)
+    decay = 1.0 - alpha
+    num = 0.0
+    den = 0.0
+    for i in range(n):
+        num = x[i] + decay * num
+        den = 1.0 + decay * den
+        out[i] = num / den
+    return out
+
+
+def _ema_seeded_loop(x, alpha):
+    n = x.size
+    out = np.empty(n)
+    if n == 0:
+        return out
+    ema = x[0]
+    out[0] = ema
+    for i in range(1, n):
+        ema = (x[i] * alpha) + (ema * (1 - alpha))
+        out[i] = ema
+    return out
+
+
+def _wilder_loop(x, period):
+    n = x.size
+    out = np.full(n, np.nan)
+    start = 0
+    while start < n and not np.isfinite(x[start]):
+        start += 1
+    seed_end = start + period
+    if seed_end > n:
+        return out
+    total = 0.0
+    for i in range(start, seed_end):
+        total += x[i]
+    value = total / period
+    out[seed_end - 1] = value
+    for i in range(seed_end, n):
+        value = (value * (period - 1) + x[i]) / period
+        out[i] = value
+    return out
+
+
+def _rolling_mean_loop(x, window):
+    n = x.size
+    out = np.full(n, np.nan)
+    for i in range(window - 1, n):
+        total = 0.0
+        for j in range(i - window + 1, i + 1):
+            total += x[j]
+        out[i] = total / window
+    return out
+
+
+def _vpt_loop(close, volume):
+    n = close.size
+    out = np.full(n, np.nan)
+    acc = 0.0
+    for i in range(1, n):
+        term = volume[i] * ((close[i] - close[i - 1]) / close[i - 1])
+        if np.isnan(term):
+            continue
+        acc += term
+        out[i] = acc
+    return out
+
+
+_NUMPY_KERNELS = {
+    'ema': _ema_adjusted_np,
+    'ema_seeded': _ema_seeded_np,
+    'wilder': _wilder_np,
+    'rolling_mean': _rolling_mean_np,
+    'vpt': _vpt_np,
+}
+
+_LOOP_KERNELS = {
+    'ema': _ema_adjusted_loop,
+    'ema_seeded': _ema_seeded_loop,
+    'wilder': _wilder_loop,
+    'rolling_mean': _rolling_mean_loop,
+    'vpt': _vpt_loop,
+}
+
+# Аргументы для прогрева/бенчмарка каждого ядра
+_SAMPLE_ARGS = {
+    'ema': lambda x, v: (x, 2 / 13),
+    'ema_seeded': lambda x, v: (x, 2 / 21),
+    'wilder': lambda x, v: (x, 14),
+    'rolling_mean': lambda x, v: (x, 14),
+    'vpt': lambda x, v: (x, v),
+}
+
+
+# ---------------------------------------------------------------------------
+# Диспетчер
+# ---------------------------------------------------------------------------
+
+class KernelRegistry:
+    """Выбор бэкенда, фоновая компиляция JIT и статистика по ядрам"""
+
+    def __init__(self, backend: str = 'auto'):
+        """
+        Args:
+            backend: 'auto' (numba, если есть), 'numba' или 'numpy'
+        """
+        self.requested_backend = backend
+        self._jit_kernels: Dict[str, object] = {}
+        self._jit_ready = threading.Event()
+        self._warmup_thread: Optional[threading.Thread] = None
+        self._stats_lock = threading.Lock()
+        self.compile_ms: Dict[str, float] = {}
+        self.reset_stats()
+
+        if backend == 'numba' and numba is None:
+            logger.warning("⚠️ numba не установлена - ядра индикаторов работают на numpy")
+        if self.jit_available:
+            self._jit_kernels = {name: numba.njit(cache=True, nogil=True)(fn)
+                                 for name, fn in _LOOP_KERNELS.items()}
+
+    @property
+    def jit_available(self) -> bool:
+        return numba is not None and self.requested_backend in ('auto', 'numba')
+
+    @property
+    def backend(self) -> str:
+        """Бэкенд, который сейчас обслуживает вызовы"""
+        return 'numba' if self._jit_ready.is_set() else 'numpy'
+
+    def reset_stats(self):
+        with self._stats_lock:
+            self.stats = {backend: {name: {'calls': 0, 'total_ms': 0.0} for name in _NUMPY_KERNELS}
+                          for backend in ('numpy', 'numba')}
+
+    def get_stats(self) -> Dict:
+        """Накопленное время по ядрам для каждого бэкенда"""
+        with self._stats_lock:
+            stats = {backend: {name: dict(s, avg_us=(s['total_ms'] * 1000 / s['calls'] if s['calls'] else 0.0))
+                               for name, s in kernels.items()}
+                     for backend, kernels in self.stats.items()}
+        return {'backend': self.backend, 'jit_available': self.jit_available,
+                'compile_ms': dict(self.compile_ms), 'kernels': stats}
+
+    def run(self, name: str, *args) -> np.ndarray:
+        backend = self.backend
+        fn = self._jit_kernels[name] if backend == 'numba' else _NUMPY_KERNELS[name]
+        start = time.perf_counter()
+        result = fn(*args)
+        elapsed = (time.perf_counter() - start) * 1000
+        with self._stats_lock:
+            entry = self.stats[backend][name]
+            entry['calls'] += 1
+            entry['total_ms'] += elapsed
+        return result
+
+    def _compile_all(self):
+        x = np.linspace(1.0, 2.0, 64)
+        v = np.ones(64)
+        try:
+            for name, kernel in self._jit_kernels.items():
+                start = time.perf_counter()
+                kernel(*_SAMPLE_ARGS[name](x, v))
+                self.compile_ms[name] = (time.perf_counter() - start) * 1000
+            self._jit_ready.set()
+            total = sum(self.compile_ms.values())
+            logger.info(f"⚡ JIT-ядра индикаторов готовы за {total:.0f} мс")
+            timings = benchmark_kernels(registry=self)
+            logger.info("⏱️ Ядра (мкс, numpy/numba): " + ", ".join(
+                f"{name} {t['numpy']:.1f}/{t.get('numba', 0):.1f}" for name, t in timings.items()))
+        except Exception as e:
+            logger.error(f"Ошибка компиляции JIT-ядер, остаемся на numpy: {e}")
+
+    def warmup(self, background: bool = True) -> Optional[threading.Thread]:
+        """Скомпилировать JIT-ядра (по умолчанию в фоновом потоке)"""
+        if not self.jit_available or self._jit_ready.is_set():
+            return None
+        if not background:
+            self._compile_all()
+            return None
+        if self._warmup_thread is None:
+            self._warmup_thread = threading.Thread(target=self._compile_all, name='kernel-warmup', daemon=True)
+            self._warmup_thread.start()
+        return self._warmup_thread
+
+    def wait_ready(self, timeout: Optional[float] = None) -> bool:
+        """Дождаться завершения компиляции (для тестов и бенчмарков)"""
+        return self._jit_ready.wait(timeout)
+
+
+def benchmark_kernels(size: int = 1000, repeat: int = 50, registry: Optional[KernelRegistry] = None) -> Dict:
+    """Время одного вызова каждого ядра (мкс, лучший прогон) для обоих бэкендов"""
+    registry = registry or kernels
+    rng = np.random.default_rng(0)
+    x = 100 * np.exp(np.cumsum(rng.normal(0, 0.01, size)))
+    v = rng.lognormal(8, 0.5, size)
+    backends = {'numpy': _NUMPY_KERNELS}
+    if registry._jit_ready.is_set():
+        backends['numba'] = registry._jit_kernels
+
+    results = {}
+    for name in _NUMPY_KERNELS:
+        args = _SAMPLE_ARGS[name](x, v)
+        results[name] = {}
+        for backend, table in backends.items():
+            fn = table[name]
+            best = float('inf')
+            for _ in range(repeat):
+                start = time.perf_counter()
+                fn(*args)
+                best = min(best, time.perf_counter() - start)
+            results[name][backend] = best * 1e6
+    return results
+
+
+kernels = KernelRegistry(INDICATOR_KERNELS_CONFIG.get('backend', 'auto'))
+
+
+def get_kernels() -> KernelRegistry:
+    """Получить общий реестр ядер"""
+    return kernels
+
+
+def warmup(background: bool = True) -> Optional[threading.Thread]:
+    """Фоновая компиляция JIT-ядер при старте процесса"""
+    return kernels.warmup(background)
+
+
+def _as_float(values) -> np.ndarray:
+    return np.ascontiguousarray(values, dtype=np.float64)
+
+
+def ema(values, span: int) -> np.ndarray:
+    """EMA как pandas ewm(span=span, adjust=True).mean() (без NaN во входе)"""
+    return kernels.run('ema', _as_float(values), 2.0 / (span + 1))
+
+
+def ema_seeded(values, period: int) -> np.ndarray:
+    """Классическая EMA: старт с первого значения, alpha = 2 / (period + 1)"""
+    return kernels.run('ema_seeded', _as_float(values), 2.0 / (period + 1))
+
+
+def wilder_smooth(values, period: int) -> np.ndarray:
+    """Сглаживание Уайлдера (RMA): старт со средней первых period значений"""
+    return kernels.run('wilder', _as_float(values), int(period))
+
+
+def rolling_mean(values, window: int) -> np.ndarray:
+    """Скользящее среднее (NaN для первых window-1 точек, как pandas rolling)"""
+    return kernels.run('rolling_mean', _as_float(values), int(window))
+
+
+def vpt(close, volume) -> np.ndarray:
+    """Volume Price Trend: накопленная сумма volume * изменение цены"""
+    return kernels.run('vpt', _as_float(close), _as_float(volume))
+
+
+def true_range(high, low, close) -> np.ndarray:
+    """True Range (первый элемент NaN - нет предыдущего close)"""
+    high, low, close = _as_float(high), _as_float(low), _as_float(close)
+    prev_close = np.r_[np.nan, close[:-1]]
+    return np.maximum(high - low, np.maximum(np.abs(high - prev_close), np.abs(low - prev_close)))
+
+
+def rolling_range(values, window: int):
+    """Скользящие минимум и максимум (NaN для первых window-1 точек)"""
+    values = _as_float(values)
+    low = np.full(values.size, np.nan)
+    high = np.full(values.size, np.nan)
+    if values.size >= window:
+        view = np.lib.stride_tricks.sliding_window_view(values, window)
+        low[window - 1:] = view.min(axis=1)
+        high[window - 1:] = view.max(axis=1)
+    return low, high
+
+
+def atr(high, low, close, period: int = 14, wilder: bool = False) -> np.ndarray:
+    """ATR: простое скользящее среднее TR или сглаживание Уайлдера"""
+    tr = true_range(high, low, close)
+    return wilder_smooth(tr, period) if wilder else rolling_mean(tr, period)
+
+
+def wilder_rsi(close, period: int = 14) -> np.ndarray:
+    """RSI Уайлдера (NaN до накопления period изменений)"""
+    close = _as_float(close)
+    out = np.full(close.size, np.nan)
+    if close.size <= period:
+        return out
+    delta = np.diff(close)
+    avg_gain = wilder_smooth(np.where(delta > 0, delta, 0.0), period)
+    avg_loss = wilder_smooth(np.where(delta < 0, -delta, 0.0), period)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        rsi = 100 - 100 / (1 + avg_gain / avg_loss)
+    rsi = np.where(avg_loss == 0, np.where(avg_gain == 0, 50.0, 100.0), rsi)
+    out[1:] = np.where(np.isnan(avg_gain), np.nan, rsi)
+    return out
@@ -14,11 +14,14 @@ from startup_dashboard import StartupDashboard
 from balance_monitor import BalanceMonitor
 from pnl_monitor import PnLMonitor
 from auto_purchase_config import get_config
-from config import PNL_MONITOR_CONFIG
+from config import PNL_MONITOR_CONFIG, INDICATOR_KERNELS_CONFIG, VERDICT_TABLE_CONFIG
 from alt_monitor import AltsMonitor
 # from stablecoin_balancer import StablecoinBalancer
 from market_scanner import MarketScanner
 from active_50_50_balancer import Active5050Balancer
+import indicator_kernels
+from cache.market_data_cache import get_market_data_cache
+from verdict_table import get_verdict_table
 
 # Настройка логирования
 logging.basicConfig(
@@ -115,6 +118,7 @@ def start_market_scanner():
         
         # Запускаем сканирование в отдельном потоке
         def run_scanner():
+            scanner.start_cpu_pool()  # Прогрев воркеров индикаторов до первого скана
             asyncio.run(scanner.start_scanning())
         
         scanner_thread = threading.Thread(target=run_scanner, daemon=True)
@@ -135,6 +139,14 @@ def main():
         dashboard = StartupDashboard()
         dashboard.send_startup_notification()
         
+        # JIT-ядра индикаторов компилируются в фоне, до готовности работает numpy
+        if INDICATOR_KERNELS_CONFIG.get('precompile_on_startup', True):
+            indicator_kernels.warmup(background=True)
+        
+        # Вердикты анти-хайп фильтра пересчитываются в фоне на границах свечей
+        if VERDICT_TABLE_CONFIG.get('enabled', True):
+            get_verdict_table().start()
+        
         # Запускаем сканер рынка для автоматических покупок
         start_market_scanner()
         
@@ -209,6 +221,9 @@ def main():
         # Держим главный поток живым, чтобы PM2 не перезапускал процесс
         while True:
             time.sleep(3600)
+            # Сколько запросов рыночных данных сервисы получили без обращения к бирже
+            logger.info(get_market_data_cache().format_report())
+            logger.info(f"🗂️ Вердикты фильтра: {get_verdict_table().get_stats()}")
         
     except KeyboardInterrupt:
         logger.info("🛑 Бот остановлен пользователем")
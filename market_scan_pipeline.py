@@ -0,0 +1,250 @@
+#!/usr/bin/env python3
+"""
+Асинхронный конвейер сканирования рынка
+Этапы: universe -> fetch -> indicators -> filter -> score
+
+У каждого этапа своя степень параллелизма и таймаут. Блокирующие вызовы
+(HTTP через MexAPI, расчет индикаторов, анти-хайп фильтр) выполняются в
+отдельном пуле потоков этапа, поэтому медленная загрузка свечей одного
+символа не держит расчеты по остальным. Цены берутся из одного bulk-запроса
+24h тикеров (этап universe) вместо отдельного запроса на символ. Анти-хайп
+фильтр и скоринг выполняются одним пакетным вызовом по всем
+проанализированным парам.
+"""
+
+import asyncio
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional
+
+from config import MARKET_SCAN_PIPELINE_CONFIG
+
+logger = logging.getLogger(__name__)
+
+STAGES = ('universe', 'fetch', 'indicators', 'filter', 'score')
+
+
+class StageTimeout(Exception):
+    """Этап не уложился в таймаут"""
+
+
+@dataclass
+class StageConfig:
+    """Параметры этапа: число параллельных задач и таймаут одной задачи (сек)"""
+    concurrency: int
+    timeout: float
+
+
+class MarketScanPipeline:
+    """Конвейер сканирования поверх компонентов MarketScanner"""
+
+    def __init__(self, scanner, config: Optional[Dict] = None):
+        """
+        Args:
+            scanner: MarketScanner (источник свечей, индикаторы, фильтр, скоринг)
+            config: Настройки конвейера (по умолчанию MARKET_SCAN_PIPELINE_CONFIG)
+        """
+        self.scanner = scanner
+        config = config or MARKET_SCAN_PIPELINE_CONFIG
+        self.stages = {name: StageConfig(**params) for name, params in config['stages'].items()}
+        self.fetch_attempts = config.get('fetch_attempts', 3)
+        self.retry_delay = config.get('retry_delay', 0.4)
+        self.min_klines = config.get('min_klines', 20)
+
+        # Отдельный пул потоков на каждый блокирующий этап
+        self._pools = {
+            name: ThreadPoolExecutor(max_workers=stage.concurrency, thread_name_prefix=f'scan-{name}')
+            for name, stage in self.stages.items() if name != 'score'
+        }
+        self._semaphores: Dict[str, asyncio.Semaphore] = {}
+        self.reset_stats()
+
+    def reset_stats(self):
+        """Сбросить статистику этапов (в начале каждого скана)"""
+        self.stage_stats = {name: {'calls': 0, 'total_sec': 0.0, 'max_sec': 0.0, 'timeouts': 0, 'errors': 0}
+                            for name in STAGES}
+
+    def _record(self, stage: str, elapsed: float, outcome: Optional[str] = None):
+        stats = self.stage_stats[stage]
+        stats['calls'] += 1
+        stats['total_sec'] += elapsed
+        stats['max_sec'] = max(stats['max_sec'], elapsed)
+        if outcome:
+            stats[outcome] += 1
+
+    async def _run_stage(self, stage: str, fn: Callable, *args, symbol: Optional[str] = None,
+                         timeout: Optional[float] = None):
+        """Выполнить блокирующую функцию в пуле этапа с ограничением и таймаутом"""
+        config = self.stages[stage]
+        timeout = timeout or config.timeout
+        metrics = self.scanner.metrics
+        async with self._semaphores[stage]:
+            start = time.perf_counter()
+            try:
+                if stage == 'score':
+                    # Скоринг - чистая арифметика, выполняется прямо в цикле событий
+                    result = fn(*args)
+                else:
+                    loop = asyncio.get_running_loop()
+                    result = await asyncio.wait_for(loop.run_in_executor(self._pools[stage], fn, *args),
+                                                    timeout=timeout)
+            except asyncio.TimeoutError:
+                self._record(stage, time.perf_counter() - start, 'timeouts')
+                metrics.record(stage, time.perf_counter() - start, symbol)
+                metrics.count_event(stage, 'timeouts')
+                raise StageTimeout(f"{stage}: превышен таймаут {timeout} сек")
+            except Exception:
+                self._record(stage, time.perf_counter() - start, 'errors')
+                metrics.count_event(stage, 'errors')
+                raise
+            self._record(stage, time.perf_counter() - start)
+            metrics.record(stage, time.perf_counter() - start, symbol)
+            return result
+
+    async def _fetch(self, symbol: str):
+        """Свечи символа с ретраями без блокировки цикла событий"""
+        scanner = self.scanner
+        for attempt in range(self.fetch_attempts):
+            klines = await self._run_stage('fetch', scanner.kline_source.get_klines,
+                                           symbol, '15m', scanner.indicator_window, symbol=symbol)
+            if klines is not None and len(klines) >= self.min_klines:
+                return klines
+            scanner.kline_source.forget(symbol)
+            if attempt < self.fetch_attempts - 1:
+                scanner.metrics.count_retry('fetch', symbol)
+                await asyncio.sleep(self.retry_delay)
+        return None
+
+    def _price(self, symbol: str, klines) -> Optional[float]:
+        """Цена из снимка 24h тикеров (fallback - close последней свечи)"""
+        ticker = self.scanner.ticker_snapshot.get(symbol)
+        if ticker:
+            try:
+                price = float(ticker.get('lastPrice') or 0)
+                if price > 0:
+                    return price
+            except (TypeError, ValueError):
+                pass
+        return float(klines.close[-1]) if hasattr(klines, 'close') else float(klines[-1][4])
+
+    async def _process(self, symbol: str) -> Optional[tuple]:
+        """Этапы fetch -> indicators; результат - вход пакетного фильтра"""
+        scanner = self.scanner
+        klines = await self._fetch(symbol)
+        if klines is None:
+            return None
+        # CPU-этап: в пуле процессов, если он включен, иначе в потоках этапа
+        calculate = (scanner.cpu_pool.compute_indicators if scanner.cpu_pool is not None
+                     else scanner.tech_indicators.calculate_all_indicators)
+        indicators = await self._run_stage('indicators', calculate, klines, symbol, symbol=symbol)
+        if not indicators:
+            return None
+        return symbol, self._price(symbol, klines), indicators
+
+    async def _filter(self, items: List[tuple]) -> List[tuple]:
+        """Этап filter: одна пакетная проверка анти-хайп фильтра (при ошибке - по одной)"""
+        if not items:
+            return []
+        anti_hype = self.scanner.anti_hype_filter
+        table = getattr(self.scanner, 'verdicts', None)  # Готовые вердикты; синхронно - только недостающие
+        check_batch = anti_hype.check_buy_permission_batch if table is None else (
+            lambda symbols, workers: table.check_buy_permission_batch(symbols, workers, fallback=anti_hype))
+        check_one = anti_hype.check_buy_permission if table is None else (
+            lambda symbol: table.check_buy_permission(symbol, fallback=anti_hype))
+        stage = self.stages['filter']
+        symbols = [item[0] for item in items]
+        try:
+            # Таймаут пачки - как у последовательных волн одиночных проверок
+            waves = -(-len(symbols) // max(1, stage.concurrency))
+            verdicts = await self._run_stage('filter', check_batch, symbols,
+                                             stage.concurrency, timeout=stage.timeout * waves)
+            return [item + (verdicts[item[0]],) for item in items]
+        except Exception as e:
+            logger.error(f"Ошибка пакетного анти-хайп фильтра: {e}")
+
+        async def single(item):
+            try:
+                return item + (await self._run_stage('filter', check_one, item[0], symbol=item[0]),)
+            except StageTimeout as e:
+                logger.warning(f"⏱️ {item[0]}: {e}")
+            except Exception as e:
+                logger.error(f"Ошибка анти-хайп фильтра {item[0]}: {e}")
+            return None
+
+        checked = await asyncio.gather(*(single(item) for item in items))
+        return [item for item in checked if item is not None]
+
+    async def _score(self, items: List[tuple]) -> List[Optional[Dict]]:
+        """Этап score: одна векторная оценка всех пар (при ошибке - по одной)"""
+        if not items:
+            return []
+        try:
+            return await self._run_stage('score', self.scanner.score_batch, items)
+        except Exception as e:
+            logger.error(f"Ошибка пакетного скоринга: {e}")
+        results = []
+        for item in items:
+            try:
+                results.append(self.scanner.score_pair(*item))
+            except Exception as e:
+                logger.error(f"Ошибка скоринга {item[0]}: {e}")
+                results.append(None)
+        return results
+
+    async def _process_safe(self, symbol: str) -> Optional[tuple]:
+        try:
+            return await self._process(symbol)
+        except StageTimeout as e:
+            logger.warning(f"⏱️ {symbol}: {e}")
+        except Exception as e:
+            logger.error(f"Ошибка анализа {symbol}: {e}")
+        return None
+
+    async def run(self, symbols: Optional[List[str]] = None) -> Dict:
+        """Полный скан; результат в формате MarketScanner.scan_market + время этапов"""
+        scanner = self.scanner
+        started = time.perf_counter()
+        self.reset_stats()
+        scanner.metrics.begin_scan()
+        self._semaphores = {name: asyncio.Semaphore(max(1, stage.concurrency))
+                            for name, stage in self.stages.items()}
+
+        if symbols is None:
+            try:
+                await self._run_stage('universe', scanner.update_trading_pairs)
+            except Exception as e:
+                logger.error(f"Ошибка обновления торговых пар: {e}")
+            universe = scanner.trading_pairs
+            # Этап 1: дешевый отсев по уже загруженным 24h тикерам
+            symbols, prefilter = scanner.prefilter_pairs(universe)
+        else:
+            universe, prefilter = symbols, None
+        scanner.kline_source.reset_stats()
+        if scanner.cpu_pool is not None:
+            scanner.cpu_pool.reset_stats()
+
+        scan_results = scanner.new_scan_results(len(universe))
+        if prefilter:
+            scan_results['prefilter'] = prefilter
+        prepared = await asyncio.gather(*(self._process_safe(symbol) for symbol in symbols))
+        items = await self._filter([item for item in prepared if item is not None])
+        scored = dict(zip((item[0] for item in items), await self._score(items)))
+        analyses = [scored.get(symbol) for symbol in symbols]
+        for symbol, analysis in zip(symbols, analyses):
+            scanner.classify_analysis(scan_results, symbol, analysis)
+        scanner.finalize_scan_results(scan_results)
+
+        scan_results['wall_time'] = time.perf_counter() - started
+        scan_results['stage_timings'] = {name: dict(stats) for name, stats in self.stage_stats.items()}
+        if scanner.cpu_pool is not None:
+            scan_results['cpu_pool'] = scanner.cpu_pool.get_stats()
+        scan_results['metrics'] = scanner.metrics.summarize()
+        logger.info(f"⏱️ Скан {len(symbols)}/{len(universe)} пар за {scan_results['wall_time']:.2f} сек")
+        return scan_results
+
+    def close(self):
+        """Остановить пулы потоков этапов"""
+        for pool in self._pools.values():
+            pool.shutdown(wait=False)
@@ -19,7 +19,22 @@ from concurrent.futures import ThreadPoolExecutor, as_completed
 from mex_api import MexAPI
 from technical_indicators import TechnicalIndicators
 from anti_hype_filter import AntiHypeFilter
-from config import TELEGRAM_BOT_TOKEN, TELEGRAM_CHAT_ID, EXCLUDED_SYMBOLS, PURCHASE_PCT_OF_USDT, PURCHASE_MIN_USDT, PURCHASE_MAX_USDT
+from verdict_table import get_verdict_table
+from cache.kline_store import get_kline_store
+from cache.kline_resampler import ResamplingKlineSource
+from cache.market_data_cache import get_market_data_cache
+from config import (TELEGRAM_BOT_TOKEN, TELEGRAM_CHAT_ID, PURCHASE_PCT_OF_USDT, PURCHASE_MIN_USDT,
+                    PURCHASE_MAX_USDT, MARKET_SCAN_PIPELINE_CONFIG, MARKET_SCAN_PREFILTER_CONFIG,
+                    SCAN_SCHEDULER_CONFIG, SCAN_HISTORY_CONFIG, CANDLE_EVENTS_CONFIG)
+from market_scan_pipeline import MarketScanPipeline
+from scan_prefilter import prefilter_symbols
+from scan_scheduler import ScanScheduler
+from scan_workers import ScanWorkerPool
+from scan_metrics import get_scan_metrics
+from scan_history import get_scan_history
+from scoring_rules import get_scoring_engine
+from universe_manager import get_universe
+from candle_events import CandleClock, CandleEventDebouncer, StreamCandleBuilder
 from active_50_50_balancer import Active5050Balancer
 
 
@@ -30,24 +45,68 @@ logger = logging.getLogger(__name__)
 class MarketScanner:
     """Фоновый сканер рынка"""
     
-    def __init__(self):
+    def __init__(self, market_data=None):
         ############################################################
         # ⚙️ ИНИЦИАЛИЗАЦИЯ
         # Назначение: клиенты API, индикаторы, фильтры, параметры
         ############################################################
         self.mex_api = MexAPI()
+        # Цены и данные балансировщика - через общий кэш рыночных данных процесса
+        self.market_data = (market_data or get_market_data_cache(self.mex_api)).client('scanner')
         self.tech_indicators = TechnicalIndicators()
-        self.anti_hype_filter = AntiHypeFilter()
-        self.balancer = Active5050Balancer()
+        self.kline_store = get_kline_store()  # Общее хранилище свечей процесса
+        # Один запрос 15m x 1000 на символ; 1h/4h для анти-хайп фильтра строятся локально
+        self.kline_source = ResamplingKlineSource(self.mex_api, base_interval='15m', base_limit=1000)
+        self.anti_hype_filter = AntiHypeFilter(kline_source=self.kline_source)
+        self.verdicts = get_verdict_table()  # Готовые вердикты фильтра (фоновый пересчет)
+        self.balancer = Active5050Balancer(market_data=self.market_data)
         self.bot_token = TELEGRAM_BOT_TOKEN
         self.chat_id = TELEGRAM_CHAT_ID
         
         # Настройки
         self.scan_interval = 600  # 10 минут (увеличено в 2 раза для отчетов)
         self.max_pairs = 200  # Максимум пар для анализа (увеличено с 20 до 200)
+        # 15m свечей для индикаторов (из базового окна без доп. запросов); на 24
+        # свечах ADX и Stoch RSI нейтральны - в скор они не входят
+        self.indicator_window = 24
         
+        # Вселенная торговых пар (exchangeInfo + 24h тикеры, индексы, EXCLUDED_SYMBOLS)
+        self.universe = get_universe(self.mex_api)
         # Торговые пары для анализа (будет заполнено динамически)
         self.trading_pairs = []
+        # Снимок 24h тикеров последнего обновления пар (цены для конвейера скана)
+        self.ticker_snapshot: Dict[str, Dict] = {}
+        # Критерии префильтра (этап 1 скана по 24h тикерам)
+        self.prefilter_config = MARKET_SCAN_PREFILTER_CONFIG
+        
+        # Пул процессов для расчета индикаторов (опционально, прогрев - start_cpu_pool)
+        pool_config = MARKET_SCAN_PIPELINE_CONFIG.get('process_pool', {})
+        self.cpu_pool = (ScanWorkerPool(pool_config.get('workers', 2), pool_config.get('start_method', 'spawn'))
+                         if pool_config.get('enabled', False) else None)
+        
+        # Асинхронный конвейер скана (universe -> fetch -> indicators -> filter -> score)
+        self.pipeline = MarketScanPipeline(self) if MARKET_SCAN_PIPELINE_CONFIG.get('enabled', True) else None
+        
+        # Адаптивный планировщик: пары по приоритету в пределах бюджета запросов
+        self.scheduler_config = SCAN_SCHEDULER_CONFIG
+        self.scheduler = ScanScheduler(SCAN_SCHEDULER_CONFIG) if SCAN_SCHEDULER_CONFIG.get('enabled', True) else None
+        self.held_symbols: List[str] = []
+        self._held_refreshed_at = 0.0
+        self._last_report_at = 0.0
+        self._last_auto_buy_at = 0.0
+        
+        # Событийный скан по закрытию свечей (вместо фиксированной паузы)
+        self.candle_events_config = CANDLE_EVENTS_CONFIG
+        self.candle_debouncer: Optional[CandleEventDebouncer] = None
+        self.watched_symbols: List[str] = []
+        
+        # Декларативные правила скоринга (SCORING_RULES_CONFIG), оценка пачкой
+        self.scoring_engine = get_scoring_engine()
+        
+        # Тайминги этапов скана (p50/p95/max, медленные символы)
+        self.metrics = get_scan_metrics()
+        # История сканов на диске (открывается при первом скане)
+        self.scan_history = None
         
         # Статистика
         self.scan_count = 0
@@ -79,7 +138,6 @@ class MarketScanner:
     ############################################################
     def _build_reasoning(self, opp: Dict) -> Dict[str, str]:
         """Построить развернутые причины и краткосрочный прогноз по возможности покупки."""
-        reasons_verbose = []
         rsi = opp.get('rsi', 50)
         macd = opp.get('macd_signal', 'NEUTRAL')
         vol = opp.get('volume_ratio', 1.0)
@@ -87,20 +145,11 @@ class MarketScanner:
         filt = opp.get('filter_result', {}) or {}
         filt_reason = filt.get('reason')
 
-        if rsi < 30:
-            reasons_verbose.append("RSI < 30 — перепроданность, ожидаем технический отскок")
-        elif rsi < 45:
-            reasons_verbose.append("RSI в нижней зоне — преимущество покупателей при развороте")
-        if bb < 0.2:
-            reasons_verbose.append("Цена у нижней границы Bollinger — вероятен отскок к средней")
-        if vol > 1.5:
-            reasons_verbose.append("Объемы выше нормы — повышенная вероятность импульса")
-        elif vol > 1.2:
-            reasons_verbose.append("Объемы нормализуются — ликвидность достаточна для входа")
-        if macd == 'BUY':
-            reasons_verbose.append("MACD подает сигнал BUY — подтверждение смены импульса")
-        elif macd == 'SELL':
-            reasons_verbose.append("MACD SELL — вход только как контртренд с малым риском")
+        # Причины - по вкладам сработавших правил скоринга
+        if 'contributions' not in opp:
+            opp = {**opp, **self.score_batch([(opp.get('symbol'), opp.get('price'),
+                                               opp.get('indicators') or opp, {'allowed': True})])[0]}
+        reasons_verbose = [f"{text} ({weight:+g})" for text, weight in self.scoring_engine.explain(opp)]
         if filt_reason:
             reasons_verbose.append(f"Анти‑хайп фильтр: {filt_reason}")
 
@@ -148,37 +197,14 @@ class MarketScanner:
         try:
             # logger.info(f"🔍 Получение топ {limit} торговых пар...")
             
-            # Получаем 24h статистику по всем парам
-            try:
-                tickers = self.mex_api.get_24hr_ticker()
-                if not isinstance(tickers, list):
-                    logger.error("Ошибка получения тикеров")
-                    return self.get_fallback_pairs()
-            except Exception as e:
-                logger.error(f"Ошибка получения 24h изменения: {e}")
+            # 24h статистика по всем парам + exchangeInfo (по TTL) во вселенную;
+            # EXCLUDED_SYMBOLS уже применен в ней
+            if not self.universe.refresh():
                 return self.get_fallback_pairs()
+            self.ticker_snapshot = self.universe.ticker_snapshot
             
-            # Фильтруем только USDT пары с достаточным объемом
-            usdt_pairs = []
-            for ticker in tickers:
-                if (ticker['symbol'].endswith('USDT') and 
-                    float(ticker.get('quoteVolume', 0)) > 10000):  # Минимум $10k объема
-                    usdt_pairs.append({
-                        'symbol': ticker['symbol'],
-                        'volume': float(ticker.get('quoteVolume', 0)),
-                        'price': float(ticker.get('lastPrice', 0))
-                    })
-            
-            # Сортируем по объему торгов
-            usdt_pairs.sort(key=lambda x: x['volume'], reverse=True)
-            
-            # Берем топ пар
-            top_pairs = [pair['symbol'] for pair in usdt_pairs[:limit]]
-            
-            # Исключаем символы из глобального списка EXCLUDED_SYMBOLS
-            if EXCLUDED_SYMBOLS:
-                excluded_set = set(EXCLUDED_SYMBOLS)
-                top_pairs = [s for s in top_pairs if s not in excluded_set]
+            # USDT пары с достаточным объемом (минимум $10k), по убыванию объема
+            top_pairs = self.universe.top_by_volume(limit, 'USDT', min_quote_volume=10000)
             
             # logger.info(f"✅ Получено {len(top_pairs)} торговых пар")
             # logger.info(f"📊 Топ-5 по объему: {top_pairs[:5]}")
@@ -209,10 +235,6 @@ class MarketScanner:
         """Обновить список торговых пар"""
         try:
             self.trading_pairs = self.get_top_trading_pairs(self.max_pairs)
-            # Дополнительная страховка: исключаем символы из EXCLUDED_SYMBOLS, если вдруг попали
-            if EXCLUDED_SYMBOLS:
-                excluded_set = set(EXCLUDED_SYMBOLS)
-                self.trading_pairs = [s for s in self.trading_pairs if s not in excluded_set]
             # logger.info(f"🔄 Список торговых пар обновлен: {len(self.trading_pairs)} пар")
         except Exception as e:
             logger.error(f"Ошибка обновления торговых пар: {e}")
@@ -224,105 +246,62 @@ class MarketScanner:
     def analyze_pair(self, symbol: str) -> Optional[Dict]:
         """Анализ одной торговой пары"""
         try:
+            metrics = self.metrics
             # Получаем свечи (используем поддерживаемый интервал) с локальными ретраями
             klines = None
-            for _ in range(3):
-                klines = self.mex_api.get_klines(symbol, '15m', 24)
-                if klines and len(klines) >= 20:
-                    break
-                time.sleep(0.4)
+            with metrics.timer('fetch', symbol):
+                for attempt in range(3):
+                    # Окно из общего хранилища свечей (базовая загрузка 15m переиспользуется фильтром)
+                    klines = self.kline_source.get_klines(symbol, '15m', self.indicator_window)
+                    if klines and len(klines) >= 20:
+                        break
+                    self.kline_source.forget(symbol)
+                    if attempt < 2:
+                        metrics.count_retry('fetch', symbol)
+                    time.sleep(0.4)
             if not klines or len(klines) < 20:
                 return None
             
             # Получаем текущую цену (локальные ретраи)
             ticker = None
-            for _ in range(3):
-                ticker = self.mex_api.get_ticker_price(symbol)
-                if ticker and 'price' in ticker:
-                    break
-                time.sleep(0.3)
+            with metrics.timer('ticker', symbol):
+                for attempt in range(3):
+                    ticker = self.market_data.get_ticker_price(symbol)
+                    if ticker and 'price' in ticker:
+                        break
+                    if attempt < 2:
+                        metrics.count_retry('ticker', symbol)
+                    time.sleep(0.3)
             if not ticker or 'price' not in ticker:
                 return None
             
             current_price = float(ticker['price'])
             
             # Рассчитываем технические индикаторы
-            indicators = self.tech_indicators.calculate_all_indicators(klines, symbol)
+            with metrics.timer('indicators', symbol):
+                indicators = self.tech_indicators.calculate_all_indicators(klines, symbol)
             if not indicators:
                 return None
             
             # Проверяем анти-хайп фильтр
-            filter_result = self.anti_hype_filter.check_buy_permission(symbol)
-            
-            # Рассчитываем скор
-            score = 0
-            reasons = []
-            
-            # RSI анализ
-            rsi = indicators.get('rsi', 50)
-            if rsi < 30:
-                score += 3
-                reasons.append("перепродано")
-            elif rsi < 45:
-                score += 2
-                reasons.append("низкий_rsi")
-            elif rsi > 70:
-                score -= 1
-                reasons.append("перекуплено")
-            
-            # Объем анализ
-            volume_ratio = indicators.get('volume_ratio', 1.0)
-            if volume_ratio > 1.5:
-                score += 2
-                reasons.append("высокий_объем")
-            elif volume_ratio > 1.2:
-                score += 1
-                reasons.append("нормальный_объем")
-            
-            # MACD анализ
-            macd_signal = indicators.get('macd_signal', 'NEUTRAL')
-            if macd_signal == 'BUY':
-                score += 2
-                reasons.append("macd_buy")
-            elif macd_signal == 'SELL':
-                score -= 1
-                reasons.append("macd_sell")
-            
-            # Bollinger Bands анализ
-            bb_position = indicators.get('bb_position', 0.5)
-            if bb_position < 0.2:
-                score += 2
-                reasons.append("bb_нижняя")
-            elif bb_position > 0.8:
-                score -= 1
-                reasons.append("bb_верхняя")
-            
-            # Анти-хайп фильтр
-            if not filter_result['allowed']:
-                score = -10  # Блокируем покупку
-                reasons.append(f"блокирован_{filter_result['reason']}")
-            
-            # Рассчитываем уверенность
-            confidence = max(0.1, min(0.9, (score + 5) / 10))
-            
-            return {
-                'symbol': symbol,
-                'price': current_price,
-                'score': score,
-                'confidence': confidence,
-                'reasons': reasons,
-                'rsi': rsi,
-                'volume_ratio': volume_ratio,
-                'macd_signal': macd_signal,
-                'bb_position': bb_position,
-                'filter_result': filter_result,
-                'indicators': indicators
-            }
+            with metrics.timer('filter', symbol):
+                filter_result = self.verdicts.check_buy_permission(symbol, fallback=self.anti_hype_filter)
+            
+            with metrics.timer('score', symbol):
+                return self.score_pair(symbol, current_price, indicators, filter_result)
             
         except Exception as e:
             logger.error(f"Ошибка анализа {symbol}: {e}")
             return None
     
+    def score_pair(self, symbol: str, current_price: float, indicators: Dict, filter_result: Dict) -> Dict:
+        """Скоринг пары по готовым индикаторам и вердикту анти-хайп фильтра"""
+        return self.score_batch([(symbol, current_price, indicators, filter_result)])[0]
+    
+    def score_batch(self, items: List[tuple]) -> List[Dict]:
+        """Скоринг пачки пар одним векторным проходом: items - (symbol, price, indicators, filter_result)"""
+        return self.scoring_engine.score_batch(items)
+    
     ############################################################
     # 🔎 СКАНИРОВАНИЕ РЫНКА (параллельно)
     ############################################################
@@ -331,27 +310,25 @@ class MarketScanner:
         try:
             logger.debug("🔍 Начинаю сканирование рынка...")
             
+            started = time.perf_counter()
+            
+            self.metrics.begin_scan()
             # Обновляем список торговых пар перед сканированием
-            self.update_trading_pairs()
-            
-            scan_results = {
-                'timestamp': datetime.now(),
-                'total_pairs': len(self.trading_pairs),
-                'analyzed_pairs': 0,
-                'buy_opportunities': [],
-                'neutral_pairs': [],
-                'blocked_pairs': [],
-                'errors': []
-            }
+            with self.metrics.timer('universe'):
+                self.update_trading_pairs()
+            self.kline_source.reset_stats()
+            
+            scan_results = self.new_scan_results(len(self.trading_pairs))
+            symbols, scan_results['prefilter'] = self.prefilter_pairs(self.trading_pairs)
             
             # Параллельная обработка с ограничением потоков
-            max_workers = min(10, len(self.trading_pairs))  # Максимум 10 потоков
+            max_workers = max(1, min(10, len(symbols)))  # Максимум 10 потоков
             
             with ThreadPoolExecutor(max_workers=max_workers) as executor:
                 # Запускаем анализ всех пар параллельно
                 future_to_symbol = {
                     executor.submit(self.analyze_pair, symbol): symbol 
-                    for symbol in self.trading_pairs
+                    for symbol in symbols
                 }
                 
                 # Собираем результаты по мере завершения
@@ -359,25 +336,14 @@ class MarketScanner:
                     symbol = future_to_symbol[future]
                     try:
                         analysis = future.result()
-                        if analysis:
-                            scan_results['analyzed_pairs'] += 1
-                            
-                            if analysis['score'] > 2:
-                                scan_results['buy_opportunities'].append(analysis)
-                            elif analysis['score'] < -5:
-                                scan_results['blocked_pairs'].append(analysis)
-                            else:
-                                scan_results['neutral_pairs'].append(analysis)
-                        else:
-                            scan_results['errors'].append(symbol)
-                            
                     except Exception as e:
                         logger.error(f"Ошибка анализа {symbol}: {e}")
-                        scan_results['errors'].append(symbol)
+                        analysis = None
+                    self.classify_analysis(scan_results, symbol, analysis)
             
-            # Сортируем результаты
-            scan_results['buy_opportunities'].sort(key=lambda x: x['score'], reverse=True)
-            scan_results['neutral_pairs'].sort(key=lambda x: x['score'], reverse=True)
+            self.finalize_scan_results(scan_results)
+            scan_results['wall_time'] = time.perf_counter() - started
+            scan_results['metrics'] = self.metrics.summarize()
             
             logger.debug(f"✅ Сканирование завершено: {scan_results['analyzed_pairs']} пар проанализировано")
             return scan_results
@@ -386,6 +352,157 @@ class MarketScanner:
             logger.error(f"Ошибка сканирования рынка: {e}")
             return None
     
+    async def scan_market_async(self) -> Optional[Dict]:
+        """Сканирование рынка асинхронным конвейером (fallback - scan_market)"""
+        if self.pipeline is None:
+            return await asyncio.to_thread(self.scan_market)
+        try:
+            if self.scheduler is not None:
+                return await self.scan_scheduled_async()
+            return await self.pipeline.run()
+        except Exception as e:
+            logger.error(f"Ошибка сканирования рынка: {e}")
+            return None
+    
+    def start_cpu_pool(self):
+        """Прогрев пула процессов индикаторов (вызывается при старте)"""
+        if self.cpu_pool is None:
+            return
+        try:
+            self.cpu_pool.warmup()
+        except Exception as e:
+            logger.error(f"❌ Пул процессов недоступен, расчет в потоках: {e}")
+            self.cpu_pool.close()
+            self.cpu_pool = None
+    
+    def get_held_symbols(self) -> List[str]:
+        """Пары с открытыми позициями (остаток дороже $1 по снимку тикеров)"""
+        account_info = self.mex_api.get_account_info()
+        held = []
+        for balance in account_info.get('balances', []):
+            asset = balance.get('asset')
+            if not asset or asset == 'USDT':
+                continue
+            symbol = self.universe.resolve(asset, ('USDT',)) or f"{asset}USDT"
+            quantity = float(balance.get('free', 0)) + float(balance.get('locked', 0))
+            price = float(self.ticker_snapshot.get(symbol, {}).get('lastPrice') or 0)
+            if quantity * price >= 1.0:
+                held.append(symbol)
+        return held
+    
+    async def scan_scheduled_async(self) -> Dict:
+        """Тик планировщика: пары, у которых подошел срок, через конвейер"""
+        scheduler = self.scheduler
+        # Один bulk-запрос тикеров за тик: свежие цены и признаки волатильности
+        await asyncio.to_thread(self.update_trading_pairs)
+        if time.time() - self._held_refreshed_at >= self.scheduler_config['held_refresh_sec']:
+            try:
+                self.held_symbols = await asyncio.to_thread(self.get_held_symbols)
+                self._held_refreshed_at = time.time()
+            except Exception as e:
+                logger.error(f"Ошибка получения открытых позиций: {e}")
+        # В очередь - только отбор префильтра (жесткие отсечки и top_k); позиции добавит планировщик
+        symbols, prefilter = self.prefilter_pairs(self.trading_pairs)
+        scheduler.sync_universe(symbols, self.ticker_snapshot, self.held_symbols)
+        
+        batch = scheduler.next_batch()
+        if not batch:
+            scan_results = self.new_scan_results(0)
+        else:
+            scan_results = await self.pipeline.run(symbols=batch)
+        scan_results['prefilter'] = prefilter
+        scheduler.record_results(scan_results)
+        scan_results['scheduler'] = scheduler.get_stats()
+        return scan_results
+    
+    def record_scan_history(self, scan_results: Dict) -> Optional[Dict]:
+        """Сохранить скан в историю; изменения относительно прошлого - в scan_results['diff']"""
+        if not SCAN_HISTORY_CONFIG.get('enabled', True):
+            return None
+        try:
+            if self.scan_history is None:
+                self.scan_history = get_scan_history()
+            # Частичные сканы (планировщик, события свечей) сравниваются с последним появлением пары
+            lookback = SCAN_HISTORY_CONFIG.get('scheduled_lookback', 30) if self._partial_scans() else 1
+            scan_results['diff'] = self.scan_history.append_and_diff(scan_results, lookback)
+            return scan_results['diff']
+        except Exception as e:
+            logger.error(f"Ошибка записи истории сканов: {e}")
+            return None
+    
+    def _partial_scans(self) -> bool:
+        """Сканы охватывают часть пар (планировщик или события свечей)"""
+        return self.scheduler is not None or self.candle_events_config.get('enabled', False)
+    
+    def _should_send_report(self, scan_results: Dict) -> bool:
+        """Контроль частоты отчетов"""
+        if not self._partial_scans():
+            # Отправляем каждый второй отчет (уменьшение спама)
+            self.report_counter += 1
+            return self.report_counter % 2 == 0
+        if not scan_results['analyzed_pairs']:
+            return False
+        if time.time() - self._last_report_at < self.scheduler_config['report_interval_sec']:
+            return False
+        self._last_report_at = time.time()
+        return True
+    
+    def _should_auto_buy(self, scan_results: Dict) -> bool:
+        """Автопокупка (и ее уведомления) не чаще одного раза за scan_interval.
+
+        Частичные сканы идут каждый тик планировщика или на закрытии свечей -
+        иначе одна и та же пара с высоким скором покупалась бы раз в пару минут.
+        """
+        if not self._partial_scans() or not scan_results.get('buy_opportunities'):
+            return True  # Полный скан и так раз в scan_interval; без возможностей покупки нет
+        if time.time() - self._last_auto_buy_at < self.scan_interval:
+            return False
+        self._last_auto_buy_at = time.time()
+        return True
+    
+    def prefilter_pairs(self, symbols: List[str]):
+        """Этап 1 скана: отбор top-K пар по снимку 24h тикеров"""
+        selected, stats = prefilter_symbols(symbols, self.ticker_snapshot, self.prefilter_config)
+        if stats['pruned']:
+            logger.debug(f"✂️ Префильтр: {stats['selected']}/{stats['candidates']} пар, отсеяно {stats['pruned']}")
+        return selected, stats
+    
+    def new_scan_results(self, total_pairs: int) -> Dict:
+        """Пустая структура результатов скана"""
+        return {
+            'timestamp': datetime.now(),
+            'total_pairs': total_pairs,
+            'analyzed_pairs': 0,
+            'buy_opportunities': [],
+            'neutral_pairs': [],
+            'blocked_pairs': [],
+            'errors': []
+        }
+    
+    def classify_analysis(self, scan_results: Dict, symbol: str, analysis: Optional[Dict]):
+        """Разложить результат анализа пары по группам"""
+        if not analysis:
+            scan_results['errors'].append(symbol)
+            return
+        scan_results['analyzed_pairs'] += 1
+        if analysis['score'] > 2:
+            scan_results['buy_opportunities'].append(analysis)
+        elif analysis['score'] < -5:
+            scan_results['blocked_pairs'].append(analysis)
+        else:
+            scan_results['neutral_pairs'].append(analysis)
+    
+    def finalize_scan_results(self, scan_results: Dict):
+        """Статистика запросов и сортировка результатов"""
+        # Сколько запросов свечей сэкономил локальный ресэмплинг
+        scan_results['kline_requests'] = self.kline_source.get_stats()
+        # Запросы всех сервисов процесса через общий кэш рыночных данных
+        scan_results['market_data'] = self.market_data.cache.get_stats()
+        
+        # Сортируем результаты
+        scan_results['buy_opportunities'].sort(key=lambda x: x['score'], reverse=True)
+        scan_results['neutral_pairs'].sort(key=lambda x: x['score'], reverse=True)
+    
     ############################################################
     # 📨 ОТЧЁТ О СКАНЕ
     ############################################################
@@ -404,7 +521,50 @@ class MarketScanner:
             report += f"✅ Возможности покупки: {len(scan_results['buy_opportunities'])}\n"
             report += f"⚠️ Нейтральные: {len(scan_results['neutral_pairs'])}\n"
             report += f"🚫 Заблокированные: {len(scan_results['blocked_pairs'])}\n"
-            report += f"❌ Ошибки: {len(scan_results['errors'])}\n\n"
+            report += f"❌ Ошибки: {len(scan_results['errors'])}\n"
+            kline_requests = scan_results.get('kline_requests')
+            if kline_requests:
+                report += (f"📡 Запросов свечей: {kline_requests['requests_made']} "
+                           f"(сэкономлено: {kline_requests['requests_eliminated']})\n")
+                if kline_requests.get('bytes_downloaded'):
+                    report += (f"📦 Трафик свечей: {kline_requests['bytes_downloaded'] / 1024:.0f} КБ "
+                               f"(без дозагрузки ~{kline_requests['bytes_full_equivalent'] / 1024:.0f} КБ, "
+                               f"дозагрузок: {kline_requests['delta_fetches']}, "
+                               f"полных: {kline_requests['full_fetches']})\n")
+            market_data = scan_results.get('market_data')
+            if market_data and market_data['calls']:
+                report += (f"🗄️ Кэш рынка (все сервисы): запросов {market_data['calls']}, "
+                           f"к бирже {market_data['fetches']}, без запроса {market_data['deduplicated']}\n")
+            prefilter = scan_results.get('prefilter')
+            if prefilter and prefilter['pruned']:
+                report += f"✂️ Отсеяно префильтром: {prefilter['pruned']} из {prefilter['candidates']}\n"
+            if 'wall_time' in scan_results:
+                report += f"⏱️ Время скана: {scan_results['wall_time']:.1f} сек\n"
+            metrics = scan_results.get('metrics')
+            if metrics and metrics['stages']:
+                stages = ', '.join(f"{name} {stage['p95']:.2f}/{stage['max']:.2f}"
+                                   for name, stage in metrics['stages'].items())
+                report += f"⏱️ Этапы p95/max (сек): {stages}\n"
+                if metrics['retries']:
+                    report += "🔁 Ретраи: " + ', '.join(f"{k} {v}" for k, v in metrics['retries'].items()) + "\n"
+                slowest = [slow for slow in metrics['slowest'][:3] if slow['total'] > 0]
+                if slowest:
+                    report += "🐢 Медленные: " + ', '.join(
+                        f"{slow['symbol']} {slow['total']:.1f}с ({max(slow['stages'], key=slow['stages'].get)})"
+                        for slow in slowest) + "\n"
+            cpu_pool = scan_results.get('cpu_pool')
+            if cpu_pool and cpu_pool['calls']:
+                report += (f"🧮 Индикаторы в процессах: {cpu_pool['calls']} расчетов, "
+                           f"{cpu_pool['avg_compute_ms']:.1f} мс расчет + {cpu_pool['avg_ipc_ms']:.1f} мс IPC\n")
+            scheduler = scan_results.get('scheduler')
+            if scheduler:
+                report += (f"🗓️ Планировщик: {scheduler['symbols']} пар, чаще: {scheduler['boosted']}, "
+                           f"реже: {scheduler['slowed']}, ждут: {scheduler['due']}\n")
+            candle_events = scan_results.get('candle_events')
+            if candle_events:
+                report += (f"⚡ Закрытие свечей: пачка {candle_events['batch']} пар, "
+                           f"задержка до скана {candle_events['last_latency_sec']:.1f} сек\n")
+            report += "\n"
             
             # Лучшие возможности
             if scan_results['buy_opportunities']:
@@ -427,7 +587,23 @@ class MarketScanner:
                 for i, pair in enumerate(scan_results['blocked_pairs'][:3], 1):
                     report += f"{i}. {pair['symbol']} - {pair['filter_result']['reason']}\n"
                 report += "\n"
-            
+
+            # Изменения относительно прошлого скана (из истории сканов)
+            diff = scan_results.get('diff')
+            if diff and diff['previous_scan_id'] is not None:
+                changes = []
+                if diff['new_opportunities']:
+                    changes.append(f"🆕 Новые возможности: {', '.join(diff['new_opportunities'][:5])}")
+                if diff['dropped']:
+                    changes.append(f"📉 Выбыли: {', '.join(diff['dropped'][:5])}")
+                if diff['score_deltas']:
+                    changes.append("🔀 Скор: " + ', '.join(f"{symbol} {delta:+.0f}" for symbol, delta
+                                                          in list(diff['score_deltas'].items())[:5]))
+                if diff['unblocked']:
+                    changes.append(f"🔓 Разблокированы: {', '.join(diff['unblocked'][:5])}")
+                if changes:
+                    report += f"🔄 <b>ИЗМЕНЕНИЯ С ПРОШЛОГО СКАНА:</b>\n" + "\n".join(changes) + "\n\n"
+
             # Рекомендации
             if usdt_balance >= 10.0:
                 if scan_results['buy_opportunities']:
@@ -454,11 +630,13 @@ class MarketScanner:
             
             logger.debug(f"🔄 Сканирование #{self.scan_count}...")
             
+            metrics = self.metrics
             # Проверяем баланс USDT в начале каждого цикла
-            try:
-                usdt_balance = self.get_usdt_balance()
-            except Exception:
-                usdt_balance = 0.0
+            with metrics.cycle_timer('balance'):
+                try:
+                    usdt_balance = self.get_usdt_balance()
+                except Exception:
+                    usdt_balance = 0.0
             
             # Если баланс недостаточный - пропускаем сканирование, но НЕ останавливаем цикл
             if usdt_balance < 6.0:
@@ -467,29 +645,156 @@ class MarketScanner:
                 pass
             else:
                 # Сканируем рынок только при достаточном балансе
-                scan_results = self.scan_market()
+                with metrics.cycle_timer('scan'):
+                    scan_results = await self.scan_market_async()
                 
                 if scan_results:
-                    # Форматируем отчет
-                    report = self.format_scan_report(scan_results)
-                    
-                    # Отправляем в Telegram (каждые 10 минут вместо 5)
-                    self.report_counter += 1
-                    if self.report_counter % 2 == 0:  # Отправляем каждый второй отчет
-                        self.send_telegram_message(report)
-                        # logger.info(f"📊 Отчет #{self.scan_count} отправлен в Telegram")
-                    else:
-                        # logger.info(f"📊 Отчет #{self.scan_count} пропущен (уменьшение спама)")
-                        pass
-                    
-                    # АВТОМАТИЧЕСКАЯ ПОКУПКА
-                    await self.auto_buy_opportunities(scan_results)
+                    await self.publish_scan_results(scan_results)
                 else:
                     logger.error("❌ Ошибка сканирования рынка")
                 
         except Exception as e:
             logger.error(f"Ошибка цикла сканирования: {e}")
     
+    async def publish_scan_results(self, scan_results: Dict):
+        """История, отчет, автопокупки и сводка таймингов по результатам скана"""
+        metrics = self.metrics
+        with metrics.cycle_timer('history'):
+            self.record_scan_history(scan_results)
+        
+        # Форматируем отчет
+        with metrics.cycle_timer('report'):
+            report = self.format_scan_report(scan_results)
+            
+            # Отправляем в Telegram (каждые 10 минут вместо 5)
+            if self._should_send_report(scan_results):
+                self.send_telegram_message(report)
+                # logger.info(f"📊 Отчет #{self.scan_count} отправлен в Telegram")
+            else:
+                # logger.info(f"📊 Отчет #{self.scan_count} пропущен (уменьшение спама)")
+                pass
+        
+        # АВТОМАТИЧЕСКАЯ ПОКУПКА
+        if self._should_auto_buy(scan_results):
+            with metrics.cycle_timer('auto_buy'):
+                await self.auto_buy_opportunities(scan_results)
+        
+        # Сводка таймингов: latest(), файл метрик и история (если включены)
+        metrics.finish_scan({'scan': self.scan_count, 'wall_time': scan_results.get('wall_time', 0.0),
+                             'analyzed_pairs': scan_results['analyzed_pairs']})
+    
+    ############################################################
+    # ⚡ СОБЫТИЙНЫЙ СКАН (закрытие свечей)
+    ############################################################
+    async def refresh_watched_symbols(self) -> List[str]:
+        """Отслеживаемые пары: отбор префильтра по 24h тикерам + открытые позиции"""
+        await asyncio.to_thread(self.update_trading_pairs)
+        try:
+            self.held_symbols = await asyncio.to_thread(self.get_held_symbols)
+        except Exception as e:
+            logger.error(f"Ошибка получения открытых позиций: {e}")
+        selected, _ = self.prefilter_pairs(self.trading_pairs)
+        limit = self.candle_events_config.get('max_symbols', 80)
+        held = [s for s in self.held_symbols if s in self.trading_pairs]
+        self.watched_symbols = held + [s for s in selected if s not in held][:max(0, limit - len(held))]
+        return self.watched_symbols
+    
+    async def handle_candle_closes(self, events: List) -> Optional[Dict]:
+        """Переоценить пары, у которых закрылась свеча (одна пачка границы)"""
+        symbols = list(dict.fromkeys(event.symbol for event in events))
+        if not symbols:
+            return None
+        # Закрытые свечи из потока вливаются в окно без запроса к API,
+        # по остальным окно дозагружается с последней сохраненной свечи
+        for event in events:
+            if event.kline is None or not self.kline_source.apply_closed_candle(event.symbol, event.kline):
+                self.kline_source.expire(event.symbol)
+        
+        self.scan_count += 1
+        self.last_scan_time = datetime.now()
+        with self.metrics.cycle_timer('balance'):
+            try:
+                usdt_balance = self.get_usdt_balance()
+            except Exception:
+                usdt_balance = 0.0
+        if usdt_balance < 6.0:
+            return None
+        
+        with self.metrics.cycle_timer('scan'):
+            if self.pipeline is not None:
+                scan_results = await self.pipeline.run(symbols=symbols)
+            else:
+                scan_results = self.new_scan_results(len(symbols))
+                analyses = await asyncio.gather(*(asyncio.to_thread(self.analyze_pair, s) for s in symbols))
+                for symbol, analysis in zip(symbols, analyses):
+                    self.classify_analysis(scan_results, symbol, analysis)
+                self.finalize_scan_results(scan_results)
+        if self.scheduler is not None:
+            self.scheduler.record_results(scan_results)
+        if self.candle_debouncer is not None:
+            scan_results['candle_events'] = dict(self.candle_debouncer.get_stats(), batch=len(symbols))
+        await self.publish_scan_results(scan_results)
+        return scan_results
+    
+    async def run_event_driven(self):
+        """Скан по закрытию свечей: источник событий -> debounce -> конвейер"""
+        config = self.candle_events_config
+        self.candle_debouncer = CandleEventDebouncer(self.handle_candle_closes, config.get('debounce_sec', 2.0),
+                                                     config.get('max_batch', 200))
+        if config.get('source', 'clock') == 'stream':
+            await self._run_stream_events(config)
+        else:
+            await self._run_clock_events(config)
+    
+    async def _run_clock_events(self, config: Dict):
+        """Локальные часы: на каждой границе свечей - все отслеживаемые пары одной пачкой"""
+        clock = CandleClock(config.get('interval', '15m'), config.get('settle_sec', 3.0))
+        refreshed_at = 0.0
+        clock.due_events([])  # Точка отсчета
+        while True:
+            try:
+                if time.time() - refreshed_at >= config.get('universe_refresh_sec', 600):
+                    await self.refresh_watched_symbols()
+                    refreshed_at = time.time()
+                await asyncio.sleep(clock.seconds_until_next())
+                for event in clock.due_events(self.watched_symbols):
+                    self.candle_debouncer.submit(event)
+            except Exception as e:
+                logger.error(f"❌ Ошибка событийного скана: {e}")
+                await asyncio.sleep(60)
+    
+    async def _run_stream_events(self, config: Dict):
+        """Поток свечей биржи: закрытие определяется по смене окна свечи"""
+        from mexc_websocket_client import MEXCWebSocketClient, StreamType
+        
+        interval = config.get('interval', '15m')
+        builder = StreamCandleBuilder(interval)
+        client = MEXCWebSocketClient()
+        subscribed: set = set()
+        
+        async def on_kline(kline_data: Dict):
+            event = builder.on_update(kline_data)
+            if event is not None:
+                self.candle_debouncer.submit(event)
+        
+        await client.connect()
+        client.listen_task = asyncio.create_task(client.listen())
+        try:
+            while True:
+                try:
+                    watched = set(await self.refresh_watched_symbols())
+                    for symbol in subscribed - watched:
+                        await client.unsubscribe(StreamType.KLINES, symbol, interval)
+                        builder.forget(symbol)
+                    for symbol in watched - subscribed:
+                        await client.subscribe(StreamType.KLINES, symbol, interval, callback=on_kline)
+                    subscribed = watched
+                except Exception as e:
+                    logger.error(f"❌ Ошибка подписки на свечи: {e}")
+                await asyncio.sleep(config.get('universe_refresh_sec', 600))
+        finally:
+            await client.disconnect()
+    
     ############################################################
     # 🛒 АВТОПОКУПКИ
     ############################################################
@@ -820,10 +1125,16 @@ class MarketScanner:
         
         # Стартовое уведомление убрано (отправляется только intro.mp4)
         
+        if self.candle_events_config.get('enabled', False):
+            await self.run_event_driven()
+            return
+        
         while True:
             try:
                 await self.scan_cycle()
-                await asyncio.sleep(self.scan_interval)
+                # С планировщиком - короткий тик, частоту пар определяют приоритеты
+                interval = self.scheduler_config['tick_sec'] if self.scheduler is not None else self.scan_interval
+                await asyncio.sleep(interval)
                 
             except KeyboardInterrupt:
                 # logger.info("🛑 Сканер остановлен")
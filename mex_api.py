@@ -1,10 +1,12 @@
 import hashlib
 import hmac
 import time
+import threading
 import requests
 import json
 import logging
 from typing import Dict, List, Optional
+from urllib.parse import urlparse
 from config import MEX_API_KEY, MEX_SECRET_KEY, MEX_SPOT_URL
 
 logger = logging.getLogger(__name__)
@@ -17,6 +19,36 @@ class MexAPI:
         self.max_retries = 3
         self.retry_delay = 1  # секунды
         
+        # Общая сессия: keep-alive соединения переиспользуются между запросами
+        # (пул рассчитан на параллельную загрузку свечей сканером)
+        self.session = requests.Session()
+        adapter = requests.adapters.HTTPAdapter(pool_connections=4, pool_maxsize=64)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+        
+        # Учет трафика: запросы и байты по эндпоинтам + размер последнего ответа потока
+        self._traffic: Dict[str, Dict[str, int]] = {}
+        self._traffic_lock = threading.Lock()
+        self._thread_state = threading.local()
+    
+    def _count_traffic(self, url: str, nbytes: int):
+        """Учесть ответ в статистике трафика"""
+        self._thread_state.last_bytes = nbytes
+        path = urlparse(url).path
+        with self._traffic_lock:
+            entry = self._traffic.setdefault(path, {'requests': 0, 'bytes': 0})
+            entry['requests'] += 1
+            entry['bytes'] += nbytes
+    
+    def last_response_bytes(self) -> int:
+        """Размер последнего ответа в текущем потоке (байт)"""
+        return getattr(self._thread_state, 'last_bytes', 0)
+    
+    def get_traffic_stats(self) -> Dict[str, Dict[str, int]]:
+        """Запросы и байты по эндпоинтам с момента создания клиента"""
+        with self._traffic_lock:
+            return {path: dict(entry) for path, entry in self._traffic.items()}
+        
     def _generate_signature(self, query_string: str) -> str:
         return hmac.new(
             self.secret_key.encode('utf-8'),
@@ -35,6 +67,11 @@ class MexAPI:
         """Конвертация символа из формата v3 (BTCUSDT) в v2 (BTC_USDT)"""
         if '_' in symbol:
             return symbol
+        # Готовое соответствие из вселенной (если она уже загружена)
+        from universe_manager import current_universe
+        universe = current_universe()
+        if universe is not None and symbol in universe.symbols:
+            return universe.to_v2(symbol)
         known_quotes = ['USDT', 'USDC', 'BTC', 'ETH']
         for quote in known_quotes:
             if symbol.endswith(quote):
@@ -53,11 +90,12 @@ class MexAPI:
                 if 'timeout' not in kwargs or kwargs.get('timeout') is None:
                     kwargs['timeout'] = 10
                 if method.upper() == 'GET':
-                    response = requests.get(url, **kwargs)
+                    response = self.session.get(url, **kwargs)
                 elif method.upper() == 'POST':
-                    response = requests.post(url, **kwargs)
+                    response = self.session.post(url, **kwargs)
                 else:
                     raise ValueError(f"Неподдерживаемый метод: {method}")
+                self._count_traffic(url, len(response.content))
                 
                 # Проверяем статус ответа
                 if response.status_code == 200:
@@ -115,8 +153,12 @@ class MexAPI:
         # Если ничего не получилось, возвращаем исходный результат/ошибку
         return result if isinstance(result, dict) else {'error': 'unknown_error', 'message': 'no valid response'}
     
-    def get_klines(self, symbol: str, interval: str = '1m', limit: int = 100) -> List:
-        """Получить данные свечей с оптимизированным выбором API"""
+    def get_klines(self, symbol: str, interval: str = '1m', limit: int = 100,
+                   start_time: Optional[int] = None) -> List:
+        """Получить данные свечей с оптимизированным выбором API
+        
+        start_time: время открытия (мс), начиная с которого нужны свечи (дозагрузка)
+        """
         # Маппинг интервалов для MEXC API
         interval_map = {
             '1m': '1m', '5m': '5m', '15m': '15m', '30m': '30m',
@@ -131,6 +173,8 @@ class MexAPI:
             'interval': mapped_interval,
             'limit': limit
         }
+        if start_time is not None:
+            params['startTime'] = int(start_time)
         result = self._make_request_with_retry('GET', url, params=params)
         if isinstance(result, list) and result:
             return result
@@ -150,6 +194,7 @@ class MexAPI:
             v2_symbol = self._to_v2_symbol(symbol)
             v2_url = f"https://www.mexc.com/open/api/v2/market/kline?symbol={v2_symbol}&interval={v2_interval}&limit={limit}"
             v2_resp = requests.get(v2_url, timeout=10)  # Уменьшил timeout
+            self._count_traffic(v2_url, len(v2_resp.content))
             if v2_resp.status_code == 200:
                 data = v2_resp.json()
                 if data.get('code') == 200 and isinstance(data.get('data'), list):
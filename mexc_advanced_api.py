@@ -14,6 +14,55 @@ import json
 from typing import Dict, List, Optional
 from config import MEX_API_KEY, MEX_SECRET_KEY, MEX_SPOT_URL
 
+
+def parse_symbol_rules(symbol_info: Dict) -> Dict:
+    """Правила торговли из записи exchangeInfo: минимальный лот, точность цены, статус"""
+    symbol = symbol_info.get('symbol', '')
+    # Безопасно извлекаем фильтры по именам
+    filters = symbol_info.get('filters', []) or []
+    by_type = {}
+    for f in filters:
+        ft = f.get('filterType') or f.get('filter_type') or f.get('type')
+        if ft:
+            by_type[ft] = f
+    
+    lot = by_type.get('LOT_SIZE', {})
+    pricef = by_type.get('PRICE_FILTER', {})
+    min_notional_f = by_type.get('MIN_NOTIONAL') or by_type.get('NOTIONAL') or {}
+    
+    def as_float(d: Dict, key: str, default: float = 0.0) -> float:
+        try:
+            return float(d.get(key, default))
+        except Exception:
+            return default
+    
+    min_qty = as_float(lot, 'minQty', as_float(lot, 'min_qty', 0.0))
+    step_size = as_float(lot, 'stepSize', as_float(lot, 'step_size', 0.0))
+    min_price = as_float(pricef, 'minPrice', as_float(pricef, 'min_price', 0.0))
+    tick_size = as_float(pricef, 'tickSize', as_float(pricef, 'tick_size', 0.0))
+    min_notional = as_float(min_notional_f, 'minNotional', as_float(min_notional_f, 'min_notional', 5.0))
+    
+    # Точности, если есть
+    price_precision = symbol_info.get('pricePrecision') or symbol_info.get('price_precision') or 8
+    quantity_precision = symbol_info.get('quantityPrecision') or symbol_info.get('quantity_precision') or 8
+    
+    return {
+        'symbol': symbol,
+        'status': symbol_info.get('status', 'UNKNOWN'),
+        'baseAsset': symbol_info.get('baseAsset', ''),
+        'quoteAsset': symbol_info.get('quoteAsset', ''),
+        'minQty': min_qty,
+        'maxQty': as_float(lot, 'maxQty', as_float(lot, 'max_qty', 0.0)),
+        'stepSize': step_size or (10 ** -int(quantity_precision)),
+        'minPrice': min_price,
+        'maxPrice': as_float(pricef, 'maxPrice', as_float(pricef, 'max_price', 0.0)),
+        'tickSize': tick_size or (10 ** -int(price_precision)),
+        'minNotional': min_notional if min_notional > 0 else 5.0,
+        'pricePrecision': int(price_precision),
+        'quantityPrecision': int(quantity_precision)
+    }
+
+
 class MexAdvancedAPI:
     """Расширенный API для получения критичных торговых данных"""
     
@@ -83,49 +132,7 @@ class MexAdvancedAPI:
             if not symbol_info:
                 return {}
             
-            # Безопасно извлекаем фильтры по именам
-            filters = symbol_info.get('filters', []) or []
-            by_type = {}
-            for f in filters:
-                ft = f.get('filterType') or f.get('filter_type') or f.get('type')
-                if ft:
-                    by_type[ft] = f
-            
-            lot = by_type.get('LOT_SIZE', {})
-            pricef = by_type.get('PRICE_FILTER', {})
-            min_notional_f = by_type.get('MIN_NOTIONAL') or by_type.get('NOTIONAL') or {}
-            
-            def as_float(d: Dict, key: str, default: float = 0.0) -> float:
-                try:
-                    return float(d.get(key, default))
-                except Exception:
-                    return default
-            
-            min_qty = as_float(lot, 'minQty', as_float(lot, 'min_qty', 0.0))
-            step_size = as_float(lot, 'stepSize', as_float(lot, 'step_size', 0.0))
-            min_price = as_float(pricef, 'minPrice', as_float(pricef, 'min_price', 0.0))
-            tick_size = as_float(pricef, 'tickSize', as_float(pricef, 'tick_size', 0.0))
-            min_notional = as_float(min_notional_f, 'minNotional', as_float(min_notional_f, 'min_notional', 5.0))
-            
-            # Точности, если есть
-            price_precision = symbol_info.get('pricePrecision') or symbol_info.get('price_precision') or 8
-            quantity_precision = symbol_info.get('quantityPrecision') or symbol_info.get('quantity_precision') or 8
-            
-            return {
-                'symbol': symbol,
-                'status': symbol_info.get('status', 'UNKNOWN'),
-                'baseAsset': symbol_info.get('baseAsset', ''),
-                'quoteAsset': symbol_info.get('quoteAsset', ''),
-                'minQty': min_qty,
-                'maxQty': as_float(lot, 'maxQty', as_float(lot, 'max_qty', 0.0)),
-                'stepSize': step_size or (10 ** -int(quantity_precision)),
-                'minPrice': min_price,
-                'maxPrice': as_float(pricef, 'maxPrice', as_float(pricef, 'max_price', 0.0)),
-                'tickSize': tick_size or (10 ** -int(price_precision)),
-                'minNotional': min_notional if min_notional > 0 else 5.0,
-                'pricePrecision': int(price_precision),
-                'quantityPrecision': int(quantity_precision)
-            }
+            return parse_symbol_rules(symbol_info)
             
         except Exception as e:
             print(f"Ошибка получения правил для {symbol}: {e}")
@@ -14,6 +14,7 @@ from dataclasses import dataclass
 from enum import Enum
 import websockets
 from websockets.exceptions import ConnectionClosed, WebSocketException
+from cache.daily_extremes import get_daily_extremes
 
 # Настройка логирования
 logging.basicConfig(level=logging.INFO)
@@ -130,6 +131,7 @@ class MEXCWebSocketClient:
         self.reconnect_attempts = 0
         self.last_ping = 0
         self.listen_task = None  # Добавляем ссылку на задачу listen
+        self.daily_extremes = get_daily_extremes()  # Дневные хай/лоу из сделок и bookTicker
         
     async def connect(self):
         """Подключение к WebSocket"""
@@ -368,6 +370,8 @@ class MEXCWebSocketClient:
         deals = data.get('publicdeals', {}).get('dealsList', [])
         
         for deal in deals:
+            # Сделки обновляют дневные хай/лоу (защита от покупок у дневного хая)
+            self.daily_extremes.update(symbol, float(deal['price']), ts=int(deal['time']))
             trade_data = {
                 'symbol': symbol,
                 'price': deal['price'],
@@ -460,6 +464,7 @@ class MEXCWebSocketClient:
             'ask_price': ticker.get('askprice'),
             'ask_quantity': ticker.get('askquantity')
         }
+        self.daily_extremes.update_book_ticker(symbol, ticker_data['bid_price'], ticker_data['ask_price'])
         
         # Вызов callback если есть
         callback = self.subscriptions.get(data.get('channel', ''))
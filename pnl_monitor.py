@@ -10,6 +10,7 @@
 ############################################################
 
 from mex_api import MexAPI
+from cache.market_data_cache import get_market_data_cache
 import asyncio
 import time
 import logging
@@ -18,6 +19,8 @@ from datetime import datetime
 from config import TELEGRAM_BOT_TOKEN, TELEGRAM_CHAT_ID, PNL_MONITOR_CONFIG
 from portfolio_balancer import PortfolioBalancer
 from mexc_advanced_api import MexAdvancedAPI
+from position_engine import get_position_engine
+from portfolio_pnl import PortfolioPnL
 from post_sale_balancer import PostSaleBalancer
 from logging.handlers import RotatingFileHandler
 from services.income_saver import IncomeSaver
@@ -31,9 +34,13 @@ class PnLMonitor:
     # ⚙️ ИНИЦИАЛИЗАЦИЯ
     # Назначение: клиенты API, параметры, логирование в файл
     ############################################################
-    def __init__(self):
+    def __init__(self, market_data=None):
         self.mex_api = MexAPI()
+        # Цены, стакан и 24h тикеры - через общий кэш рыночных данных процесса
+        self.market_data = (market_data or get_market_data_cache(self.mex_api)).client('pnl_monitor')
         self.mex_adv = MexAdvancedAPI()
+        self.positions = get_position_engine()  # Позиции по средней цене закупа
+        self.portfolio_pnl = PortfolioPnL(self.market_data, self.positions)  # PnL активов за один проход
         self.bot_token = TELEGRAM_BOT_TOKEN
         self.chat_id = TELEGRAM_CHAT_ID
         self.is_running = False
@@ -48,7 +55,7 @@ class PnLMonitor:
         self.telegram_notifications = PNL_MONITOR_CONFIG['telegram_notifications']
         
         # Балансировщик портфеля
-        self.portfolio_balancer = PortfolioBalancer()
+        self.portfolio_balancer = PortfolioBalancer(market_data=self.market_data)
         self.last_balance_check = 0
         self.balance_check_interval = 3600  # Проверка балансировки каждый час
         
@@ -133,7 +140,7 @@ class PnLMonitor:
     def get_current_price(self, symbol: str):
         """Получить текущую цену"""
         try:
-            price_info = self.mex_api.get_ticker_price(symbol)
+            price_info = self.market_data.get_ticker_price(symbol)
             if 'price' in price_info:
                 return float(price_info['price'])
             return None
@@ -355,7 +362,7 @@ class PnLMonitor:
                 if remaining_quantity > 0:
                     try:
                         # Получаем текущую цену
-                        current_price = self.mex_api.get_ticker_price(symbol)
+                        current_price = self.market_data.get_ticker_price(symbol)
                         if current_price and 'price' in current_price:
                             current_value = remaining_quantity * float(current_price['price'])
                             avg_buy_price = pos['cost'] / max(pos['bought'], 0.000001)
@@ -439,76 +446,16 @@ class PnLMonitor:
     # 🧮 AVG-COST PnL (история сделок)
     ############################################################
     def _calculate_avg_cost_pnl(self, symbol: str, current_quantity: float, current_price: float) -> dict:
-        """Рассчитать PnL от средней цены закупа по истории сделок (moving average).
+        """Рассчитать PnL от средней цены закупа (moving average) по позиции движка.
         Возвращает словарь с avg_buy_price, realized_pnl, unrealized_pnl, total_pnl."""
         try:
-            # Определяем базовый и котируемый актив из символа
-            base_asset = ''.join([c for c in symbol if not c.isdigit()]).replace('USDC', '').replace('USDT', '')
-            quote_asset = 'USDC' if symbol.endswith('USDC') else ('USDT' if symbol.endswith('USDT') else 'USDT')
-            
-            trades = self.mex_adv.get_my_trades(symbol, limit=500) or []
-            trades = sorted(trades, key=lambda t: t.get('time', 0))
-            
-            position_qty = 0.0
-            cost_basis_total = 0.0  # В котируемой валюте
-            realized_pnl = 0.0
-            
-            def commission_in_quote(trade):
-                commission = float(trade.get('commission', 0) or 0)
-                commission_asset = trade.get('commissionAsset')
-                price = float(trade.get('price', 0) or 0)
-                if commission <= 0:
-                    return 0.0
-                if commission_asset == quote_asset:
-                    return commission
-                if commission_asset == base_asset and price > 0:
-                    return commission * price
-                # Комиссия в другом активе — не учитываем
-                return 0.0
+            # Позиция ведется инкрементально: догружаются только новые сделки
+            pnl = self.positions.pnl(symbol, current_price, current_quantity)
             
-            for trade in trades:
-                qty = float(trade.get('qty', 0) or 0)
-                price = float(trade.get('price', 0) or 0)
-                quote_qty = float(trade.get('quoteQty', 0) or 0)
-                is_buyer = bool(trade.get('isBuyer', False))
-                fee_q = commission_in_quote(trade)
-                
-                if is_buyer:
-                    # Покупка: увеличиваем позицию и стоимость
-                    total_cost = quote_qty + fee_q
-                    new_position = position_qty + qty
-                    if new_position > 0:
-                        cost_basis_total = cost_basis_total + total_cost
-                        position_qty = new_position
-                else:
-                    # Продажа: рассчитываем реализованный PnL относительно текущей средней цены
-                    if position_qty <= 0:
-                        continue
-                    avg_price = cost_basis_total / position_qty if position_qty > 0 else 0.0
-                    revenue = quote_qty - fee_q
-                    realized_pnl += revenue - (avg_price * qty)
-                    # Уменьшаем базу стоимости пропорционально проданному количеству
-                    cost_basis_total -= avg_price * qty
-                    position_qty -= qty
-                    if position_qty < 1e-12:
-                        position_qty = 0.0
-                        cost_basis_total = 0.0
-            
-            avg_buy_price = (cost_basis_total / position_qty) if position_qty > 0 else 0.0
-            qty_for_pnl = min(current_quantity, position_qty) if position_qty > 0 else 0.0
-            unrealized_pnl = (current_price - avg_buy_price) * qty_for_pnl
-            total_pnl = realized_pnl + unrealized_pnl
-            
-            logger.info(f"💰 Средняя цена закупа {symbol}: ${avg_buy_price:.6f}; Позиция={position_qty:.8f}; Баланс={current_quantity:.8f}")
-            logger.info(f"📈 PnL: реализованный=${realized_pnl:.4f}, нереализованный=${unrealized_pnl:.4f}, итого=${total_pnl:.4f}")
+            logger.info(f"💰 Средняя цена закупа {symbol}: ${pnl['avg_buy_price']:.6f}; Позиция={pnl['position_qty']:.8f}; Баланс={current_quantity:.8f}")
+            logger.info(f"📈 PnL: реализованный=${pnl['realized_pnl']:.4f}, нереализованный=${pnl['unrealized_pnl']:.4f}, итого=${pnl['total_pnl']:.4f}")
             
-            return {
-                'avg_buy_price': avg_buy_price,
-                'position_qty': position_qty,
-                'realized_pnl': realized_pnl,
-                'unrealized_pnl': unrealized_pnl,
-                'total_pnl': total_pnl,
-            }
+            return pnl
         except Exception as e:
             logger.error(f"❌ Ошибка расчета AvgCost PnL для {symbol}: {e}")
             return {
@@ -790,6 +737,7 @@ class PnLMonitor:
             
             if 'orderId' in order:
                 logger.info(f"✅ Лимитный ордер на продажу создан: {order['orderId']}")
+                self.market_data.invalidate(symbol)
                 
                 # Отправляем уведомление в Telegram (НЕМЕДЛЕННО)
                 message = (
@@ -838,80 +786,62 @@ class PnLMonitor:
             # Собираем данные для уведомления
             pnl_data = []
             
-            # Проверяем BTC и ETH
-            for asset in ['BTC', 'ETH']:
-                logger.info(f"🔍 Проверяем {asset}...")
+            # Проверяем BTC и ETH: один снимок цен, PnL и пороги - для всех активов сразу
+            symbols = {'BTC': 'BTCUSDC', 'ETH': 'ETHUSDC'}
+            for asset in symbols:
+                if asset not in balances:
+                    logger.info(f"⚠️ {asset} не найден в балансах")
+                elif balances[asset]['total'] <= 0:
+                    logger.info(f"⚠️ {asset} найден, но количество = 0")
+            held = {asset: balances[asset] for asset in symbols if balances.get(asset, {}).get('total', 0) > 0}
+            actions = self.portfolio_pnl.evaluate(held, symbols, threshold_usd=self.profit_threshold,
+                                                  threshold_pct=self.profit_threshold_pct)
+            for asset in set(held) - {action['asset'] for action in actions}:
+                logger.warning(f"⚠️ Не удалось получить цену для {symbols[asset]}")
+            
+            for action in actions:
+                asset, symbol = action['asset'], action['symbol']
+                quantity = action['quantity']
+                current_price = action['current_price']
+                pnl = action['unrealized_pnl']
+                avg_buy_price = action['avg_buy_price']
+                pnl_pct = action['pnl_pct']
                 
-                if asset in balances:
-                    quantity = balances[asset]['total']
-                    logger.info(f"📊 {asset} найден в балансах, количество: {quantity}")
+                logger.info(f"📊 {asset}:")
+                logger.info(f"   Количество: {quantity}")
+                logger.info(f"   Текущая цена: ${current_price:.4f}")
+                logger.info(f"   Средняя цена закупа: ${avg_buy_price:.4f}")
+                logger.info(f"   PnL (AvgCost): ${pnl:.4f}")
+                
+                # Порог (в процентах, с фоллбэком на долларовый) проверен оценщиком портфеля
+                if action['sell']:
+                    logger.info(f"🎯 PnL превышает порог! Продаем {asset}...")
                     
-                    if quantity > 0:
-                        # Определяем символ для получения цены
-                        if asset == 'BTC':
-                            symbol = 'BTCUSDC'
-                        else:
-                            symbol = 'ETHUSDC'
-                        
-                        # Получаем текущую цену
-                        current_price = self.get_current_price(symbol)
-                        if not current_price:
-                            logger.warning(f"⚠️ Не удалось получить цену для {symbol}")
-                            continue
-                        
-                        # Новый расчет: PnL от средней цены закупа по истории сделок
-                        avg_cost_pnl = self._calculate_avg_cost_pnl(symbol, quantity, current_price)
-                        pnl = avg_cost_pnl.get('unrealized_pnl', 0.0)
-                        avg_buy_price = avg_cost_pnl.get('avg_buy_price', 0.0)
-                        pnl_pct = 0.0
-                        if avg_buy_price > 0:
-                            pnl_pct = ((current_price - avg_buy_price) / avg_buy_price) * 100.0
-                        
-                        logger.info(f"📊 {asset}:")
-                        logger.info(f"   Количество: {quantity}")
-                        logger.info(f"   Текущая цена: ${current_price:.4f}")
-                        logger.info(f"   Средняя цена закупа: ${avg_buy_price:.4f}")
-                        logger.info(f"   PnL (AvgCost): ${pnl:.4f}")
-                        
-                        # Проверяем, превышает ли PnL порог (в процентах, с фоллбэком на долларовый)
-                        meets_threshold = False
-                        if self.profit_threshold_pct is not None and avg_buy_price > 0:
-                            meets_threshold = pnl_pct >= float(self.profit_threshold_pct)
-                        else:
-                            meets_threshold = pnl > self.profit_threshold
-
-                        if meets_threshold:
-                            logger.info(f"🎯 PnL превышает порог! Продаем {asset}...")
-                            
-                            # Рыночная продажа (лимитная около рынка)
-                            order = self.market_sell(symbol, quantity)
-                            if order:
-                                logger.info(f"✅ {asset} продан успешно!")
-                                try:
-                                    saver = IncomeSaver(threshold_usdt=395.0, unit_amount_usdt=1.0)
-                                    park_result = saver.try_park_usdt_to_usdp()
-                                    logger.info(f"💼 IncomeSaver: {park_result}")
-                                except Exception as e:
-                                    logger.error(f"IncomeSaver ошибка: {e}")
-                            else:
-                                logger.error(f"❌ Ошибка продажи {asset}")
-                        else:
-                            if self.profit_threshold_pct is not None and avg_buy_price > 0:
-                                logger.info(f"📈 PnL {asset}: {pnl_pct:.2f}% (порог: {self.profit_threshold_pct}%)")
-                            else:
-                                logger.info(f"📈 PnL {asset}: ${pnl:.4f} (порог: ${self.profit_threshold})")
-                            
-                            # Сохраняем данные для уведомления
-                            pnl_data.append({
-                                'asset': asset,
-                                'quantity': quantity,
-                                'current_price': current_price,
-                                'pnl': pnl
-                            })
+                    # Рыночная продажа (лимитная около рынка)
+                    order = self.market_sell(symbol, quantity)
+                    if order:
+                        logger.info(f"✅ {asset} продан успешно!")
+                        try:
+                            saver = IncomeSaver(threshold_usdt=395.0, unit_amount_usdt=1.0)
+                            park_result = saver.try_park_usdt_to_usdp()
+                            logger.info(f"💼 IncomeSaver: {park_result}")
+                        except Exception as e:
+                            logger.error(f"IncomeSaver ошибка: {e}")
                     else:
-                        logger.info(f"⚠️ {asset} найден, но количество = 0")
+                        logger.error(f"❌ Ошибка продажи {asset}")
                 else:
-                    logger.info(f"⚠️ {asset} не найден в балансах")
+                    if self.profit_threshold_pct is not None and avg_buy_price > 0:
+                        logger.info(f"📈 PnL {asset}: {pnl_pct:.2f}% (порог: {self.profit_threshold_pct}%)")
+                    else:
+                        logger.info(f"📈 PnL {asset}: ${pnl:.4f} (порог: ${self.profit_threshold})")
+                    
+                    # Сохраняем данные для уведомления
+                    pnl_data.append({
+                        'asset': asset,
+                        'quantity': quantity,
+                        'current_price': current_price,
+                        'pnl': pnl
+                    })
             
             # Периодические сводки каждые 5 минут
             current_time = time.time()
@@ -950,7 +880,7 @@ class PnLMonitor:
                                 total_portfolio += total
                             else:
                                 try:
-                                    ticker = self.mex_api.get_ticker_price(f"{asset}USDT")
+                                    ticker = self.market_data.get_ticker_price(f"{asset}USDT")
                                     if ticker and 'price' in ticker:
                                         total_portfolio += total * float(ticker['price'])
                                 except Exception:
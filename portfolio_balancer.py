@@ -17,7 +17,9 @@ from typing import Dict, Optional, Tuple
 from decimal import Decimal
 
 from mex_api import MexAPI
+from cache.market_data_cache import get_market_data_cache
 from mexc_advanced_api import MexAdvancedAPI
+from position_engine import get_position_engine
 from config import TELEGRAM_BOT_TOKEN, TELEGRAM_CHAT_ID
 import requests
 
@@ -33,13 +35,16 @@ logger = logging.getLogger(__name__)
 class PortfolioBalancer:
     """Автоматическая балансировка портфеля BTC/ETH"""
     
-    def __init__(self):
+    def __init__(self, market_data=None):
         ############################################################
         # ⚙️ ИНИЦИАЛИЗАЦИЯ
         # Назначение: клиенты API, Telegram, целевые доли и защиты
         ############################################################
         self.mex_api = MexAPI()
+        # Цены, стакан и 24h тикеры - через общий кэш рыночных данных процесса
+        self.market_data = (market_data or get_market_data_cache(self.mex_api)).client('portfolio_balancer')
         self.mex_adv_api = MexAdvancedAPI()
+        self.positions = get_position_engine()  # Позиции по средней цене закупа
         self.bot_token = TELEGRAM_BOT_TOKEN
         self.chat_id = TELEGRAM_CHAT_ID
         
@@ -123,8 +128,8 @@ class PortfolioBalancer:
         """Рассчитать стоимость портфеля в USDC"""
         try:
             # Получаем текущие цены
-            btc_price = self.mex_api.get_ticker_price('BTCUSDC')
-            eth_price = self.mex_api.get_ticker_price('ETHUSDC')
+            btc_price = self.market_data.get_ticker_price('BTCUSDC')
+            eth_price = self.market_data.get_ticker_price('ETHUSDC')
             
             if not btc_price or not eth_price:
                 logger.error("Не удалось получить цены BTC/ETH")
@@ -235,7 +240,7 @@ class PortfolioBalancer:
     def get_orderbook_data(self, symbol: str) -> Optional[Dict]:
         """Получить данные стакана заявок"""
         try:
-            orderbook = self.mex_api.get_depth(symbol, limit=20)
+            orderbook = self.market_data.get_depth(symbol, limit=20)
             
             if 'bids' in orderbook and 'asks' in orderbook:
                 bids = orderbook['bids'][:10]
@@ -343,6 +348,7 @@ class PortfolioBalancer:
             
             if order and 'orderId' in order:
                 logger.info(f"✅ Ордер балансировки размещен: {order}")
+                self.market_data.invalidate(symbol)
                 
                 # 🔥 НОВОЕ: Ждем исполнения ордера (только для SELL)
                 if action == 'SELL':
@@ -779,7 +785,7 @@ class PortfolioBalancer:
             symbol = None
             for pair in preferred_pairs:
                 try:
-                    info = self.mex_api.get_24hr_ticker(pair)
+                    info = self.market_data.get_24hr_ticker(pair)
                     if isinstance(info, dict) and ('lastPrice' in info or 'priceChangePercent' in info):
                         symbol = pair
                         break
@@ -789,69 +795,25 @@ class PortfolioBalancer:
                 # Фоллбек — используем USDC логически
                 symbol = f"{base}USDC"
 
-            # Получаем историю сделок и считаем среднюю цену оставшейся позиции (FIFO-подобно)
-            trades = []
+            # Средняя цена оставшейся позиции - из общего движка позиций (новые сделки догружаются)
             try:
-                trades = self.mex_adv_api.get_my_trades(symbol, limit=500) or []
+                position = self.positions.sync(symbol)
             except Exception:
-                trades = []
+                position = None
 
-            if not trades:
+            if position is None or position.qty <= 0:
                 # Без истории считаем нейтрально
                 return 0.0
 
-            # Преобразование и сортировка по времени (если есть)
-            def trade_time(t):
-                return t.get('time') or t.get('timestamp') or t.get('transactTime') or 0
-
-            trades = sorted(trades, key=trade_time)
-
-            position_qty = 0.0
-            avg_cost = 0.0  # средняя цена в котируемой валюте (USDC/USDT)
-
-            # Для комиссий: если комиссия в котируемой валюте — плюсуем в стоимость
+            avg_cost = position.avg_price  # средняя цена в котируемой валюте (USDC/USDT)
             quote = symbol.replace(base, '')  # USDC/USDT
 
-            for t in trades:
-                try:
-                    is_buyer = bool(t.get('isBuyer', t.get('is_buyer', False)))
-                    price = float(t.get('price') or t.get('p') or 0)
-                    qty = float(t.get('qty') or t.get('q') or 0)
-                    quote_qty = float(t.get('quoteQty') or t.get('quote_qty') or price * qty)
-                    commission = float(t.get('commission') or 0)
-                    commission_asset = t.get('commissionAsset') or t.get('commission_asset')
-
-                    # Стоимость в котируемой валюте с учётом комиссии, если она в той же валюте
-                    cost_with_fee = quote_qty
-                    if commission_asset and commission_asset.upper() == quote.upper():
-                        cost_with_fee += commission
-
-                    if is_buyer:
-                        # Покупка: пересчёт средней
-                        new_total_cost = avg_cost * position_qty + cost_with_fee
-                        position_qty += qty
-                        if position_qty > 0:
-                            avg_cost = new_total_cost / position_qty
-                    else:
-                        # Продажа: уменьшаем позицию; средняя цена для остатка не меняется
-                        position_qty -= qty
-                        if position_qty < 0:
-                            # Ушли в шорт по данным истории — обнуляем (на практике не должно)
-                            position_qty = 0.0
-                except Exception:
-                    continue
-
-            # Если история не охватывает весь текущий остаток, используем имеющуюся среднюю
-            # PnL считаем в котируемой валюте выбранного символа
-            if position_qty <= 0:
-                return 0.0
-
             # Конвертируем текущую цену к валюте символа, если нужно (например, символ USDT, а значения у нас в USDC)
             current_in_quote = current_price
             if quote == 'USDT':
                 # Конвертация USDC->USDT курсом USDCUSDT
                 try:
-                    usdcusdt = self.mex_api.get_ticker_price('USDCUSDT')
+                    usdcusdt = self.market_data.get_ticker_price('USDCUSDT')
                     rate = float(usdcusdt.get('price', 1.0))
                     current_in_quote = current_price / rate if rate != 0 else current_price
                 except Exception:
@@ -0,0 +1,169 @@
+#!/usr/bin/env python3
+"""
+PnL всего портфеля за один проход
+PnLMonitor (BTC/ETH) и AltsMonitor (альты) считали PnL по одному активу:
+запрос цены и истории сделок на каждый символ. Здесь один снимок балансов
+и один снимок цен всех пар (24h тикеры) превращаются в массивы, и
+нереализованный PnL, PnL в % и срабатывание порога продажи считаются для
+всех активов сразу. Результат - список действий, отсортированный по
+приоритету продажи.
+
+Средняя цена закупа - из движка позиций; сделки пары догружаются не чаще
+trades_sync_sec. Сделка после загрузки меняет баланс, а покупка - и
+среднюю цену (продажа с последующей покупкой уменьшает количество, но
+средняя цена тоже устаревает), поэтому при расхождении баланса с позицией
+по сделкам сделки догружаются сразу. При ошибке загрузки актив не
+продается по устаревшей средней цене.
+"""
+
+import logging
+import time
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from config import PORTFOLIO_PNL_CONFIG
+from position_engine import DUST_QTY, get_position_engine
+
+logger = logging.getLogger(__name__)
+
+
+class PortfolioPnL:
+    """Оценка PnL и порогов продажи по снимкам балансов и цен"""
+
+    def __init__(self, market_data=None, positions=None, config: Optional[Dict] = None):
+        """
+        Args:
+            market_data: Источник цен с get_24hr_ticker/get_ticker_price (по умолчанию общий кэш рынка)
+            positions: Движок позиций (по умолчанию общий движок процесса)
+            config: Интервал догрузки сделок (по умолчанию PORTFOLIO_PNL_CONFIG)
+        """
+        self.config = config or PORTFOLIO_PNL_CONFIG
+        if market_data is None:
+            from cache.market_data_cache import get_market_data_cache
+            market_data = get_market_data_cache().client('portfolio_pnl')
+        self.market_data = market_data
+        self.positions = positions if positions is not None else get_position_engine()
+        self.stats = {'evaluations': 0, 'assets': 0, 'price_fallbacks': 0, 'forced_syncs': 0}
+        # Баланс пары на момент последней загрузки сделок отсюда: постоянное расхождение
+        # (перевод, пыль) не должно вызывать догрузку при каждой оценке
+        self._synced_balance: Dict[str, float] = {}
+
+    def prices(self, symbols: List[str]) -> Dict[str, float]:
+        """Цены символов из одного снимка 24h тикеров (отдельный запрос - только если пары там нет)"""
+        tickers = self.market_data.get_24hr_ticker()
+        snapshot = {}
+        if isinstance(tickers, list):
+            for ticker in tickers:
+                try:
+                    snapshot[ticker['symbol']] = float(ticker['lastPrice'])
+                except (KeyError, TypeError, ValueError):
+                    continue
+        prices = {}
+        for symbol in symbols:
+            price = snapshot.get(symbol)
+            if price is None:
+                self.stats['price_fallbacks'] += 1
+                try:
+                    info = self.market_data.get_ticker_price(symbol)
+                    price = float(info['price']) if isinstance(info, dict) and 'price' in info else None
+                except Exception as e:
+                    logger.warning(f"⚠️ Нет цены для {symbol}: {e}")
+            if price:
+                prices[symbol] = price
+        return prices
+
+    def _position(self, symbol: str, total: float, max_age: float):
+        """Позиция пары и признак того, что средняя цена актуальна.
+
+        Баланс расходится с позицией по сделкам и изменился с нашей прошлой
+        загрузки - были сделки (любая покупка меняет среднюю цену), поэтому
+        догружаем сделки сразу, не дожидаясь trades_sync_sec.
+        """
+        try:
+            started = time.time()
+            position = self.positions.sync(symbol, max_age=max_age)
+            tolerance = max(DUST_QTY, position.qty * 1e-9)
+            if position.synced_at < started and abs(total - position.qty) > tolerance \
+                    and abs(total - self._synced_balance.get(symbol, float('inf'))) > tolerance:
+                self.stats['forced_syncs'] += 1
+                position = self.positions.sync(symbol, force=True)
+            if position.synced_at >= started:
+                self._synced_balance[symbol] = total
+            return position, True
+        except Exception as e:
+            logger.error(f"❌ Ошибка загрузки сделок {symbol}: {e}")
+            return self.positions.get(symbol), False
+
+    def evaluate(self, balances: Dict[str, Dict], symbols: Dict[str, str],
+                 threshold_usd: Optional[float] = None, threshold_pct: Optional[float] = None,
+                 prices: Optional[Dict[str, float]] = None) -> List[Dict]:
+        """PnL и решения о продаже для всех активов.
+
+        Args:
+            balances: {актив: {'free', 'locked', 'total'}}
+            symbols: {актив: торговая пара}; активы без пары пропускаются
+            threshold_usd: Порог продажи по нереализованному PnL, $
+            threshold_pct: Порог в % от средней цены (приоритетнее, если средняя цена известна)
+            prices: Готовый снимок цен (по умолчанию prices())
+
+        Returns:
+            Список действий: сначала активы к продаже, затем по убыванию PnL
+        """
+        started = time.time()
+        assets = [a for a in balances if symbols.get(a) and balances[a].get('total', 0) > 0]
+        prices = prices if prices is not None else self.prices([symbols[a] for a in assets])
+        assets = [a for a in assets if symbols[a] in prices]
+        if not assets:
+            return []
+
+        max_age = self.config.get('trades_sync_sec', 300)
+        positions, stale = [], []
+        for asset in assets:
+            position, fresh = self._position(symbols[asset], balances[asset]['total'], max_age)
+            positions.append(position)
+            stale.append(not fresh)
+
+        quantity = np.array([balances[a]['total'] for a in assets], dtype=np.float64)
+        free = np.array([balances[a].get('free', balances[a]['total']) for a in assets], dtype=np.float64)
+        price = np.array([prices[symbols[a]] for a in assets], dtype=np.float64)
+        avg_price = np.array([p.avg_price if p else 0.0 for p in positions], dtype=np.float64)
+        position_qty = np.array([p.qty if p else 0.0 for p in positions], dtype=np.float64)
+        realized = np.array([p.realized_pnl if p else 0.0 for p in positions], dtype=np.float64)
+
+        has_cost = avg_price > 0
+        held = np.where(position_qty > 0, np.minimum(quantity, position_qty), 0.0)
+        unrealized = (price - avg_price) * held
+        with np.errstate(divide='ignore', invalid='ignore'):
+            pnl_pct = np.where(has_cost, (price - avg_price) / avg_price * 100.0, 0.0)
+        sell = np.zeros(len(assets), dtype=bool)
+        if threshold_pct is not None:
+            sell |= has_cost & (pnl_pct >= float(threshold_pct))
+        if threshold_usd is not None:
+            by_usd = unrealized > float(threshold_usd)
+            sell |= by_usd if threshold_pct is None else (~has_cost & by_usd)
+        sell &= ~np.array(stale, dtype=bool)  # Устаревшая средняя цена - не повод продавать
+        order = np.lexsort((-unrealized, ~sell))
+
+        self.stats['evaluations'] += 1
+        self.stats['assets'] += len(assets)
+        logger.info(f"💼 PnL портфеля: {len(assets)} активов, к продаже {int(sell.sum())}, "
+                    f"итого ${unrealized.sum():.4f} за {(time.time() - started) * 1000:.0f}мс")
+        return [{
+            'asset': assets[i],
+            'symbol': symbols[assets[i]],
+            'quantity': float(quantity[i]),
+            'free': float(free[i]),
+            'current_price': float(price[i]),
+            'value': float(quantity[i] * price[i]),
+            'avg_buy_price': float(avg_price[i]),
+            'position_qty': float(position_qty[i]),
+            'realized_pnl': float(realized[i]),
+            'unrealized_pnl': float(unrealized[i]),
+            'pnl_pct': float(pnl_pct[i]),
+            'sell': bool(sell[i]),
+        } for i in order]
+
+    def get_stats(self) -> Dict:
+        return dict(self.stats)
+
@@ -0,0 +1,249 @@
+#!/usr/bin/env python3
+"""
+Позиции по средней цене закупа (avg-cost)
+Раньше PnL от средней цены считали PnLMonitor, AltsMonitor, PortfolioBalancer
+и утилиты, каждый раз заново проигрывая до 500 последних сделок. Движок
+хранит по каждой паре состояние позиции (количество, себестоимость,
+реализованный PnL, комиссии в котируемой валюте) и применяет только новые
+сделки. Нереализованный PnL по текущей цене считается за O(1).
+
+Состояние сохраняется снимком в JSON и подхватывается при старте.
+"""
+
+import json
+import logging
+import os
+import threading
+import time
+from dataclasses import asdict, dataclass, field
+from typing import Dict, List, Optional
+
+from config import POSITION_ENGINE_CONFIG
+
+logger = logging.getLogger(__name__)
+
+DUST_QTY = 1e-12  # Остаток меньше - позиция закрыта
+
+
+def split_symbol(symbol: str) -> tuple:
+    """Базовый и котируемый актив пары ('ETHUSDC' -> ('ETH', 'USDC'))"""
+    for quote in ('USDC', 'USDT'):
+        if symbol.endswith(quote) and len(symbol) > len(quote):
+            return symbol[:-len(quote)], quote
+    return symbol, 'USDT'
+
+
+@dataclass
+class Position:
+    """Состояние позиции по паре (суммы - в котируемой валюте)"""
+    symbol: str
+    qty: float = 0.0
+    cost_basis: float = 0.0     # Себестоимость остатка с комиссиями покупок
+    realized_pnl: float = 0.0
+    fees_quote: float = 0.0
+    buys: int = 0
+    sells: int = 0
+    last_time: int = 0          # Время последней примененной сделки (мс)
+    last_ids: List = field(default_factory=list)  # id сделок с временем last_time
+    synced_at: float = 0.0
+
+    @property
+    def avg_price(self) -> float:
+        return self.cost_basis / self.qty if self.qty > 0 else 0.0
+
+    def unrealized_pnl(self, price: float, qty: Optional[float] = None) -> float:
+        """PnL остатка по цене price; qty - фактический баланс (не больше позиции)"""
+        if self.qty <= 0:
+            return 0.0
+        held = self.qty if qty is None else min(qty, self.qty)
+        return (price - self.avg_price) * held
+
+    def is_new(self, trade: Dict) -> bool:
+        trade_time = int(trade.get('time') or 0)
+        return trade_time > self.last_time or (trade_time == self.last_time and trade.get('id') not in self.last_ids)
+
+    def apply(self, trade: Dict):
+        """Применить сделку myTrades (moving average: продажа не меняет среднюю цену)"""
+        base, quote = split_symbol(self.symbol)
+        qty = float(trade.get('qty', 0) or 0)
+        price = float(trade.get('price', 0) or 0)
+        quote_qty = float(trade.get('quoteQty', 0) or 0)
+        fee = float(trade.get('commission', 0) or 0)
+        fee_asset = trade.get('commissionAsset')
+        if fee <= 0:
+            fee_q = 0.0
+        elif fee_asset == quote:
+            fee_q = fee
+        elif fee_asset == base and price > 0:
+            fee_q = fee * price
+        else:
+            fee_q = 0.0  # Комиссия в другом активе - не учитываем
+
+        trade_time = int(trade.get('time') or 0)
+        if trade_time > self.last_time:
+            self.last_time, self.last_ids = trade_time, []
+        self.last_ids.append(trade.get('id'))
+
+        if trade.get('isBuyer', False):
+            self.buys += 1
+            self.fees_quote += fee_q
+            if self.qty + qty > 0:
+                self.cost_basis += quote_qty + fee_q
+                self.qty += qty
+            return
+        self.sells += 1
+        if self.qty <= 0:
+            return  # Продажа монет, купленных до начала истории
+        self.fees_quote += fee_q
+        avg = self.avg_price
+        self.realized_pnl += quote_qty - fee_q - avg * qty
+        self.cost_basis -= avg * qty
+        self.qty -= qty
+        if self.qty < DUST_QTY:
+            self.qty = 0.0
+            self.cost_basis = 0.0
+
+    def summary(self, price: float, qty: Optional[float] = None) -> Dict:
+        """PnL в формате прежних расчетов avg-cost"""
+        unrealized = self.unrealized_pnl(price, qty)
+        return {
+            'avg_buy_price': self.avg_price,
+            'current_price': price,
+            'position_qty': self.qty,
+            'cost_basis': self.cost_basis,
+            'fees_quote': self.fees_quote,
+            'realized_pnl': self.realized_pnl,
+            'unrealized_pnl': unrealized,
+            'total_pnl': self.realized_pnl + unrealized,
+        }
+
+
+class PositionEngine:
+    """Позиции всех пар процесса с инкрементальной загрузкой сделок"""
+
+    def __init__(self, path: Optional[str] = None, trade_source=None, config: Optional[Dict] = None):
+        """
+        Args:
+            path: Файл снимка позиций ('' - без сохранения)
+            trade_source: Источник сделок с методом get_my_trades(symbol, limit)
+                (по умолчанию MexAdvancedAPI)
+            config: Интервал синхронизации и лимиты загрузки (по умолчанию POSITION_ENGINE_CONFIG)
+        """
+        self.config = config or POSITION_ENGINE_CONFIG
+        self.path = self.config.get('path', 'positions.json') if path is None else path
+        self._trade_source = trade_source
+        self._positions: Dict[str, Position] = {}
+        self._lock = threading.RLock()
+        self.stats = {'syncs': 0, 'full_loads': 0, 'trades_applied': 0, 'snapshots': 0}
+        self.load()
+
+    @property
+    def trade_source(self):
+        if self._trade_source is None:
+            from mexc_advanced_api import MexAdvancedAPI
+            self._trade_source = MexAdvancedAPI()
+        return self._trade_source
+
+    ############################################################
+    # 🔄 СДЕЛКИ
+    ############################################################
+    def apply_trades(self, symbol: str, trades: List[Dict]) -> int:
+        """Применить новые сделки пары (уже примененные пропускаются)"""
+        with self._lock:
+            position = self._positions.setdefault(symbol, Position(symbol))
+            applied = 0
+            for trade in sorted(trades or [], key=lambda t: t.get('time') or 0):
+                if position.is_new(trade):
+                    position.apply(trade)
+                    applied += 1
+            self.stats['trades_applied'] += applied
+            return applied
+
+    def sync(self, symbol: str, force: bool = False, max_age: Optional[float] = None) -> Position:
+        """Догрузить новые сделки пары (не чаще max_age, по умолчанию sync_interval_sec)"""
+        max_age = self.config.get('sync_interval_sec', 60) if max_age is None else max_age
+        with self._lock:
+            position = self._positions.get(symbol)
+            if position is not None and not force and time.time() - position.synced_at < max_age:
+                return position
+        full_limit = self.config.get('initial_limit', 500)
+        limit = self.config.get('delta_limit', 100) if position is not None else full_limit
+        trades = self.trade_source.get_my_trades(symbol, limit=limit) or []
+        if position is not None and len(trades) >= limit and limit < full_limit \
+                and all(position.is_new(t) for t in trades):
+            # Новых сделок больше лимита - догружаем полную историю
+            trades = self.trade_source.get_my_trades(symbol, limit=full_limit) or []
+            self.stats['full_loads'] += 1
+        elif position is None:
+            self.stats['full_loads'] += 1
+        applied = self.apply_trades(symbol, trades)
+        with self._lock:
+            position = self._positions[symbol]
+            position.synced_at = time.time()
+            self.stats['syncs'] += 1
+        if applied:
+            self.save()
+        return position
+
+    ############################################################
+    # 📈 PnL
+    ############################################################
+    def get(self, symbol: str) -> Optional[Position]:
+        return self._positions.get(symbol)
+
+    def pnl(self, symbol: str, price: float, qty: Optional[float] = None, sync: bool = True) -> Dict:
+        """PnL пары по текущей цене (сделки догружаются, если пора)"""
+        position = self.sync(symbol) if sync else self._positions.get(symbol, Position(symbol))
+        with self._lock:
+            return position.summary(price, qty)
+
+    ############################################################
+    # 💾 СНИМОК
+    ############################################################
+    def save(self):
+        """Сохранить снимок позиций (атомарная замена файла)"""
+        if not self.path:
+            return
+        with self._lock:
+            data = {symbol: asdict(position) for symbol, position in self._positions.items()}
+        tmp_path = f"{self.path}.tmp"
+        try:
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(data, f)
+            os.replace(tmp_path, self.path)
+            self.stats['snapshots'] += 1
+        except OSError as e:
+            logger.error(f"❌ Ошибка сохранения позиций: {e}")
+
+    def load(self):
+        """Загрузить снимок позиций (время синхронизации сбрасывается)"""
+        if not self.path or not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, encoding='utf-8') as f:
+                data = json.load(f)
+            with self._lock:
+                self._positions = {symbol: Position(**{**state, 'synced_at': 0.0})
+                                   for symbol, state in data.items()}
+            logger.info(f"💼 Загружено позиций: {len(self._positions)} из {self.path}")
+        except (OSError, ValueError, TypeError) as e:
+            logger.error(f"❌ Ошибка загрузки позиций {self.path}: {e}")
+
+    def get_stats(self) -> Dict:
+        stats = dict(self.stats)
+        stats['positions'] = sum(1 for p in self._positions.values() if p.qty > 0)
+        stats['symbols'] = len(self._positions)
+        return stats
+
+
+_position_engine: Optional[PositionEngine] = None
+_position_engine_lock = threading.Lock()
+
+
+def get_position_engine() -> PositionEngine:
+    """Получить общий движок позиций процесса"""
+    global _position_engine
+    with _position_engine_lock:
+        if _position_engine is None:
+            _position_engine = PositionEngine()
+        return _position_engine
@@ -8,14 +8,32 @@ import numpy as np
 from typing import Dict, List, Optional
 from mex_api import MexAPI
 from technical_indicators import TechnicalIndicators
+from cache.kline_store import KlineWindow, as_window, get_kline_store
+from cache.ttl_cache import TTLCache
+from cache.ath_index import get_ath_index
+from cache.daily_extremes import get_daily_extremes
+from config import KLINE_CACHE_CONFIG
+from filter_decision_log import get_decision_log
+import indicator_kernels as kernels
 import logging
 
 logger = logging.getLogger(__name__)
 
 class RebalancerAntiHypeFilter:
-    def __init__(self):
+    def __init__(self, kline_source=None, ath_index=None):
+        """
+        Args:
+            kline_source: Источник свечей с методом get_klines (по умолчанию MexAPI);
+                например ResamplingKlineSource, строящий 1h/4h из одной базовой загрузки
+            ath_index: Индекс ATH/ATL (по умолчанию общий индекс процесса get_ath_index())
+        """
         self.mex_api = MexAPI()
+        self.kline_source = kline_source or self.mex_api
         self.tech_indicators = TechnicalIndicators()
+        self.kline_store = get_kline_store()  # Общее хранилище свечей процесса
+        self.ath_index = ath_index if ath_index is not None else get_ath_index()
+        self.daily_extremes = get_daily_extremes()  # Дневные хай/лоу из потока цен
+        self.decision_log = get_decision_log()  # Журнал решений (None - выключен)
         
         # Параметры фильтра - УСИЛЕНЫ НА 10% ДЛЯ АЛЬТ-СЕЗОНА
         self.atr_impulse_multiplier = 2.7  # Усилено с 3.0 (более строгая блокировка импульса)
@@ -34,65 +52,60 @@ class RebalancerAntiHypeFilter:
         self.daily_high_safety_margin = 0.01  # 1% безопасная дистанция от дневного хая
         self.daily_high_block_threshold = 0.002  # 0.2% от хая = полная блокировка
         
-        # Кэш для избежания повторных запросов
-        self.cache = {}
-        self.cache_ttl = 300  # 5 минут
+        # Кэш окон свечей: TTL, устаревание на границе свечи, LRU-лимит, одна загрузка на ключ
+        self.cache_ttl = KLINE_CACHE_CONFIG['ttl_sec']
+        self.cache = TTLCache(KLINE_CACHE_CONFIG['max_entries'], self.cache_ttl)
     
-    def _get_klines_cached(self, symbol: str, interval: str, limit: int = 100) -> List:
-        """Получить свечи с кэшированием"""
-        cache_key = f"{symbol}_{interval}_{limit}"
-        
-        if cache_key in self.cache:
-            return self.cache[cache_key]
-        
-        klines = self.mex_api.get_klines(symbol, interval, limit)
-        self.cache[cache_key] = klines
-        return klines
+    def _get_klines_cached(self, symbol: str, interval: str, limit: int = 100) -> Optional[KlineWindow]:
+        """Получить свечи с кэшированием (окно общего хранилища свечей)"""
+        return self.cache.get_or_load((symbol, interval, limit),
+                                      lambda: self._fetch_window(symbol, interval, limit), interval)
+    
+    def _fetch_window(self, symbol: str, interval: str, limit: int) -> Optional[KlineWindow]:
+        """Загрузить свечи из источника и вернуть окно общего хранилища"""
+        klines = self.kline_source.get_klines(symbol, interval, limit)
+        if isinstance(klines, KlineWindow):
+            return klines
+        if isinstance(klines, list) and klines:
+            # Парсим один раз при загрузке, дальше работаем с массивами
+            self.kline_store.ingest(symbol, interval, klines)
+            return self.kline_store.window(symbol, interval, len(klines))
+        return None
     
-    def _calculate_atr(self, klines: List, period: int = 14) -> float:
+    def _calculate_atr(self, klines, period: int = 14) -> float:
         """Рассчитать ATR (Average True Range)"""
-        if len(klines) < period + 1:
+        window = as_window(klines)
+        if window is None or len(window) < period + 1:
             return 0.0
         
         try:
-            highs = [float(k[2]) for k in klines[-period-1:]]
-            lows = [float(k[3]) for k in klines[-period-1:]]
-            closes = [float(k[4]) for k in klines[-period-1:]]
+            highs = window.high[-period-1:]
+            lows = window.low[-period-1:]
+            closes = window.close[-period-1:]
             
-            true_ranges = []
-            for i in range(1, len(highs)):
-                tr1 = highs[i] - lows[i]
-                tr2 = abs(highs[i] - closes[i-1])
-                tr3 = abs(lows[i] - closes[i-1])
-                true_ranges.append(max(tr1, tr2, tr3))
+            true_ranges = np.maximum(
+                highs[1:] - lows[1:],
+                np.maximum(np.abs(highs[1:] - closes[:-1]), np.abs(lows[1:] - closes[:-1]))
+            )
             
-            return sum(true_ranges) / len(true_ranges) if true_ranges else 0.0
+            return float(true_ranges.mean()) if true_ranges.size else 0.0
         except Exception as e:
             logger.error(f"Ошибка расчета ATR: {e}")
             return 0.0
     
-    def _calculate_rsi(self, klines: List, period: int = 14) -> float:
+    def _calculate_rsi(self, klines, period: int = 14) -> float:
         """Рассчитать RSI"""
-        if len(klines) < period + 1:
+        window = as_window(klines)
+        if window is None or len(window) < period + 1:
             return 50.0
         
         try:
-            closes = [float(k[4]) for k in klines[-period-1:]]
+            changes = np.diff(window.close[-period-1:])
+            gains = np.where(changes > 0, changes, 0.0)
+            losses = np.where(changes > 0, 0.0, -changes)
             
-            gains = []
-            losses = []
-            
-            for i in range(1, len(closes)):
-                change = closes[i] - closes[i-1]
-                if change > 0:
-                    gains.append(change)
-                    losses.append(0)
-                else:
-                    gains.append(0)
-                    losses.append(abs(change))
-            
-            avg_gain = sum(gains) / len(gains) if gains else 0
-            avg_loss = sum(losses) / len(losses) if losses else 0
+            avg_gain = float(gains.mean()) if gains.size else 0
+            avg_loss = float(losses.mean()) if losses.size else 0
             
             if avg_loss == 0:
                 return 100.0
@@ -104,98 +117,118 @@ class RebalancerAntiHypeFilter:
             logger.error(f"Ошибка расчета RSI: {e}")
             return 50.0
     
-    def _calculate_ema(self, klines: List, period: int) -> float:
+    def _calculate_ema(self, klines, period: int) -> float:
         """Рассчитать EMA"""
-        if len(klines) < period:
+        window = as_window(klines)
+        if window is None or len(window) < period:
             return 0.0
         
         try:
-            closes = [float(k[4]) for k in klines[-period:]]
-            multiplier = 2 / (period + 1)
-            
-            ema = closes[0]
-            for close in closes[1:]:
-                ema = (close * multiplier) + (ema * (1 - multiplier))
-            
-            return ema
+            # Старт с первой цены окна, рекурсия - в ядре (numba/numpy)
+            return float(kernels.ema_seeded(window.close[-period:], period)[-1])
         except Exception as e:
             logger.error(f"Ошибка расчета EMA: {e}")
             return 0.0
     
-    def _get_historical_max(self, klines: List, days: int = 30) -> float:
+    def _get_historical_max(self, klines, days: int = 30) -> float:
         """Получить исторический максимум за N дней"""
         try:
-            if len(klines) < days:
+            window = as_window(klines)
+            if window is None or len(window) < days:
                 return 0.0
             
-            highs = [float(k[2]) for k in klines[-days:]]
-            return max(highs) if highs else 0.0
+            return float(window.high[-days:].max())
         except Exception as e:
             logger.error(f"Ошибка получения исторического максимума: {e}")
             return 0.0
     
-    def _get_recent_high(self, klines: List, hours: int = 24) -> float:
+    def _get_recent_high(self, klines, hours: int = 24) -> float:
         """Получить недавний максимум за N часов"""
         try:
-            if len(klines) < hours:
+            window = as_window(klines)
+            if window is None or len(window) < hours:
                 return 0.0
             
-            highs = [float(k[2]) for k in klines[-hours:]]
-            return max(highs) if highs else 0.0
+            return float(window.high[-hours:].max())
         except Exception as e:
             logger.error(f"Ошибка получения недавнего максимума: {e}")
             return 0.0
     
     def _get_ath(self, symbol: str, max_days: int = 1000) -> float:
-        """Получить ATH (All-Time High) по дневным свечам.
-        Берем максимум High из доступных дневных свечей (до max_days).
+        """Получить ATH (All-Time High) из индекса экстремумов.
+        Символ загружается в индекс один раз по дневным свечам (до max_days);
+        дальше дозагружаются только дневные свечи, пропущенные с прошлого
+        обновления, а живой максимум берется из уже загруженного окна 1h.
         """
         try:
-            daily_klines = self.mex_api.get_klines(symbol, '1d', max_days)
-            if not daily_klines:
-                return 0.0
-            highs = [float(k[2]) for k in daily_klines]
-            return max(highs) if highs else 0.0
+            missing = self.ath_index.missing_days(symbol)
+            if missing < 0:
+                self.ath_index.bootstrap(symbol, self._fetch_window(symbol, '1d', max_days))
+            elif missing > 0:
+                # Последняя учтенная дневная свеча могла быть незакрытой - берем и ее
+                self.ath_index.apply_klines(
+                    symbol, self._fetch_window(symbol, '1d', min(missing + 1, max_days)), daily=True)
+            if symbol in self.ath_index:
+                self.ath_index.apply_klines(symbol, self._get_klines_cached(symbol, '1h', 100))
+            return self.ath_index.ath(symbol)
         except Exception as e:
             logger.error(f"Ошибка получения ATH: {e}")
             return 0.0
     
-    def _check_volume_hype(self, klines: List, period: int = 20) -> bool:
+    def _volume_ratio(self, klines, period: int = 20) -> Optional[float]:
+        """Отношение объема последней свечи к среднему за period (для журнала решений)"""
+        window = as_window(klines)
+        if window is None or len(window) < period:
+            return None
+        avg_volume = float(window.volume[-period:-1].mean())
+        return float(window.volume[-1]) / avg_volume if avg_volume > 0 else None
+    
+    def _check_volume_hype(self, klines, period: int = 20) -> bool:
         """Проверить хайп по объему"""
         try:
-            if len(klines) < period:
+            window = as_window(klines)
+            if window is None or len(window) < period:
                 return False
             
-            volumes = [float(k[5]) for k in klines[-period:]]
-            current_volume = volumes[-1]
-            avg_volume = sum(volumes[:-1]) / len(volumes[:-1])
+            volumes = window.volume[-period:]
+            current_volume = float(volumes[-1])
+            avg_volume = float(volumes[:-1].mean())
             
             return current_volume > avg_volume * self.volume_hype_threshold
         except Exception as e:
             logger.error(f"Ошибка проверки объема: {e}")
             return False
     
+    def _get_daily_high(self, symbol: str, days: int = 7) -> Optional[float]:
+        """Хай за последние days UTC-суток из трекера; если символ не отслеживается -
+        засеваем трекер дневными свечами (None - свечей нет)"""
+        daily_high = self.daily_extremes.high(symbol, days)
+        if daily_high is not None:
+            return daily_high
+        daily_window = self._fetch_window(symbol, '1d', days)
+        if not daily_window:
+            return None
+        if self.daily_extremes.seed(symbol, daily_window):
+            daily_high = self.daily_extremes.high(symbol, days)
+        # Свечи не текущие (история, тесты) - максимум окна, как раньше
+        return daily_high if daily_high is not None else float(daily_window.high.max())
+    
     def _check_daily_high_protection(self, symbol: str, current_price: float) -> Dict:
         """Проверка защиты от покупок близко к дневному хаю"""
         try:
-            # Получаем дневные свечи
-            daily_klines = self.mex_api.get_klines(symbol, '1d', 7)
-            if not daily_klines or len(daily_klines) < 1:
+            # Хай за 7 суток: из трекера, без трекера - из дневных свечей
+            daily_high = self._get_daily_high(symbol, 7)
+            if daily_high is None:
                 logger.warning(f"⚠️ Нет дневных свечей для {symbol}")
                 return {'blocked': False, 'reason': 'no_daily_data'}
             
-            # Находим дневной хай
-            daily_high = max([float(k[2]) for k in daily_klines])  # high price
-            
             # Рассчитываем расстояние от хая
             distance_from_high = (daily_high - current_price) / daily_high
             distance_percent = distance_from_high * 100
             
-            logger.info(f"📊 {symbol}: дневной хай=${daily_high:.4f}, текущая цена=${current_price:.4f}, дистанция={distance_percent:.2f}%")
-            
             # Полная блокировка если слишком близко к хаю
             if distance_from_high < self.daily_high_block_threshold:
-                logger.warning(f"🚫 {symbol}: ПОЛНАЯ БЛОКИРОВКА! Слишком близко к дневному хаю: {distance_percent:.2f}% < {self.daily_high_block_threshold*100:.1f}%")
+                logger.debug(f"🚫 {symbol}: ПОЛНАЯ БЛОКИРОВКА! Слишком близко к дневному хаю: {distance_percent:.2f}% < {self.daily_high_block_threshold*100:.1f}%")
                 return {
                     'blocked': True, 
                     'reason': f'rebalancer_daily_high_too_close_{distance_percent:.1f}%',
@@ -207,7 +240,7 @@ class RebalancerAntiHypeFilter:
             
             # Ограничение если близко к хаю
             if distance_from_high < self.daily_high_safety_margin:
-                logger.warning(f"⚠️ {symbol}: ОГРАНИЧЕНИЕ! Близко к дневному хаю: {distance_percent:.2f}% < {self.daily_high_safety_margin*100:.1f}%")
+                logger.debug(f"⚠️ {symbol}: ОГРАНИЧЕНИЕ! Близко к дневному хаю: {distance_percent:.2f}% < {self.daily_high_safety_margin*100:.1f}%")
                 return {
                     'blocked': False, 
                     'reason': f'rebalancer_daily_high_close_{distance_percent:.1f}%',
@@ -219,7 +252,6 @@ class RebalancerAntiHypeFilter:
                 }
             
             # Безопасная зона
-            logger.info(f"✅ {symbol}: Безопасная зона от дневного хая: {distance_percent:.2f}%")
             return {
                 'blocked': False, 
                 'reason': f'rebalancer_daily_high_safe_{distance_percent:.1f}%',
@@ -236,6 +268,44 @@ class RebalancerAntiHypeFilter:
     
     def check_buy_permission(self, symbol: str) -> Dict:
         """Проверить разрешение на покупку для ребалансировщика"""
+        trace: Dict = {}
+        result = self._evaluate(symbol, trace)
+        self._record_decision(symbol, trace, result)
+        return result
+    
+    def _decision_rules(self, trace: Dict) -> List[tuple]:
+        """Значение, порог и сравнение каждого правила (порядок RULES['rebalancer'] журнала)"""
+        price, daily_high = trace.get('price'), trace.get('daily_high')
+        atr, rsi, ema20, ema200 = trace.get('atr'), trace.get('rsi'), trace.get('ema20'), trace.get('ema200')
+        change, ath, recent_high = trace.get('change_4h'), trace.get('ath'), trace.get('recent_high')
+        distance = (daily_high - price) / daily_high if price and daily_high else None
+        atr_percent = atr / price * 100 if price and atr is not None else None
+        return [
+            (distance, self.daily_high_block_threshold, '<'),
+            (distance, self.daily_high_safety_margin, '<'),
+            (price, ath * (1 - self.max_historical_deviation) if ath else None, '>'),
+            (price, recent_high * (1 - self.recent_high_threshold) if recent_high else None, '>'),
+            (trace.get('volume_ratio'), self.volume_hype_threshold, '>'),
+            (change, atr_percent * self.atr_impulse_multiplier if atr_percent is not None else None, '>'),
+            (rsi, self.rsi_overbought, '>'),
+            (price / ema20 - 1 if price and ema20 else None, self.ema_deviation, '>'),
+            (price, ema200 * 0.95 if ema200 is not None else None, '<'),
+            (change, -atr_percent * self.atr_dca_multiplier if atr_percent is not None else None, '<'),
+            (rsi, self.rsi_oversold, '<'),
+            (rsi, self.rsi_neutral, '<'),
+        ]
+    
+    def _record_decision(self, symbol: str, trace: Dict, result: Dict):
+        """Записать решение в журнал решений фильтров"""
+        if self.decision_log is None:
+            return
+        try:
+            self.decision_log.record('rebalancer', symbol, result, trace, self._decision_rules(trace))
+        except Exception as e:
+            logger.error(f"❌ Ошибка записи решения фильтра для {symbol}: {e}")
+    
+    def _evaluate(self, symbol: str, trace: Dict) -> Dict:
+        """Проверка правил; trace заполняется входными данными для журнала решений"""
         try:
             # Получаем данные
             klines_1h = self._get_klines_cached(symbol, '1h', 100)
@@ -253,12 +323,14 @@ class RebalancerAntiHypeFilter:
                 }
             
             # Рассчитываем индикаторы
-            current_price = float(klines_1h[-1][4])
+            current_price = float(klines_1h.close[-1])
+            trace['price'] = current_price
             
             # Проверяем защиту от покупок близко к дневному хаю
             daily_high_protection = self._check_daily_high_protection(symbol, current_price)
+            trace['daily_high'] = daily_high_protection.get('daily_high')
             if daily_high_protection['blocked']:
-                logger.warning(f"🚫 РЕБАЛАНСИРОВКА {symbol}: {daily_high_protection['reason']}")
+                logger.debug(f"🚫 РЕБАЛАНСИРОВКА {symbol}: {daily_high_protection['reason']}")
                 # Формируем результат с информацией о дневном хае для Telegram
                 result = {
                     'allowed': False, 
@@ -280,22 +352,19 @@ class RebalancerAntiHypeFilter:
             ema200_4h = self._calculate_ema(klines_4h, 200)
             
             # Изменение цены за 4 часа
-            price_4h_ago = float(klines_4h[-2][4]) if len(klines_4h) > 1 else current_price
+            price_4h_ago = float(klines_4h.close[-2]) if len(klines_4h) > 1 else current_price
             price_change_4h = ((current_price - price_4h_ago) / price_4h_ago) * 100
             
             # Исторические максимумы: используем настоящий ATH по дневным свечам
             ath_all_time = self._get_ath(symbol, 1000)
             recent_high = self._get_recent_high(klines_1h, 24)
             volume_hype = self._check_volume_hype(klines_1h, 20)
-            
-            logger.info(f"🔄 РЕБАЛАНСИРОВКА {symbol}: цена=${current_price:.4f}, ATR={atr_4h:.4f}, RSI={rsi_1h:.1f}")
-            logger.info(f"🔄 РЕБАЛАНСИРОВКА {symbol}: изменение 4ч={price_change_4h:.2f}%, EMA20=${ema20_1h:.4f}")
-            logger.info(f"🔄 РЕБАЛАНСИРОВКА {symbol}: ATH=${ath_all_time:.4f}, недавний макс=${recent_high:.4f}")
-            logger.info(f"🔄 РЕБАЛАНСИРОВКА {symbol}: объем хайп={'ДА' if volume_hype else 'НЕТ'}")
+            trace.update(atr=atr_4h, rsi=rsi_1h, ema20=ema20_1h, ema200=ema200_4h, change_4h=price_change_4h,
+                         ath=ath_all_time, recent_high=recent_high, volume_ratio=self._volume_ratio(klines_1h, 20))
             
             # 0. ПРОВЕРКА ATH (БЛОКИРОВКА)
             if ath_all_time > 0 and current_price > ath_all_time * (1 - self.max_historical_deviation):
-                logger.warning(f"🚫 РЕБАЛАНСИРОВКА {symbol}: БЛИЗКО К ATH! Цена ${current_price:.4f} vs ATH ${ath_all_time:.4f}")
+                logger.debug(f"🚫 РЕБАЛАНСИРОВКА {symbol}: БЛИЗКО К ATH! Цена ${current_price:.4f} vs ATH ${ath_all_time:.4f}")
                 return {
                     'allowed': False, 
                     'multiplier': 0.0, 
@@ -309,7 +378,7 @@ class RebalancerAntiHypeFilter:
             # 1. ПРОВЕРКА НЕДАВНЕГО МАКСИМУМА (ОГРАНИЧЕНИЕ) - МЕНЕЕ СТРОГОЕ
             if recent_high > 0 and current_price > recent_high * (1 - self.recent_high_threshold):
                 final_multiplier = 0.5 * daily_high_multiplier
-                logger.warning(f"⚠️ РЕБАЛАНСИРОВКА {symbol}: БЛИЗКО К НЕДАВНЕМУ МАКСИМУМУ! Цена ${current_price:.4f} vs недавний ${recent_high:.4f}")
+                logger.debug(f"⚠️ РЕБАЛАНСИРОВКА {symbol}: БЛИЗКО К НЕДАВНЕМУ МАКСИМУМУ! Цена ${current_price:.4f} vs недавний ${recent_high:.4f}")
                 return {
                     'allowed': True, 
                     'multiplier': final_multiplier,  # Менее строгое ограничение
@@ -322,7 +391,7 @@ class RebalancerAntiHypeFilter:
             
             # 2. ПРОВЕРКА ОБЪЕМА ХАЙПА (БЛОКИРОВКА) - МЕНЕЕ СТРОГАЯ
             if volume_hype:
-                logger.warning(f"🚫 РЕБАЛАНСИРОВКА {symbol}: ХАЙП ПО ОБЪЕМУ! Объем в {self.volume_hype_threshold}x выше среднего")
+                logger.debug(f"🚫 РЕБАЛАНСИРОВКА {symbol}: ХАЙП ПО ОБЪЕМУ! Объем в {self.volume_hype_threshold}x выше среднего")
                 return {
                     'allowed': False, 
                     'multiplier': 0.0, 
@@ -336,7 +405,7 @@ class RebalancerAntiHypeFilter:
             # 3. ПРОВЕРКА ИМПУЛЬСА ВВЕРХ (блокировка) - МЕНЕЕ СТРОГАЯ
             atr_threshold = (atr_4h / current_price) * 100 * self.atr_impulse_multiplier
             if price_change_4h > atr_threshold:
-                logger.warning(f"🚫 РЕБАЛАНСИРОВКА {symbol}: Импульс вверх {price_change_4h:.2f}% > {atr_threshold:.2f}% (3×ATR)")
+                logger.debug(f"🚫 РЕБАЛАНСИРОВКА {symbol}: Импульс вверх {price_change_4h:.2f}% > {atr_threshold:.2f}% (3×ATR)")
                 return {
                     'allowed': False, 
                     'multiplier': 0.0, 
@@ -349,7 +418,7 @@ class RebalancerAntiHypeFilter:
             
             # 4. ПРОВЕРКА ПЕРЕКУПЛЕННОСТИ (блокировка) - МЕНЕЕ СТРОГАЯ
             if rsi_1h > self.rsi_overbought and current_price > ema20_1h * (1 + self.ema_deviation):
-                logger.warning(f"🚫 РЕБАЛАНСИРОВКА {symbol}: Перекупленность RSI={rsi_1h:.1f} и цена выше EMA20+3%")
+                logger.debug(f"🚫 РЕБАЛАНСИРОВКА {symbol}: Перекупленность RSI={rsi_1h:.1f} и цена выше EMA20+3%")
                 return {
                     'allowed': False, 
                     'multiplier': 0.0, 
@@ -362,7 +431,7 @@ class RebalancerAntiHypeFilter:
             
             # 5. ПРОВЕРКА МЕДВЕЖЬЕГО ТРЕНДА (блокировка) - МЕНЕЕ СТРОГАЯ
             if current_price < ema200_4h * 0.95:  # Допускаем 5% ниже EMA200
-                logger.warning(f"🚫 РЕБАЛАНСИРОВКА {symbol}: Цена сильно ниже EMA200 (медвежий тренд)")
+                logger.debug(f"🚫 РЕБАЛАНСИРОВКА {symbol}: Цена сильно ниже EMA200 (медвежий тренд)")
                 return {
                     'allowed': False, 
                     'multiplier': 0.0, 
@@ -377,7 +446,7 @@ class RebalancerAntiHypeFilter:
             atr_dca_threshold = (atr_4h / current_price) * 100 * self.atr_dca_multiplier
             if price_change_4h < -atr_dca_threshold and rsi_1h < self.rsi_oversold:
                 final_multiplier = 1.5 * daily_high_multiplier
-                logger.info(f"🚀 РЕБАЛАНСИРОВКА {symbol}: DCA усиление! Падение {price_change_4h:.2f}% и RSI={rsi_1h:.1f}, множитель={final_multiplier:.2f}")
+                logger.debug(f"🚀 РЕБАЛАНСИРОВКА {symbol}: DCA усиление! Падение {price_change_4h:.2f}% и RSI={rsi_1h:.1f}, множитель={final_multiplier:.2f}")
                 return {
                     'allowed': True, 
                     'multiplier': final_multiplier, 
@@ -391,7 +460,7 @@ class RebalancerAntiHypeFilter:
             # 7. БАЗОВЫЕ ПОКУПКИ (норма) - МЕНЕЕ СТРОГИЕ
             if rsi_1h < self.rsi_neutral:
                 final_multiplier = 1.0 * daily_high_multiplier
-                logger.info(f"✅ РЕБАЛАНСИРОВКА {symbol}: Нормальная покупка, RSI={rsi_1h:.1f}, множитель={final_multiplier:.2f}")
+                logger.debug(f"✅ РЕБАЛАНСИРОВКА {symbol}: Нормальная покупка, RSI={rsi_1h:.1f}, множитель={final_multiplier:.2f}")
                 return {
                     'allowed': True, 
                     'multiplier': final_multiplier, 
@@ -404,7 +473,7 @@ class RebalancerAntiHypeFilter:
             
             # 8. НЕЙТРАЛЬНАЯ ЗОНА (умеренное ограничение) - МЕНЕЕ СТРОГОЕ
             final_multiplier = 0.7 * daily_high_multiplier
-            logger.info(f"⚠️ РЕБАЛАНСИРОВКА {symbol}: Нейтральная зона, RSI={rsi_1h:.1f}, множитель={final_multiplier:.2f}")
+            logger.debug(f"⚠️ РЕБАЛАНСИРОВКА {symbol}: Нейтральная зона, RSI={rsi_1h:.1f}, множитель={final_multiplier:.2f}")
             return {
                 'allowed': True, 
                 'multiplier': final_multiplier,  # Менее строгое ограничение
@@ -0,0 +1,272 @@
+#!/usr/bin/env python3
+"""
+Персистентная история результатов сканирования
+Каждый скан дописывается в конец бинарного файла одним блоком: заголовок
+(номер скана, время, число строк) и колонки фиксированной ширины - индекс
+символа, скор, RSI, volume_ratio, bb_position, вердикт фильтра и индекс
+причины блокировки. Строки (символы, причины) хранятся в append-only
+словаре. Поверх истории - сравнение скана с предыдущим: новые возможности,
+выбывшие, изменения скора, новые блокировки и разблокировки.
+"""
+
+import logging
+import os
+import struct
+import threading
+import time
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from config import SCAN_HISTORY_CONFIG
+
+logger = logging.getLogger(__name__)
+
+MAGIC = b'SCN1'
+HEADER = struct.Struct('<4sIqI')  # magic, scan_id, timestamp_ms, rows
+COLUMNS = (
+    ('symbol', np.uint32),
+    ('score', np.float32),
+    ('rsi', np.float32),
+    ('volume_ratio', np.float32),
+    ('bb_position', np.float32),
+    ('allowed', np.uint8),
+    ('reason', np.uint32),  # Индекс причины в словаре (0 - нет причины)
+)
+ROW_BYTES = sum(np.dtype(dtype).itemsize for _, dtype in COLUMNS)
+GROUPS = ('buy_opportunities', 'neutral_pairs', 'blocked_pairs')
+
+
+class ScanHistory:
+    """Колоночная append-only история сканов"""
+
+    def __init__(self, path: str = 'scan_history', buy_threshold: float = 2):
+        """
+        Args:
+            path: Каталог истории (scans.bin + strings.txt)
+            buy_threshold: Скор выше порога - возможность покупки (как в classify_analysis)
+        """
+        self.path = path
+        self.buy_threshold = buy_threshold
+        self.data_file = os.path.join(path, 'scans.bin')
+        self.strings_file = os.path.join(path, 'strings.txt')
+        self._lock = threading.Lock()
+        self._strings: List[str] = ['']
+        self._string_index: Dict[str, int] = {'': 0}
+        self._index: List[tuple] = []  # (scan_id, timestamp_ms, rows, offset)
+        self._load()
+
+    ############################################################
+    # 📂 ЗАГРУЗКА И ЗАПИСЬ
+    ############################################################
+    def _load(self):
+        os.makedirs(self.path, exist_ok=True)
+        if os.path.exists(self.strings_file):
+            with open(self.strings_file, encoding='utf-8') as f:
+                for line in f:
+                    self._intern_loaded(line.rstrip('\n'))
+        if os.path.exists(self.data_file):
+            self._index = self._scan_index()
+
+    def _intern_loaded(self, value: str):
+        self._string_index[value] = len(self._strings)
+        self._strings.append(value)
+
+    def _scan_index(self) -> List[tuple]:
+        """Прочитать заголовки блоков; недописанный хвост (сбой записи) отбрасывается"""
+        index = []
+        size = os.path.getsize(self.data_file)
+        with open(self.data_file, 'rb') as f:
+            offset = 0
+            while offset + HEADER.size <= size:
+                f.seek(offset)
+                magic, scan_id, timestamp_ms, rows = HEADER.unpack(f.read(HEADER.size))
+                end = offset + HEADER.size + rows * ROW_BYTES
+                if magic != MAGIC or end > size:
+                    logger.warning(f"⚠️ История сканов: поврежденный блок на позиции {offset}, хвост отброшен")
+                    break
+                index.append((scan_id, timestamp_ms, rows, offset))
+                offset = end
+        if offset < size:
+            with open(self.data_file, 'r+b') as f:
+                f.truncate(offset)
+        return index
+
+    def _intern(self, value: str, new_strings: List[str]) -> int:
+        value = (value or '').replace('\n', ' ')
+        idx = self._string_index.get(value)
+        if idx is None:
+            idx = len(self._strings)
+            self._string_index[value] = idx
+            self._strings.append(value)
+            new_strings.append(value)
+        return idx
+
+    def append(self, scan_results: Dict, timestamp_ms: Optional[int] = None) -> int:
+        """Дописать скан в историю.
+
+        Returns:
+            Номер скана
+        """
+        analyses = [a for group in GROUPS for a in scan_results.get(group, [])]
+        timestamp_ms = int(time.time() * 1000) if timestamp_ms is None else timestamp_ms
+        with self._lock:
+            new_strings: List[str] = []
+            filters = [a.get('filter_result') or {} for a in analyses]
+            columns = {
+                'symbol': [self._intern(a['symbol'], new_strings) for a in analyses],
+                'score': [a['score'] for a in analyses],
+                'rsi': [a.get('rsi', np.nan) for a in analyses],
+                'volume_ratio': [a.get('volume_ratio', np.nan) for a in analyses],
+                'bb_position': [a.get('bb_position', np.nan) for a in analyses],
+                'allowed': [bool(f.get('allowed', True)) for f in filters],
+                'reason': [0 if f.get('allowed', True) else self._intern(f.get('reason', ''), new_strings)
+                           for f in filters],
+            }
+            scan_id = self._index[-1][0] + 1 if self._index else 1
+
+            # Сначала словарь строк, затем блок - блок не ссылается на незаписанные строки
+            if new_strings:
+                with open(self.strings_file, 'a', encoding='utf-8') as f:
+                    f.write(''.join(f"{value}\n" for value in new_strings))
+            payload = HEADER.pack(MAGIC, scan_id, timestamp_ms, len(analyses)) + b''.join(
+                np.asarray(columns[name], dtype=dtype).tobytes() for name, dtype in COLUMNS)
+            with open(self.data_file, 'ab') as f:
+                offset = f.tell()
+                f.write(payload)
+            self._index.append((scan_id, timestamp_ms, len(analyses), offset))
+        return scan_id
+
+    ############################################################
+    # 📖 ЧТЕНИЕ
+    ############################################################
+    def scan_ids(self) -> List[int]:
+        """Номера сохраненных сканов по порядку"""
+        with self._lock:
+            return [entry[0] for entry in self._index]
+
+    def load_scan(self, scan_id: Optional[int] = None, back: int = 0) -> Optional[Dict]:
+        """Колонки скана: по номеру или back-й с конца (0 - последний).
+
+        Returns:
+            {'scan_id', 'timestamp_ms', 'symbols': [...], 'reasons': [...], <колонка>: np.ndarray}
+        """
+        with self._lock:
+            if scan_id is not None:
+                entries = [e for e in self._index if e[0] == scan_id]
+            else:
+                entries = self._index[-1 - back:len(self._index) - back] if back < len(self._index) else []
+            if not entries:
+                return None
+            scan_id, timestamp_ms, rows, offset = entries[0]
+            with open(self.data_file, 'rb') as f:
+                f.seek(offset + HEADER.size)
+                raw = f.read(rows * ROW_BYTES)
+            strings = self._strings
+
+        scan = {'scan_id': scan_id, 'timestamp_ms': timestamp_ms}
+        position = 0
+        for name, dtype in COLUMNS:
+            nbytes = rows * np.dtype(dtype).itemsize
+            scan[name] = np.frombuffer(raw, dtype=dtype, count=rows, offset=position)
+            position += nbytes
+        scan['symbols'] = [strings[i] for i in scan['symbol']]
+        scan['reasons'] = [strings[i] for i in scan['reason']]
+        scan['allowed'] = scan['allowed'].astype(bool)
+        return scan
+
+    ############################################################
+    # 🔀 СРАВНЕНИЕ СКАНОВ
+    ############################################################
+    def diff(self, previous: Optional[Dict], current: Dict) -> Dict:
+        """Изменения между двумя сканами (результаты load_scan)"""
+        threshold = self.buy_threshold
+        cur = {s: i for i, s in enumerate(current['symbols'])}
+        prev = {s: i for i, s in enumerate(previous['symbols'])} if previous else {}
+        prev_score = previous['score'] if previous else np.empty(0)
+        cur_score = current['score']
+
+        def is_opportunity(scan_map, scores, symbol):
+            i = scan_map.get(symbol)
+            return i is not None and scores[i] > threshold
+
+        new_opportunities = [s for s in cur if is_opportunity(cur, cur_score, s)
+                             and not is_opportunity(prev, prev_score, s)]
+        # Выбывшие - переоцененные пары, которые больше не проходят порог
+        dropped = [s for s in prev if s in cur and is_opportunity(prev, prev_score, s)
+                   and not is_opportunity(cur, cur_score, s)]
+
+        common = [s for s in cur if s in prev]
+        cur_idx = np.array([cur[s] for s in common], dtype=np.int64)
+        prev_idx = np.array([prev[s] for s in common], dtype=np.int64)
+        deltas = cur_score[cur_idx] - prev_score[prev_idx] if common else np.empty(0)
+        changed = np.flatnonzero(deltas != 0)
+        order = changed[np.argsort(-np.abs(deltas[changed]), kind='stable')]
+        score_deltas = {common[i]: float(deltas[i]) for i in order}
+
+        newly_blocked = [common[i] for i in range(len(common))
+                         if previous['allowed'][prev_idx[i]] and not current['allowed'][cur_idx[i]]]
+        unblocked = [common[i] for i in range(len(common))
+                     if not previous['allowed'][prev_idx[i]] and current['allowed'][cur_idx[i]]]
+
+        return {
+            'scan_id': current['scan_id'],
+            'previous_scan_id': previous['scan_id'] if previous else None,
+            'new_opportunities': sorted(new_opportunities, key=lambda s: -cur_score[cur[s]]),
+            'dropped': dropped,
+            'score_deltas': score_deltas,  # По убыванию |изменения|
+            'newly_blocked': newly_blocked,
+            'unblocked': unblocked,
+            'new_symbols': [s for s in cur if s not in prev],
+            'missing_symbols': [s for s in prev if s not in cur],
+        }
+
+    def previous_state(self, lookback: int = 1) -> Optional[Dict]:
+        """Последнее известное состояние пар по lookback сканам перед последним.
+
+        При частичных сканах (планировщик) пара сравнивается со своим
+        последним появлением, а не только с соседним сканом.
+        """
+        scans = [self.load_scan(back=back) for back in range(lookback, 0, -1)]
+        scans = [scan for scan in scans if scan is not None]
+        if not scans:
+            return None
+        if len(scans) == 1:
+            return scans[0]
+        latest = {}
+        for scan in scans:  # От старых к новым - более новое значение перезаписывает
+            for i, symbol in enumerate(scan['symbols']):
+                latest[symbol] = (scan, i)
+        merged = {'scan_id': scans[-1]['scan_id'], 'timestamp_ms': scans[-1]['timestamp_ms'],
+                  'symbols': list(latest)}
+        for name in [name for name, _ in COLUMNS] + ['reasons']:
+            values = [scan[name][i] for scan, i in latest.values()]
+            merged[name] = values if name == 'reasons' else np.asarray(values, dtype=scans[-1][name].dtype)
+        return merged
+
+    def latest_diff(self, lookback: int = 1) -> Optional[Dict]:
+        """Сравнение последнего скана с предыдущим (или с состоянием по lookback сканам)"""
+        current = self.load_scan()
+        if current is None:
+            return None
+        return self.diff(self.previous_state(lookback), current)
+
+    def append_and_diff(self, scan_results: Dict, lookback: int = 1) -> Dict:
+        """Сохранить скан и вернуть изменения относительно предыдущего"""
+        self.append(scan_results)
+        return self.latest_diff(lookback)
+
+
+# Глобальная история сканов
+_scan_history: Optional[ScanHistory] = None
+_scan_history_lock = threading.Lock()
+
+
+def get_scan_history() -> ScanHistory:
+    """Получить глобальную историю сканов (создается при первом обращении)"""
+    global _scan_history
+    with _scan_history_lock:
+        if _scan_history is None:
+            _scan_history = ScanHistory(SCAN_HISTORY_CONFIG.get('path', 'scan_history'),
+                                        SCAN_HISTORY_CONFIG.get('buy_threshold', 2))
+        return _scan_history
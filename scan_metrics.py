@@ -0,0 +1,217 @@
+#!/usr/bin/env python3
+"""
+Метрики сканирования рынка по этапам
+Таймеры этапов анализа пары (свечи, тикер, индикаторы, фильтр, скоринг)
+и цикла сканирования (баланс, скан, отчет, автопокупки), счетчики ретраев.
+По итогам скана считаются p50/p95/max по этапам и top-N самых медленных
+символов. Сводка доступна через get_scan_metrics().latest(), в формате
+Prometheus (textfile) и, опционально, дописывается одной JSON-строкой в
+файл истории для анализа трендов.
+"""
+
+import json
+import logging
+import os
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from config import SCAN_METRICS_CONFIG
+
+logger = logging.getLogger(__name__)
+
+
+class ScanMetrics:
+    """Сборщик таймингов и ретраев одного скана"""
+
+    def __init__(self, top_n: int = 5, history_file: str = '', metrics_file: str = ''):
+        """
+        Args:
+            top_n: Сколько самых медленных символов включать в сводку
+            history_file: JSONL-файл истории сводок (пусто - не писать)
+            metrics_file: Файл метрик в формате Prometheus textfile (пусто - не писать)
+        """
+        self.top_n = top_n
+        self.history_file = history_file
+        self.metrics_file = metrics_file
+        self._lock = threading.Lock()
+        self._last_summary: Optional[Dict] = None
+        self._cycle: Dict[str, float] = {}
+        self.begin_scan()
+
+    ############################################################
+    # ⏱️ СБОР
+    ############################################################
+    def begin_scan(self):
+        """Сбросить тайминги символов (начало скана)"""
+        with self._lock:
+            self._samples: Dict[str, List[float]] = defaultdict(list)
+            self._symbol_stages: Dict[str, Dict[str, float]] = defaultdict(lambda: defaultdict(float))
+            self._retries: Dict[str, int] = defaultdict(int)
+            self._symbol_retries: Dict[str, int] = defaultdict(int)
+            self._events: Dict[str, int] = defaultdict(int)
+            self._started = time.perf_counter()
+
+    def record(self, stage: str, seconds: float, symbol: Optional[str] = None):
+        """Учесть длительность этапа (для символа, если указан)"""
+        with self._lock:
+            self._samples[stage].append(seconds)
+            if symbol:
+                self._symbol_stages[symbol][stage] += seconds
+
+    @contextmanager
+    def timer(self, stage: str, symbol: Optional[str] = None):
+        """Контекстный менеджер: время блока как этап скана"""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(stage, time.perf_counter() - started, symbol)
+
+    def count_retry(self, stage: str, symbol: Optional[str] = None):
+        """Повторная попытка этапа"""
+        with self._lock:
+            self._retries[stage] += 1
+            if symbol:
+                self._symbol_retries[symbol] += 1
+
+    def count_event(self, stage: str, event: str):
+        """Таймаут/ошибка этапа"""
+        with self._lock:
+            self._events[f"{stage}.{event}"] += 1
+
+    @contextmanager
+    def cycle_timer(self, stage: str):
+        """Время этапа цикла сканирования (баланс, скан, отчет, автопокупки)"""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            with self._lock:
+                self._cycle[stage] = self._cycle.get(stage, 0.0) + time.perf_counter() - started
+
+    ############################################################
+    # 📊 СВОДКА
+    ############################################################
+    def summarize(self) -> Dict:
+        """p50/p95/max по этапам, ретраи и top-N медленных символов текущего скана"""
+        with self._lock:
+            stages = {}
+            for stage, samples in self._samples.items():
+                values = np.asarray(samples)
+                p50, p95 = np.percentile(values, [50, 95])
+                stages[stage] = {'count': int(values.size), 'total': float(values.sum()),
+                                 'p50': float(p50), 'p95': float(p95), 'max': float(values.max())}
+            totals = {symbol: sum(parts.values()) for symbol, parts in self._symbol_stages.items()}
+            slowest = sorted(totals, key=totals.get, reverse=True)[:self.top_n]
+            return {
+                'timestamp': datetime.now().isoformat(timespec='seconds'),
+                'elapsed': time.perf_counter() - self._started,
+                'symbols': len(totals),
+                'stages': stages,
+                'retries': dict(self._retries),
+                'events': dict(self._events),
+                'cycle': dict(self._cycle),
+                'slowest': [{'symbol': symbol, 'total': totals[symbol],
+                             'stages': dict(self._symbol_stages[symbol]),
+                             'retries': self._symbol_retries.get(symbol, 0)} for symbol in slowest],
+            }
+
+    def finish_scan(self, extra: Optional[Dict] = None) -> Dict:
+        """Зафиксировать сводку скана: latest(), файл метрик и история"""
+        summary = self.summarize()
+        if extra:
+            summary.update(extra)
+        with self._lock:
+            self._last_summary = summary
+            self._cycle = {}
+        if self.metrics_file:
+            self._write_metrics_file(summary)
+        if self.history_file:
+            self._append_history(summary)
+        return summary
+
+    def latest(self) -> Optional[Dict]:
+        """Сводка последнего завершенного скана"""
+        with self._lock:
+            return self._last_summary
+
+    ############################################################
+    # 📤 ЭКСПОРТ
+    ############################################################
+    def format_prometheus(self, summary: Optional[Dict] = None) -> str:
+        """Сводка в текстовом формате Prometheus"""
+        summary = summary or self.latest()
+        if not summary:
+            return ''
+        lines = ['# TYPE scan_stage_seconds summary']
+        for stage, s in summary['stages'].items():
+            lines.append(f'scan_stage_seconds{{stage="{stage}",quantile="0.5"}} {s["p50"]:.6f}')
+            lines.append(f'scan_stage_seconds{{stage="{stage}",quantile="0.95"}} {s["p95"]:.6f}')
+            lines.append(f'scan_stage_seconds_sum{{stage="{stage}"}} {s["total"]:.6f}')
+            lines.append(f'scan_stage_seconds_count{{stage="{stage}"}} {s["count"]}')
+            lines.append(f'scan_stage_seconds_max{{stage="{stage}"}} {s["max"]:.6f}')
+        for stage, count in summary['retries'].items():
+            lines.append(f'scan_retries{{stage="{stage}"}} {count}')
+        for key, count in summary['events'].items():
+            stage, event = key.split('.', 1)
+            lines.append(f'scan_stage_events{{stage="{stage}",event="{event}"}} {count}')
+        for stage, seconds in summary['cycle'].items():
+            lines.append(f'scan_cycle_seconds{{stage="{stage}"}} {seconds:.6f}')
+        for rank, slow in enumerate(summary['slowest'], 1):
+            lines.append(f'scan_slowest_symbol_seconds{{rank="{rank}",symbol="{slow["symbol"]}"}} {slow["total"]:.6f}')
+        if 'wall_time' in summary:
+            lines.append(f'scan_wall_seconds {summary["wall_time"]:.6f}')
+        return '\n'.join(lines) + '\n'
+
+    def _write_metrics_file(self, summary: Dict):
+        try:
+            tmp_path = f"{self.metrics_file}.tmp"
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                f.write(self.format_prometheus(summary))
+            os.replace(tmp_path, self.metrics_file)  # Атомарная замена для сборщика
+        except OSError as e:
+            logger.error(f"Ошибка записи метрик скана: {e}")
+
+    def _append_history(self, summary: Dict):
+        """Одна компактная строка на скан (округление до мс)"""
+        def compact(value):
+            if isinstance(value, float):
+                return round(value, 3)
+            if isinstance(value, dict):
+                return {k: compact(v) for k, v in value.items()}
+            if isinstance(value, list):
+                return [compact(v) for v in value]
+            return value
+        try:
+            with open(self.history_file, 'a', encoding='utf-8') as f:
+                f.write(json.dumps(compact(summary), ensure_ascii=False, separators=(',', ':')) + '\n')
+        except OSError as e:
+            logger.error(f"Ошибка записи истории метрик скана: {e}")
+
+
+# Глобальный сборщик метрик скана
+scan_metrics = ScanMetrics(
+    top_n=SCAN_METRICS_CONFIG.get('top_n', 5),
+    history_file=SCAN_METRICS_CONFIG.get('history_file', ''),
+    metrics_file=SCAN_METRICS_CONFIG.get('metrics_file', ''),
+)
+
+
+def get_scan_metrics() -> ScanMetrics:
+    """Получить глобальный сборщик метрик скана"""
+    return scan_metrics
+
+
+def load_history(path: str, limit: Optional[int] = None) -> List[Dict]:
+    """Прочитать сводки из файла истории (последние limit)"""
+    if not os.path.exists(path):
+        return []
+    with open(path, encoding='utf-8') as f:
+        rows = [json.loads(line) for line in f if line.strip()]
+    return rows[-limit:] if limit else rows
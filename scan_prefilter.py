@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+"""
+Префильтр скана по bulk 24h тикерам (первый этап двухэтапного скана)
+
+По уже загруженному списку /ticker/24hr считаются признаки для всех пар
+разом (numpy): позиция цены в дневном диапазоне, изменение за 24ч,
+z-оценка объема и расстояние до дневного хая. Отсеиваются только пары,
+которые анти-хайп фильтр заведомо полностью заблокирует (вплотную к хаю
+дня), остальные ранжируются, и в дорогой анализ (свечи + индикаторы +
+фильтр) уходят только top-K. Отсечки по остальным признакам - по желанию.
+"""
+
+import logging
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+from config import MARKET_SCAN_PREFILTER_CONFIG
+
+logger = logging.getLogger(__name__)
+
+FEATURES = ('range_position', 'change_pct', 'volume_z', 'dist_to_high_pct')
+
+
+def _field(tickers: List[Dict], key: str) -> np.ndarray:
+    values = np.empty(len(tickers))
+    for i, ticker in enumerate(tickers):
+        try:
+            values[i] = float(ticker.get(key) or 'nan')
+        except (TypeError, ValueError):
+            values[i] = np.nan
+    return values
+
+
+def compute_features(tickers: List[Dict]) -> Dict[str, np.ndarray]:
+    """Признаки префильтра для списка тикеров (NaN - данных нет)"""
+    last = _field(tickers, 'lastPrice')
+    high = _field(tickers, 'highPrice')
+    low = _field(tickers, 'lowPrice')
+    open_ = _field(tickers, 'openPrice')
+    quote_volume = _field(tickers, 'quoteVolume')
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        span = high - low
+        range_position = np.where(span > 0, (last - low) / span, 0.5)
+        change_pct = (last / open_ - 1) * 100
+        dist_to_high_pct = (high - last) / high * 100
+
+        log_volume = np.log(np.where(quote_volume > 0, quote_volume, np.nan))
+        std = np.nanstd(log_volume) if np.isfinite(log_volume).sum() > 1 else 0.0
+        volume_z = (log_volume - np.nanmean(log_volume)) / std if std > 0 else np.zeros(len(tickers))
+
+    return {
+        'range_position': range_position,
+        'change_pct': change_pct,
+        'volume_z': volume_z,
+        'dist_to_high_pct': dist_to_high_pct,
+    }
+
+
+def prefilter_symbols(symbols: List[str], ticker_snapshot: Dict[str, Dict],
+                      config: Dict = None) -> Tuple[List[str], Dict]:
+    """Отобрать пары для полного анализа.
+
+    Args:
+        symbols: Пары-кандидаты (universe)
+        ticker_snapshot: {symbol: 24h тикер} из того же запроса, что и universe
+        config: Критерии (по умолчанию MARKET_SCAN_PREFILTER_CONFIG)
+
+    Returns:
+        (отобранные пары в порядке ранга, статистика отсева)
+    """
+    config = config or MARKET_SCAN_PREFILTER_CONFIG
+    stats = {'candidates': len(symbols), 'selected': len(symbols), 'pruned': 0, 'pruned_by': {}}
+    if not config.get('enabled', True) or not symbols:
+        return list(symbols), stats
+
+    known = [s for s in symbols if s in ticker_snapshot]
+    unknown = [s for s in symbols if s not in ticker_snapshot]  # без данных не отсеиваем
+    features = compute_features([ticker_snapshot[s] for s in known])
+
+    # Отсечки (None в конфиге - выключена); NaN-признак не отсекает
+    def below(name, key):
+        limit = config.get(key)
+        return features[name] < limit if limit is not None else np.zeros(len(known), dtype=bool)
+
+    def above(name, key):
+        limit = config.get(key)
+        return features[name] > limit if limit is not None else np.zeros(len(known), dtype=bool)
+
+    cuts = {
+        'range_position': above('range_position', 'max_range_position'),
+        'dist_to_high': below('dist_to_high_pct', 'min_dist_to_high_pct'),
+        'change_pct': below('change_pct', 'min_change_pct') | above('change_pct', 'max_change_pct'),
+        'volume_z': below('volume_z', 'min_volume_z'),
+    }
+    keep = np.ones(len(known), dtype=bool)
+    for name, mask in cuts.items():
+        mask = mask & keep  # считаем по первой сработавшей причине
+        stats['pruned_by'][name] = int(mask.sum())
+        keep &= ~mask
+
+    # Ранжирование оставшихся: взвешенная сумма признаков
+    weights = config['weights']
+    rank_score = np.zeros(len(known))
+    for name in FEATURES:
+        rank_score += weights.get(name, 0.0) * np.nan_to_num(features[name])
+    survivors = np.flatnonzero(keep)
+    order = survivors[np.argsort(-rank_score[survivors], kind='stable')]
+
+    top_k = config.get('top_k') or len(order)
+    selected = [known[i] for i in order[:top_k]]
+    stats['pruned_by']['top_k'] = max(0, len(order) - top_k)
+
+    selected += unknown
+    stats['selected'] = len(selected)
+    stats['pruned'] = len(symbols) - len(selected)
+    return selected, stats
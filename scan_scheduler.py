@@ -0,0 +1,234 @@
+#!/usr/bin/env python3
+"""
+Адаптивный планировщик сканирования рынка
+Вместо пересканирования всех пар с одним интервалом пары стоят в очереди
+с приоритетами: недавний высокий скор, открытая позиция, всплеск
+волатильности и блокировка фильтром при хорошем скоре сокращают интервал,
+застывшие и неликвидные пары сканируются реже. За один тик выбираются
+пары, у которых подошел срок, в пределах глобального бюджета запросов.
+"""
+
+import heapq
+import logging
+import time
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional
+
+import numpy as np
+
+from config import SCAN_SCHEDULER_CONFIG
+from scan_prefilter import compute_features
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class SymbolSchedule:
+    """Состояние пары в очереди планировщика"""
+    symbol: str
+    next_due: float = 0.0
+    last_scan: Optional[float] = None
+    interval: float = 0.0
+    priority: float = 1.0
+    last_score: Optional[float] = None
+    raw_score: Optional[float] = None  # Скор до блокировки анти-хайп фильтром
+    blocked: bool = False
+    held: bool = False
+    volatility_z: float = 0.0
+    volume_z: float = 0.0
+    quiet_scans: int = 0  # Подряд сканов без сигнала (score <= 0)
+    scans: int = 0
+    retry_after: float = 0.0  # Пауза после ошибки: раньше пара не сканируется
+
+
+class ScanScheduler:
+    """Очередь пар с приоритетами и бюджетом запросов свечей"""
+
+    def __init__(self, config: Optional[Dict] = None):
+        """
+        Args:
+            config: Настройки (по умолчанию SCAN_SCHEDULER_CONFIG)
+        """
+        self.config = config or SCAN_SCHEDULER_CONFIG
+        self.states: Dict[str, SymbolSchedule] = {}
+        self._heap: List[tuple] = []
+        self._seq = 0
+
+        # Бюджет: токен-бакет, один токен - один анализ пары (запрос свечей)
+        self._budget_warned = False
+        self._set_budget(0)
+        self.tokens = self.capacity
+        self._refilled_at: Optional[float] = None
+        self.budget_spent = 0
+
+    def _set_budget(self, symbols: int):
+        """Бюджет анализов в минуту: из конфига или по числу пар (None)"""
+        config = self.config
+        demand = symbols * 60.0 / config['base_interval_sec']  # Каждая пара раз в base_interval_sec
+        budget = config.get('request_budget_per_min')
+        if budget is None:
+            budget = max(1.0, demand * config.get('budget_headroom', 1.5))
+        elif budget < demand and not self._budget_warned:
+            self._budget_warned = True
+            logger.warning(f"⚠️ Бюджет планировщика {budget}/мин меньше нужного для {symbols} пар "
+                           f"({demand:.1f}/мин): пары будут сканироваться реже base_interval_sec")
+        self.budget_per_min = budget
+        self.rate_per_sec = budget / 60.0
+        self.capacity = max(1.0, self.rate_per_sec * config['tick_sec'] * config.get('burst_ticks', 2))
+
+    ############################################################
+    # 🎯 ПРИОРИТЕТ
+    ############################################################
+    def _priority(self, state: SymbolSchedule) -> float:
+        """Множитель частоты сканирования пары (>1 - чаще, <1 - реже)"""
+        config = self.config
+        boosts = config['boosts']
+        priority = 1.0
+        if state.last_score is not None and state.last_score >= config['high_score']:
+            priority *= boosts['high_score']
+        if state.held:
+            priority *= boosts['held']
+        if state.volatility_z >= config['volatility_z']:
+            priority *= boosts['volatility_spike']
+        if state.blocked and state.raw_score is not None and state.raw_score >= config['near_threshold_score']:
+            priority *= boosts['near_threshold']
+        if state.quiet_scans >= config['stale_scans']:
+            priority *= boosts['stale']
+        if state.volume_z <= config['illiquid_volume_z'] and not state.held:
+            priority *= boosts['illiquid']
+        return priority
+
+    def _reschedule(self, state: SymbolSchedule, now: float):
+        config = self.config
+        state.priority = self._priority(state)
+        state.interval = float(np.clip(config['base_interval_sec'] / state.priority,
+                                       config['min_interval_sec'], config['max_interval_sec']))
+        if state.last_scan is not None:
+            state.next_due = max(state.last_scan + state.interval, state.retry_after)
+        self._seq += 1
+        heapq.heappush(self._heap, (state.next_due, self._seq, state.symbol))
+
+    ############################################################
+    # 🌐 СПИСОК ПАР И ПРИЗНАКИ
+    ############################################################
+    def sync_universe(self, symbols: List[str], ticker_snapshot: Dict[str, Dict],
+                      held: Iterable[str] = (), now: Optional[float] = None):
+        """Обновить список пар, признаки волатильности/ликвидности и позиции"""
+        now = time.time() if now is None else now
+        held = set(held)
+        symbols = list(dict.fromkeys(symbols))
+        for symbol in set(self.states) - set(symbols) - held:
+            del self.states[symbol]  # Записи в куче отбрасываются лениво
+        # Пары с открытыми позициями сканируются, даже если выпали из топа по объему
+        symbols += [s for s in sorted(held) if s not in symbols]
+
+        known = [s for s in symbols if s in ticker_snapshot]
+        features = compute_features([ticker_snapshot[s] for s in known])
+        abs_change = np.abs(np.nan_to_num(features['change_pct']))
+        std = abs_change.std() if len(known) > 1 else 0.0
+        volatility_z = (abs_change - abs_change.mean()) / std if std > 0 else np.zeros(len(known))
+        feature_index = {s: i for i, s in enumerate(known)}
+
+        for symbol in symbols:
+            state = self.states.get(symbol)
+            if state is None:
+                state = self.states[symbol] = SymbolSchedule(symbol, next_due=now)
+            i = feature_index.get(symbol)
+            state.volatility_z = float(volatility_z[i]) if i is not None else 0.0
+            state.volume_z = float(np.nan_to_num(features['volume_z'][i])) if i is not None else 0.0
+            state.held = symbol in held
+            self._reschedule(state, now)
+        self._compact()
+        self._set_budget(len(self.states))
+        if self._refilled_at is None:
+            self.tokens = self.capacity  # Первый тик - с полным бюджетом под текущий список пар
+        else:
+            self.tokens = min(self.tokens, self.capacity)
+
+    def _compact(self):
+        """Пересобрать кучу, если в ней накопилось много устаревших записей"""
+        if len(self._heap) > 4 * max(1, len(self.states)):
+            self._heap = [(state.next_due, i, state.symbol) for i, state in enumerate(self.states.values())]
+            heapq.heapify(self._heap)
+            self._seq = len(self._heap)
+
+    ############################################################
+    # ⏱️ ВЫБОР ПАР НА ТИК
+    ############################################################
+    def _refill(self, now: float):
+        if self._refilled_at is not None:
+            self.tokens = min(self.capacity, self.tokens + (now - self._refilled_at) * self.rate_per_sec)
+        self._refilled_at = now
+
+    def next_batch(self, now: Optional[float] = None) -> List[str]:
+        """Пары к сканированию сейчас: срок подошел, по убыванию приоритета, в пределах бюджета"""
+        now = time.time() if now is None else now
+        self._refill(now)
+
+        due, seen = [], set()
+        while self._heap and self._heap[0][0] <= now:
+            next_due, _, symbol = heapq.heappop(self._heap)
+            state = self.states.get(symbol)
+            # Устаревшие записи (пара перепланирована или удалена) пропускаем
+            if state is not None and state.next_due == next_due and symbol not in seen:
+                seen.add(symbol)
+                due.append(state)
+
+        # Сначала важные пары, среди равных - дольше всех ждущие
+        due.sort(key=lambda s: (-s.priority, s.next_due))
+        budget = int(self.tokens)
+        batch, deferred = due[:budget], due[budget:]
+        for state in deferred:
+            self._seq += 1
+            heapq.heappush(self._heap, (state.next_due, self._seq, state.symbol))
+        for state in batch:
+            # До прихода результата пара не должна попасть в следующий тик
+            state.next_due = now + state.interval
+            self._seq += 1
+            heapq.heappush(self._heap, (state.next_due, self._seq, state.symbol))
+
+        self.tokens -= len(batch)
+        self.budget_spent += len(batch)
+        if deferred:
+            logger.debug(f"⏳ Бюджет запросов: отложено {len(deferred)} пар")
+        return [state.symbol for state in batch]
+
+    def record_results(self, scan_results: Dict, now: Optional[float] = None):
+        """Учесть результаты скана: скоры, блокировки, ошибки"""
+        now = time.time() if now is None else now
+        for group in ('buy_opportunities', 'neutral_pairs', 'blocked_pairs'):
+            for analysis in scan_results.get(group, []):
+                state = self.states.get(analysis['symbol'])
+                if state is None:
+                    continue
+                state.last_scan = now
+                state.scans += 1
+                state.last_score = analysis['score']
+                state.raw_score = analysis.get('raw_score', analysis['score'])
+                state.blocked = not analysis.get('filter_result', {}).get('allowed', True)
+                state.quiet_scans = state.quiet_scans + 1 if state.raw_score <= 0 else 0
+                self._reschedule(state, now)
+        for symbol in scan_results.get('errors', []):
+            state = self.states.get(symbol)
+            if state is not None:
+                # Ошибка - повтор через минимальный интервал, без изменения признаков
+                state.retry_after = now + self.config['min_interval_sec']
+                state.next_due = state.retry_after
+                self._seq += 1
+                heapq.heappush(self._heap, (state.next_due, self._seq, symbol))
+
+    def get_stats(self, now: Optional[float] = None) -> Dict:
+        """Размер очереди, сколько пар ждет, распределение интервалов"""
+        now = time.time() if now is None else now
+        intervals = [s.interval for s in self.states.values()]
+        return {
+            'symbols': len(self.states),
+            'due': sum(1 for s in self.states.values() if s.next_due <= now),
+            'boosted': sum(1 for s in self.states.values() if s.priority > 1),
+            'slowed': sum(1 for s in self.states.values() if s.priority < 1),
+            'min_interval': min(intervals) if intervals else 0.0,
+            'max_interval': max(intervals) if intervals else 0.0,
+            'tokens': self.tokens,
+            'budget_per_min': self.budget_per_min,
+            'budget_spent': self.budget_spent,
+        }
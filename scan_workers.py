@@ -0,0 +1,157 @@
+#!/usr/bin/env python3
+"""
+Пул процессов для CPU-этапа сканирования (расчет индикаторов)
+Расчет индикаторов по 200 парам держит GIL и задерживает потоки
+PnLMonitor и Active5050Balancer в том же процессе. С включенным пулом
+расчет уходит в постоянные процессы-воркеры: окно свечей передается
+одним массивом float64 (6 x N), в ответ приходит словарь индикаторов.
+Воркеры прогреваются при старте (импорт pandas, компиляция JIT-ядер),
+время передачи (IPC) и расчета учитываются отдельно.
+"""
+
+import logging
+import multiprocessing
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional, Union
+
+import numpy as np
+
+from cache.kline_store import KlineWindow, as_window
+
+logger = logging.getLogger(__name__)
+
+# Состояние процесса-воркера
+_worker_indicators = None
+
+
+def _init_worker(backend: str):
+    """Инициализация воркера: калькулятор индикаторов и синхронная компиляция ядер"""
+    global _worker_indicators
+    logging.getLogger('technical_indicators').setLevel(logging.WARNING)
+    import indicator_kernels
+    from technical_indicators import TechnicalIndicators
+
+    if backend != indicator_kernels.kernels.requested_backend:
+        indicator_kernels.kernels = indicator_kernels.KernelRegistry(backend)
+    indicator_kernels.warmup(background=False)
+    _worker_indicators = TechnicalIndicators()
+
+
+def pack_window(window: KlineWindow) -> np.ndarray:
+    """Окно свечей -> один непрерывный массив (6 x N): ts, open, high, low, close, volume"""
+    # ts в мс точно представимо в float64 (< 2^53)
+    return np.vstack([window.ts, window.open, window.high, window.low, window.close, window.volume]).astype(np.float64)
+
+
+def unpack_window(symbol: str, interval: str, packed: np.ndarray) -> KlineWindow:
+    """Обратное преобразование pack_window"""
+    return KlineWindow(symbol, interval, packed[0].astype(np.int64), packed[1], packed[2],
+                       packed[3], packed[4], packed[5])
+
+
+def _compute_indicators(symbol: str, interval: str, packed: np.ndarray):
+    """Выполняется в воркере: (индикаторы, время расчета в сек)"""
+    started = time.perf_counter()
+    indicators = _worker_indicators.calculate_all_indicators(unpack_window(symbol, interval, packed), symbol)
+    return indicators, time.perf_counter() - started
+
+
+def _ping(delay: float) -> int:
+    """Задача прогрева: держит воркер занятым, чтобы пул запустил все процессы"""
+    time.sleep(delay)
+    return multiprocessing.current_process().pid
+
+
+class ScanWorkerPool:
+    """Постоянный пул процессов для расчета индикаторов скана"""
+
+    def __init__(self, workers: int = 2, start_method: str = 'spawn', backend: Optional[str] = None):
+        """
+        Args:
+            workers: Число процессов
+            start_method: Способ запуска процессов (spawn безопасен при работающих потоках)
+            backend: Бэкенд ядер индикаторов в воркерах (по умолчанию - как в родителе)
+        """
+        import indicator_kernels
+
+        self.workers = max(1, workers)
+        self.start_method = start_method
+        # Запрошенный, а не текущий бэкенд: до окончания фоновой JIT-компиляции
+        # родитель работает на numpy, и воркеры остались бы без numba
+        self.backend = backend or indicator_kernels.kernels.requested_backend
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._executor_lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        self.warmup_sec = 0.0
+        self.reset_stats()
+
+    def reset_stats(self):
+        """Сбросить счетчики (в начале каждого скана)"""
+        with self._stats_lock:
+            self.stats = {
+                'calls': 0,
+                'compute_sec': 0.0,    # Расчет внутри воркеров
+                'roundtrip_sec': 0.0,  # От отправки до получения результата
+                'bytes_sent': 0,       # Объем массивов свечей
+            }
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        with self._executor_lock:
+            if self._executor is None:
+                context = multiprocessing.get_context(self.start_method)
+                self._executor = ProcessPoolExecutor(max_workers=self.workers, mp_context=context,
+                                                     initializer=_init_worker, initargs=(self.backend,))
+            return self._executor
+
+    def warmup(self, timeout: float = 120.0) -> List[int]:
+        """Запустить все процессы и дождаться их инициализации.
+
+        Returns:
+            PID воркеров
+        """
+        started = time.perf_counter()
+        executor = self._get_executor()
+        futures = [executor.submit(_ping, 0.2) for _ in range(self.workers)]
+        pids = sorted({future.result(timeout=timeout) for future in futures})
+        self.warmup_sec = time.perf_counter() - started
+        logger.info(f"🧮 Пул расчета индикаторов готов: {len(pids)} процессов за {self.warmup_sec:.1f} сек")
+        return pids
+
+    def compute_indicators(self, klines: Union[KlineWindow, List], symbol: str) -> Dict:
+        """Совместимый с TechnicalIndicators.calculate_all_indicators вызов (блокирующий)"""
+        window = klines if isinstance(klines, KlineWindow) else as_window(klines, symbol, '15m')
+        if window is None or len(window) == 0:
+            return {}
+        packed = pack_window(window)
+        started = time.perf_counter()
+        indicators, compute_sec = self._get_executor().submit(
+            _compute_indicators, symbol, window.interval, packed).result()
+        roundtrip = time.perf_counter() - started
+        with self._stats_lock:
+            self.stats['calls'] += 1
+            self.stats['compute_sec'] += compute_sec
+            self.stats['roundtrip_sec'] += roundtrip
+            self.stats['bytes_sent'] += packed.nbytes
+        return indicators
+
+    def get_stats(self) -> Dict:
+        """Счетчики + ipc_sec: накладные расходы = roundtrip - compute
+        (сериализация, передача и ожидание свободного воркера)"""
+        with self._stats_lock:
+            stats = dict(self.stats)
+        stats['ipc_sec'] = max(0.0, stats['roundtrip_sec'] - stats['compute_sec'])
+        calls = stats['calls'] or 1
+        stats['avg_compute_ms'] = stats['compute_sec'] / calls * 1000
+        stats['avg_ipc_ms'] = stats['ipc_sec'] / calls * 1000
+        stats['workers'] = self.workers
+        stats['warmup_sec'] = self.warmup_sec
+        return stats
+
+    def close(self):
+        """Остановить процессы"""
+        with self._executor_lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=True, cancel_futures=True)
+                self._executor = None
@@ -0,0 +1,175 @@
+#!/usr/bin/env python3
+"""
+Декларативный скоринг пар сканера
+Правила (пороги, веса, группы if/elif) описаны данными в
+SCORING_RULES_CONFIG и вычисляются векторно сразу для всех пар скана:
+каждое условие - одна операция numpy над колонкой значений. Для каждой
+пары сохраняется вклад каждого сработавшего правила - он используется
+в объяснении сделки (_build_reasoning).
+"""
+
+import logging
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from config import SCORING_RULES_CONFIG
+
+logger = logging.getLogger(__name__)
+
+OPS = {
+    '<': np.less,
+    '<=': np.less_equal,
+    '>': np.greater,
+    '>=': np.greater_equal,
+    '==': np.equal,
+    '!=': np.not_equal,
+}
+
+
+@dataclass
+class ScoreRule:
+    """Правило скоринга: при выполнении всех условий к скору добавляется weight"""
+    name: str
+    weight: float
+    when: List[Tuple[str, str, Any]]
+    group: Optional[str] = None
+    explain: str = ''
+
+
+@dataclass
+class ScoreBatch:
+    """Результат векторной оценки: скоры и матрица сработавших правил (пары x правила)"""
+    scores: np.ndarray
+    fired: np.ndarray
+    values: Dict[str, List[Any]] = field(default_factory=dict)
+
+
+class ScoringEngine:
+    """Векторный движок правил скоринга"""
+
+    def __init__(self, config: Optional[Dict] = None):
+        """
+        Args:
+            config: Поля, правила и параметры блокировки (по умолчанию SCORING_RULES_CONFIG)
+        """
+        config = config or SCORING_RULES_CONFIG
+        self.fields: Dict[str, Tuple[str, Any]] = {name: tuple(spec) for name, spec in config['fields'].items()}
+        self.rules = [ScoreRule(rule['name'], rule['weight'], [tuple(c) for c in rule['when']],
+                                rule.get('group'), rule.get('explain', ''))
+                      for rule in config['rules']]
+        self.block_score = config.get('block_score', -10)
+        self.block_reason_prefix = config.get('block_reason_prefix', 'блокирован_')
+        self.confidence = config.get('confidence', {'offset': 5, 'scale': 10, 'min': 0.1, 'max': 0.9})
+        self._validate()
+        # Целые веса - целый скор (как в отчетах и истории сканов)
+        self.weights = np.asarray([rule.weight for rule in self.rules] or [0])[:len(self.rules)]
+
+    def _validate(self):
+        for rule in self.rules:
+            if not rule.when:
+                raise ValueError(f"Правило {rule.name}: нет условий")
+            for field_name, op, _ in rule.when:
+                if field_name not in self.fields:
+                    raise ValueError(f"Правило {rule.name}: неизвестное поле {field_name}")
+                if op not in OPS:
+                    raise ValueError(f"Правило {rule.name}: неизвестная операция {op}")
+
+    ############################################################
+    # 🧮 ВЕКТОРНАЯ ОЦЕНКА
+    ############################################################
+    def _column(self, values: List[Any], default: Any) -> np.ndarray:
+        if isinstance(default, str):
+            column = np.empty(len(values), dtype=object)
+            column[:] = values
+            return column
+        return np.asarray([np.nan if v is None else v for v in values], dtype=np.float64)
+
+    def evaluate(self, indicators_list: Sequence[Dict]) -> ScoreBatch:
+        """Оценить все правила для списка словарей индикаторов"""
+        values = {name: [indicators.get(key, default) for indicators in indicators_list]
+                  for name, (key, default) in self.fields.items()}
+        columns = {name: self._column(values[name], self.fields[name][1]) for name in self.fields}
+
+        n = len(indicators_list)
+        fired = np.zeros((n, len(self.rules)), dtype=bool)
+        taken: Dict[str, np.ndarray] = {}
+        for j, rule in enumerate(self.rules):
+            mask = np.ones(n, dtype=bool)
+            for field_name, op, threshold in rule.when:
+                mask &= np.asarray(OPS[op](columns[field_name], threshold), dtype=bool)
+            if rule.group is not None:
+                # Цепочка if/elif: в группе срабатывает только первое правило
+                group_taken = taken.setdefault(rule.group, np.zeros(n, dtype=bool))
+                mask &= ~group_taken
+                group_taken |= mask
+            fired[:, j] = mask
+
+        scores = fired.astype(self.weights.dtype) @ self.weights
+        return ScoreBatch(scores, fired, values)
+
+    def score_batch(self, items: Sequence[Tuple[str, float, Dict, Dict]]) -> List[Dict]:
+        """Скоринг пар скана: items - (symbol, price, indicators, filter_result).
+
+        Returns:
+            Результаты в формате MarketScanner.score_pair + contributions {правило: вклад}
+        """
+        if not items:
+            return []
+        batch = self.evaluate([item[2] for item in items])
+        allowed = np.asarray([bool(item[3]['allowed']) for item in items])
+        raw_scores = batch.scores
+        scores = np.where(allowed, raw_scores, self.block_score)
+        conf = self.confidence
+        confidence = np.clip((scores + conf['offset']) / conf['scale'], conf['min'], conf['max'])
+
+        reasons: List[List[str]] = [[] for _ in items]
+        contributions: List[Dict[str, float]] = [{} for _ in items]
+        for j, rule in enumerate(self.rules):
+            weight = self.weights[j].item()
+            for i in np.flatnonzero(batch.fired[:, j]):
+                reasons[i].append(rule.name)
+                contributions[i][rule.name] = weight
+
+        results = []
+        raw_list, score_list, confidence_list = raw_scores.tolist(), scores.tolist(), confidence.tolist()
+        for i, (symbol, price, indicators, filter_result) in enumerate(items):
+            if not allowed[i]:
+                reasons[i].append(f"{self.block_reason_prefix}{filter_result['reason']}")
+            result = {
+                'symbol': symbol,
+                'price': price,
+                'score': score_list[i],
+                'raw_score': raw_list[i],
+                'confidence': confidence_list[i],
+                'reasons': reasons[i],
+                'contributions': contributions[i],
+            }
+            result.update({name: batch.values[name][i] for name in self.fields})
+            result['filter_result'] = filter_result
+            result['indicators'] = indicators
+            results.append(result)
+        return results
+
+    ############################################################
+    # 🗣️ ОБЪЯСНЕНИЕ
+    ############################################################
+    def explain(self, result: Dict) -> List[Tuple[str, float]]:
+        """Развернутые причины по вкладам правил (для _build_reasoning): [(текст, вклад)]"""
+        lines = []
+        contributions = result.get('contributions') or {}
+        values = {name: result.get(name, spec[1]) for name, spec in self.fields.items()}
+        for rule in self.rules:
+            if rule.name in contributions and rule.explain:
+                lines.append((rule.explain.format(**values), contributions[rule.name]))
+        return lines
+
+
+# Глобальный движок скоринга
+scoring_engine = ScoringEngine()
+
+
+def get_scoring_engine() -> ScoringEngine:
+    """Получить глобальный движок скоринга"""
+    return scoring_engine
@@ -8,6 +8,9 @@ import pandas as pd
 from typing import Dict, List, Tuple, Optional, Union
 import logging
 
+from cache.kline_store import KlineWindow
+import indicator_kernels as kernels
+
 # Настройка логирования
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -20,12 +23,13 @@ class TechnicalIndicators:
         """Инициализация калькулятора индикаторов"""
         self.cache = {}  # Кэш для оптимизации расчетов
         
-    def calculate_all_indicators(self, klines_data: List[List], symbol: str) -> Dict:
+    def calculate_all_indicators(self, klines_data: Union[List[List], KlineWindow], symbol: str) -> Dict:
         """
         Расчет всех технических индикаторов для символа
         
         Args:
             klines_data: Список свечей [timestamp, open, high, low, close, volume]
+                или окно KlineWindow из общего хранилища свечей
             symbol: Торговый символ
             
         Returns:
@@ -46,13 +50,20 @@ class TechnicalIndicators:
                 'volume': float(df['volume'].iloc[-1])
             }
             
+            # Общие промежуточные массивы (TR, типичная цена, скользящие суммы)
+            # считаются один раз и переиспользуются всеми индикаторами
+            arrays = self._prepare_arrays(df)
+            
             # Базовые индикаторы
-            indicators.update(self._calculate_rsi(df))
-            indicators.update(self._calculate_moving_averages(df))
-            indicators.update(self._calculate_macd(df))
+            indicators.update(self._calculate_rsi(arrays))
+            indicators.update(self._calculate_moving_averages(arrays))
+            indicators.update(self._calculate_macd(arrays))
             indicators.update(self._calculate_bollinger_bands(df))
-            indicators.update(self._calculate_atr(df))
-            indicators.update(self._calculate_volume_indicators(df))
+            indicators.update(self._calculate_atr(arrays))
+            indicators.update(self._calculate_volume_indicators(arrays))
+            
+            # Расширенные индикаторы (Stoch RSI, OBV, VWAP, ADX, Keltner)
+            indicators.update(self._calculate_extended_indicators(arrays))
             
             # Кэшируем результат
             self.cache[symbol] = indicators
@@ -63,10 +74,20 @@ class TechnicalIndicators:
             logger.error(f"Ошибка расчета индикаторов для {symbol}: {e}")
             return {}
     
-    def _prepare_dataframe(self, klines_data: List[List]) -> pd.DataFrame:
+    def _prepare_dataframe(self, klines_data: Union[List[List], KlineWindow]) -> pd.DataFrame:
         """Подготовка DataFrame из данных свечей"""
         if not klines_data:
             return pd.DataFrame()
+        
+        # Окно хранилища уже разобрано в float64 - строим DataFrame без парсинга строк
+        if isinstance(klines_data, KlineWindow):
+            return pd.DataFrame({
+                'open': klines_data.open,
+                'high': klines_data.high,
+                'low': klines_data.low,
+                'close': klines_data.close,
+                'volume': klines_data.volume,
+            }, index=pd.DatetimeIndex(pd.to_datetime(klines_data.ts, unit='ms'), name='timestamp'))
             
         # MEX API возвращает список списков: [timestamp, open, high, low, close, volume, close_time, quote_volume]
         # Проверяем формат данных
@@ -100,38 +121,63 @@ class TechnicalIndicators:
         df.set_index('timestamp', inplace=True)
         return df
     
-    def _calculate_rsi(self, df: pd.DataFrame, period: int = 14) -> Dict:
+    def _prepare_arrays(self, df: pd.DataFrame, rsi_period: int = 14, atr_period: int = 14) -> Dict[str, np.ndarray]:
+        """Общие массивы для всех индикаторов (один проход по данным)"""
+        close = df['close'].to_numpy(dtype=float)
+        high = df['high'].to_numpy(dtype=float)
+        low = df['low'].to_numpy(dtype=float)
+        volume = df['volume'].to_numpy(dtype=float)
+        
+        delta = np.diff(close, prepend=np.nan)
+        gain = kernels.rolling_mean(np.where(delta > 0, delta, 0.0), rsi_period)
+        loss = kernels.rolling_mean(np.where(delta < 0, -delta, 0.0), rsi_period)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            rsi = 100 - (100 / (1 + gain / loss))
+        
+        true_range = kernels.true_range(high, low, close)
+        return {
+            'close': close,
+            'high': high,
+            'low': low,
+            'volume': volume,
+            'delta': delta,
+            'rsi': rsi,
+            'true_range': true_range,
+            'atr': kernels.rolling_mean(true_range, atr_period),
+            'atr_wilder': kernels.wilder_smooth(true_range, atr_period),
+            'typical_price': (high + low + close) / 3,
+            'ema_12': kernels.ema(close, 12),
+            'ema_26': kernels.ema(close, 26),
+            'volume_mean_20': kernels.rolling_mean(volume, 20),
+        }
+    
+    def _calculate_rsi(self, arrays: Dict[str, np.ndarray]) -> Dict:
         """Расчет RSI (Relative Strength Index)"""
         try:
-            delta = df['close'].diff()
-            gain = (delta.where(delta > 0, 0)).rolling(window=period).mean()
-            loss = (-delta.where(delta < 0, 0)).rolling(window=period).mean()
-            
-            rs = gain / loss
-            rsi = 100 - (100 / (1 + rs))
+            rsi = arrays['rsi'][-1]
             
             return {
-                'rsi_14': float(rsi.iloc[-1]) if not pd.isna(rsi.iloc[-1]) else 50.0,
-                'rsi_trend': 'bullish' if rsi.iloc[-1] > 70 else 'bearish' if rsi.iloc[-1] < 30 else 'neutral'
+                'rsi_14': float(rsi) if not pd.isna(rsi) else 50.0,
+                'rsi_trend': 'bullish' if rsi > 70 else 'bearish' if rsi < 30 else 'neutral'
             }
         except Exception as e:
             logger.error(f"Ошибка расчета RSI: {e}")
             return {'rsi_14': 50.0, 'rsi_trend': 'neutral'}
     
-    def _calculate_moving_averages(self, df: pd.DataFrame) -> Dict:
+    def _calculate_moving_averages(self, arrays: Dict[str, np.ndarray]) -> Dict:
         """Расчет скользящих средних"""
         try:
-            sma_20 = df['close'].rolling(window=20).mean()
-            sma_50 = df['close'].rolling(window=50).mean()
-            ema_12 = df['close'].ewm(span=12).mean()
-            ema_26 = df['close'].ewm(span=26).mean()
+            sma_20 = kernels.rolling_mean(arrays['close'], 20)
+            sma_50 = kernels.rolling_mean(arrays['close'], 50)
+            ema_12 = arrays['ema_12']
+            ema_26 = arrays['ema_26']
             
             return {
-                'sma_20': float(sma_20.iloc[-1]) if not pd.isna(sma_20.iloc[-1]) else 0.0,
-                'sma_50': float(sma_50.iloc[-1]) if not pd.isna(sma_50.iloc[-1]) else 0.0,
-                'ema_12': float(ema_12.iloc[-1]) if not pd.isna(ema_12.iloc[-1]) else 0.0,
-                'ema_26': float(ema_26.iloc[-1]) if not pd.isna(ema_26.iloc[-1]) else 0.0,
-                'ma_trend': 'bullish' if sma_20.iloc[-1] > sma_50.iloc[-1] else 'bearish'
+                'sma_20': float(sma_20[-1]) if not pd.isna(sma_20[-1]) else 0.0,
+                'sma_50': float(sma_50[-1]) if not pd.isna(sma_50[-1]) else 0.0,
+                'ema_12': float(ema_12[-1]) if not pd.isna(ema_12[-1]) else 0.0,
+                'ema_26': float(ema_26[-1]) if not pd.isna(ema_26[-1]) else 0.0,
+                'ma_trend': 'bullish' if sma_20[-1] > sma_50[-1] else 'bearish'
             }
         except Exception as e:
             logger.error(f"Ошибка расчета MA: {e}")
@@ -139,23 +185,21 @@ class TechnicalIndicators:
                 'sma_20': 0.0, 'sma_50': 0.0, 'ema_12': 0.0, 'ema_26': 0.0, 'ma_trend': 'neutral'
             }
     
-    def _calculate_macd(self, df: pd.DataFrame) -> Dict:
+    def _calculate_macd(self, arrays: Dict[str, np.ndarray]) -> Dict:
         """Расчет MACD (Moving Average Convergence Divergence)"""
         try:
-            ema_12 = df['close'].ewm(span=12).mean()
-            ema_26 = df['close'].ewm(span=26).mean()
-            macd_line = ema_12 - ema_26
-            signal_line = macd_line.ewm(span=9).mean()
+            macd_line = arrays['ema_12'] - arrays['ema_26']
+            signal_line = kernels.ema(macd_line, 9)
             histogram = macd_line - signal_line
             
             return {
                 'macd': {
-                    'macd': float(macd_line.iloc[-1]) if not pd.isna(macd_line.iloc[-1]) else 0.0,
-                    'signal': float(signal_line.iloc[-1]) if not pd.isna(signal_line.iloc[-1]) else 0.0,
-                    'histogram': float(histogram.iloc[-1]) if not pd.isna(histogram.iloc[-1]) else 0.0
+                    'macd': float(macd_line[-1]) if not pd.isna(macd_line[-1]) else 0.0,
+                    'signal': float(signal_line[-1]) if not pd.isna(signal_line[-1]) else 0.0,
+                    'histogram': float(histogram[-1]) if not pd.isna(histogram[-1]) else 0.0
                 },
-                'macd_signal': 'buy' if histogram.iloc[-1] > 0 and histogram.iloc[-2] <= 0 else 
-                              'sell' if histogram.iloc[-1] < 0 and histogram.iloc[-2] >= 0 else 'hold'
+                'macd_signal': 'buy' if histogram[-1] > 0 and histogram[-2] <= 0 else 
+                              'sell' if histogram[-1] < 0 and histogram[-2] >= 0 else 'hold'
             }
         except Exception as e:
             logger.error(f"Ошибка расчета MACD: {e}")
@@ -197,39 +241,35 @@ class TechnicalIndicators:
                 'bb_position': 0.5, 'bb_signal': 'neutral'
             }
     
-    def _calculate_atr(self, df: pd.DataFrame, period: int = 14) -> Dict:
+    def _calculate_atr(self, arrays: Dict[str, np.ndarray]) -> Dict:
         """Расчет ATR (Average True Range)"""
         try:
-            high_low = df['high'] - df['low']
-            high_close = np.abs(df['high'] - df['close'].shift())
-            low_close = np.abs(df['low'] - df['close'].shift())
-            
-            true_range = np.maximum(high_low, np.maximum(high_close, low_close))
-            atr = true_range.rolling(window=period).mean()
+            atr = arrays['atr']
             
             return {
-                'atr_14': float(atr.iloc[-1]) if not pd.isna(atr.iloc[-1]) else 0.0,
-                'volatility': 'high' if atr.iloc[-1] > atr.iloc[-5] * 1.5 else 
-                             'low' if atr.iloc[-1] < atr.iloc[-5] * 0.5 else 'normal'
+                'atr_14': float(atr[-1]) if not pd.isna(atr[-1]) else 0.0,
+                'volatility': 'high' if atr[-1] > atr[-5] * 1.5 else 
+                             'low' if atr[-1] < atr[-5] * 0.5 else 'normal'
             }
         except Exception as e:
             logger.error(f"Ошибка расчета ATR: {e}")
             return {'atr_14': 0.0, 'volatility': 'normal'}
     
-    def _calculate_volume_indicators(self, df: pd.DataFrame) -> Dict:
+    def _calculate_volume_indicators(self, arrays: Dict[str, np.ndarray]) -> Dict:
         """Расчет индикаторов объема"""
         try:
-            volume_sma = df['volume'].rolling(window=20).mean()
-            volume_ratio = df['volume'].iloc[-1] / volume_sma.iloc[-1] if volume_sma.iloc[-1] > 0 else 1.0
+            volume = arrays['volume']
+            volume_sma = arrays['volume_mean_20']
+            volume_ratio = volume[-1] / volume_sma[-1] if volume_sma[-1] > 0 else 1.0
             
             # Volume Price Trend
-            vpt = (df['volume'] * ((df['close'] - df['close'].shift(1)) / df['close'].shift(1))).cumsum()
+            vpt = kernels.vpt(arrays['close'], volume)
             
             return {
-                'volume_sma': float(volume_sma.iloc[-1]) if not pd.isna(volume_sma.iloc[-1]) else 0.0,
+                'volume_sma': float(volume_sma[-1]) if not pd.isna(volume_sma[-1]) else 0.0,
                 'volume_ratio': float(volume_ratio),
                 'volume_trend': 'high' if volume_ratio > 1.5 else 'low' if volume_ratio < 0.5 else 'normal',
-                'vpt': float(vpt.iloc[-1]) if not pd.isna(vpt.iloc[-1]) else 0.0
+                'vpt': float(vpt[-1]) if not pd.isna(vpt[-1]) else 0.0
             }
         except Exception as e:
             logger.error(f"Ошибка расчета Volume: {e}")
@@ -237,6 +277,84 @@ class TechnicalIndicators:
                 'volume_sma': 0.0, 'volume_ratio': 1.0, 'volume_trend': 'normal', 'vpt': 0.0
             }
     
+    def _calculate_extended_indicators(self, arrays: Dict[str, np.ndarray]) -> Dict:
+        """Stoch RSI, OBV, VWAP, ADX и каналы Кельтнера на общих массивах"""
+        try:
+            close, high, low = arrays['close'], arrays['high'], arrays['low']
+            volume, delta = arrays['volume'], arrays['delta']
+            
+            # Stochastic RSI (14, 3, 3) поверх уже посчитанного RSI
+            rsi_low, rsi_high = kernels.rolling_range(arrays['rsi'], 14)
+            with np.errstate(divide='ignore', invalid='ignore'):
+                stoch = np.where(rsi_high > rsi_low, (arrays['rsi'] - rsi_low) / (rsi_high - rsi_low) * 100, 50.0)
+            stoch = np.where(np.isnan(rsi_low), np.nan, stoch)
+            stoch_k = kernels.rolling_mean(stoch, 3)
+            stoch_d = kernels.rolling_mean(stoch_k, 3)
+            
+            # OBV: накопленный объем по знаку изменения цены
+            obv = np.cumsum(np.sign(np.nan_to_num(delta)) * volume)
+            obv_sma = kernels.rolling_mean(obv, 20)
+            
+            # VWAP за 20 свечей: делит скользящую сумму объема с volume_sma
+            with np.errstate(divide='ignore', invalid='ignore'):
+                vwap = kernels.rolling_mean(arrays['typical_price'] * volume, 20) / arrays['volume_mean_20']
+            
+            # ADX (14): направленное движение, сглаженное по Уайлдеру, на общем TR
+            up = np.diff(high, prepend=np.nan)
+            down = -np.diff(low, prepend=np.nan)
+            plus_dm = np.where((up > down) & (up > 0), up, 0.0)
+            minus_dm = np.where((down > up) & (down > 0), down, 0.0)
+            plus_dm[0] = minus_dm[0] = np.nan
+            atr_wilder = arrays['atr_wilder']
+            with np.errstate(divide='ignore', invalid='ignore'):
+                plus_di = 100 * kernels.wilder_smooth(plus_dm, 14) / atr_wilder
+                minus_di = 100 * kernels.wilder_smooth(minus_dm, 14) / atr_wilder
+                dx = 100 * np.abs(plus_di - minus_di) / (plus_di + minus_di)
+            adx = kernels.wilder_smooth(dx, 14)
+            
+            # Каналы Кельтнера: EMA20 ± 2 * ATR Уайлдера
+            keltner_middle = kernels.ema(close, 20)[-1]
+            keltner_upper = keltner_middle + 2 * atr_wilder[-1]
+            keltner_lower = keltner_middle - 2 * atr_wilder[-1]
+            keltner_width = keltner_upper - keltner_lower
+            keltner_position = (close[-1] - keltner_lower) / keltner_width if keltner_width > 0 else 0.5
+            
+            def last(values, default=0.0):
+                return float(values[-1]) if not pd.isna(values[-1]) else default
+            
+            stoch_k_last = last(stoch_k, 50.0)
+            adx_last = last(adx)
+            vwap_last = last(vwap)
+            
+            return {
+                'stoch_rsi': {'k': stoch_k_last, 'd': last(stoch_d, 50.0)},
+                'stoch_rsi_signal': 'oversold' if stoch_k_last < 20 else 'overbought' if stoch_k_last > 80 else 'neutral',
+                'obv': last(obv),
+                'obv_trend': 'rising' if obv[-1] > obv_sma[-1] else 'falling' if obv[-1] < obv_sma[-1] else 'flat',
+                'vwap': vwap_last,
+                'vwap_deviation': float(close[-1] / vwap_last - 1) if vwap_last > 0 else 0.0,
+                'adx': adx_last,
+                'plus_di': last(plus_di),
+                'minus_di': last(minus_di),
+                'adx_trend': 'strong' if adx_last > 25 else 'weak' if adx_last < 20 else 'moderate',
+                'keltner': {
+                    'upper': float(keltner_upper) if not pd.isna(keltner_upper) else 0.0,
+                    'middle': float(keltner_middle) if not pd.isna(keltner_middle) else 0.0,
+                    'lower': float(keltner_lower) if not pd.isna(keltner_lower) else 0.0
+                },
+                'keltner_position': float(keltner_position) if not pd.isna(keltner_position) else 0.5,
+                'keltner_signal': 'below' if keltner_position < 0 else 'above' if keltner_position > 1 else 'inside'
+            }
+        except Exception as e:
+            logger.error(f"Ошибка расчета расширенных индикаторов: {e}")
+            return {
+                'stoch_rsi': {'k': 50.0, 'd': 50.0}, 'stoch_rsi_signal': 'neutral',
+                'obv': 0.0, 'obv_trend': 'flat', 'vwap': 0.0, 'vwap_deviation': 0.0,
+                'adx': 0.0, 'plus_di': 0.0, 'minus_di': 0.0, 'adx_trend': 'weak',
+                'keltner': {'upper': 0.0, 'middle': 0.0, 'lower': 0.0},
+                'keltner_position': 0.5, 'keltner_signal': 'inside'
+            }
+    
     def get_cached_indicators(self, symbol: str) -> Optional[Dict]:
         """Получение кэшированных индикаторов"""
         return self.cache.get(symbol)
@@ -0,0 +1,28 @@
+#!/usr/bin/env python3
+"""
+Изоляция тестов от рабочих файлов бота
+Импортируется до config: постоянный индекс ATH/ATL, журнал решений фильтров,
+снимок позиций и история сканов по умолчанию пишутся в рабочие файлы бота,
+и тестовые свечи попадали бы в них (индекс ATH только растет - навсегда).
+Тесты получают их во временном каталоге, удаляемом при выходе.
+"""
+
+import atexit
+import os
+import shutil
+import tempfile
+
+TMP_DIR = tempfile.mkdtemp(prefix='tgch_tests_')
+atexit.register(shutil.rmtree, TMP_DIR, True)  # Регистрируется первым - выполняется последним
+
+os.environ['ATH_INDEX_FILE'] = ':memory:'
+os.environ['FILTER_DECISIONS_DIR'] = os.path.join(TMP_DIR, 'filter_decisions')
+os.environ['SCAN_HISTORY_DIR'] = os.path.join(TMP_DIR, 'scan_history')
+os.environ['POSITIONS_FILE'] = ''  # Без снимка на диск
+
+
+def memory_index(filter_class) -> dict:
+    """Аргументы конструктора фильтра с индексом ATH в памяти (он есть только у ребалансировщика)"""
+    from cache.ath_index import AthIndex
+    from rebalancer_anti_hype_filter import RebalancerAntiHypeFilter
+    return {'ath_index': AthIndex(':memory:')} if filter_class is RebalancerAntiHypeFilter else {}
@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+"""
+Фикстуры свечей для офлайн-тестов и бенчмарков индикаторов
+
+По умолчанию используется записанный файл tests/fixtures/klines_recorded.json.gz,
+если он есть. Иначе генерируется детерминированный синтетический набор
+(200 символов, интервалы 15m/1h/4h/1d) с разными режимами рынка, чтобы
+фильтры проходили все ветки (импульс, перекупленность, медвежий тренд, DCA).
+
+Запись с биржи:
+    python3 tests/kline_fixtures.py --record
+"""
+
+import gzip
+import json
+import os
+import sys
+import zlib
+from typing import Dict, List
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures')
+RECORDED_FILE = os.path.join(FIXTURES_DIR, 'klines_recorded.json.gz')
+
+# Интервал -> количество свечей в фикстуре
+FIXTURE_INTERVALS = {'15m': 100, '1h': 100, '4h': 100, '1d': 120}
+INTERVAL_MS = {'15m': 15 * 60_000, '1h': 60 * 60_000, '4h': 4 * 60 * 60_000, '1d': 24 * 60 * 60_000}
+FIXTURE_END_MS = 1_700_006_400_000  # 2023-11-15 00:00 UTC
+SYMBOL_COUNT = 200
+
+# Режимы рынка: (дрейф за свечу, волатильность, импульс на последних свечах)
+REGIMES = [
+    (0.0, 0.006, 0.0),      # боковик
+    (0.002, 0.008, 0.0),    # восходящий тренд
+    (-0.002, 0.008, 0.0),   # нисходящий тренд
+    (0.0005, 0.01, 0.06),   # памп в конце
+    (-0.0005, 0.01, -0.06), # пролив в конце
+]
+
+
+def synthetic_symbols(count: int = SYMBOL_COUNT) -> List[str]:
+    return [f"S{i:03d}USDT" for i in range(count)]
+
+
+def _synthetic_series(symbol: str, interval: str, n: int) -> List[List]:
+    seed = zlib.crc32(f"{symbol}:{interval}".encode())
+    rng = np.random.default_rng(seed)
+    drift, vol, impulse = REGIMES[zlib.crc32(symbol.encode()) % len(REGIMES)]
+    vol = vol * (INTERVAL_MS[interval] / INTERVAL_MS['1h']) ** 0.5
+
+    returns = rng.normal(drift, vol, n)
+    if impulse:
+        returns[-3:] += impulse / 3
+    start_price = 10 ** rng.uniform(-3, 4)
+    close = start_price * np.exp(np.cumsum(returns))
+    open_ = np.r_[start_price, close[:-1]]
+    wick = np.abs(rng.normal(0, vol / 2, (2, n)))
+    high = np.maximum(open_, close) * (1 + wick[0])
+    low = np.minimum(open_, close) * (1 - wick[1])
+    volume = rng.lognormal(8, 0.6, n) * (1 + 4 * (np.arange(n) >= n - 3) * bool(impulse))
+
+    step = INTERVAL_MS[interval]
+    ts = FIXTURE_END_MS - step * np.arange(n, 0, -1)
+    return [[int(t), f"{o:.8g}", f"{h:.8g}", f"{l:.8g}", f"{c:.8g}", f"{v:.2f}", int(t) + step - 1, f"{v * c:.2f}"]
+            for t, o, h, l, c, v in zip(ts, open_, high, low, close, volume)]
+
+
+def generate_synthetic(count: int = SYMBOL_COUNT) -> Dict[str, Dict[str, List[List]]]:
+    """Детерминированный синтетический набор {symbol: {interval: klines}}"""
+    return {
+        symbol: {interval: _synthetic_series(symbol, interval, n) for interval, n in FIXTURE_INTERVALS.items()}
+        for symbol in synthetic_symbols(count)
+    }
+
+
+_cache: Dict[str, Dict] = {}
+
+
+def load_fixtures(prefer_recorded: bool = True) -> Dict[str, Dict[str, List[List]]]:
+    """Загрузить фикстуры (записанные, если есть, иначе синтетические)"""
+    source = 'recorded' if prefer_recorded and os.path.exists(RECORDED_FILE) else 'synthetic'
+    if source not in _cache:
+        if source == 'recorded':
+            with gzip.open(RECORDED_FILE, 'rt', encoding='utf-8') as f:
+                _cache[source] = json.load(f)['klines']
+        else:
+            _cache[source] = generate_synthetic()
+    return _cache[source]
+
+
+def fixtures_name(prefer_recorded: bool = True) -> str:
+    """Имя набора фикстур (для выбора файла эталонных значений)"""
+    return 'recorded' if prefer_recorded and os.path.exists(RECORDED_FILE) else 'synthetic'
+
+
+class FixtureKlineSource:
+    """Источник свечей с интерфейсом MexAPI.get_klines поверх фикстур"""
+
+    def __init__(self, fixtures: Dict[str, Dict[str, List[List]]]):
+        self.fixtures = fixtures
+        self.calls = 0
+
+    def get_klines(self, symbol: str, interval: str = '1m', limit: int = 100) -> List:
+        self.calls += 1
+        interval = {'60m': '1h', '240m': '4h'}.get(interval, interval)
+        return self.fixtures.get(symbol, {}).get(interval, [])[-limit:]
+
+
+def record_fixtures(count: int = SYMBOL_COUNT):
+    """Записать фикстуры с биржи: топ-N USDT пар по объему"""
+    from mex_api import MexAPI
+    api = MexAPI()
+    tickers = api.get_24hr_ticker()
+    symbols = [t['symbol'] for t in sorted(
+        (t for t in tickers if t['symbol'].endswith('USDT')),
+        key=lambda t: float(t.get('quoteVolume', 0) or 0), reverse=True)][:count]
+    data = {}
+    for i, symbol in enumerate(symbols, 1):
+        data[symbol] = {interval: api.get_klines(symbol, interval, n) for interval, n in FIXTURE_INTERVALS.items()}
+        print(f"   {i}/{len(symbols)} {symbol}")
+    os.makedirs(FIXTURES_DIR, exist_ok=True)
+    with gzip.open(RECORDED_FILE, 'wt', encoding='utf-8') as f:
+        json.dump({'meta': {'intervals': FIXTURE_INTERVALS, 'symbols': len(data)}, 'klines': data}, f)
+    print(f"✅ Записано {len(data)} символов в {RECORDED_FILE}")
+
+
+if __name__ == "__main__":
+    if '--record' in sys.argv:
+        record_fixtures()
+    else:
+        fixtures = load_fixtures()
+        print(f"Набор: {fixtures_name()}, символов: {len(fixtures)}")
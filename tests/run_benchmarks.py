@@ -0,0 +1,249 @@
+#!/usr/bin/env python3
+"""
+Офлайн регрессия индикаторов и бенчмарк производительности
+
+Проверяет на фикстурах свечей (200 символов, 15m/1h/4h/1d):
+- TechnicalIndicators.calculate_all_indicators
+- AntiHypeFilter / RebalancerAntiHypeFilter.check_buy_permission
+- utils/market_analyzer.calculate_technical_indicators
+
+Значения сверяются с эталоном (tests/fixtures/indicator_golden_<набор>.json),
+задержки и пропускная способность - с базовой линией
+(tests/fixtures/benchmark_baseline.json). Запуск перед деплоем:
+
+    python3 tests/run_benchmarks.py                   # сверка + бенчмарк
+    python3 tests/run_benchmarks.py --threshold 1.3   # допустимое замедление
+    python3 tests/run_benchmarks.py --update-golden   # пересохранить эталон
+    python3 tests/run_benchmarks.py --update-baseline # пересохранить базовую линию
+
+Код возврата 1 - расхождение с эталоном или регрессия скорости.
+"""
+
+import json
+import logging
+import math
+import os
+import platform
+import sys
+import time
+from typing import Callable, Dict, List
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import isolated_storage  # noqa: F401 - до импорта config, рабочие файлы бота не трогаем
+from kline_fixtures import FIXTURES_DIR, FixtureKlineSource, fixtures_name, load_fixtures
+from technical_indicators import TechnicalIndicators
+from anti_hype_filter import AntiHypeFilter
+from rebalancer_anti_hype_filter import RebalancerAntiHypeFilter
+from cache.ath_index import AthIndex
+from utils.market_analyzer import calculate_technical_indicators
+import indicator_kernels
+
+BASELINE_FILE = os.path.join(FIXTURES_DIR, 'benchmark_baseline.json')
+DEFAULT_THRESHOLD = float(os.getenv('BENCH_REGRESSION_THRESHOLD', '1.5'))
+REL_TOLERANCE = 1e-9
+
+
+def golden_file(name: str) -> str:
+    return os.path.join(FIXTURES_DIR, f'indicator_golden_{name}.json')
+
+
+def _flatten(data: Dict, prefix: str = '') -> Dict:
+    flat = {}
+    for key, value in data.items():
+        name = f"{prefix}{key}"
+        if isinstance(value, dict):
+            flat.update(_flatten(value, name + '.'))
+        elif isinstance(value, (int, float, str, bool)) or value is None:
+            flat[name] = value
+    return flat
+
+
+# Компоненты: имя -> (фабрика состояния, функция (состояние, symbol, fixtures) -> dict)
+def _components() -> Dict[str, tuple]:
+    filter_keys = ('allowed', 'multiplier', 'reason', 'block_type')
+    return {
+        'technical_indicators': (
+            TechnicalIndicators,
+            lambda ti, symbol, fx: ti.calculate_all_indicators(fx[symbol]['15m'], symbol),
+        ),
+        'anti_hype_filter': (
+            lambda fx: AntiHypeFilter(kline_source=FixtureKlineSource(fx)),
+            lambda f, symbol, fx: {k: f.check_buy_permission(symbol).get(k) for k in filter_keys},
+        ),
+        'rebalancer_anti_hype_filter': (
+            lambda fx: RebalancerAntiHypeFilter(kline_source=FixtureKlineSource(fx), ath_index=AthIndex(':memory:')),
+            lambda f, symbol, fx: {k: f.check_buy_permission(symbol).get(k) for k in filter_keys},
+        ),
+        'market_analyzer': (
+            lambda fx: None,
+            lambda _, symbol, fx: calculate_technical_indicators(fx[symbol]['1h']),
+        ),
+    }
+
+
+def _make_state(factory: Callable, fixtures: Dict):
+    try:
+        return factory(fixtures)
+    except TypeError:
+        return factory()
+
+
+def compute_outputs(fixtures: Dict) -> Dict[str, Dict[str, Dict]]:
+    """Значения всех компонентов: {component: {symbol: {field: value}}}"""
+    outputs = {}
+    for name, (factory, fn) in _components().items():
+        state = _make_state(factory, fixtures)
+        outputs[name] = {symbol: _flatten(fn(state, symbol, fixtures)) for symbol in sorted(fixtures)}
+    return outputs
+
+
+def _close(a, b) -> bool:
+    if isinstance(a, float) or isinstance(b, float):
+        if a is None or b is None:
+            return a is b
+        if math.isnan(a) and math.isnan(b):
+            return True
+        return abs(a - b) <= REL_TOLERANCE * max(1.0, abs(a), abs(b))
+    return a == b
+
+
+def compare_with_golden(outputs: Dict, golden: Dict) -> List[str]:
+    """Список расхождений с эталоном (пустой - все совпало)"""
+    mismatches = []
+    for component, per_symbol in golden.items():
+        actual_component = outputs.get(component, {})
+        for symbol, fields in per_symbol.items():
+            actual = actual_component.get(symbol, {})
+            for field, expected in fields.items():
+                if field not in actual or not _close(actual[field], expected):
+                    mismatches.append(f"{component}/{symbol}/{field}: {actual.get(field)!r} != {expected!r}")
+    return mismatches
+
+
+def load_golden(name: str) -> Dict:
+    path = golden_file(name)
+    if not os.path.exists(path):
+        return {}
+    with open(path, encoding='utf-8') as f:
+        return json.load(f)
+
+
+def run_benchmarks(fixtures: Dict, repeat: int = 3) -> Dict[str, Dict]:
+    """Задержка на символ (p50/p95, лучший прогон) и пропускная способность"""
+    results = {}
+    symbols = sorted(fixtures)
+    for name, (factory, fn) in _components().items():
+        best_total = None
+        best_latencies = None
+        for _ in range(repeat):
+            state = _make_state(factory, fixtures)  # свежее состояние - без кэша результатов
+            latencies = []
+            start = time.perf_counter()
+            for symbol in symbols:
+                t0 = time.perf_counter()
+                fn(state, symbol, fixtures)
+                latencies.append(time.perf_counter() - t0)
+            total = time.perf_counter() - start
+            if best_total is None or total < best_total:
+                best_total, best_latencies = total, sorted(latencies)
+        results[name] = {
+            'symbols': len(symbols),
+            'per_symbol_ms': best_total / len(symbols) * 1000,
+            'p50_ms': best_latencies[len(best_latencies) // 2] * 1000,
+            'p95_ms': best_latencies[int(len(best_latencies) * 0.95)] * 1000,
+            'throughput_per_s': len(symbols) / best_total,
+        }
+    return results
+
+
+def check_regressions(results: Dict, baseline: Dict, threshold: float) -> List[str]:
+    """Компоненты, замедлившиеся больше чем в threshold раз"""
+    regressions = []
+    for name, current in results.items():
+        base = baseline.get('components', {}).get(name)
+        if not base:
+            continue
+        ratio = current['per_symbol_ms'] / base['per_symbol_ms'] if base['per_symbol_ms'] > 0 else 1.0
+        if ratio > threshold:
+            regressions.append(f"{name}: {current['per_symbol_ms']:.3f} мс/символ "
+                               f"против {base['per_symbol_ms']:.3f} (x{ratio:.2f} > x{threshold})")
+    return regressions
+
+
+def _write_json(path: str, data: Dict):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, ensure_ascii=False, indent=1, sort_keys=True)
+        f.write('\n')
+
+
+def main(argv: List[str]) -> int:
+    threshold = DEFAULT_THRESHOLD
+    if '--threshold' in argv:
+        threshold = float(argv[argv.index('--threshold') + 1])
+
+    # Логи фильтров не должны влиять на замеры
+    logging.disable(logging.WARNING)
+
+    fixtures = load_fixtures()
+    name = fixtures_name()
+    print(f"📦 Фикстуры: {name}, символов: {len(fixtures)}")
+
+    # JIT-ядра компилируем до замеров (в боте это делается в фоне при старте)
+    indicator_kernels.warmup(background=False)
+    print(f"⚙️ Бэкенд ядер индикаторов: {indicator_kernels.get_kernels().backend}")
+
+    outputs = compute_outputs(fixtures)
+    if '--update-golden' in argv:
+        _write_json(golden_file(name), outputs)
+        print(f"💾 Эталон сохранен: {golden_file(name)}")
+    failed = False
+    golden = load_golden(name)
+    if golden:
+        mismatches = compare_with_golden(outputs, golden)
+        if mismatches:
+            failed = True
+            print(f"❌ Расхождений с эталоном: {len(mismatches)}")
+            for line in mismatches[:20]:
+                print(f"   {line}")
+        else:
+            print("✅ Значения совпадают с эталоном")
+    else:
+        print("⚠️ Эталон не найден (запустите с --update-golden)")
+
+    results = run_benchmarks(fixtures)
+    print("\n⏱️ БЕНЧМАРК:")
+    for component, r in results.items():
+        print(f"   {component:30s} {r['per_symbol_ms']:8.3f} мс/символ  p95={r['p95_ms']:.3f} мс  "
+              f"{r['throughput_per_s']:9.1f} символов/с")
+
+    print("\n⏱️ ЯДРА ИНДИКАТОРОВ (мкс на 1000 точек):")
+    for kernel, timings in indicator_kernels.benchmark_kernels().items():
+        line = "  ".join(f"{backend}={us:8.1f}" for backend, us in timings.items())
+        print(f"   {kernel:30s} {line}")
+
+    if '--update-baseline' in argv:
+        _write_json(BASELINE_FILE, {
+            'meta': {'python': platform.python_version(), 'machine': platform.machine(), 'fixtures': name},
+            'components': results,
+        })
+        print(f"💾 Базовая линия сохранена: {BASELINE_FILE}")
+    elif os.path.exists(BASELINE_FILE):
+        with open(BASELINE_FILE, encoding='utf-8') as f:
+            baseline = json.load(f)
+        regressions = check_regressions(results, baseline, threshold)
+        if regressions:
+            failed = True
+            print(f"\n❌ Регрессия производительности (порог x{threshold}):")
+            for line in regressions:
+                print(f"   {line}")
+        else:
+            print(f"\n✅ Регрессий нет (порог x{threshold})")
+
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
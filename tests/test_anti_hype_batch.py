@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+"""
+Тест пакетной проверки анти-хайп фильтра
+Сверка с одиночной проверкой на синтетических парах; сети и API ключей не требует
+"""
+
+import logging
+import os
+import sys
+import threading
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import isolated_storage  # noqa: F401 - до импорта config, рабочие файлы бота не трогаем
+from anti_hype_filter import AntiHypeFilter
+from cache.kline_store import KlineStore
+from test_kline_store import make_klines
+
+logging.getLogger('anti_hype_filter').setLevel(logging.CRITICAL)
+
+HOUR = 3_600_000
+SCENARIOS = ('random', 'pump', 'dump', 'at_high', 'near_high', 'no_1h', 'no_data', 'no_hourly', 'zero_price')
+
+
+def set_close(kline, close):
+    kline[4] = f"{close:.6f}"
+    kline[2] = f"{max(float(kline[2]), close):.6f}"
+    kline[3] = f"{min(float(kline[3]), close):.6f}"
+
+
+class ScenarioSource:
+    """Фейковый источник свечей: сценарий по номеру пары, задержка и подсчет запросов"""
+
+    def __init__(self, symbols, latency=0.0):
+        self.latency = latency
+        self.requests = []
+        self._lock = threading.Lock()
+        self.scenario = {s: SCENARIOS[i % len(SCENARIOS)] for i, s in enumerate(symbols)}
+        self.data = {}
+        for i, symbol in enumerate(symbols):
+            hourly = [list(k) for k in make_klines(50, step_ms=HOUR, seed=i + 1)]
+            h4 = [list(k) for k in make_klines(50, step_ms=4 * HOUR, seed=1000 + i)]
+            scenario = self.scenario[symbol]
+            if scenario == 'pump':
+                set_close(h4[-1], float(h4[-2][4]) * 1.2)
+            elif scenario == 'dump':
+                set_close(h4[-1], float(h4[-2][4]) * 0.8)
+                for k in hourly[-15:]:
+                    set_close(k, float(k[1]) * 0.99)
+            elif scenario in ('at_high', 'near_high'):
+                top = max(float(k[2]) for k in hourly[-24:])
+                set_close(hourly[-1], top * (0.999 if scenario == 'at_high' else 0.995))
+            elif scenario == 'zero_price':
+                hourly[-1][4] = '0'
+            self.data[symbol] = {'1h': hourly, '4h': h4, '15m': hourly, '60m': hourly}
+
+    def get_klines(self, symbol, interval='1h', limit=100):
+        with self._lock:
+            self.requests.append((symbol, interval, limit))
+        time.sleep(self.latency)
+        scenario = self.scenario[symbol]
+        if scenario == 'no_data' or (scenario == 'no_1h' and interval == '1h') or \
+                (scenario == 'no_hourly' and limit == 24):
+            return []
+        return [list(k) for k in self.data[symbol][interval][-limit:]]
+
+
+def make_filter(source):
+    anti_hype = AntiHypeFilter(kline_source=source)
+    anti_hype.kline_store = KlineStore()
+    return anti_hype
+
+
+def test_batch_matches_single():
+    print("🔍 ТЕСТ СОВПАДЕНИЯ С ОДИНОЧНОЙ ПРОВЕРКОЙ")
+    symbols = [f"H{i:03d}USDT" for i in range(90)]
+    single_source, batch_source = ScenarioSource(symbols), ScenarioSource(symbols)
+    single = make_filter(single_source)
+    expected = {symbol: single.check_buy_permission(symbol) for symbol in symbols}
+    actual = make_filter(batch_source).check_buy_permission_batch(symbols)
+
+    assert list(actual) == symbols
+    for symbol in symbols:
+        assert actual[symbol] == expected[symbol], (symbol, actual[symbol], expected[symbol])
+    # Те же загрузки свечей, каждая по одному разу
+    assert sorted(batch_source.requests) == sorted(single_source.requests)
+    assert len(set(batch_source.requests)) == len(batch_source.requests)
+
+    reasons = {r['reason'].split('_RSI')[0].rstrip('0123456789.%-_') for r in expected.values()}
+    for reason in ('no_data', 'error_fallback', 'daily_high_too_close', 'hype_block_impulse', 'dca_boost_fall'):
+        assert reason in reasons, reasons
+    print(f"   ✅ {len(symbols)} пар совпадают, исходы: {len(reasons)}")
+
+
+def test_result_cache_and_duplicates():
+    print("🔍 ТЕСТ КЭША РЕЗУЛЬТАТОВ И ПОВТОРОВ")
+    symbols = [f"C{i:02d}USDT" for i in range(9)]
+    source = ScenarioSource(symbols)
+    anti_hype = make_filter(source)
+    first = anti_hype.check_buy_permission(symbols[0])
+    results = anti_hype.check_buy_permission_batch(symbols + symbols[:2])
+    assert list(results) == symbols and results[symbols[0]] is first
+    requests = len(source.requests)
+    assert anti_hype.check_buy_permission_batch(symbols) == results
+    assert len(source.requests) == requests  # Все из кэша результатов
+    assert anti_hype.get_filter_status(symbols[:3]) == {s: results[s] for s in symbols[:3]}
+    assert anti_hype.check_buy_permission_batch([]) == {}
+    print("   ✅ OK")
+
+
+def test_concurrent_fetch_wall_time():
+    print("🔍 ТЕСТ ПАРАЛЛЕЛЬНОЙ ЗАГРУЗКИ СВЕЧЕЙ")
+    symbols = [f"W{i:02d}USDT" for i in range(27)]
+    single = make_filter(ScenarioSource(symbols, latency=0.02))
+    start = time.perf_counter()
+    for symbol in symbols:
+        single.check_buy_permission(symbol)
+    single_sec = time.perf_counter() - start
+
+    batch = make_filter(ScenarioSource(symbols, latency=0.02))
+    start = time.perf_counter()
+    batch.check_buy_permission_batch(symbols, max_workers=16)
+    batch_sec = time.perf_counter() - start
+    assert batch_sec < single_sec / 3, (single_sec, batch_sec)
+    print(f"   ✅ по одной {single_sec:.2f} сек, пачкой {batch_sec:.2f} сек")
+
+
+if __name__ == "__main__":
+    test_batch_matches_single()
+    test_result_cache_and_duplicates()
+    test_concurrent_fetch_wall_time()
+    print("\n✅ Все тесты пакетного анти-хайп фильтра пройдены")
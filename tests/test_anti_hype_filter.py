@@ -3,6 +3,7 @@
 Тест анти-хайп фильтра на реальных данных
 """
 
+import isolated_storage  # noqa: F401 - до импорта config, рабочие файлы бота не трогаем
 from anti_hype_filter import AntiHypeFilter
 from balance_monitor import BalanceMonitor
 from alt_monitor import AltsMonitor
@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+"""
+Тест офлайн-перебора порогов анти-хайп фильтра
+Синтетическая история 1h свечей; сети и API ключей не требует
+"""
+
+import os
+import sys
+import tempfile
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import isolated_storage  # noqa: F401 - до импорта config, рабочие файлы бота не трогаем
+import numpy as np
+
+from anti_hype_filter import AntiHypeFilter
+from anti_hype_sweep import (build_entries, compute_features, evaluate, format_results, history_from_klines,
+                             load_entries, parameter_grid, save_history, sweep)
+from cache.daily_extremes import DailyExtremesTracker
+from cache.kline_resampler import resample
+from cache.kline_store import KlineStore, as_window
+from test_kline_store import make_klines
+
+HOUR_MS = 3_600_000
+
+
+def make_history(symbols=6, n=400):
+    klines = {}
+    for i in range(symbols):
+        rows = make_klines(n + i * 7, start_ts=1_700_000_000_000 + 3 * HOUR_MS, step_ms=HOUR_MS, seed=i + 1)
+        for k in range(n // 2, n // 2 + 4):  # Импульс вверх посередине
+            for col in (2, 4):
+                rows[k][col] = f"{float(rows[k][col]) * (1 + 0.02 * i):.6f}"
+        klines[f"S{i}USDT"] = rows
+    return klines
+
+
+class ReplaySource:
+    """Окна, которые фильтр видел бы на закрытии часовой свечи t"""
+
+    def __init__(self, klines):
+        self.klines = klines
+        self.t = 0
+
+    def get_klines(self, symbol, interval='1h', limit=100):
+        hourly = as_window(self.klines[:self.t + 1], symbol, '1h')
+        if interval == '4h':
+            return resample(hourly, '4h').tail(limit)  # Последняя 4h свеча формируется
+        return hourly.tail(limit) if interval == '1h' else None
+
+
+def test_features_match_filter():
+    print("🔍 ТЕСТ СОВПАДЕНИЯ ПРИЗНАКОВ И РЕШЕНИЙ С ФИЛЬТРОМ")
+    klines = make_history()
+    history = history_from_klines(klines)
+    features = compute_features(history)
+    base = AntiHypeFilter(kline_source=None).decision_params()
+    checked = blocked = 0
+    for row, symbol in enumerate(history['symbols']):
+        offset = history['close'].shape[1] - len(klines[symbol])
+        source = ReplaySource(klines[symbol])
+        for t in range(60, len(klines[symbol]), 23):
+            col = offset + t
+            if not features['has_data'][row, col]:
+                continue
+            source.t = t
+            anti_hype = AntiHypeFilter(kline_source=source)
+            # Момент проверки - перед закрытием свечи t: трекер дает хай UTC-суток до нее
+            moment = (int(klines[symbol][t][0]) + HOUR_MS - 1) / 1000
+            anti_hype.kline_store, anti_hype.daily_extremes, anti_hype.decision_log = \
+                KlineStore(), DailyExtremesTracker(clock=lambda: moment), None
+            expected = anti_hype._symbol_features(symbol)
+            expected['daily_high'] = anti_hype._get_daily_high(symbol)
+            for name in ('price', 'daily_high', 'atr', 'rsi', 'ema20', 'ema200', 'change'):
+                assert np.isclose(features[name][row, col], expected[name], rtol=1e-9, atol=1e-9), \
+                    (symbol, t, name, features[name][row, col], expected[name])
+            result = anti_hype.check_buy_permission(symbol)
+            entries = {name: features[name][row:row + 1, col] for name in expected}
+            entries.update(horizons=np.zeros(0, dtype=np.int64))
+            replayed = evaluate(entries, base)
+            assert replayed['blocked'] == (0 if result['allowed'] else 1)
+            checked += 1
+            blocked += not result['allowed']
+    assert checked > 50 and 0 < blocked < checked, (checked, blocked)
+    print(f"   ✅ {checked} точек, заблокировано {blocked}")
+
+
+def test_sweep_and_feature_cache():
+    print("🔍 ТЕСТ ПЕРЕБОРА И КЭША ПРИЗНАКОВ")
+    base = AntiHypeFilter(kline_source=None).decision_params()
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'history.npz')
+        save_history(history_from_klines(make_history(symbols=12, n=600)), path)
+        entries = load_entries(path, horizons=(4, 24))
+        cache_path = os.path.join(tmp, 'history.features.npz')
+        cached_at = os.path.getmtime(cache_path)
+        time.sleep(0.01)
+        assert len(load_entries(path, horizons=(4, 24))['price']) == len(entries['price'])
+        assert os.path.getmtime(cache_path) == cached_at  # Из кэша, без пересчета
+
+        grid = {'atr_impulse_multiplier': (1.5, 2.7, 4.0), 'rsi_overbought': (50, 58, 70)}
+        assert len(parameter_grid(grid, base)) == 9
+        try:
+            parameter_grid({'unknown': (1,)}, base)
+            raise AssertionError("неизвестный параметр принят")
+        except ValueError:
+            pass
+        local = sweep(entries, grid, base, workers=1)
+        pooled = sweep(entries, grid, base, workers=2)
+        assert [r['blocked'] for r in local] == [r['blocked'] for r in pooled]
+        by_impulse = {r['params']['atr_impulse_multiplier']: r['block_rate']
+                      for r in local if r['params']['rsi_overbought'] == 58}
+        assert by_impulse[1.5] >= by_impulse[2.7] >= by_impulse[4.0]  # Мягче порог - меньше блокировок
+        stats = local[0]['horizons'][24]
+        assert np.isfinite(stats['allowed_mean']) and np.isfinite(stats['edge'])
+        report = format_results(local, evaluate(entries, base), top=3)
+        assert 'Текущие пороги' in report and 'atr_impulse_multiplier' in report
+        assert list(load_entries(path, horizons=(8,))['horizons']) == [8]  # Другие горизонты - пересчет
+    print("   ✅ OK")
+
+
+def test_vectorized_features_fast():
+    print("🔍 ТЕСТ СКОРОСТИ РАСЧЕТА ПРИЗНАКОВ")
+    klines = make_history(symbols=40, n=1000)
+    history = history_from_klines(klines)
+    started = time.perf_counter()
+    entries = build_entries(history, (4, 24))
+    elapsed = time.perf_counter() - started
+    assert len(entries['price']) > 30_000 and elapsed < 5, elapsed
+    print(f"   ✅ {len(entries['price'])} входов за {elapsed:.2f} сек")
+
+
+if __name__ == "__main__":
+    test_features_match_filter()
+    test_sweep_and_feature_cache()
+    test_vectorized_features_fast()
+    print("\n✅ Все тесты перебора порогов анти-хайп фильтра пройдены")
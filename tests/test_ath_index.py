@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""
+Тест постоянного индекса ATH/ATL ребалансировщика
+Фейковый источник свечей и временный файл SQLite; сети и API ключей не требует
+"""
+
+import os
+import sys
+import tempfile
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import isolated_storage  # noqa: F401 - до импорта config, рабочие файлы бота не трогаем
+from cache.ath_index import DAY_MS, AthIndex
+from cache.kline_store import KlineStore
+from rebalancer_anti_hype_filter import RebalancerAntiHypeFilter
+from test_kline_store import make_klines
+
+HOUR_MS = 3_600_000
+
+
+def daily_klines(n, last_day_ms, seed=1):
+    """n дневных свечей, последняя открыта в last_day_ms"""
+    return make_klines(n, start_ts=last_day_ms - (n - 1) * DAY_MS, step_ms=DAY_MS, seed=seed)
+
+
+def test_bootstrap_and_incremental_updates():
+    print("🔍 ТЕСТ НАЧАЛЬНОЙ ЗАГРУЗКИ И ОБНОВЛЕНИЙ")
+    today = int(time.time() * 1000) // DAY_MS * DAY_MS
+    history = daily_klines(300, today - DAY_MS)
+    index = AthIndex(':memory:')
+    entry = index.bootstrap('AUSDT', history)
+    assert entry.ath == max(float(k[2]) for k in history) and entry.bootstrap_days == 300
+    assert entry.atl == min(float(k[3]) for k in history)
+    assert index.missing_days('AUSDT') == 1 and index.missing_days('BUSDT') == -1
+
+    ath, atl, writes = entry.ath, entry.atl, index.stats['writes']
+    assert not index.update_price('AUSDT', (ath + atl) / 2)  # Внутри диапазона - без записи
+    assert index.stats['writes'] == writes
+    assert index.update_price('AUSDT', ath * 1.1)
+    assert index.ath('AUSDT') == ath * 1.1 and index.get('AUSDT').ath_time > history[-1][0]
+
+    new_day = [[today, '1', str(ath * 2), str(atl / 2), '1', '10']]
+    assert index.apply_klines('AUSDT', new_day, daily=True)
+    assert index.missing_days('AUSDT') == 0
+    assert index.atl('AUSDT') == atl / 2 and index.get('AUSDT').last_day == today
+    print("   ✅ OK")
+
+
+def test_persisted_between_restarts():
+    print("🔍 ТЕСТ СОХРАНЕНИЯ МЕЖДУ ПЕРЕЗАПУСКАМИ")
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'ath.db')
+        index = AthIndex(path)
+        index.bootstrap('AUSDT', daily_klines(50, 1_700_000_000_000 // DAY_MS * DAY_MS))
+        ath = index.ath('AUSDT')
+        index.close()
+        reopened = AthIndex(path)
+        assert 'AUSDT' in reopened and len(reopened) == 1 and reopened.ath('AUSDT') == ath
+        reopened.close()
+    print("   ✅ OK")
+
+
+class CountingSource:
+    def __init__(self, today):
+        self.today = today
+        self.requests = []
+
+    def get_klines(self, symbol, interval='1h', limit=100):
+        self.requests.append((interval, limit))
+        if interval == '1d':
+            return daily_klines(limit, self.today)
+        return make_klines(limit, start_ts=self.today, step_ms=HOUR_MS)
+
+
+def test_filter_reads_ath_without_network():
+    print("🔍 ТЕСТ ATH ФИЛЬТРА БЕЗ ЗАГРУЗКИ ИСТОРИИ")
+    today = int(time.time() * 1000) // DAY_MS * DAY_MS
+    source = CountingSource(today)
+    index = AthIndex(':memory:')
+    anti_hype = RebalancerAntiHypeFilter(kline_source=source, ath_index=index)
+    anti_hype.kline_store = KlineStore()
+
+    first = anti_hype._get_ath('AUSDT', 1000)
+    assert first > 0 and source.requests == [('1d', 1000), ('1h', 100)]
+    for _ in range(5):
+        assert anti_hype._get_ath('AUSDT', 1000) == first
+    assert len(source.requests) == 2  # Индекс + окно 1h из кэша
+
+    # Прошло два дня: дозагружаются только пропущенные дневные свечи
+    index.get('AUSDT').last_day = today - 2 * DAY_MS
+    anti_hype._get_ath('AUSDT', 1000)
+    assert source.requests[-1] == ('1d', 3)
+    assert index.missing_days('AUSDT') == 0
+    print(f"   ✅ 6 проверок ATH -> {len(source.requests)} запроса свечей")
+
+
+if __name__ == "__main__":
+    test_bootstrap_and_incremental_updates()
+    test_persisted_between_restarts()
+    test_filter_reads_ath_without_network()
+    print("\n✅ Все тесты индекса ATH пройдены")
@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+"""
+Тест событийного скана по закрытию свечей
+Фейковая биржа и поток свечей; сети и API ключей не требует
+"""
+
+import asyncio
+import os
+import sys
+import tempfile
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import isolated_storage  # noqa: F401 - до импорта config, рабочие файлы бота не трогаем
+from cache.kline_store import INTERVAL_MS
+from candle_events import CandleClock, CandleClose, CandleEventDebouncer, StreamCandleBuilder
+from scan_history import ScanHistory
+from test_market_scan_pipeline import SlowExchange, make_scanner, pipeline_config
+
+STEP = INTERVAL_MS['15m']
+
+
+def update(symbol, start_sec, close, volume=10.0):
+    return {'symbol': symbol, 'interval': 'Min15', 'open': '1.0', 'high': str(max(1.0, close)),
+            'low': str(min(1.0, close)), 'close': str(close), 'volume': str(volume), 'start_time': start_sec}
+
+
+def test_stream_builder():
+    print("🔍 ТЕСТ ОПРЕДЕЛЕНИЯ ЗАКРЫТИЯ ПО ПОТОКУ")
+    builder = StreamCandleBuilder('15m')
+    start = 1_700_000_100  # сек, кратно 15 минутам
+    assert builder.on_update(update('AUSDT', start, 1.1)) is None
+    assert builder.on_update(update('AUSDT', start, 1.2, 20)) is None
+    event = builder.on_update(update('AUSDT', start + 900, 1.3))
+    assert event is not None and event.symbol == 'AUSDT'
+    assert event.open_time == start * 1000 and event.close_time == start * 1000 + STEP
+    assert event.kline == [start * 1000, 1.0, 1.2, 1.0, 1.2, 20.0]  # Последнее состояние закрытой свечи
+    assert builder.on_update(update('AUSDT', start, 1.0)) is None  # Запоздавшее обновление
+    assert builder.on_update({'symbol': 'AUSDT'}) is None
+    print("   ✅ OK")
+
+
+def test_clock():
+    print("🔍 ТЕСТ ЧАСОВ ГРАНИЦ СВЕЧЕЙ")
+    clock = CandleClock('15m', settle_sec=3)
+    boundary = 1_700_000_100
+    assert clock.due_events(['A'], now=boundary + 10) == []  # Точка отсчета
+    assert clock.due_events(['A'], now=boundary + 500) == []
+    assert clock.due_events(['A'], now=boundary + 901) == []  # settle еще не прошел
+    events = clock.due_events(['A', 'B'], now=boundary + 904)
+    assert [e.symbol for e in events] == ['A', 'B']
+    assert events[0].close_time == (boundary + 900) * 1000
+    assert clock.due_events(['A'], now=boundary + 950) == []
+    assert abs(clock.seconds_until_next(now=boundary + 904) - 899) < 1e-6
+    print("   ✅ OK")
+
+
+def test_debounce_batches_by_boundary():
+    print("🔍 ТЕСТ DEBOUNCE ПО ГРАНИЦАМ")
+    batches = []
+
+    async def handler(events):
+        batches.append(sorted(e.symbol for e in events))
+
+    async def run():
+        debouncer = CandleEventDebouncer(handler, debounce_sec=0.05, max_batch=3)
+        for symbol in ('A', 'B', 'A'):
+            debouncer.submit(CandleClose(symbol, '15m', 0, STEP))
+        debouncer.submit(CandleClose('C', '15m', STEP, 2 * STEP))
+        await asyncio.sleep(0.02)
+        assert batches == []  # Ждем остальные пары границы
+        await asyncio.sleep(0.1)
+        # Полная пачка отправляется сразу
+        for symbol in ('X', 'Y', 'Z'):
+            debouncer.submit(CandleClose(symbol, '15m', 2 * STEP, 3 * STEP))
+        await asyncio.sleep(0)
+        await debouncer.flush_all()
+        return debouncer.get_stats()
+
+    stats = asyncio.run(run())
+    assert batches == [['A', 'B'], ['C'], ['X', 'Y', 'Z']], batches
+    assert stats['events'] == 7 and stats['duplicates'] == 1 and stats['batches'] == 3 and stats['pending'] == 0
+    print("   ✅ OK")
+
+
+def make_event_scanner(symbols):
+    scanner = make_scanner(SlowExchange(symbols), pipeline_config())
+    scanner.scan_history = ScanHistory(tempfile.mkdtemp())
+    scanner.get_usdt_balance = lambda: 100.0
+    scanner.sent = []
+    scanner.send_telegram_message = scanner.sent.append
+    scanner.bought = []
+
+    async def auto_buy(scan_results):
+        scanner.bought.append(scan_results['analyzed_pairs'])
+    scanner.auto_buy_opportunities = auto_buy
+    return scanner
+
+
+def test_scanner_reevaluates_closed_symbols():
+    print("🔍 ТЕСТ ПЕРЕОЦЕНКИ ПАР ПО ЗАКРЫТИЮ СВЕЧЕЙ")
+    symbols = [f"E{i:02d}USDT" for i in range(6)]
+    scanner = make_event_scanner(symbols)
+    exchange = scanner.mex_api
+
+    async def run():
+        await scanner.pipeline.run(symbols=symbols)  # Окна загружены
+        scanner.candle_debouncer = CandleEventDebouncer(scanner.handle_candle_closes, debounce_sec=0.01)
+        # Поток: закрытие последней (незакрытой в REST) свечи у трех пар
+        stream = symbols[:3]
+        for symbol in stream:
+            last = exchange.base[symbol][-1]
+            kline = [int(last[0]), float(last[1]), float(last[2]), float(last[3]), float(last[4]) * 1.01,
+                     float(last[5])]
+            scanner.candle_debouncer.submit(CandleClose(symbol, '15m', kline[0], kline[0] + STEP, kline))
+        await scanner.candle_debouncer.flush_all()
+        return scanner.scan_history.load_scan()
+
+    scan = asyncio.run(run())
+    assert sorted(scan['symbols']) == symbols[:3]  # Переоценены только закрывшиеся пары
+    stats = scanner.kline_source.get_stats()
+    assert stats['requests_made'] == 0 and stats['served_local'] == 3, stats
+    window = scanner.kline_source.kline_store.window(symbols[0], '15m')
+    assert abs(window.close[-1] - float(exchange.base[symbols[0]][-1][4]) * 1.01) < 1e-9
+    assert scanner.bought == [3]
+    print("   ✅ 3 пары переоценены одной пачкой без запросов свечей")
+
+
+if __name__ == "__main__":
+    test_stream_builder()
+    test_clock()
+    test_debounce_batches_by_boundary()
+    test_scanner_reevaluates_closed_symbols()
+    print("\n✅ Все тесты событийного скана пройдены")
@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+"""
+Тест потокового трекера дневных хай/лоу (защита от покупок у дневного хая)
+Фейковые часы и источник свечей; сети и API ключей не требует
+"""
+
+import os
+import sys
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from isolated_storage import memory_index  # До импорта config
+from anti_hype_filter import AntiHypeFilter
+from cache.daily_extremes import DAY_MS, DailyExtremesTracker
+from cache.kline_store import KlineStore
+from rebalancer_anti_hype_filter import RebalancerAntiHypeFilter
+from test_kline_store import make_klines
+
+HOUR_MS = 3_600_000
+DAY0 = 1_700_000_000_000 // DAY_MS * DAY_MS  # Начало UTC-суток
+
+
+class FakeClock:
+    def __init__(self, now_ms):
+        self.now_ms = now_ms
+
+    def __call__(self):
+        return self.now_ms / 1000
+
+
+def hourly(n, end_ms, seed=1):
+    """n часовых свечей, последняя открыта в час end_ms"""
+    last = end_ms - end_ms % HOUR_MS
+    return make_klines(n, start_ts=last - (n - 1) * HOUR_MS, step_ms=HOUR_MS, seed=seed)
+
+
+def test_coverage_and_day_reset():
+    print("🔍 ТЕСТ ПОКРЫТИЯ И СБРОСА НА ГРАНИЦЕ СУТОК")
+    clock = FakeClock(DAY0 + 15 * HOUR_MS + 10_000)
+    tracker = DailyExtremesTracker(days_kept=7, max_gap_sec=300, clock=clock)
+    tracker.update('AUSDT', 100.0)
+    assert tracker.high('AUSDT') is None  # Начало суток не видели
+
+    klines = hourly(24, clock.now_ms)
+    assert tracker.seed('AUSDT', klines, '1h')
+    today = [k for k in klines if k[0] >= DAY0]
+    assert tracker.high('AUSDT') == max(max(float(k[2]) for k in today), 100.0)  # Только текущие сутки
+    assert tracker.low('AUSDT') == min(min(float(k[3]) for k in today), 100.0)
+
+    top = tracker.high('AUSDT')
+    tracker.update('AUSDT', top * 1.05)
+    assert tracker.high('AUSDT') == top * 1.05
+
+    while clock.now_ms < DAY0 + DAY_MS:  # Поток без перерывов до новых суток
+        clock.now_ms += 240_000
+        tracker.update('AUSDT', 95.0 if clock.now_ms >= DAY0 + DAY_MS else 90.0)
+    assert tracker.high('AUSDT') == 95.0 and tracker.high('AUSDT', 2) == top * 1.05
+
+    clock.now_ms += 600_000  # Перерыв дольше max_gap_sec
+    assert tracker.high('AUSDT') is None
+    tracker.update('AUSDT', 96.0)
+    assert tracker.high('AUSDT') is None  # Что было в перерыве - неизвестно
+    print("   ✅ OK")
+
+
+def test_bulk_tickers_and_book_ticker():
+    print("🔍 ТЕСТ СНИМКА 24H ТИКЕРОВ И BOOKTICKER")
+    clock = FakeClock(DAY0 + 5 * HOUR_MS)
+    tracker = DailyExtremesTracker(clock=clock)
+    tracker.update_from_tickers([
+        {'symbol': 'BUSDT', 'lastPrice': '10', 'highPrice': '12', 'lowPrice': '9'},
+        {'symbol': 'BROKEN', 'lastPrice': None},
+    ])
+    assert tracker.high('BUSDT') == 12.0 and tracker.low('BUSDT') == 9.0 and 'BROKEN' not in tracker._symbols
+    tracker.update_book_ticker('BUSDT', '12.9', '13.1')
+    assert tracker.high('BUSDT') == 13.0
+    tracker.update_from_tickers([{'symbol': 'BUSDT', 'lastPrice': '11', 'highPrice': '20', 'lowPrice': '9'}])
+    assert tracker.high('BUSDT') == 13.0  # Покрытый символ - только lastPrice
+    print("   ✅ OK")
+
+
+class CountingSource:
+    def __init__(self):
+        self.requests = []
+
+    def get_klines(self, symbol, interval='1h', limit=100):
+        self.requests.append((interval, limit))
+        now = int(time.time() * 1000)
+        if interval == '1d':
+            return make_klines(limit, start_ts=now // DAY_MS * DAY_MS - (limit - 1) * DAY_MS, step_ms=DAY_MS)
+        return hourly(limit, now)
+
+
+def test_filters_check_without_klines():
+    print("🔍 ТЕСТ ЗАЩИТЫ ОТ ДНЕВНОГО ХАЯ БЕЗ ЗАГРУЗКИ СВЕЧЕЙ")
+    for filter_class, interval, days in ((AntiHypeFilter, '1h', 1), (RebalancerAntiHypeFilter, '1d', 7)):
+        source = CountingSource()
+        anti_hype = filter_class(kline_source=source, **memory_index(filter_class))
+        anti_hype.kline_store = KlineStore()
+        anti_hype.daily_extremes = tracker = DailyExtremesTracker()
+
+        first = anti_hype._check_daily_high_protection('AUSDT', 50.0)
+        assert first['block_type'].endswith('safe') and first['daily_high'] == tracker.high('AUSDT', days)
+        fetched = len(source.requests)
+        assert fetched == 1 and source.requests[0][0] == interval
+        for _ in range(10):
+            anti_hype.cache.invalidate()
+            assert anti_hype._check_daily_high_protection('AUSDT', 50.0)['daily_high'] == first['daily_high']
+        assert len(source.requests) == fetched
+
+        tracker.update('AUSDT', first['daily_high'] * 1.2)  # Новый хай из потока сделок
+        blocked = anti_hype._check_daily_high_protection('AUSDT', first['daily_high'] * 1.2)
+        assert blocked['blocked'] and len(source.requests) == fetched
+    print("   ✅ 11 проверок -> 1 загрузка свечей на фильтр")
+
+
+def test_batch_skips_tracked_symbols():
+    print("🔍 ТЕСТ ПАКЕТНОЙ ПРОВЕРКИ С ТРЕКЕРОМ")
+    source = CountingSource()
+    anti_hype = AntiHypeFilter(kline_source=source)
+    anti_hype.kline_store = KlineStore()
+    anti_hype.daily_extremes = tracker = DailyExtremesTracker()
+    tracker.seed('AUSDT', hourly(24, int(time.time() * 1000), seed=7), '1h')
+    results = anti_hype.check_buy_permission_batch(['AUSDT', 'BUSDT'])
+    assert ('1h', 24) in source.requests and source.requests.count(('1h', 24)) == 1  # Только BUSDT
+    assert results['AUSDT']['daily_high'] == tracker.high('AUSDT')
+    print("   ✅ OK")
+
+
+if __name__ == "__main__":
+    test_coverage_and_day_reset()
+    test_bulk_tickers_and_book_ticker()
+    test_filters_check_without_klines()
+    test_batch_skips_tracked_symbols()
+    print("\n✅ Все тесты трекера дневных хай/лоу пройдены")
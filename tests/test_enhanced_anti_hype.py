@@ -6,6 +6,7 @@
 
 import asyncio
 import logging
+import isolated_storage  # noqa: F401 - до импорта config, рабочие файлы бота не трогаем
 from anti_hype_filter import AntiHypeFilter
 
 # Настройка логирования
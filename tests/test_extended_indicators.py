@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""
+Тест расширенных индикаторов (Stoch RSI, OBV, VWAP, ADX, Keltner)
+Сверка однопроходного расчета с прямолинейными эталонными формулами
+"""
+
+import os
+import sys
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+import pandas as pd
+
+from technical_indicators import TechnicalIndicators
+from test_kline_store import make_klines
+
+
+def wilder(values, period):
+    out = [np.nan] * len(values)
+    start = next(i for i, v in enumerate(values) if not np.isnan(v))
+    value = float(np.mean(values[start:start + period]))
+    out[start + period - 1] = value
+    for i in range(start + period, len(values)):
+        value = (value * (period - 1) + values[i]) / period
+        out[i] = value
+    return np.array(out)
+
+
+def reference(klines):
+    df = pd.DataFrame([[float(x) for x in k[1:6]] for k in klines], columns=['open', 'high', 'low', 'close', 'volume'])
+    close, high, low, volume = df['close'], df['high'], df['low'], df['volume']
+
+    delta = close.diff()
+    gain = delta.where(delta > 0, 0).rolling(14).mean()
+    loss = (-delta.where(delta < 0, 0)).rolling(14).mean()
+    rsi = 100 - 100 / (1 + gain / loss)
+    stoch = (rsi - rsi.rolling(14).min()) / (rsi.rolling(14).max() - rsi.rolling(14).min()) * 100
+    stoch_k = stoch.rolling(3).mean()
+
+    obv = (np.sign(delta.fillna(0)) * volume).cumsum()
+    typical = (high + low + close) / 3
+    vwap = (typical * volume).rolling(20).sum() / volume.rolling(20).sum()
+
+    prev_close = close.shift()
+    tr = pd.concat([high - low, (high - prev_close).abs(), (low - prev_close).abs()], axis=1).max(axis=1, skipna=False)
+    up, down = high.diff(), -low.diff()
+    plus_dm = np.where((up > down) & (up > 0), up, 0.0)
+    minus_dm = np.where((down > up) & (down > 0), down, 0.0)
+    plus_dm[0] = minus_dm[0] = np.nan
+    atr = wilder(tr.values, 14)
+    plus_di = 100 * wilder(plus_dm, 14) / atr
+    minus_di = 100 * wilder(minus_dm, 14) / atr
+    adx = wilder(100 * np.abs(plus_di - minus_di) / (plus_di + minus_di), 14)
+
+    middle = close.ewm(span=20).mean().iloc[-1]
+    return {
+        'stoch_k': stoch_k.iloc[-1], 'stoch_d': stoch_k.rolling(3).mean().iloc[-1],
+        'obv': obv.iloc[-1], 'vwap': vwap.iloc[-1],
+        'adx': adx[-1], 'plus_di': plus_di[-1], 'minus_di': minus_di[-1],
+        'keltner_upper': middle + 2 * atr[-1], 'keltner_lower': middle - 2 * atr[-1],
+    }
+
+
+def test_extended_match_reference():
+    print("🔍 ТЕСТ РАСШИРЕННЫХ ИНДИКАТОРОВ")
+    for seed in (1, 2, 3):
+        klines = make_klines(120, seed=seed)
+        ours = TechnicalIndicators().calculate_all_indicators(klines, 'TESTUSDT')
+        ref = reference(klines)
+        actual = {
+            'stoch_k': ours['stoch_rsi']['k'], 'stoch_d': ours['stoch_rsi']['d'],
+            'obv': ours['obv'], 'vwap': ours['vwap'],
+            'adx': ours['adx'], 'plus_di': ours['plus_di'], 'minus_di': ours['minus_di'],
+            'keltner_upper': ours['keltner']['upper'], 'keltner_lower': ours['keltner']['lower'],
+        }
+        for key, expected in ref.items():
+            assert abs(actual[key] - expected) <= 1e-9 * max(1.0, abs(expected)), f"{key}: {actual[key]} != {expected}"
+        assert 0 <= ours['adx'] <= 100 and 0 <= ours['stoch_rsi']['k'] <= 100
+        print(f"   ✅ seed={seed}: ADX={ours['adx']:.1f} StochRSI={ours['stoch_rsi']['k']:.1f} VWAP={ours['vwap']:.4f}")
+
+
+def test_short_history_defaults():
+    print("🔍 ТЕСТ КОРОТКОЙ ИСТОРИИ")
+    ours = TechnicalIndicators().calculate_all_indicators(make_klines(24), 'TESTUSDT')
+    # Базовые индикаторы считаются, расширенным не хватает истории - нейтральные значения
+    assert ours['rsi_14'] != 50.0
+    assert ours['adx'] == 0.0 and ours['adx_trend'] == 'weak'
+    assert ours['stoch_rsi'] == {'k': 50.0, 'd': 50.0} and ours['stoch_rsi_signal'] == 'neutral'
+    print("   ✅ OK")
+
+
+def test_signal_summary_unchanged():
+    print("🔍 ТЕСТ СВОДКИ СИГНАЛОВ")
+    ti = TechnicalIndicators()
+    base = {'rsi_14': 50, 'macd_signal': 'hold', 'bb_signal': 'neutral', 'ma_trend': 'neutral'}
+    # Расширенные индикаторы только считаются - на сводку сигналов не влияют
+    summary = ti.get_signal_summary(dict(base, stoch_rsi_signal='oversold', keltner_signal='below', adx=22))
+    assert summary == ti.get_signal_summary(base) and summary['overall_signal'] == 'hold'
+    print("   ✅ OK")
+
+
+if __name__ == "__main__":
+    test_extended_match_reference()
+    test_short_history_defaults()
+    test_signal_summary_unchanged()
+    print("\n✅ Все тесты расширенных индикаторов пройдены")
@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""
+Тест журнала решений анти-хайп фильтров
+Временный каталог и фейковый источник свечей; сети и API ключей не требует
+"""
+
+import os
+import sys
+import tempfile
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from isolated_storage import memory_index  # До импорта config
+import numpy as np
+
+from anti_hype_filter import AntiHypeFilter, _finite
+from cache.daily_extremes import DailyExtremesTracker
+from cache.kline_store import KlineStore
+from filter_decision_log import RECORD, RULES, FilterDecisionLog
+from rebalancer_anti_hype_filter import RebalancerAntiHypeFilter
+from test_kline_store import make_klines
+from utils.query_filter_decisions import format_summary
+
+DAY_SEC = 86400
+
+
+def test_buffered_records_and_summary():
+    print("🔍 ТЕСТ БУФЕРА, ФАЙЛОВ СУТОК И СВОДКИ")
+    with tempfile.TemporaryDirectory() as tmp:
+        log = FilterDecisionLog(tmp, flush_records=4, flush_sec=3600)
+        now = time.time()
+        yesterday_ms = int((now - DAY_SEC) * 1000)
+        blocked = {'allowed': False, 'multiplier': 0.0, 'block_type': 'impulse_block'}
+        allowed = {'allowed': True, 'multiplier': 0.7, 'block_type': 'neutral_zone'}
+        rules = [(0.05, 0.002, '<'), (0.05, 0.01, '<'), (6.0, 3.0, '>')]  # Сработал только импульс
+        log.record('anti_hype', 'AUSDT', blocked, {'price': 1.0, 'rsi': 70.0}, rules, ts_ms=yesterday_ms)
+        for _ in range(2):
+            log.record('anti_hype', 'BUSDT', allowed, {'price': 2.0}, [(0.05, 0.002, '<'), (None, 0.01, '<')])
+        assert not [name for name in os.listdir(tmp) if name.endswith('.bin')]  # Еще в буфере
+        log.record('rebalancer', 'AUSDT', blocked, {'price': 1.0}, rules)  # 4-я запись - сброс
+        assert os.path.getsize(os.path.join(tmp, 'strings.txt')) > 0
+        log.record('anti_hype', 'AUSDT', blocked, {'price': 1.0}, rules)  # Остается в буфере
+
+        records = log.load(days=1)
+        assert len(records) == 4 and RECORD.itemsize < 200
+        assert len(log.load(days=2)) == 5
+
+        summary = log.summarize(days=2)
+        assert summary['total'] == 5 and summary['blocked'] == 3 and summary['allowed'] == 2
+        assert summary['block_types'] == {'impulse_block': 3}
+        assert summary['blocked_symbols'] == {'AUSDT': 3}
+        impulse = summary['rules']['anti_hype']['impulse']
+        assert impulse == {'evaluated': 2, 'fired': 2, 'hit_rate': 1.0}
+        assert summary['rules']['anti_hype']['daily_high_limit']['evaluated'] == 2  # None - не проверялось
+        assert log.summarize(days=2, filter_name='rebalancer')['total'] == 1
+        assert log.summarize(days=2, symbol='BUSDT')['blocked'] == 0
+        assert 'impulse_block' in format_summary(summary, 2)
+
+        # Недописанный хвост файла отбрасывается при чтении
+        day_file = [name for name in os.listdir(tmp) if name.endswith('.bin')][-1]
+        with open(os.path.join(tmp, day_file), 'ab') as f:
+            f.write(b'\x01\x02\x03')
+        reopened = FilterDecisionLog(tmp)
+        assert reopened.summarize(days=2)['total'] == 5
+    print("   ✅ OK")
+
+
+class ScenarioSource:
+    def get_klines(self, symbol, interval='1h', limit=100):
+        step = {'15m': 900_000, '1h': 3_600_000, '60m': 3_600_000, '4h': 14_400_000}.get(interval, 86_400_000)
+        return make_klines(limit, step_ms=step, seed=len(symbol))
+
+
+def test_filters_record_every_decision():
+    print("🔍 ТЕСТ ЗАПИСИ РЕШЕНИЙ ФИЛЬТРАМИ")
+    with tempfile.TemporaryDirectory() as tmp:
+        log = FilterDecisionLog(tmp)
+        for filter_class, name in ((AntiHypeFilter, 'anti_hype'), (RebalancerAntiHypeFilter, 'rebalancer')):
+            anti_hype = filter_class(kline_source=ScenarioSource(), **memory_index(filter_class))
+            anti_hype.kline_store = KlineStore()
+            anti_hype.daily_extremes = DailyExtremesTracker()
+            anti_hype.decision_log = log
+            result = anti_hype.check_buy_permission('AUSDT')
+            record = log.load()[-1]
+            assert bool(record['allowed']) == result['allowed']
+            assert np.isclose(record['multiplier'], result['multiplier'])
+            assert log.string(int(record['block_type'])) == result['block_type']
+            assert np.isfinite(record['inputs'][0]) and record['evaluated'] == (1 << len(RULES[name])) - 1
+        batch = AntiHypeFilter(kline_source=ScenarioSource())
+        batch.kline_store, batch.decision_log = KlineStore(), log
+        batch.daily_extremes = DailyExtremesTracker()
+        batch.check_buy_permission_batch(['AUSDT', 'BBUSDT', 'CCCUSDT'])
+        assert log.summarize()['total'] == 5
+        # Пакет пишет те же записи, что и одиночная проверка (NaN признаков -> None)
+        records = log.load()
+        single, batched = records[0], records[2 + [log.string(int(r['symbol'])) for r in records[2:]].index('AUSDT')]
+        for field in ('allowed', 'evaluated', 'fired', 'block_type'):
+            assert single[field] == batched[field], field
+        assert np.allclose(single['inputs'], batched['inputs'], equal_nan=True)
+        assert _finite(np.nan) is None and _finite(np.float64(2.5)) == 2.5
+    print("   ✅ OK")
+
+
+if __name__ == "__main__":
+    test_buffered_records_and_summary()
+    test_filters_record_every_decision()
+    print("\n✅ Все тесты журнала решений фильтров пройдены")
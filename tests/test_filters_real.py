@@ -5,8 +5,10 @@
 
 import sys
 import logging
+import isolated_storage  # noqa: F401 - до импорта config, рабочие файлы бота не трогаем
 from anti_hype_filter import AntiHypeFilter
 from rebalancer_anti_hype_filter import RebalancerAntiHypeFilter
+from cache.ath_index import AthIndex
 
 # Настройка логирования
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
@@ -20,7 +22,7 @@ def test_filters():
     
     # Создаем фильтры
     anti_hype = AntiHypeFilter()
-    rebalancer = RebalancerAntiHypeFilter()
+    rebalancer = RebalancerAntiHypeFilter(ath_index=AthIndex(':memory:'))  # Не пишем в рабочий индекс
     
     symbols = ['BTCUSDC', 'ETHUSDC']
     
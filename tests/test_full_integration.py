@@ -4,6 +4,7 @@
 """
 
 import asyncio
+import isolated_storage  # noqa: F401 - до импорта config, рабочие файлы бота не трогаем
 from active_50_50_balancer import Active5050Balancer
 from market_scanner import MarketScanner
 from alt_monitor import AltsMonitor
@@ -0,0 +1,49 @@
+#!/usr/bin/env python3
+"""
+Регрессионный тест индикаторов и фильтров на эталонных значениях
+Не требует API ключей и сети (фикстуры из tests/kline_fixtures.py)
+"""
+
+import logging
+import os
+import sys
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import isolated_storage  # noqa: F401 - до импорта config, рабочие файлы бота не трогаем
+from kline_fixtures import fixtures_name, load_fixtures
+from run_benchmarks import compare_with_golden, compute_outputs, load_golden
+
+
+def test_outputs_match_golden():
+    print("🔍 ТЕСТ СОВПАДЕНИЯ С ЭТАЛОННЫМИ ЗНАЧЕНИЯМИ")
+    golden = load_golden(fixtures_name())
+    assert golden, "Эталон не найден: python3 tests/run_benchmarks.py --update-golden"
+
+    logging.disable(logging.WARNING)
+    try:
+        outputs = compute_outputs(load_fixtures())
+    finally:
+        logging.disable(logging.NOTSET)
+
+    mismatches = compare_with_golden(outputs, golden)
+    assert not mismatches, f"{len(mismatches)} расхождений, первые: {mismatches[:5]}"
+    for component, per_symbol in golden.items():
+        print(f"   ✅ {component}: {len(per_symbol)} символов")
+
+
+def test_golden_covers_filter_branches():
+    print("🔍 ТЕСТ ПОКРЫТИЯ ВЕТОК ФИЛЬТРОВ")
+    golden = load_golden(fixtures_name())
+    for component in ('anti_hype_filter', 'rebalancer_anti_hype_filter'):
+        verdicts = golden[component].values()
+        allowed = sum(1 for v in verdicts if v['allowed'])
+        assert 0 < allowed < len(golden[component]), f"{component}: нет разнообразия вердиктов"
+        print(f"   ✅ {component}: разрешено {allowed}/{len(golden[component])}")
+
+
+if __name__ == "__main__":
+    test_outputs_match_golden()
+    test_golden_covers_filter_branches()
+    print("\n✅ Эталонные значения совпадают")
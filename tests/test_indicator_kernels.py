@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+"""
+Тест ядер рекурсивных индикаторов (numpy и numba бэкенды)
+Сверка с pandas и с эталонными значениями; без numba JIT-часть пропускается
+"""
+
+import logging
+import os
+import sys
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import isolated_storage  # noqa: F401 - до импорта config, рабочие файлы бота не трогаем
+import numpy as np
+import pandas as pd
+
+import indicator_kernels
+from indicator_kernels import KernelRegistry
+
+
+def sample_series(n=500, seed=7):
+    rng = np.random.default_rng(seed)
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.01, n)))
+    volume = rng.lognormal(8, 0.5, n)
+    return close, volume
+
+
+def assert_close(a, b, label):
+    a, b = np.asarray(a, dtype=float), np.asarray(b, dtype=float)
+    assert a.shape == b.shape, f"{label}: {a.shape} != {b.shape}"
+    assert np.array_equal(np.isnan(a), np.isnan(b)), f"{label}: NaN не совпадают"
+    mask = ~np.isnan(a)
+    assert np.allclose(a[mask], b[mask], rtol=1e-12, atol=1e-12), f"{label}: значения расходятся"
+
+
+def check_registry(registry):
+    close, volume = sample_series()
+    s = pd.Series(close)
+    assert_close(registry.run('ema', close, 2 / 13), s.ewm(span=12).mean(), 'ema')
+    assert_close(registry.run('rolling_mean', close, 20), s.rolling(20).mean(), 'rolling_mean')
+    vpt = (pd.Series(volume) * ((s - s.shift(1)) / s.shift(1))).cumsum()
+    assert_close(registry.run('vpt', close, volume), vpt, 'vpt')
+
+    seeded = [close[0]]
+    for c in close[1:]:
+        seeded.append(c * (2 / 21) + seeded[-1] * (1 - 2 / 21))
+    assert_close(registry.run('ema_seeded', close, 2 / 21), seeded, 'ema_seeded')
+
+    wilder = np.full(close.size, np.nan)
+    wilder[13] = close[:14].mean()
+    for i in range(14, close.size):
+        wilder[i] = (wilder[i - 1] * 13 + close[i]) / 14
+    assert_close(registry.run('wilder', close, 14), wilder, 'wilder')
+
+
+def test_numpy_backend_matches_pandas():
+    print("🔍 ТЕСТ NUMPY-ЯДЕР")
+    registry = KernelRegistry('numpy')
+    assert registry.backend == 'numpy' and not registry.jit_available
+    check_registry(registry)
+    stats = registry.get_stats()['kernels']['numpy']
+    assert all(entry['calls'] == 1 for entry in stats.values())
+    print("   ✅ совпадает с pandas")
+
+
+def test_numba_backend_matches_pandas():
+    print("🔍 ТЕСТ JIT-ЯДЕР")
+    registry = KernelRegistry('auto')
+    if not registry.jit_available:
+        print("   ⏭️ numba не установлена - пропуск")
+        return
+    assert registry.backend == 'numpy'  # до компиляции работает numpy
+    thread = registry.warmup(background=True)
+    assert thread is not None and registry.wait_ready(120)
+    assert registry.backend == 'numba'
+    check_registry(registry)
+    stats = registry.get_stats()
+    assert set(stats['compile_ms']) == set(stats['kernels']['numba'])
+    print(f"   ✅ совпадает с pandas, компиляция {sum(stats['compile_ms'].values()):.0f} мс")
+
+
+def test_wilder_rsi_and_short_input():
+    print("🔍 ТЕСТ RSI УАЙЛДЕРА И КОРОТКИХ ДАННЫХ")
+    rising = np.arange(1.0, 40.0)
+    assert indicator_kernels.wilder_rsi(rising, 14)[-1] == 100.0
+    assert np.isnan(indicator_kernels.wilder_rsi(rising[:10], 14)).all()
+    assert np.isnan(indicator_kernels.rolling_mean(rising[:5], 14)).all()
+    assert indicator_kernels.ema_seeded([], 20).size == 0
+    print("   ✅ OK")
+
+
+def test_golden_with_jit_backend():
+    print("🔍 ТЕСТ ЭТАЛОНА НА JIT-БЭКЕНДЕ")
+    if not indicator_kernels.get_kernels().jit_available:
+        print("   ⏭️ numba не установлена - пропуск")
+        return
+    from kline_fixtures import fixtures_name, load_fixtures
+    from run_benchmarks import compare_with_golden, compute_outputs, load_golden
+
+    indicator_kernels.warmup(background=False)
+    assert indicator_kernels.get_kernels().backend == 'numba'
+    logging.disable(logging.WARNING)
+    try:
+        outputs = compute_outputs(load_fixtures())
+    finally:
+        logging.disable(logging.NOTSET)
+    mismatches = compare_with_golden(outputs, load_golden(fixtures_name()))
+    assert not mismatches, mismatches[:5]
+    print("   ✅ значения совпадают с эталоном")
+
+
+if __name__ == "__main__":
+    test_numpy_backend_matches_pandas()
+    test_numba_backend_matches_pandas()
+    test_wilder_rsi_and_short_input()
+    test_golden_with_jit_backend()
+    print("\n✅ Все тесты ядер индикаторов пройдены")
@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+"""
+Тест дозагрузки свечей (startTime) между сканами
+Фейковая биржа с растущей историей; сети и API ключей не требует
+"""
+
+import json
+import os
+import sys
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from cache.kline_store import INTERVAL_MS, KlineStore
+from cache.kline_resampler import ResamplingKlineSource
+from test_kline_store import make_klines
+
+STEP = INTERVAL_MS['15m']
+
+
+class GrowingExchange:
+    """Фейковый API с поддержкой startTime и подсчетом байт ответа"""
+
+    def __init__(self, n=1200):
+        self.all = make_klines(n, step_ms=STEP)
+        self.visible = 1000  # Сколько свечей уже "наступило"
+        self.calls = []
+        self._last_bytes = 0
+
+    def advance(self, candles=1, revise_last=True):
+        if revise_last:
+            # Незакрытая свеча на бирже успела измениться
+            k = self.all[self.visible - 1]
+            k[4] = f"{float(k[4]) * 1.001:.6f}"
+        self.visible += candles
+
+    def get_klines(self, symbol, interval='1m', limit=100, start_time=None):
+        self.calls.append((interval, limit, start_time))
+        history = self.all[:self.visible]
+        if start_time is not None:
+            result = [k for k in history if k[0] >= start_time][:limit]
+        else:
+            result = history[-limit:]
+        self._last_bytes = len(json.dumps(result))
+        return result
+
+    def last_response_bytes(self):
+        return self._last_bytes
+
+
+def test_delta_merge_matches_full_fetch():
+    print("🔍 ТЕСТ ДОЗАГРУЗКИ И СЛИЯНИЯ")
+    exchange = GrowingExchange()
+    source = ResamplingKlineSource(exchange, refresh_sec=0, kline_store=KlineStore())
+    source.get_window('AUSDT', '15m', 100)
+    full_bytes = source.get_stats()['bytes_downloaded']
+
+    source.reset_stats()
+    exchange.advance(3)
+    window = source.get_window('AUSDT', '15m', 1000)
+    stats = source.get_stats()
+    assert exchange.calls[-1][2] == exchange.all[999][0]  # startTime = последняя сохраненная свеча
+    assert stats['delta_fetches'] == 1 and stats['full_fetches'] == 0
+    assert stats['bytes_downloaded'] < full_bytes / 50
+    assert stats['bytes_full_equivalent'] >= full_bytes * 0.99
+
+    # Окно после слияния совпадает с полной загрузкой
+    reference = ResamplingKlineSource(exchange, kline_store=KlineStore()).get_window('AUSDT', '15m', 1000)
+    assert (window.ts == reference.ts).all() and (window.close == reference.close).all()
+    print(f"   ✅ полная загрузка {full_bytes / 1024:.0f} КБ -> дозагрузка {stats['bytes_downloaded']} байт")
+
+
+def test_gap_falls_back_to_full_fetch():
+    print("🔍 ТЕСТ РАЗРЫВА ДАННЫХ")
+    exchange = GrowingExchange()
+    source = ResamplingKlineSource(exchange, base_limit=150, refresh_sec=0, kline_store=KlineStore())
+    source.get_window('AUSDT', '15m', 100)
+
+    # Новых свечей больше лимита - дозагрузка не покрывает разрыв
+    exchange.advance(190, revise_last=False)
+    window = source.get_window('AUSDT', '15m', 150)
+    stats = source.get_stats()
+    assert stats['gap_refetches'] == 1 and stats['full_fetches'] == 2
+    assert window.ts[-1] == exchange.all[exchange.visible - 1][0]
+    assert (window.ts[1:] - window.ts[:-1] == STEP).all()
+
+    # После forget() - снова полная загрузка
+    source.reset_stats()
+    source.forget('AUSDT')
+    source.get_window('AUSDT', '15m', 100)
+    assert source.get_stats()['full_fetches'] == 1 and source.get_stats()['delta_fetches'] == 0
+    print("   ✅ разрыв и forget() ведут к полной загрузке")
+
+
+def test_source_without_start_time():
+    print("🔍 ТЕСТ КЛИЕНТА БЕЗ startTime")
+
+    class LegacyExchange(GrowingExchange):
+        def get_klines(self, symbol, interval='1m', limit=100):
+            return super().get_klines(symbol, interval, limit)
+
+    exchange = LegacyExchange()
+    source = ResamplingKlineSource(exchange, refresh_sec=0, kline_store=KlineStore())
+    source.get_window('AUSDT', '15m', 100)
+    exchange.advance(2)
+    window = source.get_window('AUSDT', '15m', 100)
+    assert not source.delta_refresh and source.get_stats()['full_fetches'] == 2
+    assert window.ts[-1] == exchange.all[exchange.visible - 1][0]
+    print("   ✅ OK")
+
+
+if __name__ == "__main__":
+    test_delta_merge_matches_full_fetch()
+    test_gap_falls_back_to_full_fetch()
+    test_source_without_start_time()
+    print("\n✅ Все тесты дозагрузки свечей пройдены")
@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+"""
+Тест локального ресэмплинга свечей (15m -> 1h/4h/1d)
+Офлайн-сверка с эталонной агрегацией биржи; при наличии сети -
+сверка с настоящими старшими свечами MEXC
+"""
+
+import os
+import sys
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import isolated_storage  # noqa: F401 - до импорта config, рабочие файлы бота не трогаем
+from cache.kline_store import INTERVAL_MS, KlineStore, as_window
+from cache.kline_resampler import ResamplingKlineSource, can_resample, resample
+from anti_hype_filter import AntiHypeFilter
+from test_kline_store import make_klines
+
+DAY_MS = INTERVAL_MS['1d']
+BASE_START = 1_700_006_400_000  # 2023-11-15 00:00 UTC
+
+
+def exchange_aggregate(klines, period_ms):
+    """Эталонная агрегация биржи: бакеты по UTC, first/max/min/last/sum"""
+    bars = {}
+    for k in klines:
+        bucket = (k[0] // period_ms) * period_ms
+        o, h, l, c, v = (float(x) for x in k[1:6])
+        if bucket not in bars:
+            bars[bucket] = [bucket, o, h, l, c, v]
+        else:
+            bar = bars[bucket]
+            bar[2] = max(bar[2], h)
+            bar[3] = min(bar[3], l)
+            bar[4] = c
+            bar[5] += v
+    return [bars[b] for b in sorted(bars)]
+
+
+class FakeExchange:
+    """Фейковый API: 15m свечи + старшие ТФ, агрегированные как на бирже"""
+
+    def __init__(self, n_base=1000, start=BASE_START + 7 * INTERVAL_MS['15m']):
+        self.base = make_klines(n_base, start_ts=start, step_ms=INTERVAL_MS['15m'])
+        self.calls = []
+
+    def get_klines(self, symbol, interval='1m', limit=100):
+        self.calls.append((symbol, interval, limit))
+        interval = {'60m': '1h'}.get(interval, interval)
+        if interval == '15m':
+            return self.base[-limit:]
+        return exchange_aggregate(self.base, INTERVAL_MS[interval])[-limit:]
+
+
+def assert_bars_equal(ours, theirs, label):
+    assert len(ours) == len(theirs), f"{label}: {len(ours)} != {len(theirs)}"
+    for a, b in zip(ours, theirs):
+        assert a[0] == b[0], f"{label}: время {a[0]} != {b[0]}"
+        for x, y in zip(a[1:6], b[1:6]):
+            assert abs(x - y) <= 1e-9 * max(1.0, abs(y)), f"{label}: {a} != {b}"
+
+
+def test_resample_matches_exchange_bars():
+    print("🔍 ТЕСТ СОВПАДЕНИЯ С ЭТАЛОННЫМИ СВЕЧАМИ")
+    exchange = FakeExchange()
+    base = as_window(exchange.base, 'TESTUSDT', '15m')
+    for interval in ('1h', '4h', '1d'):
+        ours = resample(base, interval).to_klines()
+        theirs = exchange_aggregate(exchange.base, INTERVAL_MS[interval])
+        # Первый бакет у нас отброшен как неполный (окно начинается с середины)
+        assert ours[0][0] > exchange.base[0][0]
+        assert_bars_equal(ours, theirs[-len(ours):], interval)
+        assert ours[0][0] % INTERVAL_MS[interval] == 0
+        print(f"   ✅ {interval}: {len(ours)} свечей совпадают")
+
+
+def test_can_resample():
+    print("🔍 ТЕСТ ДОПУСТИМЫХ ПРЕОБРАЗОВАНИЙ")
+    assert can_resample('15m', '60m')
+    assert can_resample('15m', '1d')
+    assert not can_resample('1h', '15m')
+    assert not can_resample('1d', '1w')
+    print("   ✅ OK")
+
+
+def test_requests_eliminated_per_scan():
+    print("🔍 ТЕСТ СЧЕТЧИКА СЭКОНОМЛЕННЫХ ЗАПРОСОВ")
+    exchange = FakeExchange()
+    source = ResamplingKlineSource(exchange, base_interval='15m', kline_store=KlineStore())
+    anti_hype = AntiHypeFilter(kline_source=source)
+
+    symbols = ['AAAUSDT', 'BBBUSDT', 'CCCUSDT']
+    for symbol in symbols:
+        # Как в MarketScanner.analyze_pair: 15m x 24 + анти-хайп (1h x 50, 4h x 50, 1h x 24)
+        assert len(source.get_klines(symbol, '15m', 24)) == 24
+        anti_hype.check_buy_permission(symbol)
+
+    stats = source.get_stats()
+    assert stats['requests_made'] == len(symbols) == len(exchange.calls)
+    assert stats['requests_eliminated'] == 3 * len(symbols)
+    assert all(call[1] == '15m' for call in exchange.calls)
+    print(f"   ✅ {stats}")
+
+
+def test_filter_same_inputs_as_rest():
+    print("🔍 ТЕСТ ФИЛЬТРА: РЕСЭМПЛИНГ vs ПРЯМЫЕ ЗАПРОСЫ")
+    exchange = FakeExchange()
+    local = AntiHypeFilter(kline_source=ResamplingKlineSource(exchange, kline_store=KlineStore()))
+    rest = AntiHypeFilter(kline_source=FakeExchange())
+    for interval, limit in (('1h', 50), ('4h', 50), ('1h', 24)):
+        a = local._get_klines_cached('AAAUSDT', interval, limit).to_klines()
+        b = rest._get_klines_cached('AAAUSDT', interval, limit).to_klines()
+        assert_bars_equal(a, b, f"{interval}x{limit}")
+    print("   ✅ фильтр получает те же свечи")
+
+
+def test_live_exchange_bars():
+    """Сверка с настоящими свечами MEXC (пропускается без сети)"""
+    print("🔍 ТЕСТ НА РЕАЛЬНЫХ СВЕЧАХ MEXC")
+    from mex_api import MexAPI
+    api = MexAPI()
+    api.max_retries = 1
+    base = api.get_klines('BTCUSDT', '15m', 1000)
+    if not isinstance(base, list) or len(base) < 500:
+        print("   ⏭️ Нет доступа к API - пропуск")
+        return
+    window = as_window(base, 'BTCUSDT', '15m')
+    for interval in ('1h', '4h'):
+        ours = resample(window, interval).to_klines()[:-1]  # последняя еще формируется
+        theirs = [k for k in api.get_klines('BTCUSDT', interval, 100) if ours[0][0] <= k[0] <= ours[-1][0]]
+        theirs = [[int(k[0])] + [float(x) for x in k[1:6]] for k in theirs]
+        ours = [k for k in ours if k[0] >= theirs[0][0]]
+        for a, b in zip(ours, theirs):
+            assert a[0] == b[0]
+            assert abs(a[2] - b[2]) < 1e-6 * b[2] and abs(a[3] - b[3]) < 1e-6 * b[3]
+        print(f"   ✅ {interval}: {len(theirs)} свечей совпадают с биржей")
+
+
+if __name__ == "__main__":
+    test_resample_matches_exchange_bars()
+    test_can_resample()
+    test_requests_eliminated_per_scan()
+    test_filter_same_inputs_as_rest()
+    test_live_exchange_bars()
+    print("\n✅ Все тесты ресэмплинга пройдены")
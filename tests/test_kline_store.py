@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+"""
+Тест колоночного хранилища свечей (KlineStore)
+Не требует API ключей и сети
+"""
+
+import os
+import sys
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+
+from cache.kline_store import KlineStore, as_window, normalize_interval
+
+
+def make_klines(n, start_ts=1_700_000_000_000, step_ms=15 * 60_000, seed=1):
+    """Синтетические свечи в формате REST (строки, как отдает MEXC)"""
+    rng = np.random.default_rng(seed)
+    price = 100.0
+    klines = []
+    for i in range(n):
+        o = price
+        c = max(0.01, o * (1 + rng.normal(0, 0.01)))
+        h = max(o, c) * (1 + abs(rng.normal(0, 0.003)))
+        l = min(o, c) * (1 - abs(rng.normal(0, 0.003)))
+        v = abs(rng.normal(1000, 200))
+        klines.append([start_ts + i * step_ms, f"{o:.6f}", f"{h:.6f}", f"{l:.6f}", f"{c:.6f}", f"{v:.4f}",
+                       start_ts + (i + 1) * step_ms - 1, f"{v * c:.4f}"])
+        price = c
+    return klines
+
+
+def test_ingest_and_window():
+    print("🔍 ТЕСТ ЗАГРУЗКИ И ОКОН")
+    store = KlineStore(default_capacity=50)
+    klines = make_klines(30)
+    assert store.ingest('AAAUSDT', '15m', klines) == 30
+
+    window = store.window('AAAUSDT', '15m', 10)
+    assert len(window) == 10
+    assert window.ts[-1] == klines[-1][0]
+    assert window.close[-1] == float(klines[-1][4])
+    assert not window.close.flags.writeable
+    print(f"   ✅ окно из {len(window)} свечей, последняя close={window.close[-1]}")
+
+
+def test_ring_wraparound_zero_copy():
+    print("🔍 ТЕСТ ПЕРЕПОЛНЕНИЯ КОЛЬЦЕВОГО БУФЕРА")
+    store = KlineStore(default_capacity=20)
+    klines = make_klines(75)
+    store.ingest('AAAUSDT', '15m', klines[:10])
+    for i in range(10, 75, 7):
+        store.ingest('AAAUSDT', '15m', klines[i - 1:i + 7])
+
+    window = store.window('AAAUSDT', '15m')
+    assert len(window) == 20
+    expected = [k[0] for k in klines[-20:]]
+    assert window.ts.tolist() == expected
+    # Окно - представление буфера, а не копия
+    assert window.close.base is not None
+    print("   ✅ после переполнения окно непрерывно и упорядочено")
+
+
+def test_update_last_candle():
+    print("🔍 ТЕСТ ОБНОВЛЕНИЯ НЕЗАКРЫТОЙ СВЕЧИ")
+    store = KlineStore(default_capacity=10)
+    klines = make_klines(5)
+    store.ingest('AAAUSDT', '1h', klines)
+    updated = list(klines[-1])
+    updated[4] = "123.456"
+    assert store.ingest('AAAUSDT', '60m', [updated]) == 1
+    window = store.window('AAAUSDT', '1h')
+    assert len(window) == 5
+    assert window.close[-1] == 123.456
+    print("   ✅ последняя свеча обновлена, '60m' и '1h' - один буфер")
+
+
+def test_gap_resets_window():
+    print("🔍 ТЕСТ РАЗРЫВА МЕЖДУ ПАКЕТАМИ")
+    store = KlineStore(default_capacity=50)
+    klines = make_klines(40)
+    store.ingest('AAAUSDT', '15m', klines[:20])
+    # Пакет перекрывает последнюю свечу и идет дальше без разрыва - дописывается
+    store.ingest('AAAUSDT', '15m', klines[19:25])
+    assert store.window('AAAUSDT', '15m').ts.tolist() == [k[0] for k in klines[:25]]
+    # Пропущены свечи 25-29: окно не должно склеивать историю через дыру
+    assert store.ingest('AAAUSDT', '15m', klines[30:40]) == 10
+    window = store.window('AAAUSDT', '15m')
+    assert window.ts.tolist() == [k[0] for k in klines[30:40]]
+    assert np.all(np.diff(window.ts) == 15 * 60_000)
+    assert store.get_stats()['gap_resets'] == 1
+    print("   ✅ после разрыва буфер начат заново")
+
+
+def test_window_survives_reset():
+    print("🔍 ТЕСТ ОКНА ЧЕРЕЗ СБРОС БУФЕРА")
+    store = KlineStore(default_capacity=200)
+    klines = make_klines(150, step_ms=3_600_000)
+    store.ingest('AAAUSDT', '1h', klines[-50:])  # Фильтр покупки: 1h x 50
+    window = store.window('AAAUSDT', '1h', 24)
+    ts, close = window.ts.tolist(), window.close.tolist()
+    store.ingest('AAAUSDT', '1h', klines[-100:])  # Ребалансировщик: 1h x 100 - пакет-эталон
+    assert window.ts.tolist() == ts and window.close.tolist() == close
+    store.ingest('AAAUSDT', '1h', make_klines(10, start_ts=klines[-1][0] + 5 * 3_600_000))  # Разрыв
+    assert window.ts.tolist() == ts and window.close.tolist() == close
+    assert store.get_stats()['gap_resets'] == 1
+    print("   ✅ выданное окно не меняется при сбросе")
+
+
+def test_memory_accounting():
+    print("🔍 ТЕСТ УЧЕТА ПАМЯТИ")
+    store = KlineStore(default_capacity=100)
+    store.ingest('AAAUSDT', '15m', make_klines(10))
+    store.ingest('AAAUSDT', '1h', make_klines(10))
+    store.ingest('BBBUSDT', '15m', make_klines(10))
+    usage = store.memory_usage()
+    assert usage['AAAUSDT'] == 2 * usage['BBBUSDT']
+    assert store.total_memory() == sum(usage.values())
+    store.drop('AAAUSDT')
+    assert 'AAAUSDT' not in store.memory_usage()
+    print(f"   ✅ {usage}")
+
+
+def test_as_window_and_intervals():
+    print("🔍 ТЕСТ as_window И НОРМАЛИЗАЦИИ ИНТЕРВАЛОВ")
+    klines = make_klines(5)
+    window = as_window(klines)
+    assert len(window) == 5 and window.to_klines()[0][0] == klines[0][0]
+    assert as_window([]) is None
+    assert normalize_interval('60m') == '1h'
+    assert normalize_interval('15m') == '15m'
+    print("   ✅ OK")
+
+
+if __name__ == "__main__":
+    test_ingest_and_window()
+    test_ring_wraparound_zero_copy()
+    test_update_last_candle()
+    test_gap_resets_window()
+    test_window_survives_reset()
+    test_memory_accounting()
+    test_as_window_and_intervals()
+    print("\n✅ Все тесты KlineStore пройдены")
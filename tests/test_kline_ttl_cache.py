@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+"""
+Тест TTL+LRU кэша окон свечей анти-хайп фильтров
+Фейковые часы и источник свечей; сети и API ключей не требует
+"""
+
+import os
+import sys
+import threading
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from isolated_storage import memory_index  # До импорта config
+from anti_hype_filter import AntiHypeFilter
+from cache.kline_store import KlineStore
+from cache.ttl_cache import TTLCache
+from rebalancer_anti_hype_filter import RebalancerAntiHypeFilter
+from test_kline_store import make_klines
+
+HOUR_SEC = 3600
+T0 = 1_700_000_000 - 1_700_000_000 % HOUR_SEC  # Начало часа
+
+
+class FakeClock:
+    def __init__(self, now):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+def test_ttl_and_candle_boundary():
+    print("🔍 ТЕСТ TTL И ГРАНИЦЫ СВЕЧИ")
+    clock = FakeClock(T0 + 100)
+    cache = TTLCache(max_entries=10, ttl_sec=300, clock=clock)
+    cache.set('plain', 1)
+    cache.set('hourly', 2, interval='1h')
+    cache.set('minute', 3, interval='1m')
+    clock.now = T0 + 119
+    assert cache.get('minute') == 3
+    clock.now = T0 + 120  # Закрылась минутная свеча
+    assert 'minute' not in cache and cache.get('plain') == 1 and cache.get('hourly') == 2
+    clock.now = T0 + 400  # Истек TTL
+    assert cache.get('plain') is None and cache.get('hourly') is None
+    assert cache.expires_at(T0 + HOUR_SEC - 10, '60m') == T0 + HOUR_SEC  # Граница раньше TTL
+    assert cache.get_stats()['expired'] == 3
+    print("   ✅ OK")
+
+
+def test_lru_bound():
+    print("🔍 ТЕСТ LRU-ОГРАНИЧЕНИЯ")
+    cache = TTLCache(max_entries=3, ttl_sec=300)
+    for key in 'abc':
+        cache.set(key, key)
+    assert cache.get('a') == 'a'  # 'a' свежее 'b'
+    cache.set('d', 'd')
+    assert len(cache) == 3 and 'b' not in cache and 'a' in cache
+    assert cache.get_stats()['evicted'] == 1
+    print("   ✅ OK")
+
+
+def test_concurrent_misses_load_once():
+    print("🔍 ТЕСТ ОДНОЙ ЗАГРУЗКИ ПРИ ОДНОВРЕМЕННЫХ ПРОМАХАХ")
+    cache = TTLCache()
+    loads = []
+
+    def loader():
+        loads.append(1)
+        time.sleep(0.05)
+        return 'window'
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(cache.get_or_load('k', loader, '1h')))
+               for _ in range(10)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert results == ['window'] * 10 and len(loads) == 1
+    stats = cache.get_stats()
+    assert stats['loads'] == 1 and stats['shared_loads'] == 9 and not cache._key_locks
+    print("   ✅ OK")
+
+
+class CountingSource:
+    def __init__(self):
+        self.requests = 0
+
+    def get_klines(self, symbol, interval='1h', limit=100):
+        self.requests += 1
+        step = {'1h': HOUR_SEC, '4h': 4 * HOUR_SEC}.get(interval, HOUR_SEC) * 1000
+        return make_klines(limit, start_ts=(T0 - limit * HOUR_SEC) * 1000, step_ms=step, seed=self.requests)
+
+
+def test_filters_refresh_after_close():
+    print("🔍 ТЕСТ ОБНОВЛЕНИЯ ОКОН ФИЛЬТРОВ ПОСЛЕ ЗАКРЫТИЯ СВЕЧИ")
+    for filter_class in (AntiHypeFilter, RebalancerAntiHypeFilter):
+        source, clock = CountingSource(), FakeClock(T0 + 10)
+        anti_hype = filter_class(kline_source=source, **memory_index(filter_class))
+        anti_hype.kline_store = KlineStore()
+        anti_hype.cache = TTLCache(max_entries=4, ttl_sec=300, clock=clock)
+        first = anti_hype._get_klines_cached('AUSDT', '1h', 50)
+        assert anti_hype._get_klines_cached('AUSDT', '1h', 50) is first and source.requests == 1
+        clock.now = T0 + HOUR_SEC  # Новая часовая свеча: окно устарело раньше TTL
+        assert anti_hype._get_klines_cached('AUSDT', '1h', 50) is not None and source.requests == 2
+        for i in range(10):
+            anti_hype._get_klines_cached(f"S{i}USDT", '4h', 20)
+        assert len(anti_hype.cache) == 4  # Память ограничена
+    print("   ✅ OK")
+
+
+if __name__ == "__main__":
+    test_ttl_and_candle_boundary()
+    test_lru_bound()
+    test_concurrent_misses_load_once()
+    test_filters_refresh_after_close()
+    print("\n✅ Все тесты кэша окон свечей пройдены")
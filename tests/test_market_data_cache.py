@@ -0,0 +1,154 @@
+#!/usr/bin/env python3
+"""
+Тест общего кэша рыночных данных процесса
+Фейковая биржа со счетчиком запросов; сети и API ключей не требует
+"""
+
+import os
+import sys
+import threading
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import isolated_storage  # noqa: F401 - до импорта config, рабочие файлы бота не трогаем
+from anti_hype_filter import AntiHypeFilter
+from cache.ath_index import AthIndex
+from cache.kline_store import KlineStore
+from cache.market_data_cache import MarketDataCache
+from rebalancer_anti_hype_filter import RebalancerAntiHypeFilter
+from test_kline_store import make_klines
+
+
+class CountingExchange:
+    """Фейковый API: свечи, цены, 24h тикеры и стакан; подсчет запросов по типам"""
+
+    def __init__(self):
+        self.calls = {'klines': 0, 'price': 0, 'ticker_24h': 0, 'depth': 0}
+        self._lock = threading.Lock()
+        self.fail_prices = set()
+
+    def _count(self, kind):
+        with self._lock:
+            self.calls[kind] += 1
+        time.sleep(0.01)
+
+    def get_klines(self, symbol, interval='1m', limit=100, start_time=None):
+        self._count('klines')
+        return make_klines(limit, step_ms=3_600_000, seed=len(symbol))
+
+    def get_ticker_price(self, symbol):
+        self._count('price')
+        if symbol in self.fail_prices:
+            return {'error': 'http_error', 'message': '503'}
+        return {'symbol': symbol, 'price': '2.5'}
+
+    def get_24hr_ticker(self, symbol=None):
+        self._count('ticker_24h')
+        return [{'symbol': 'BTCUSDC', 'lastPrice': '60000'}, {'symbol': 'ETHUSDC', 'lastPrice': '3000'}]
+
+    def get_depth(self, symbol, limit=100):
+        self._count('depth')
+        return {'bids': [['1.0', '5']], 'asks': [['1.1', '5']]}
+
+
+def test_shared_between_services():
+    print("🔍 ТЕСТ ОБЩЕГО КЭША ДЛЯ НЕСКОЛЬКИХ СЕРВИСОВ")
+    exchange = CountingExchange()
+    cache = MarketDataCache(exchange)
+    alts, pnl = cache.client('alts'), cache.client('pnl_monitor')
+
+    assert alts.get_ticker_price('SOLUSDT')['price'] == '2.5'
+    assert pnl.get_ticker_price('SOLUSDT')['price'] == '2.5'
+    assert len(alts.get_klines('SOLUSDT', '1h', 50)) == 50
+    assert len(pnl.get_klines('SOLUSDT', '60m', 24)) == 24  # Из окна 50 (тот же интервал)
+    assert len(pnl.get_klines('SOLUSDT', '1h', 100)) == 100  # Больше окна - новый запрос
+    assert alts.get_depth('SOLUSDT', 5) == pnl.get_depth('SOLUSDT', 5)
+    assert exchange.calls == {'klines': 2, 'price': 1, 'ticker_24h': 0, 'depth': 1}
+
+    stats = cache.get_stats()
+    assert stats['calls'] == 7 and stats['fetches'] == 4 and stats['deduplicated'] == 3
+    assert stats['by_consumer']['pnl_monitor']['price'] == {'calls': 1, 'fetches': 0, 'deduplicated': 1}
+    assert stats['by_kind']['klines'] == {'calls': 3, 'fetches': 2, 'deduplicated': 1}
+    assert 'pnl_monitor' in cache.format_report()
+    print("   ✅ 7 запросов сервисов -> 4 запроса к бирже")
+
+
+def test_prices_from_bulk_snapshot_and_errors():
+    print("🔍 ТЕСТ ЦЕН ИЗ СНИМКА ТИКЕРОВ И ОШИБОК")
+    exchange = CountingExchange()
+    cache = MarketDataCache(exchange)
+    client = cache.client('balancer_5050')
+    client.get_24hr_ticker()
+    assert client.get_ticker_price('BTCUSDC') == {'symbol': 'BTCUSDC', 'price': '60000'}
+    assert exchange.calls['price'] == 0
+
+    exchange.fail_prices.add('XUSDT')
+    assert 'error' in client.get_ticker_price('XUSDT')
+    client.get_ticker_price('XUSDT')
+    assert exchange.calls['price'] == 2  # Ошибка не кэшируется
+
+    client.get_klines('AUSDT', '15m', 10, start_time=123)
+    client.get_klines('AUSDT', '15m', 10, start_time=123)
+    assert exchange.calls['klines'] == 2  # Дозагрузка по startTime - без кэша
+    assert client.last_response_bytes() == 0
+    print("   ✅ OK")
+
+
+def test_invalidate_after_order():
+    print("🔍 ТЕСТ СБРОСА ЦЕН ПОСЛЕ ОРДЕРА")
+    exchange = CountingExchange()
+    cache = MarketDataCache(exchange)
+    client = cache.client('alts')
+    client.get_ticker_price('SOLUSDT')
+    client.get_depth('SOLUSDT', 5)
+    client.get_klines('SOLUSDT', '1h', 50)
+    client.invalidate('SOLUSDT')  # Как после place_order в мониторах и балансировщиках
+    client.get_ticker_price('SOLUSDT')
+    client.get_depth('SOLUSDT', 5)
+    client.get_klines('SOLUSDT', '1h', 50)
+    assert exchange.calls == {'klines': 1, 'price': 2, 'ticker_24h': 0, 'depth': 2}  # Свечи не сбрасываются
+    print("   ✅ OK")
+
+
+def test_concurrent_requests_fetch_once():
+    print("🔍 ТЕСТ ОДНОГО ЗАПРОСА ПРИ ОДНОВРЕМЕННЫХ ОБРАЩЕНИЯХ")
+    exchange = CountingExchange()
+    cache = MarketDataCache(exchange)
+    threads = [threading.Thread(target=cache.client(f"s{i % 3}").get_ticker_price, args=('ETHUSDT',))
+               for i in range(12)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert exchange.calls['price'] == 1
+    print("   ✅ OK")
+
+
+def test_filters_of_different_services_share_klines():
+    print("🔍 ТЕСТ ОБЩИХ СВЕЧЕЙ ФИЛЬТРОВ РАЗНЫХ СЕРВИСОВ")
+    exchange = CountingExchange()
+    cache = MarketDataCache(exchange)
+    alts_filter = AntiHypeFilter(kline_source=cache.client('alts'))
+    balance_filter = AntiHypeFilter(kline_source=cache.client('balance_monitor'))
+    rebalancer_filter = RebalancerAntiHypeFilter(kline_source=cache.client('balance_monitor'),
+                                                 ath_index=AthIndex(':memory:'))
+    for anti_hype in (alts_filter, balance_filter, rebalancer_filter):
+        anti_hype.kline_store = KlineStore()
+        anti_hype.check_buy_permission('BTCUSDC')
+    # Второй анти-хайп фильтр - целиком из кэша; 1h x 24 - из окна 1h x 50
+    stats = cache.get_stats()
+    assert stats['by_consumer']['alts']['klines'] == {'calls': 3, 'fetches': 2, 'deduplicated': 1}
+    assert stats['by_consumer']['balance_monitor']['klines']['fetches'] == 4  # 1h/4h x 100 и 1d ребалансировщика
+    assert exchange.calls['klines'] == stats['fetches'] == 6 and stats['calls'] == 10
+    print(f"   ✅ {stats['by_kind']['klines']['calls']} запросов свечей -> {exchange.calls['klines']}")
+
+
+if __name__ == "__main__":
+    test_shared_between_services()
+    test_prices_from_bulk_snapshot_and_errors()
+    test_invalidate_after_order()
+    test_concurrent_requests_fetch_once()
+    test_filters_of_different_services_share_klines()
+    print("\n✅ Все тесты общего кэша рыночных данных пройдены")
@@ -0,0 +1,162 @@
+#!/usr/bin/env python3
+"""
+Тест асинхронного конвейера сканирования рынка
+Фейковая биржа с задержкой ответа; сети и API ключей не требует
+"""
+
+import asyncio
+import os
+import sys
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import isolated_storage  # noqa: F401 - до импорта config, рабочие файлы бота не трогаем
+from cache.kline_store import INTERVAL_MS, KlineStore
+from cache.kline_resampler import ResamplingKlineSource
+from cache.market_data_cache import MarketDataCache
+from anti_hype_filter import AntiHypeFilter
+from market_scanner import MarketScanner
+from market_scan_pipeline import MarketScanPipeline
+from universe_manager import UniverseManager
+from test_kline_resampler import exchange_aggregate
+from test_kline_store import make_klines
+
+LATENCY = 0.05  # Сек на запрос свечей
+
+
+class SlowExchange:
+    """Фейковый API: задержка на каждый запрос свечей, bulk 24h тикеры"""
+
+    def __init__(self, symbols, hang=()):
+        self.symbols = symbols
+        self.hang = set(hang)
+        self.base = {s: make_klines(1000, start_ts=1_700_006_400_000, seed=i + 1) for i, s in enumerate(symbols)}
+
+    def get_klines(self, symbol, interval='1m', limit=100):
+        time.sleep(2 if symbol in self.hang else LATENCY)
+        base = self.base[symbol]
+        if interval == '15m':
+            return base[-limit:]
+        interval = {'60m': '1h'}.get(interval, interval)
+        return exchange_aggregate(base, INTERVAL_MS[interval])[-limit:]
+
+    def get_24hr_ticker(self, symbol=None):
+        return [{'symbol': s, 'quoteVolume': str(1e6 - i), 'lastPrice': self.base[s][-1][4]}
+                for i, s in enumerate(self.symbols)]
+
+    def get_ticker_price(self, symbol):
+        time.sleep(LATENCY)
+        return {'symbol': symbol, 'price': self.base[symbol][-1][4]}
+
+
+def make_scanner(exchange, config=None):
+    scanner = MarketScanner()
+    scanner.mex_api = exchange
+    scanner.market_data = MarketDataCache(exchange).client('scanner')
+    scanner.universe = UniverseManager(exchange)
+    scanner.kline_source = ResamplingKlineSource(exchange, kline_store=KlineStore())
+    scanner.anti_hype_filter = AntiHypeFilter(kline_source=scanner.kline_source)
+    scanner.pipeline = MarketScanPipeline(scanner, config)
+    scanner.prefilter_config = dict(scanner.prefilter_config, enabled=False)
+    return scanner
+
+
+def pipeline_config(fetch_timeout=15.0):
+    return {
+        'stages': {
+            'universe': {'concurrency': 1, 'timeout': 5.0},
+            'fetch': {'concurrency': 32, 'timeout': fetch_timeout},
+            'indicators': {'concurrency': 4, 'timeout': 5.0},
+            'filter': {'concurrency': 8, 'timeout': 5.0},
+            'score': {'concurrency': 64, 'timeout': 1.0},
+        },
+        'fetch_attempts': 1,
+        'retry_delay': 0.0,
+    }
+
+
+def test_pipeline_matches_sequential_analysis():
+    print("🔍 ТЕСТ СОВПАДЕНИЯ С ПОСЛЕДОВАТЕЛЬНЫМ АНАЛИЗОМ")
+    symbols = [f"T{i:02d}USDT" for i in range(12)]
+    scanner = make_scanner(SlowExchange(symbols), pipeline_config())
+    results = asyncio.run(scanner.pipeline.run())
+
+    reference = make_scanner(SlowExchange(symbols), pipeline_config())
+    reference.trading_pairs = symbols
+    expected = {s: reference.analyze_pair(s) for s in symbols}
+
+    got = {a['symbol']: a for group in ('buy_opportunities', 'neutral_pairs', 'blocked_pairs')
+           for a in results[group]}
+    assert results['analyzed_pairs'] == len(symbols) and not results['errors']
+    for symbol in symbols:
+        assert got[symbol]['score'] == expected[symbol]['score'], symbol
+        assert got[symbol]['reasons'] == expected[symbol]['reasons'], symbol
+        assert got[symbol]['price'] == expected[symbol]['price'], symbol
+    print(f"   ✅ {len(symbols)} пар: скоры и причины совпадают")
+
+
+def test_pipeline_wall_time_bounded_fanout():
+    print("🔍 ТЕСТ ВРЕМЕНИ СКАНА")
+    symbols = [f"W{i:03d}USDT" for i in range(200)]
+    scanner = make_scanner(SlowExchange(symbols), pipeline_config())
+    results = asyncio.run(scanner.pipeline.run())
+
+    sequential_fetch = len(symbols) * LATENCY
+    assert results['analyzed_pairs'] == len(symbols)
+    assert results['kline_requests']['requests_made'] == len(symbols)  # один запрос на символ
+    assert results['wall_time'] < sequential_fetch / 3, results['wall_time']
+    timings = results['stage_timings']
+    assert timings['fetch']['calls'] == len(symbols) and timings['score']['calls'] == 1  # Скоринг одной пачкой
+    print(f"   ✅ 200 пар за {results['wall_time']:.2f} сек "
+          f"(последовательная загрузка ~{sequential_fetch:.0f} сек)")
+
+
+def test_stage_timeout_isolates_symbol():
+    print("🔍 ТЕСТ ТАЙМАУТА ЭТАПА")
+    symbols = ['AAAUSDT', 'HANGUSDT', 'BBBUSDT']
+    scanner = make_scanner(SlowExchange(symbols, hang=['HANGUSDT']), pipeline_config(fetch_timeout=0.5))
+    started = time.perf_counter()
+    results = asyncio.run(scanner.pipeline.run())
+    assert time.perf_counter() - started < 5
+    assert results['errors'] == ['HANGUSDT']
+    assert results['analyzed_pairs'] == 2
+    assert results['stage_timings']['fetch']['timeouts'] == 1
+    print("   ✅ зависший символ отброшен по таймауту, остальные проанализированы")
+
+
+def test_prefilter_prunes_before_fetch():
+    print("🔍 ТЕСТ ПРЕФИЛЬТРА ПО 24H ТИКЕРАМ")
+    symbols = [f"P{i:03d}USDT" for i in range(100)]
+    exchange = SlowExchange(symbols)
+    scanner = make_scanner(exchange, pipeline_config())
+    scanner.prefilter_config = dict(scanner.prefilter_config, enabled=True, top_k=30)
+
+    # Каждая 4-я пара торгуется у хая дня - должна отсеяться до загрузки свечей
+    def tickers(symbol=None):
+        result = []
+        for i, s in enumerate(symbols):
+            last = float(exchange.base[s][-1][4])
+            high = last * (1.002 if i % 4 == 0 else 1.05)
+            result.append({'symbol': s, 'lastPrice': str(last), 'openPrice': str(last * 0.99),
+                           'highPrice': str(high), 'lowPrice': str(last * 0.95), 'quoteVolume': str(1e6 + i)})
+        return result
+    exchange.get_24hr_ticker = tickers
+
+    results = asyncio.run(scanner.pipeline.run())
+    prefilter = results['prefilter']
+    assert prefilter['candidates'] == 100 and prefilter['selected'] == 30 and prefilter['pruned'] == 70
+    assert prefilter['pruned_by']['range_position'] + prefilter['pruned_by']['dist_to_high'] == 25
+    assert results['kline_requests']['requests_made'] == 30
+    assert results['total_pairs'] == 100 and results['analyzed_pairs'] == 30
+    assert "Отсеяно префильтром: 70 из 100" in scanner.format_scan_report(results)
+    print(f"   ✅ {prefilter}")
+
+
+if __name__ == "__main__":
+    test_pipeline_matches_sequential_analysis()
+    test_pipeline_wall_time_bounded_fanout()
+    test_stage_timeout_isolates_symbol()
+    test_prefilter_prunes_before_fetch()
+    print("\n✅ Все тесты конвейера сканирования пройдены")
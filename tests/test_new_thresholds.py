@@ -7,6 +7,7 @@
 import asyncio
 import logging
 from datetime import datetime
+import isolated_storage  # noqa: F401 - до импорта config, рабочие файлы бота не трогаем
 from mex_api import MexAPI
 from mexc_advanced_api import MexAdvancedAPI
 from pnl_monitor import PnLMonitor
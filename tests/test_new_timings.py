@@ -5,6 +5,7 @@
 
 import logging
 from datetime import datetime
+import isolated_storage  # noqa: F401 - до импорта config, рабочие файлы бота не трогаем
 from market_scanner import MarketScanner
 from config import PNL_MONITOR_CONFIG
 
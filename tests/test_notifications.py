@@ -3,6 +3,7 @@
 Тест новых уведомлений с анти-хайп фильтром и общей стоимостью портфеля
 """
 
+import isolated_storage  # noqa: F401 - до импорта config, рабочие файлы бота не трогаем
 from balance_monitor import BalanceMonitor
 from alt_monitor import AltsMonitor
 from pnl_monitor import PnLMonitor
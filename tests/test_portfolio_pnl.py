@@ -0,0 +1,171 @@
+#!/usr/bin/env python3
+"""
+Тест оценки PnL всего портфеля за один проход
+Фейковые снимок цен и источник сделок; сети и API ключей не требует
+"""
+
+import os
+import sys
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from portfolio_pnl import PortfolioPnL
+from position_engine import PositionEngine
+from test_position_engine import close, make_trades
+
+CONFIG = {'sync_interval_sec': 60, 'initial_limit': 500, 'delta_limit': 100}
+
+
+class FakeMarket:
+    """Снимок 24h тикеров + цены отдельных пар, со счетчиками запросов"""
+
+    def __init__(self, prices, listed):
+        self.prices = prices
+        self.listed = listed
+        self.calls = {'ticker_24h': 0, 'price': 0}
+
+    def get_24hr_ticker(self, symbol=None):
+        self.calls['ticker_24h'] += 1
+        return [{'symbol': s, 'lastPrice': str(p)} for s, p in self.prices.items() if s in self.listed]
+
+    def get_ticker_price(self, symbol):
+        self.calls['price'] += 1
+        return {'symbol': symbol, 'price': str(self.prices[symbol])} if symbol in self.prices else {}
+
+
+class FakeTrades:
+    def __init__(self, by_symbol):
+        self.by_symbol = by_symbol
+        self.calls = 0
+
+    def get_my_trades(self, symbol, limit=100):
+        self.calls += 1
+        return self.by_symbol.get(symbol, [])[-limit:]
+
+
+def make_portfolio(count=30):
+    assets = [f"A{i:02d}" for i in range(count)]
+    trades = {f"{a}USDT": [dict(t, commissionAsset='USDT') for t in make_trades(60, seed=i)]
+              for i, a in enumerate(assets)}
+    engine = PositionEngine(path='', trade_source=FakeTrades(trades), config=CONFIG)
+    for symbol, symbol_trades in trades.items():
+        engine.apply_trades(symbol, symbol_trades)
+    balances = {}
+    for i, asset in enumerate(assets):
+        qty = engine.get(f"{asset}USDT").qty
+        total = qty * (0.5 + (i % 3) * 0.5)  # Меньше, равен и больше позиции по сделкам
+        balances[asset] = {'free': total, 'locked': 0.0, 'total': total}
+    balances['ZERO'] = {'free': 0.0, 'locked': 0.0, 'total': 0.0}
+    return assets, engine, balances
+
+
+def test_portfolio_matches_per_asset():
+    print("🔍 ТЕСТ PnL ПОРТФЕЛЯ ЗА ОДИН ПРОХОД")
+    assets, engine, balances = make_portfolio()
+    symbols = {asset: f"{asset}USDT" for asset in assets}
+    symbols['NOPAIR'] = None
+    prices = {f"{a}USDT": 8.0 + i * 0.15 for i, a in enumerate(assets)}
+    market = FakeMarket(prices, listed=set(prices) - {'A05USDT'})  # Одной пары нет в снимке
+    engine.trade_source.calls = 0
+    for symbol in symbols.values():
+        if symbol:
+            engine.get(symbol).synced_at = time.time()
+    evaluator = PortfolioPnL(market, engine)
+    actions = evaluator.evaluate(balances, symbols, threshold_usd=0.15)
+
+    differs = sum(1 for a in assets if not close(balances[a]['total'], engine.get(f"{a}USDT").qty))
+    assert market.calls == {'ticker_24h': 1, 'price': 1}
+    assert engine.trade_source.calls == differs  # Догрузка только там, где баланс расходится с позицией
+    assert {a['asset'] for a in actions} == set(assets)  # Нулевой баланс и актив без пары пропущены
+    for action in actions:
+        expected = engine.get(action['symbol']).summary(prices[action['symbol']], action['quantity'])
+        assert close(action['unrealized_pnl'], expected['unrealized_pnl'])
+        assert close(action['avg_buy_price'], expected['avg_buy_price'])
+        assert action['sell'] == (expected['unrealized_pnl'] > 0.15)
+    flags = [a['sell'] for a in actions]
+    assert any(flags) and not all(flags) and flags == sorted(flags, reverse=True)  # Продажи первыми
+    sells = [a['unrealized_pnl'] for a in actions if a['sell']]
+    assert sells == sorted(sells, reverse=True)
+
+    by_pct = evaluator.evaluate(balances, symbols, threshold_usd=1e9, threshold_pct=5.0, prices=prices)
+    for action in by_pct:
+        assert action['sell'] == (action['avg_buy_price'] > 0 and action['pnl_pct'] >= 5.0)
+    assert market.calls['ticker_24h'] == 1  # Готовый снимок цен - без запросов
+    print("   ✅ OK")
+
+
+def test_trade_sync_throttled():
+    print("🔍 ТЕСТ ДОГРУЗКИ СДЕЛОК ПРИ ОЦЕНКЕ ПОРТФЕЛЯ")
+    assets, engine, balances = make_portfolio(count=5)
+    for asset in assets:  # Часть баланса выведена с биржи - расхождение постоянное, сделок нет
+        balances[asset]['total'] = min(balances[asset]['total'], engine.get(f"{asset}USDT").qty)
+    prices = {f"{a}USDT": 10.0 for a in assets}
+    symbols = {asset: f"{asset}USDT" for asset in assets}
+    evaluator = PortfolioPnL(FakeMarket(prices, set(prices)), engine, config={'trades_sync_sec': 300})
+    engine.trade_source.calls = 0
+    evaluator.evaluate(balances, symbols, threshold_usd=0.15)
+    assert engine.trade_source.calls == 5  # Позиции еще не синхронизированы с биржей
+    evaluator.evaluate(balances, symbols, threshold_usd=0.15)
+    assert engine.trade_source.calls == 5  # Дальше - не чаще trades_sync_sec, расхождение то же
+    assert evaluator.get_stats()['evaluations'] == 2
+    print("   ✅ OK")
+
+
+def test_buy_between_syncs():
+    print("🔍 ТЕСТ ПОКУПКИ МЕЖДУ ДОГРУЗКАМИ СДЕЛОК")
+    buy = {'id': 'b0', 'price': 10.0, 'qty': 1.0, 'quoteQty': 10.0, 'commission': 0.0,
+           'commissionAsset': 'USDT', 'time': 1_700_000_000_000, 'isBuyer': True}
+    source = FakeTrades({'ABCUSDT': [buy]})
+    engine = PositionEngine(path='', trade_source=source, config=CONFIG)
+    evaluator = PortfolioPnL(FakeMarket({'ABCUSDT': 11.0}, {'ABCUSDT'}), engine, config={'trades_sync_sec': 300})
+    balances = {'ABC': {'free': 1.0, 'locked': 0.0, 'total': 1.0}}
+    first = evaluator.evaluate(balances, {'ABC': 'ABCUSDT'}, threshold_pct=5.0)
+    assert first[0]['sell'] and source.calls == 1
+
+    # Усреднение вверх: средняя цена 15.5, по цене 11 - убыток, продавать нельзя
+    source.by_symbol['ABCUSDT'].append(dict(buy, id='b1', price=21.0, quoteQty=21.0, time=buy['time'] + 1000))
+    balances['ABC'] = {'free': 2.0, 'locked': 0.0, 'total': 2.0}
+    second = evaluator.evaluate(balances, {'ABC': 'ABCUSDT'}, threshold_pct=5.0)
+    assert source.calls == 2 and evaluator.get_stats()['forced_syncs'] == 1
+    assert close(second[0]['avg_buy_price'], 15.5) and not second[0]['sell']
+
+    # Сделки не загрузились - по устаревшей средней цене не продаем
+    def broken(symbol, limit=100):
+        raise ConnectionError("timeout")
+    source.get_my_trades = broken
+    balances['ABC'] = {'free': 3.0, 'locked': 0.0, 'total': 3.0}
+    third = evaluator.evaluate(balances, {'ABC': 'ABCUSDT'}, threshold_usd=-1e9)
+    assert not third[0]['sell']
+    print("   ✅ OK")
+
+
+def test_sell_then_buy_between_syncs():
+    print("🔍 ТЕСТ ПРОДАЖИ И ПОКУПКИ МЕЖДУ ДОГРУЗКАМИ")
+    buy = {'id': 'b0', 'price': 100.0, 'qty': 10.0, 'quoteQty': 1000.0, 'commission': 0.0,
+           'commissionAsset': 'USDT', 'time': 1_700_000_000_000, 'isBuyer': True}
+    source = FakeTrades({'ABCUSDT': [buy]})
+    engine = PositionEngine(path='', trade_source=source, config=CONFIG)
+    evaluator = PortfolioPnL(FakeMarket({'ABCUSDT': 105.0}, {'ABCUSDT'}), engine, config={'trades_sync_sec': 300})
+    balances = {'ABC': {'free': 10.0, 'locked': 0.0, 'total': 10.0}}
+    evaluator.evaluate(balances, {'ABC': 'ABCUSDT'}, threshold_pct=5.0)
+    assert close(engine.get('ABCUSDT').avg_price, 100.0)
+
+    # Продано 5 и куплено 3 по 120: баланс меньше позиции, средняя цена (5*100 + 3*120) / 8 = 107.5
+    source.by_symbol['ABCUSDT'] += [
+        dict(buy, id='s1', qty=5.0, quoteQty=500.0, time=buy['time'] + 1000, isBuyer=False),
+        dict(buy, id='b2', price=120.0, qty=3.0, quoteQty=360.0, time=buy['time'] + 2000)]
+    balances['ABC'] = {'free': 8.0, 'locked': 0.0, 'total': 8.0}
+    actions = evaluator.evaluate(balances, {'ABC': 'ABCUSDT'}, threshold_pct=5.0)
+    assert close(actions[0]['avg_buy_price'], 107.5)
+    assert not actions[0]['sell']  # По цене 105 - убыток, а не +5% от устаревших 100
+    print("   ✅ OK")
+
+
+if __name__ == "__main__":
+    test_portfolio_matches_per_asset()
+    test_trade_sync_throttled()
+    test_buy_between_syncs()
+    test_sell_then_buy_between_syncs()
+    print("\n✅ Все тесты PnL портфеля пройдены")
@@ -0,0 +1,142 @@
+#!/usr/bin/env python3
+"""
+Тест движка позиций по средней цене закупа
+Фейковый источник сделок и временный файл снимка; сети и API ключей не требует
+"""
+
+import os
+import random
+import sys
+import tempfile
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from position_engine import Position, PositionEngine, split_symbol
+
+CONFIG = {'sync_interval_sec': 60, 'initial_limit': 500, 'delta_limit': 100}
+
+
+def make_trades(n, seed=1, start_time=1_700_000_000_000):
+    """Случайные сделки myTrades: покупки, продажи (в т.ч. больше позиции), комиссии в разных активах"""
+    rng = random.Random(seed)
+    trades = []
+    for i in range(n):
+        price = 10 * (1 + rng.uniform(-0.2, 0.2))
+        qty = round(rng.uniform(0.1, 3.0), 4)
+        trades.append({
+            'id': f"t{i}", 'price': price, 'qty': qty, 'quoteQty': price * qty,
+            'commission': rng.choice([0.0, 0.001 * qty, 0.001 * price * qty, 0.5]),
+            'commissionAsset': rng.choice(['ABC', 'USDT', 'MX']),
+            'time': start_time + i // 2 * 1000,  # По две сделки с одинаковым временем
+            'isBuyer': rng.random() < 0.55,
+        })
+    return trades
+
+
+def replay(trades, symbol='ABCUSDT'):
+    """Прежний расчет мониторов: полный проход по истории сделок"""
+    base, quote = 'ABC', 'USDT'
+    position_qty = cost_basis_total = realized_pnl = 0.0
+    for trade in sorted(trades, key=lambda t: t.get('time', 0)):
+        qty, price, quote_qty = trade['qty'], trade['price'], trade['quoteQty']
+        commission, asset = trade['commission'], trade['commissionAsset']
+        fee_q = 0.0
+        if commission > 0 and asset == quote:
+            fee_q = commission
+        elif commission > 0 and asset == base and price > 0:
+            fee_q = commission * price
+        if trade['isBuyer']:
+            if position_qty + qty > 0:
+                cost_basis_total += quote_qty + fee_q
+                position_qty += qty
+        else:
+            if position_qty <= 0:
+                continue
+            avg = cost_basis_total / position_qty
+            realized_pnl += quote_qty - fee_q - avg * qty
+            cost_basis_total -= avg * qty
+            position_qty -= qty
+            if position_qty < 1e-12:
+                position_qty = cost_basis_total = 0.0
+    avg_price = cost_basis_total / position_qty if position_qty > 0 else 0.0
+    return position_qty, avg_price, realized_pnl
+
+
+class FakeTrades:
+    """Источник сделок: последние limit сделок из trades (как myTrades)"""
+
+    def __init__(self, trades):
+        self.trades = trades
+        self.limits = []
+
+    def get_my_trades(self, symbol, limit=100):
+        self.limits.append(limit)
+        return list(reversed(self.trades))[:limit][::-1]
+
+
+def close(a, b):
+    return abs(a - b) <= 1e-9 * max(1.0, abs(a), abs(b))
+
+
+def test_incremental_matches_replay():
+    print("🔍 ТЕСТ ИНКРЕМЕНТАЛЬНОГО ПРИМЕНЕНИЯ СДЕЛОК")
+    assert split_symbol('ETHUSDC') == ('ETH', 'USDC') and split_symbol('ABCUSDT') == ('ABC', 'USDT')
+    trades = make_trades(400)
+    engine = PositionEngine(path='', trade_source=FakeTrades([]), config=CONFIG)
+    rng = random.Random(7)
+    end = 0
+    while end < len(trades):
+        start = max(0, end - rng.randint(0, 5))  # Пачки перекрываются, как повторные загрузки
+        end = min(len(trades), end + rng.randint(1, 30))
+        engine.apply_trades('ABCUSDT', trades[start:end])
+        qty, avg, realized = replay(trades[:end])
+        position = engine.get('ABCUSDT')
+        assert close(position.qty, qty) and close(position.avg_price, avg) and close(position.realized_pnl, realized)
+    assert engine.get_stats()['trades_applied'] == len(trades)
+    assert position.buys + position.sells == len(trades) and position.fees_quote > 0
+
+    summary = position.summary(12.0, qty=position.qty / 2)
+    assert close(summary['unrealized_pnl'], (12.0 - avg) * position.qty / 2)
+    assert close(summary['total_pnl'], summary['realized_pnl'] + summary['unrealized_pnl'])
+    assert close(position.unrealized_pnl(12.0, qty=position.qty * 10), (12.0 - avg) * position.qty)
+    assert Position('XUSDT').unrealized_pnl(5.0) == 0.0
+    print("   ✅ OK")
+
+
+def test_sync_limits_and_snapshot():
+    print("🔍 ТЕСТ ДОГРУЗКИ СДЕЛОК И СНИМКА")
+    trades = make_trades(300, seed=3)
+    source = FakeTrades(trades[:200])
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'positions.json')
+        engine = PositionEngine(path=path, trade_source=source, config=CONFIG)
+        engine.pnl('ABCUSDT', 10.0)
+        engine.pnl('ABCUSDT', 10.0)  # Интервал синхронизации не прошел - без запроса
+        assert source.limits == [500]
+
+        source.trades = trades[:230]
+        engine.sync('ABCUSDT', force=True)  # Новых меньше лимита - одна короткая загрузка
+        assert source.limits == [500, 100]
+        source.trades = trades[:300]
+        engine.sync('ABCUSDT', force=True)
+        assert source.limits == [500, 100, 100]  # Последняя сотня перекрывает уже примененные
+        source.trades = trades + make_trades(150, seed=4, start_time=1_800_000_000_000)
+        engine.sync('ABCUSDT', force=True)  # Все 100 новые - догрузка полной истории
+        assert source.limits == [500, 100, 100, 100, 500]
+
+        expected = replay(source.trades)
+        position = engine.get('ABCUSDT')
+        assert close(position.qty, expected[0]) and close(position.realized_pnl, expected[2])
+
+        reloaded = PositionEngine(path=path, trade_source=FakeTrades(source.trades), config=CONFIG)
+        again = reloaded.get('ABCUSDT')
+        assert close(again.qty, position.qty) and close(again.cost_basis, position.cost_basis)
+        assert reloaded.apply_trades('ABCUSDT', source.trades) == 0  # Уже примененные пропускаются
+        assert reloaded.sync('ABCUSDT').synced_at > 0  # После загрузки снимка синхронизация сразу
+    print("   ✅ OK")
+
+
+if __name__ == "__main__":
+    test_incremental_matches_replay()
+    test_sync_limits_and_snapshot()
+    print("\n✅ Все тесты движка позиций пройдены")
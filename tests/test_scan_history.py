@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""
+Тест персистентной истории сканов и сравнения с предыдущим сканом
+Не требует сети и API ключей
+"""
+
+import os
+import sys
+import tempfile
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from scan_history import HEADER, ROW_BYTES, ScanHistory
+
+
+def analysis(symbol, score, rsi=40.0, allowed=True, reason='ok'):
+    return {'symbol': symbol, 'score': score, 'rsi': rsi, 'volume_ratio': 1.3, 'bb_position': 0.2,
+            'filter_result': {'allowed': allowed, 'reason': reason}}
+
+
+def scan(*analyses):
+    results = {'buy_opportunities': [], 'neutral_pairs': [], 'blocked_pairs': [], 'errors': []}
+    for a in analyses:
+        group = 'buy_opportunities' if a['score'] > 2 else 'blocked_pairs' if a['score'] < -5 else 'neutral_pairs'
+        results[group].append(a)
+    return results
+
+
+def test_append_and_load():
+    print("🔍 ТЕСТ ЗАПИСИ И ЧТЕНИЯ")
+    with tempfile.TemporaryDirectory() as tmp:
+        history = ScanHistory(tmp)
+        first = history.append(scan(analysis('AUSDT', 4, rsi=28.5),
+                                    analysis('BUSDT', -10, allowed=False, reason='bear_trend_below_ema200')))
+        history.append(scan(analysis('AUSDT', 1)))
+        assert os.path.getsize(history.data_file) == 2 * HEADER.size + 3 * ROW_BYTES
+
+        # Переоткрытие: индекс и словарь строк восстанавливаются с диска
+        reopened = ScanHistory(tmp)
+        assert reopened.scan_ids() == [first, first + 1]
+        loaded = reopened.load_scan(first)
+        assert loaded['symbols'] == ['AUSDT', 'BUSDT']
+        assert list(loaded['score']) == [4.0, -10.0] and abs(loaded['rsi'][0] - 28.5) < 1e-6
+        assert list(loaded['allowed']) == [True, False]
+        assert loaded['reasons'] == ['', 'bear_trend_below_ema200']
+
+        # Недописанный блок (сбой при записи) отбрасывается при открытии
+        with open(history.data_file, 'ab') as f:
+            f.write(b'SCN1\x03')
+        assert ScanHistory(tmp).scan_ids() == [first, first + 1]
+        assert os.path.getsize(history.data_file) == 2 * HEADER.size + 3 * ROW_BYTES
+    print(f"   ✅ {ROW_BYTES} байт на пару в скане")
+
+
+def test_diff():
+    print("🔍 ТЕСТ СРАВНЕНИЯ СКАНОВ")
+    with tempfile.TemporaryDirectory() as tmp:
+        history = ScanHistory(tmp)
+        assert history.append_and_diff(scan(analysis('AUSDT', 4)))['previous_scan_id'] is None
+        history.append(scan(analysis('AUSDT', 4), analysis('BUSDT', 3), analysis('CUSDT', 1),
+                            analysis('DUSDT', -10, allowed=False, reason='hype')))
+        diff = history.append_and_diff(scan(analysis('AUSDT', 6), analysis('BUSDT', 0), analysis('CUSDT', 3),
+                                            analysis('DUSDT', 2), analysis('EUSDT', 5)))
+        assert diff['new_opportunities'] == ['EUSDT', 'CUSDT']
+        assert diff['dropped'] == ['BUSDT']
+        assert diff['score_deltas'] == {'DUSDT': 12.0, 'BUSDT': -3.0, 'AUSDT': 2.0, 'CUSDT': 2.0}
+        assert diff['unblocked'] == ['DUSDT'] and diff['newly_blocked'] == []
+        assert diff['new_symbols'] == ['EUSDT']
+    print("   ✅ OK")
+
+
+def test_partial_scans_lookback():
+    print("🔍 ТЕСТ ЧАСТИЧНЫХ СКАНОВ (ПЛАНИРОВЩИК)")
+    with tempfile.TemporaryDirectory() as tmp:
+        history = ScanHistory(tmp)
+        history.append(scan(analysis('AUSDT', 4), analysis('BUSDT', 0)))
+        history.append(scan(analysis('CUSDT', 1)))
+        # Соседний скан не содержит AUSDT - без lookback изменение не видно
+        assert history.append_and_diff(scan(analysis('AUSDT', 1)))['dropped'] == []
+        diff = history.latest_diff(lookback=5)
+        assert diff['dropped'] == ['AUSDT'] and diff['score_deltas'] == {'AUSDT': -3.0}
+        assert diff['missing_symbols'] == ['BUSDT', 'CUSDT']
+    print("   ✅ OK")
+
+
+if __name__ == "__main__":
+    test_append_and_load()
+    test_diff()
+    test_partial_scans_lookback()
+    print("\n✅ Все тесты истории сканов пройдены")
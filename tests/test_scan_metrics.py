@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+"""
+Тест метрик сканирования по этапам
+Перцентили, медленные символы, ретраи, экспорт; сети не требует
+"""
+
+import asyncio
+import os
+import sys
+import tempfile
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import isolated_storage  # noqa: F401 - до импорта config, рабочие файлы бота не трогаем
+from scan_history import ScanHistory
+from scan_metrics import ScanMetrics, load_history
+from test_market_scan_pipeline import LATENCY, SlowExchange, make_scanner, pipeline_config
+
+
+def test_summary_percentiles_and_export():
+    print("🔍 ТЕСТ СВОДКИ И ЭКСПОРТА")
+    with tempfile.TemporaryDirectory() as tmp:
+        history = os.path.join(tmp, 'scan_metrics.jsonl')
+        prom = os.path.join(tmp, 'scan.prom')
+        metrics = ScanMetrics(top_n=2, history_file=history, metrics_file=prom)
+        metrics.begin_scan()
+        for i in range(1, 101):
+            metrics.record('fetch', i / 100, f"S{i}USDT")
+        metrics.record('filter', 5.0, 'S1USDT')
+        metrics.count_retry('fetch', 'S1USDT')
+        metrics.count_event('fetch', 'timeouts')
+
+        summary = metrics.finish_scan({'wall_time': 3.0})
+        fetch = summary['stages']['fetch']
+        assert fetch['count'] == 100 and fetch['max'] == 1.0
+        assert abs(fetch['p50'] - 0.505) < 1e-9 and abs(fetch['p95'] - 0.9505) < 1e-9
+        assert [s['symbol'] for s in summary['slowest']] == ['S1USDT', 'S100USDT']
+        assert summary['slowest'][0]['retries'] == 1
+        assert metrics.latest() is summary
+
+        text = open(prom).read()
+        assert 'scan_stage_seconds{stage="fetch",quantile="0.95"} 0.950500' in text
+        assert 'scan_stage_events{stage="fetch",event="timeouts"} 1' in text
+        assert 'scan_wall_seconds 3.000000' in text
+
+        metrics.begin_scan()
+        metrics.record('fetch', 0.1, 'AUSDT')
+        metrics.finish_scan()
+        rows = load_history(history)
+        assert len(rows) == 2 and abs(rows[0]['stages']['fetch']['p95'] - 0.9505) <= 0.001  # округление до мс
+    print("   ✅ OK")
+
+
+def test_pipeline_reports_slow_symbols_and_retries():
+    print("🔍 ТЕСТ МЕДЛЕННЫХ СИМВОЛОВ В КОНВЕЙЕРЕ")
+    symbols = [f"M{i:02d}USDT" for i in range(10)]
+
+    class Exchange(SlowExchange):
+        failures = 2  # Базовая загрузка и прямой запрос первой попытки - пустые ответы
+
+        def get_klines(self, symbol, interval='1m', limit=100, start_time=None):
+            if symbol == 'M03USDT' and self.failures:
+                self.failures -= 1
+                return []
+            if symbol == 'M07USDT':
+                time.sleep(0.3)
+            return super().get_klines(symbol, interval, limit)
+
+    config = dict(pipeline_config(), fetch_attempts=2)
+    scanner = make_scanner(Exchange(symbols), config)
+    scanner.metrics = ScanMetrics(top_n=3)
+    results = asyncio.run(scanner.pipeline.run())
+
+    metrics = results['metrics']
+    assert metrics['slowest'][0]['symbol'] == 'M07USDT'
+    assert metrics['slowest'][0]['stages']['fetch'] >= 0.3
+    assert metrics['retries'] == {'fetch': 1}
+    assert metrics['stages']['fetch']['count'] == len(symbols) + 1
+    # Только относительные проверки: на загруженной машине абсолютные тайминги плавают
+    fetch = metrics['stages']['fetch']
+    assert fetch['max'] >= 0.3 and fetch['max'] >= fetch['p50'] >= LATENCY
+    report = scanner.format_scan_report(results)
+    assert "🐢 Медленные: M07USDT" in report and "Ретраи: fetch 1" in report
+    print(f"   ✅ {metrics['slowest'][0]['symbol']}: {metrics['slowest'][0]['total']:.2f} сек")
+
+
+def test_scan_cycle_stages():
+    print("🔍 ТЕСТ ЭТАПОВ ЦИКЛА")
+    symbols = [f"C{i:02d}USDT" for i in range(6)]
+    exchange = SlowExchange(symbols)
+    exchange.get_account_info = lambda: {'balances': [{'asset': 'USDT', 'free': '100', 'locked': '0'}]}
+    scanner = make_scanner(exchange, pipeline_config())
+    scanner.scheduler = None
+    scanner.metrics = ScanMetrics()
+    scanner.scan_history = ScanHistory(tempfile.mkdtemp())
+    scanner.send_telegram_message = lambda message: None
+
+    async def no_buy(scan_results):
+        await asyncio.sleep(0.01)
+    scanner.auto_buy_opportunities = no_buy
+
+    asyncio.run(scanner.scan_cycle())
+    summary = scanner.metrics.latest()
+    assert set(summary['cycle']) == {'balance', 'scan', 'history', 'report', 'auto_buy'}
+    assert summary['cycle']['auto_buy'] >= 0.01 and summary['analyzed_pairs'] == len(symbols)
+    assert {'universe', 'fetch', 'indicators', 'filter', 'score'} <= set(summary['stages'])
+    print(f"   ✅ {', '.join(f'{k}={v:.2f}' for k, v in summary['cycle'].items())}")
+
+
+if __name__ == "__main__":
+    test_summary_percentiles_and_export()
+    test_pipeline_reports_slow_symbols_and_retries()
+    test_scan_cycle_stages()
+    print("\n✅ Все тесты метрик скана пройдены")
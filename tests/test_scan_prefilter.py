@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+"""
+Тест префильтра скана по bulk 24h тикерам
+Не требует API ключей и сети
+"""
+
+import os
+import sys
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config import MARKET_SCAN_PREFILTER_CONFIG
+from scan_prefilter import compute_features, prefilter_symbols
+
+
+def ticker(symbol, last, open_, high, low, volume):
+    return {'symbol': symbol, 'lastPrice': str(last), 'openPrice': str(open_),
+            'highPrice': str(high), 'lowPrice': str(low), 'quoteVolume': str(volume)}
+
+
+def test_features():
+    print("🔍 ТЕСТ ПРИЗНАКОВ")
+    features = compute_features([ticker('A', 105, 100, 110, 100, 1e6), ticker('B', 100, 100, 100, 100, 1e4)])
+    assert abs(features['range_position'][0] - 0.5) < 1e-12
+    assert abs(features['change_pct'][0] - 5.0) < 1e-12
+    assert abs(features['dist_to_high_pct'][0] - 100 * 5 / 110) < 1e-12
+    assert features['range_position'][1] == 0.5  # нулевой диапазон - середина
+    assert features['volume_z'][0] > 0 > features['volume_z'][1]
+    print("   ✅ OK")
+
+
+def test_cuts_ranking_and_top_k():
+    print("🔍 ТЕСТ ОТСЕЧЕК И TOP-K")
+    snapshot = {
+        'NEARHIGHUSDT': ticker('NEARHIGHUSDT', 109.9, 100, 110, 100, 1e6),   # 0.09% до хая - блок фильтра
+        'RESTRICTUSDT': ticker('RESTRICTUSDT', 109.5, 100, 110, 100, 1e6),  # 0.45% - фильтр пропускает
+        'PUMPUSDT': ticker('PUMPUSDT', 150, 100, 170, 95, 1e6),
+        'LOWUSDT': ticker('LOWUSDT', 101, 105, 110, 100, 1e6),
+        'MIDUSDT': ticker('MIDUSDT', 105, 104, 110, 100, 1e6),
+    }
+    symbols = list(snapshot) + ['NODATAUSDT']
+    config = dict(MARKET_SCAN_PREFILTER_CONFIG, top_k=None)
+    selected, stats = prefilter_symbols(symbols, snapshot, config)
+    # По умолчанию жестко отсекается только то, что фильтр заблокирует полностью
+    assert selected == ['LOWUSDT', 'MIDUSDT', 'RESTRICTUSDT', 'PUMPUSDT', 'NODATAUSDT']
+    assert stats['pruned_by']['dist_to_high'] == 1 and stats['pruned'] == 1
+
+    config = dict(config, top_k=1)
+    selected, stats = prefilter_symbols(symbols, snapshot, config)
+    # Лучший по рангу (ниже в диапазоне) + пара без данных (не отсеивается)
+    assert selected == ['LOWUSDT', 'NODATAUSDT']
+    assert stats['pruned'] == 4 and stats['pruned_by']['top_k'] == 3
+
+    cut = dict(config, max_range_position=0.9, max_change_pct=20.0, top_k=None)
+    selected, stats = prefilter_symbols(symbols, snapshot, cut)
+    assert selected == ['LOWUSDT', 'MIDUSDT', 'NODATAUSDT']
+    assert stats['pruned_by']['range_position'] == 2 and stats['pruned_by']['change_pct'] == 1
+
+    selected, stats = prefilter_symbols(symbols, snapshot, dict(config, enabled=False))
+    assert selected == symbols and stats['pruned'] == 0
+    print(f"   ✅ {stats}")
+
+
+if __name__ == "__main__":
+    test_features()
+    test_cuts_ranking_and_top_k()
+    print("\n✅ Все тесты префильтра пройдены")
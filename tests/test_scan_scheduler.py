@@ -0,0 +1,186 @@
+#!/usr/bin/env python3
+"""
+Тест адаптивного планировщика сканирования
+Симуляция часов работы без сети и API ключей
+"""
+
+import asyncio
+import os
+import sys
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import isolated_storage  # noqa: F401 - до импорта config, рабочие файлы бота не трогаем
+from config import SCAN_SCHEDULER_CONFIG
+from scan_scheduler import ScanScheduler
+from test_market_scan_pipeline import SlowExchange, make_scanner, pipeline_config
+
+SYMBOLS = [f"S{i:03d}USDT" for i in range(200)]
+
+
+def tickers(volatile=(), illiquid=()):
+    snapshot = {}
+    for s in SYMBOLS:
+        change = 25.0 if s in volatile else 1.0
+        volume = 1e3 if s in illiquid else 1e6
+        snapshot[s] = {'symbol': s, 'lastPrice': str(100 + change), 'openPrice': '100',
+                       'highPrice': '130', 'lowPrice': '95', 'quoteVolume': str(volume)}
+    return snapshot
+
+
+def analysis(symbol, score, raw_score=None, allowed=True):
+    return {'symbol': symbol, 'score': score, 'raw_score': score if raw_score is None else raw_score,
+            'filter_result': {'allowed': allowed}}
+
+
+def simulate(scheduler, minutes, scores, start=0.0):
+    """Тики раз в минуту; scores(symbol) -> (score, raw_score, allowed)"""
+    scanned = {}
+    for minute in range(minutes):
+        now = start + minute * 60
+        batch = scheduler.next_batch(now)
+        results = {'buy_opportunities': [], 'neutral_pairs': [], 'blocked_pairs': [], 'errors': []}
+        for symbol in batch:
+            scanned[symbol] = scanned.get(symbol, 0) + 1
+            results['neutral_pairs'].append(analysis(symbol, *scores(symbol)))
+        scheduler.record_results(results, now)
+    return scanned
+
+
+def test_priorities():
+    print("🔍 ТЕСТ ПРИОРИТЕТОВ")
+    scheduler = ScanScheduler()
+    scheduler.sync_universe(SYMBOLS, tickers(volatile=['S001USDT'], illiquid=['S002USDT']),
+                            held=['S003USDT'], now=0)
+    states = scheduler.states
+    base = SCAN_SCHEDULER_CONFIG['base_interval_sec']
+    assert states['S000USDT'].interval == base
+    assert states['S001USDT'].interval < base      # всплеск волатильности
+    assert states['S002USDT'].interval > base      # неликвидная
+    assert states['S003USDT'].interval < base      # открытая позиция
+
+    now = 600
+    scheduler.record_results({'neutral_pairs': [analysis('S010USDT', 4),
+                                                analysis('S011USDT', -10, raw_score=3, allowed=False)]}, now)
+    assert states['S010USDT'].interval < base and states['S011USDT'].interval < base
+    for _ in range(SCAN_SCHEDULER_CONFIG['stale_scans']):
+        scheduler.record_results({'neutral_pairs': [analysis('S012USDT', -1)]}, now)
+    assert states['S012USDT'].interval > base
+    print(f"   ✅ {scheduler.get_stats(now)}")
+
+
+def test_budget_and_faster_rescans():
+    print("🔍 ТЕСТ БЮДЖЕТА ЗАПРОСОВ")
+    scheduler = ScanScheduler()
+    scheduler.sync_universe(SYMBOLS, tickers(), now=0)
+    hot = {'S050USDT', 'S150USDT'}
+    minutes = 120
+    scanned = simulate(scheduler, minutes, lambda s: (4,) if s in hot else (0,))
+
+    budget = scheduler.budget_per_min
+    assert budget >= len(SYMBOLS) * 60 / SCAN_SCHEDULER_CONFIG['base_interval_sec']  # По числу пар
+    # Бюджета хватает, чтобы вся вселенная уложилась в base_interval_sec
+    first_round = ScanScheduler()
+    first_round.sync_universe(SYMBOLS, tickers(), now=0)
+    assert len(simulate(first_round, SCAN_SCHEDULER_CONFIG['base_interval_sec'] // 60, lambda s: (0,))) == len(SYMBOLS)
+    total = sum(scanned.values())
+    assert total <= budget * minutes + scheduler.capacity, total
+    assert set(scanned) == set(SYMBOLS)  # каждая пара просканирована хотя бы раз
+    ordinary = sorted(v for s, v in scanned.items() if s not in hot)[len(SYMBOLS) // 2]
+    assert all(scanned[s] >= 3 * ordinary for s in hot), (scanned['S050USDT'], ordinary)
+    print(f"   ✅ {total} анализов за {minutes} мин (бюджет {budget}/мин), "
+          f"горячие пары: {scanned['S050USDT']}, обычные: {ordinary}")
+
+
+def test_fixed_budget_too_small():
+    print("🔍 ТЕСТ ФИКСИРОВАННОГО БЮДЖЕТА")
+    scheduler = ScanScheduler(dict(SCAN_SCHEDULER_CONFIG, request_budget_per_min=12))
+    scheduler.sync_universe(SYMBOLS, tickers(), now=0)
+    assert scheduler.budget_per_min == 12 and scheduler._budget_warned  # 200 пар раз в 600 с - нужно 20/мин
+    print("   ✅ OK")
+
+
+def test_error_backoff_survives_sync():
+    print("🔍 ТЕСТ ПАУЗЫ ПОСЛЕ ОШИБКИ")
+    scheduler = ScanScheduler()
+    symbol, snapshot = 'S000USDT', tickers()
+    scheduler.sync_universe([symbol], snapshot, now=0)
+    assert scheduler.next_batch(0) == [symbol]
+    scheduler.record_results({'neutral_pairs': [analysis(symbol, 0)]}, 0)
+    failed_at = 10 * SCAN_SCHEDULER_CONFIG['max_interval_sec']  # Пара давно просрочена
+    scheduler.record_results({'errors': [symbol]}, failed_at)
+    scheduler.sync_universe([symbol], snapshot, now=failed_at + 1)  # Каждый тик пересчитывает интервалы
+    assert scheduler.next_batch(failed_at + 1) == []
+    assert scheduler.next_batch(failed_at + SCAN_SCHEDULER_CONFIG['min_interval_sec']) == [symbol]
+    print("   ✅ OK")
+
+
+def test_scanner_scheduled_tick():
+    print("🔍 ТЕСТ ТИКА СКАНЕРА С ПЛАНИРОВЩИКОМ")
+    symbols = [f"Q{i:03d}USDT" for i in range(40)]
+    exchange = SlowExchange(symbols)
+    exchange.get_account_info = lambda: {'balances': [{'asset': 'Q039', 'free': '5', 'locked': '0'}]}
+    scanner = make_scanner(exchange, pipeline_config())
+    scanner.scheduler = ScanScheduler(dict(SCAN_SCHEDULER_CONFIG, request_budget_per_min=10))
+
+    results = asyncio.run(scanner.scan_market_async())
+    assert results['analyzed_pairs'] == int(scanner.scheduler.capacity)
+    assert scanner.held_symbols == ['Q039USDT']
+    assert 'Q039USDT' in {a['symbol'] for g in ('buy_opportunities', 'neutral_pairs', 'blocked_pairs')
+                          for a in results[g]}  # позиция сканируется в первую очередь
+    assert results['scheduler']['symbols'] == len(symbols)
+    assert "Планировщик" in scanner.format_scan_report(results)
+    print(f"   ✅ {results['analyzed_pairs']} пар за тик, {results['scheduler']}")
+
+
+def test_scheduler_uses_prefilter():
+    print("🔍 ТЕСТ ПРЕФИЛЬТРА ДЛЯ ПЛАНИРОВЩИКА")
+    symbols = [f"Q{i:03d}USDT" for i in range(40)]
+    exchange = SlowExchange(symbols)
+    exchange.get_account_info = lambda: {'balances': []}
+    scanner = make_scanner(exchange, pipeline_config())
+    scanner.scheduler = ScanScheduler()
+    scanner.prefilter_config = dict(scanner.prefilter_config, enabled=True, top_k=10)
+    results = asyncio.run(scanner.scan_market_async())
+    assert results['scheduler']['symbols'] == 10 and results['prefilter']['pruned'] == 30
+    print("   ✅ OK")
+
+
+def test_auto_buy_on_scan_cadence():
+    print("🔍 ТЕСТ ЧАСТОТЫ АВТОПОКУПОК")
+    scanner = make_scanner(SlowExchange(['Q000USDT']), pipeline_config())
+    scanner.scheduler = ScanScheduler()
+    scanner.record_scan_history = lambda scan_results: None
+    scanner.send_telegram_message = lambda message: None
+    scanner.format_scan_report = lambda scan_results: ""
+    calls = []
+
+    async def auto_buy(scan_results):
+        calls.append(len(scan_results['buy_opportunities']))
+    scanner.auto_buy_opportunities = auto_buy
+
+    def tick(opportunities):
+        results = scanner.new_scan_results(1)
+        results['buy_opportunities'] = opportunities
+        asyncio.run(scanner.publish_scan_results(results))
+
+    opportunity = {'symbol': 'Q000USDT', 'score': 5}
+    tick([opportunity])
+    tick([opportunity])  # Следующий тик планировщика - та же пара не покупается повторно
+    assert calls == [1]
+    scanner._last_auto_buy_at -= scanner.scan_interval
+    tick([opportunity])
+    assert calls == [1, 1]
+    print("   ✅ OK")
+
+
+if __name__ == "__main__":
+    test_priorities()
+    test_budget_and_faster_rescans()
+    test_fixed_budget_too_small()
+    test_error_backoff_survives_sync()
+    test_scanner_scheduled_tick()
+    test_scheduler_uses_prefilter()
+    test_auto_buy_on_scan_cadence()
+    print("\n✅ Все тесты планировщика пройдены")
@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""
+Тест пула процессов для расчета индикаторов скана
+Сверка с расчетом в текущем процессе, замер IPC; сети не требует
+"""
+
+import asyncio
+import os
+import sys
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import isolated_storage  # noqa: F401 - до импорта config, рабочие файлы бота не трогаем
+import numpy as np
+
+from cache.kline_store import as_window
+from scan_workers import ScanWorkerPool, pack_window, unpack_window
+from technical_indicators import TechnicalIndicators
+from test_kline_store import make_klines
+from test_market_scan_pipeline import SlowExchange, make_scanner, pipeline_config
+
+
+def assert_same(a, b, path=''):
+    if isinstance(a, dict):
+        assert set(a) == set(b), path
+        for key in a:
+            assert_same(a[key], b[key], f"{path}.{key}")
+    elif isinstance(a, float):
+        # Воркер может считать JIT-ядрами, а текущий процесс - numpy: допуск как в эталонном тесте
+        assert abs(a - b) <= 1e-9 * max(1.0, abs(b)) or (np.isnan(a) and np.isnan(b)), f"{path}: {a} != {b}"
+    else:
+        assert a == b, f"{path}: {a} != {b}"
+
+
+def test_pack_roundtrip():
+    print("🔍 ТЕСТ УПАКОВКИ ОКНА")
+    window = as_window(make_klines(100), 'AUSDT', '15m')
+    packed = pack_window(window)
+    assert packed.shape == (6, 100) and packed.flags['C_CONTIGUOUS']
+    restored = unpack_window('AUSDT', '15m', packed)
+    assert (restored.ts == window.ts).all() and restored.ts.dtype == np.int64
+    assert (restored.close == window.close).all()
+    print(f"   ✅ {packed.nbytes} байт на окно из 100 свечей")
+
+
+def test_pool_backend_follows_config():
+    print("🔍 ТЕСТ БЭКЕНДА ЯДЕР В ВОРКЕРАХ")
+    import indicator_kernels
+    registry = indicator_kernels.KernelRegistry('auto')  # JIT еще не прогрет - вызовы идут в numpy
+    saved, indicator_kernels.kernels = indicator_kernels.kernels, registry
+    try:
+        assert registry.backend == 'numpy'
+        assert ScanWorkerPool(workers=1).backend == 'auto'  # Воркеры получают запрошенный бэкенд
+        assert ScanWorkerPool(workers=1, backend='numpy').backend == 'numpy'
+    finally:
+        indicator_kernels.kernels = saved
+    print("   ✅ OK")
+
+
+def test_pool_matches_in_process():
+    print("🔍 ТЕСТ СОВПАДЕНИЯ С РАСЧЕТОМ В ПРОЦЕССЕ")
+    pool = ScanWorkerPool(workers=2)
+    try:
+        pids = pool.warmup()
+        assert len(pids) == 2 and os.getpid() not in pids
+        local = TechnicalIndicators()
+        for seed in range(1, 6):
+            window = as_window(make_klines(100, seed=seed), 'AUSDT', '15m')
+            assert_same(pool.compute_indicators(window, 'AUSDT'), local.calculate_all_indicators(window, 'AUSDT'))
+        stats = pool.get_stats()
+        assert stats['calls'] == 5 and stats['compute_sec'] > 0 and stats['roundtrip_sec'] >= stats['compute_sec']
+        print(f"   ✅ прогрев {stats['warmup_sec']:.1f} сек, расчет {stats['avg_compute_ms']:.2f} мс, "
+              f"IPC {stats['avg_ipc_ms']:.2f} мс на символ")
+    finally:
+        pool.close()
+
+
+def test_pipeline_with_process_pool():
+    print("🔍 ТЕСТ КОНВЕЙЕРА С ПУЛОМ ПРОЦЕССОВ")
+    symbols = [f"T{i:02d}USDT" for i in range(12)]
+    reference = asyncio.run(make_scanner(SlowExchange(symbols), pipeline_config()).pipeline.run())
+
+    scanner = make_scanner(SlowExchange(symbols), pipeline_config())
+    scanner.cpu_pool = ScanWorkerPool(workers=2)
+    try:
+        scanner.start_cpu_pool()
+        results = asyncio.run(scanner.pipeline.run())
+    finally:
+        scanner.cpu_pool.close()
+
+    scores = lambda r: {a['symbol']: (a['score'], a['reasons']) for g in ('buy_opportunities', 'neutral_pairs',
+                                                                          'blocked_pairs') for a in r[g]}
+    assert scores(results) == scores(reference)
+    assert results['cpu_pool']['calls'] == len(symbols)
+    assert "Индикаторы в процессах" in scanner.format_scan_report(results)
+    print(f"   ✅ скоры совпадают, {results['cpu_pool']['calls']} расчетов в процессах")
+
+
+if __name__ == "__main__":
+    test_pack_roundtrip()
+    test_pool_backend_follows_config()
+    test_pool_matches_in_process()
+    test_pipeline_with_process_pool()
+    print("\n✅ Все тесты пула процессов пройдены")
@@ -0,0 +1,163 @@
+#!/usr/bin/env python3
+"""
+Тест декларативного скоринга: совпадение с прежней цепочкой if/elif
+Не требует API ключей и сети
+"""
+
+import copy
+import os
+import random
+import sys
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config import SCORING_RULES_CONFIG
+from scoring_rules import ScoringEngine
+
+
+def legacy_score_pair(symbol, current_price, indicators, filter_result):
+    """Прежняя реализация MarketScanner.score_pair (эталон)"""
+    score = 0
+    reasons = []
+    rsi = indicators.get('rsi', 50)
+    if rsi < 30:
+        score += 3
+        reasons.append("перепродано")
+    elif rsi < 45:
+        score += 2
+        reasons.append("низкий_rsi")
+    elif rsi > 70:
+        score -= 1
+        reasons.append("перекуплено")
+    volume_ratio = indicators.get('volume_ratio', 1.0)
+    if volume_ratio > 1.5:
+        score += 2
+        reasons.append("высокий_объем")
+    elif volume_ratio > 1.2:
+        score += 1
+        reasons.append("нормальный_объем")
+    macd_signal = indicators.get('macd_signal', 'NEUTRAL')
+    if macd_signal == 'BUY':
+        score += 2
+        reasons.append("macd_buy")
+    elif macd_signal == 'SELL':
+        score -= 1
+        reasons.append("macd_sell")
+    bb_position = indicators.get('bb_position', 0.5)
+    if bb_position < 0.2:
+        score += 2
+        reasons.append("bb_нижняя")
+    elif bb_position > 0.8:
+        score -= 1
+        reasons.append("bb_верхняя")
+    stoch_rsi_signal = indicators.get('stoch_rsi_signal', 'neutral')  # Поля без правил - только в результат
+    keltner_signal = indicators.get('keltner_signal', 'inside')
+    adx = indicators.get('adx', 0.0)
+    raw_score = score
+    if not filter_result['allowed']:
+        score = -10
+        reasons.append(f"блокирован_{filter_result['reason']}")
+    confidence = max(0.1, min(0.9, (score + 5) / 10))
+    return {
+        'symbol': symbol, 'price': current_price, 'score': score, 'raw_score': raw_score,
+        'confidence': confidence, 'reasons': reasons, 'rsi': rsi, 'volume_ratio': volume_ratio,
+        'macd_signal': macd_signal, 'bb_position': bb_position, 'stoch_rsi_signal': stoch_rsi_signal,
+        'keltner_signal': keltner_signal, 'adx': adx,
+        'vwap_deviation': indicators.get('vwap_deviation', 0.0),
+        'filter_result': filter_result, 'indicators': indicators,
+    }
+
+
+def random_indicators(rng):
+    """Случайные индикаторы с упором на граничные значения порогов"""
+    indicators = {}
+    if rng.random() < 0.5:  # Ключ 'rsi' есть не всегда (расчет пишет rsi_14)
+        indicators['rsi'] = rng.choice([29.999, 30, 30.001, 44.9, 45, 70, 70.001, rng.uniform(0, 100)])
+    if rng.random() < 0.9:
+        indicators['volume_ratio'] = rng.choice([1.2, 1.2000001, 1.5, 1.5000001, rng.uniform(0, 3)])
+    if rng.random() < 0.9:
+        indicators['macd_signal'] = rng.choice(['BUY', 'SELL', 'buy', 'sell', 'neutral'])
+    if rng.random() < 0.9:
+        indicators['bb_position'] = rng.choice([0.2, 0.1999, 0.8, 0.8001, rng.random()])
+    if rng.random() < 0.9:
+        indicators['stoch_rsi_signal'] = rng.choice(['oversold', 'overbought', 'neutral'])
+    if rng.random() < 0.9:
+        indicators['keltner_signal'] = rng.choice(['below', 'above', 'inside'])
+    if rng.random() < 0.9:
+        indicators['adx'] = rng.choice([24.999, 25, 25.001, rng.uniform(0, 60)])
+    if rng.random() < 0.5:
+        indicators['vwap_deviation'] = rng.uniform(-5, 5)
+    return indicators
+
+
+def random_filter(rng):
+    if rng.random() < 0.2:
+        return {'allowed': False, 'reason': rng.choice(['памп', 'дневной_максимум'])}
+    return {'allowed': True, 'reason': 'ok'}
+
+
+def test_matches_legacy():
+    print("🔍 ТЕСТ СОВПАДЕНИЯ С ЦЕПОЧКОЙ IF/ELIF")
+    rng = random.Random(7)
+    engine = ScoringEngine()
+    items = [(f"S{i}USDT", rng.uniform(0.01, 100), random_indicators(rng), random_filter(rng)) for i in range(3000)]
+    results = engine.score_batch(items)
+    for item, result in zip(items, results):
+        expected = legacy_score_pair(*item)
+        contributions = result.pop('contributions')
+        assert result == expected, (item, result, expected)
+        assert type(result['score']) is type(expected['score'])
+        assert list(contributions) == [r for r in expected['reasons'] if not r.startswith('блокирован_')]
+        assert sum(contributions.values()) == expected['raw_score']
+    print(f"   ✅ {len(items)} пар совпадают (скор, причины, уверенность)")
+
+
+def test_single_and_empty():
+    print("🔍 ТЕСТ ОДНОЙ ПАРЫ И ПУСТОЙ ПАЧКИ")
+    engine = ScoringEngine()
+    assert engine.score_batch([]) == []
+    result = engine.score_batch([('AUSDT', 1.0, {}, {'allowed': True, 'reason': 'ok'})])[0]
+    assert result['score'] == 0 and result['reasons'] == [] and result['confidence'] == 0.5
+    print("   ✅ OK")
+
+
+def test_rules_from_config():
+    print("🔍 ТЕСТ ИЗМЕНЕНИЯ ПРАВИЛ ЧЕРЕЗ КОНФИГ")
+    config = copy.deepcopy(SCORING_RULES_CONFIG)
+    config['rules'].append({'name': 'ниже_vwap', 'when': [('vwap_deviation', '<=', -2)], 'weight': 2,
+                            'explain': 'Цена ниже VWAP на {vwap_deviation:.1f}%'})
+    engine = ScoringEngine(config)
+    result = engine.score_batch([('AUSDT', 1.0, {'vwap_deviation': -3.0}, {'allowed': True, 'reason': 'ok'})])[0]
+    assert result['score'] == 2 and result['reasons'] == ['ниже_vwap']
+    assert engine.explain(result) == [('Цена ниже VWAP на -3.0%', 2)]
+
+    config['rules'].append({'name': 'плохое', 'when': [('нет_поля', '<', 1)], 'weight': 1})
+    try:
+        ScoringEngine(config)
+        raise AssertionError("неизвестное поле должно отклоняться")
+    except ValueError:
+        pass
+    print("   ✅ OK")
+
+
+def test_explain():
+    print("🔍 ТЕСТ ОБЪЯСНЕНИЯ ПО ВКЛАДАМ")
+    config = copy.deepcopy(SCORING_RULES_CONFIG)
+    config['rules'].append({'name': 'ниже_кельтнера', 'when': [('keltner_signal', '==', 'below'), ('adx', '<', 25)],
+                            'weight': 1, 'explain': 'Цена под каналом Кельтнера при слабом тренде (ADX {adx:.0f})'})
+    engine = ScoringEngine(config)
+    result = engine.score_batch([('AUSDT', 1.0, {'rsi': 25, 'keltner_signal': 'below', 'adx': 12.4},
+                                  {'allowed': True, 'reason': 'ok'})])[0]
+    assert result['contributions'] == {'перепродано': 3, 'ниже_кельтнера': 1}
+    lines = engine.explain(result)
+    assert lines[0] == ('RSI < 30 — перепроданность, ожидаем технический отскок', 3)
+    assert 'ADX 12' in lines[1][0] and lines[1][1] == 1
+    print("   ✅ OK")
+
+
+if __name__ == "__main__":
+    test_matches_legacy()
+    test_single_and_empty()
+    test_rules_from_config()
+    test_explain()
+    print("\n✅ Все тесты декларативного скоринга пройдены")
@@ -6,6 +6,7 @@
 import asyncio
 import logging
 from datetime import datetime
+import isolated_storage  # noqa: F401 - до импорта config, рабочие файлы бота не трогаем
 from market_scanner import MarketScanner
 
 # Настройка логирования
@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+"""
+Тест менеджера торговой вселенной
+Фейковые exchangeInfo и 24h тикеры; сети и API ключей не требует
+"""
+
+import copy
+import os
+import sys
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from universe_manager import UniverseManager, split_symbol
+
+
+def entry(base, quote, status='1', step='0.01'):
+    return {'symbol': f"{base}{quote}", 'baseAsset': base, 'quoteAsset': quote, 'status': status,
+            'filters': [{'filterType': 'LOT_SIZE', 'minQty': '0.1', 'stepSize': step}]}
+
+
+class FakeExchange:
+    """Фейковый API: exchangeInfo и 24h тикеры, подсчет запросов"""
+
+    def __init__(self):
+        self.entries = [entry('SOL', 'USDT'), entry('SOL', 'USDC'), entry('DOGE', 'USDC'),
+                        entry('PEPE', 'USDT'), entry('XLM', 'USDT'), entry('DEAD', 'USDT', status='2'),
+                        entry('USDC', 'USDT'), entry('ETH', 'BTC'), entry('WBTC', 'USDT')]
+        self.volumes = {'SOLUSDT': 5e6, 'SOLUSDC': 1e6, 'DOGEUSDC': 2e6, 'PEPEUSDT': 9e6,
+                        'XLMUSDT': 8e6, 'DEADUSDT': 7e6, 'USDCUSDT': 3e6, 'ETHBTC': 4e6, 'WBTCUSDT': 5e3}
+        self.calls = {'exchange_info': 0, 'tickers': 0}
+
+    def get_exchange_info(self):
+        self.calls['exchange_info'] += 1
+        return {'symbols': copy.deepcopy(self.entries)}
+
+    def get_24hr_ticker(self, symbol=None):
+        self.calls['tickers'] += 1
+        tickers = [{'symbol': s, 'quoteVolume': str(v), 'lastPrice': '1.0'} for s, v in self.volumes.items()]
+        tickers.append({'symbol': 'GHOSTUSDT', 'quoteVolume': '1e9', 'lastPrice': '1.0'})  # Нет в exchangeInfo
+        return tickers
+
+
+def test_indexes_and_lookups():
+    print("🔍 ТЕСТ ИНДЕКСОВ И ПОИСКА")
+    exchange = FakeExchange()
+    universe = UniverseManager(exchange, excluded=['XLMUSDT'])
+    assert universe.refresh()
+
+    # Топ по объему: без исключенных, неторгуемых, чужой котировки и малого объема
+    assert universe.top_by_volume(10, 'USDT', min_quote_volume=10000) == ['PEPEUSDT', 'SOLUSDT', 'USDCUSDT']
+    assert universe.top_by_volume(2, 'USDT') == ['PEPEUSDT', 'SOLUSDT']
+    assert universe.get('SOLUSDT').volume_rank == 1 and universe.get('XLMUSDT').volume_rank is None
+
+    assert universe.resolve('SOL') == 'SOLUSDT'
+    assert universe.resolve('DOGE') == 'DOGEUSDC'  # USDT-пары нет - USDC
+    assert universe.resolve('DOGE', ('USDT',)) is None
+    assert universe.resolve('DEAD') is None        # Не торгуется
+    assert universe.resolve('XLM') == 'XLMUSDT'    # Исключение касается только скана
+    assert universe.symbols_by_base('SOL') == ['SOLUSDC', 'SOLUSDT']
+    assert 'DEADUSDT' not in universe.symbols_by_quote('USDT')
+    assert universe.symbols_by_status('2') == ['DEADUSDT']
+    assert universe.get('GHOSTUSDT') is None
+    assert universe.ticker_snapshot['GHOSTUSDT']['quoteVolume'] == '1e9'
+
+    assert universe.to_v2('USDCUSDT') == 'USDC_USDT' and universe.to_v2('ETHBTC') == 'ETH_BTC'
+    assert universe.to_v2('NEWUSDC') == 'NEW_USDC'  # Нет во вселенной - по суффиксу
+    assert universe.symbol_rules('SOLUSDT')['stepSize'] == 0.01
+    assert universe.symbol_rules('NOPEUSDT') == {}
+    print("   ✅ OK")
+
+
+def test_incremental_refresh():
+    print("🔍 ТЕСТ ИНКРЕМЕНТАЛЬНОГО ОБНОВЛЕНИЯ")
+    exchange = FakeExchange()
+    universe = UniverseManager(exchange, config={'exchange_info_ttl_sec': 3600}, excluded=[])
+    universe.refresh()
+    universe.refresh()
+    assert exchange.calls == {'exchange_info': 1, 'tickers': 2}  # exchangeInfo - по TTL
+
+    sol = universe.get('SOLUSDC')
+    exchange.entries = [e for e in exchange.entries if e['symbol'] != 'PEPEUSDT']
+    exchange.entries.append(entry('NEW', 'USDT'))
+    exchange.entries[0]['status'] = '2'  # SOLUSDT остановлен
+    exchange.volumes['NEWUSDT'] = 6e6
+    changes = universe.apply_exchange_info(exchange.get_exchange_info())
+    assert changes == {'added': 1, 'removed': 1, 'changed': 1}, changes
+    assert universe.get('SOLUSDC') is sol  # Неизменившиеся пары не пересоздаются
+    assert universe.get('PEPEUSDT') is None and universe.resolve('SOL') == 'SOLUSDC'
+    assert universe.get('SOLUSDT').quote_volume == 5e6  # Рыночные данные сохранены
+
+    universe.refresh()
+    assert universe.top_by_volume(10, 'USDT') == ['XLMUSDT', 'NEWUSDT', 'USDCUSDT', 'WBTCUSDT']
+    print("   ✅ OK")
+
+
+def test_ticker_only_fallback():
+    print("🔍 ТЕСТ ВСЕЛЕННОЙ БЕЗ EXCHANGEINFO")
+
+    class TickersOnly:
+        def get_24hr_ticker(self, symbol=None):
+            return [{'symbol': 'AUSDT', 'quoteVolume': '2e6', 'lastPrice': '1'},
+                    {'symbol': 'BUSDT', 'quoteVolume': '3e6', 'lastPrice': '1'},
+                    {'symbol': 'CUSDC', 'quoteVolume': '9e6', 'lastPrice': '1'}]
+
+    universe = UniverseManager(TickersOnly(), excluded=['BUSDT'])
+    assert universe.refresh() and not universe.exchange_info_loaded
+    assert universe.top_by_volume(10, 'USDT') == ['AUSDT']
+    assert universe.resolve('C') == 'CUSDC'
+    assert split_symbol('USDCUSDT', ('USDT', 'USDC')) == ('USDC', 'USDT')
+    assert split_symbol('BTC_USDT', ('USDT',)) == ('BTC', 'USDT')
+    print("   ✅ OK")
+
+
+if __name__ == "__main__":
+    test_indexes_and_lookups()
+    test_incremental_refresh()
+    test_ticker_only_fallback()
+    print("\n✅ Все тесты вселенной пройдены")
@@ -6,6 +6,7 @@
 
 import sys
 import logging
+import isolated_storage  # noqa: F401 - до импорта config, рабочие файлы бота не трогаем
 from balance_monitor import BalanceMonitor
 from market_scanner import MarketScanner
 from active_50_50_balancer import Active5050Balancer
@@ -0,0 +1,183 @@
+#!/usr/bin/env python3
+"""
+Тест таблицы готовых вердиктов анти-хайп фильтра
+Фейковый фильтр со счетчиком проверок; сети и API ключей не требует
+"""
+
+import os
+import sys
+import threading
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from cache.daily_extremes import DailyExtremesTracker
+from verdict_table import VerdictTable
+
+CONFIG = {'interval': '1h', 'settle_sec': 5.0, 'max_watched': 3}
+HOUR_SEC = 3600
+
+
+class CountingFilter:
+    """Фейковый фильтр: блокирует символы на 'X', считает проверки"""
+
+    def __init__(self, delay=0.0):
+        self.checked = []
+        self.delay = delay
+
+    def _verdict(self, symbol):
+        self.checked.append(symbol)
+        allowed = not symbol.startswith('X')
+        return {'allowed': allowed, 'multiplier': 1.0 if allowed else 0.0, 'reason': 'fake',
+                'block_type': 'normal_buy' if allowed else 'impulse_block'}
+
+    def check_buy_permission(self, symbol):
+        return self._verdict(symbol)
+
+    def check_buy_permission_batch(self, symbols, max_workers=8):
+        time.sleep(self.delay)
+        return {symbol: self._verdict(symbol) for symbol in symbols}
+
+
+def test_snapshot_reads_and_fallback():
+    print("🔍 ТЕСТ ЧТЕНИЯ СНИМКА И СИНХРОННОЙ ПРОВЕРКИ НЕДОСТАЮЩИХ")
+    universe = CountingFilter()
+    table = VerdictTable(universe, symbols_fn=lambda: ['AUSDT', 'XUSDT'], config=CONFIG)
+    assert table.check_buy_permission('AUSDT')['allowed']  # Снимка еще нет - синхронно
+    snapshot = table.refresh()
+    assert snapshot.generation == 1 and set(snapshot.verdicts) == {'AUSDT', 'XUSDT'}  # AUSDT уже в наблюдении
+    universe.checked.clear()
+
+    verdict = table.check_buy_permission('XUSDT')
+    assert verdict['block_type'] == 'impulse_block' and not universe.checked
+    verdict['allowed'] = True  # Копия: снимок не меняется
+    assert not table.check_buy_permission('XUSDT')['allowed']
+    try:
+        snapshot.verdicts['XUSDT']['allowed'] = True
+        raise AssertionError("снимок изменяемый")
+    except TypeError:
+        pass
+
+    own = CountingFilter()
+    results = table.check_buy_permission_batch(['XUSDT', 'BUSDT', 'AUSDT'], fallback=own)
+    assert list(results) == ['XUSDT', 'BUSDT', 'AUSDT'] and own.checked == ['BUSDT']
+    assert table.refresh().verdicts.keys() >= {'BUSDT'}  # Недостающий символ вошел в пересчет
+    stats = table.get_stats()
+    assert stats['hits'] == 4 and stats['misses'] == 2 and stats['generation'] == 2
+    print("   ✅ OK")
+
+
+def test_stale_snapshot_not_used():
+    print("🔍 ТЕСТ УСТАРЕВШЕГО СНИМКА")
+    fake = CountingFilter()
+    table = VerdictTable(fake, symbols_fn=lambda: ['AUSDT'], config=CONFIG)
+    boundary = 1_700_000_000 - 1_700_000_000 % HOUR_SEC
+    snapshot = table.refresh(now=boundary + 10)
+    assert snapshot.get('AUSDT', now=boundary + HOUR_SEC + 9) is not None  # Пауза после следующей границы
+    assert snapshot.get('AUSDT', now=boundary + HOUR_SEC + 11) is None
+    fake.checked.clear()
+    table.check_buy_permission('AUSDT')  # Реальное время далеко после снимка
+    assert fake.checked == ['AUSDT']
+    table.watch(['B', 'C', 'D', 'E'])
+    assert list(table._watched) == ['C', 'D', 'E']  # Список наблюдения ограничен
+    print("   ✅ OK")
+
+
+def test_readers_not_blocked_by_refresh():
+    print("🔍 ТЕСТ ЧТЕНИЯ ВО ВРЕМЯ ПЕРЕСЧЕТА")
+    fake = CountingFilter(delay=0.3)
+    symbols = [f"S{i}USDT" for i in range(200)]
+    table = VerdictTable(fake, symbols_fn=lambda: symbols, config=CONFIG)
+    table.refresh()
+    refresher = threading.Thread(target=table.refresh)
+    refresher.start()
+    time.sleep(0.05)
+    started = time.perf_counter()
+    reads = 20_000
+    for i in range(reads):
+        table.check_buy_permission(symbols[i % len(symbols)])
+    per_read_us = (time.perf_counter() - started) / reads * 1e6
+    refreshing = refresher.is_alive()
+    refresher.join()
+    assert refreshing and per_read_us < 50, per_read_us
+    assert table.snapshot.generation == 2
+    print(f"   ✅ {per_read_us:.2f} мкс на чтение во время пересчета")
+
+
+def test_background_worker():
+    print("🔍 ТЕСТ ФОНОВОГО ПЕРЕСЧЕТА")
+    table = VerdictTable(CountingFilter(), symbols_fn=lambda: ['AUSDT'], config=CONFIG)
+    table.start()
+    deadline = time.time() + 5
+    while table.snapshot is None and time.time() < deadline:
+        time.sleep(0.01)
+    table.stop()
+    assert table.snapshot is not None and table.check_buy_permission('AUSDT')['allowed']
+    print("   ✅ OK")
+
+
+class TrackedFilter(CountingFilter):
+    """Фейковый фильтр с трекером дневных хаев и порогами защиты от хая"""
+    daily_high_block_threshold = 0.002
+    daily_high_safety_margin = 0.01
+    result_cache_ttl = 120
+
+    def __init__(self):
+        super().__init__()
+        self.daily_extremes = DailyExtremesTracker()
+
+
+class FakePrices:
+    def __init__(self, prices):
+        self.prices = prices
+        self.calls = 0
+
+    def get_ticker_price(self, symbol):
+        self.calls += 1
+        return {'symbol': symbol, 'price': str(self.prices[symbol])} if symbol in self.prices else {}
+
+    def get_24hr_ticker(self, symbol=None):
+        self.calls += 1
+        return [{'symbol': s, 'lastPrice': str(p)} for s, p in self.prices.items()]
+
+
+def test_live_daily_high_recheck():
+    print("🔍 ТЕСТ ПЕРЕПРОВЕРКИ ДНЕВНОГО ХАЯ ПО ЖИВОЙ ЦЕНЕ")
+    fake, prices = TrackedFilter(), FakePrices({'AUSDT': 100.0, 'BUSDT': 100.0})
+    table = VerdictTable(fake, symbols_fn=lambda: ['AUSDT', 'BUSDT', 'CUSDT', 'XUSDT'], config=CONFIG,
+                         price_source=prices)
+    fake.daily_extremes.update_from_tickers([{'symbol': s, 'lastPrice': '100', 'highPrice': '110', 'lowPrice': '90'}
+                                             for s in ('AUSDT', 'BUSDT')])
+    snapshot = table.refresh()
+    assert table.check_buy_permission('AUSDT')['multiplier'] == 1.0  # 9% до хая
+    prices.prices['AUSDT'] = 109.9  # Памп внутри свечи, до хая 0.09%
+    verdict = table.check_buy_permission('AUSDT')
+    assert not verdict['allowed'] and verdict['block_type'] == 'daily_high_full_block'
+    assert snapshot.verdicts['AUSDT']['allowed']  # Снимок не меняется
+
+    prices.prices['BUSDT'] = 109.0  # До хая 0.9% - ограничение множителя
+    fake.daily_extremes.update('AUSDT', 112.0)  # Новый хай: AUSDT снова дальше 1%
+    fake.checked.clear()
+    results = table.check_buy_permission_batch(['AUSDT', 'BUSDT'])
+    assert results['AUSDT']['allowed'] and results['AUSDT']['multiplier'] == 1.0
+    assert abs(results['BUSDT']['multiplier'] - 0.3) < 1e-12 and not fake.checked
+
+    # Разрешение живет не дольше кэша результатов фильтра - и с живой ценой и хаем, и без них
+    boundary = 1_700_000_000 - 1_700_000_000 % HOUR_SEC
+    snapshot = table.refresh(now=boundary + 10)
+    for symbol in ('AUSDT', 'CUSDT'):
+        assert table._read(snapshot, symbol, boundary + 100) is not None
+        assert table._read(snapshot, symbol, boundary + 10 + 120) is None
+    assert not table._read(snapshot, 'XUSDT', boundary + 10 + 120)['allowed']  # Блокировка - до конца снимка
+    stats = table.get_stats()
+    assert stats['live_blocks'] == 1 and stats['expired'] == 2
+    print("   ✅ OK")
+
+
+if __name__ == "__main__":
+    test_snapshot_reads_and_fallback()
+    test_stale_snapshot_not_used()
+    test_readers_not_blocked_by_refresh()
+    test_background_worker()
+    test_live_daily_high_recheck()
+    print("\n✅ Все тесты таблицы вердиктов пройдены")
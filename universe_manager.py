@@ -0,0 +1,329 @@
+#!/usr/bin/env python3
+"""
+Менеджер торговой вселенной
+Единый кэш метаданных торговых пар: строится из exchangeInfo и 24h тикеров
+и заменяет независимые поиски пар в сканере, мониторе альтов и утилитах.
+Индексы по базовому и котируемому активу, статусу и рангу объема,
+готовые v2-символы (BTC_USDT) и EXCLUDED_SYMBOLS, примененный один раз.
+exchangeInfo перечитывается редко и вливается инкрементально (обновляются
+только изменившиеся пары), тикеры - на каждом обновлении вселенной.
+"""
+
+import logging
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, List, Optional, Sequence, Set, Tuple
+
+from config import EXCLUDED_SYMBOLS, UNIVERSE_CONFIG
+from mexc_advanced_api import parse_symbol_rules
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class SymbolInfo:
+    """Метаданные торговой пары"""
+    symbol: str
+    base: str
+    quote: str
+    status: str = 'UNKNOWN'
+    tradable: bool = True
+    excluded: bool = False
+    v2_symbol: str = ''
+    quote_volume: float = 0.0
+    last_price: float = 0.0
+    volume_rank: Optional[int] = None  # Ранг по объему среди пар той же котировки (0 - максимальный)
+    rules: Dict = field(default_factory=dict)
+    raw: Dict = field(default_factory=dict)
+
+    @property
+    def scannable(self) -> bool:
+        """Пара участвует в скане: торгуется и не исключена"""
+        return self.tradable and not self.excluded
+
+
+def split_symbol(symbol: str, quotes: Sequence[str]) -> Tuple[str, str]:
+    """Разбор символа без exchangeInfo: (база, котировка) по известным суффиксам"""
+    if '_' in symbol:
+        base, _, quote = symbol.partition('_')
+        return base, quote
+    for quote in quotes:
+        if symbol.endswith(quote) and len(symbol) > len(quote):
+            return symbol[:-len(quote)], quote
+    return symbol, ''
+
+
+class UniverseManager:
+    """Кэш торговых пар с индексами для O(1) поиска"""
+
+    def __init__(self, mex_api=None, config: Optional[Dict] = None,
+                 excluded: Optional[Iterable[str]] = None):
+        """
+        Args:
+            mex_api: Клиент с get_exchange_info() и get_24hr_ticker() (по умолчанию MexAPI)
+            config: Параметры обновления (по умолчанию UNIVERSE_CONFIG)
+            excluded: Символы, исключенные из скана (по умолчанию EXCLUDED_SYMBOLS)
+        """
+        if mex_api is None:
+            from mex_api import MexAPI
+            mex_api = MexAPI()
+        self.mex_api = mex_api
+        self.config = config or UNIVERSE_CONFIG
+        self.quotes: Tuple[str, ...] = tuple(self.config.get('quotes', ('USDT', 'USDC', 'BTC', 'ETH')))
+        self.trading_statuses = {str(s) for s in self.config.get('trading_statuses', ('1', 'TRADING', 'ENABLED'))}
+        self.excluded: Set[str] = set(EXCLUDED_SYMBOLS if excluded is None else excluded)
+
+        self._lock = threading.RLock()
+        self.symbols: Dict[str, SymbolInfo] = {}
+        self.ticker_snapshot: Dict[str, Dict] = {}
+        # Индексы
+        self._by_base: Dict[str, Set[str]] = {}
+        self._by_quote: Dict[str, Set[str]] = {}
+        self._by_status: Dict[str, Set[str]] = {}
+        self._pairs: Dict[Tuple[str, str], str] = {}
+        self._v2: Dict[str, str] = {}
+        self._ranked: Dict[str, List[str]] = {}  # котировка -> пары по убыванию объема
+
+        self.exchange_info_loaded = False
+        self._exchange_info_at = 0.0
+        self._tickers_at = 0.0
+        self.stats = {'exchange_info_refreshes': 0, 'ticker_refreshes': 0,
+                      'added': 0, 'removed': 0, 'changed': 0}
+
+    ############################################################
+    # 🗂️ ИНДЕКСЫ
+    ############################################################
+    def _index(self, info: SymbolInfo):
+        self._by_base.setdefault(info.base, set()).add(info.symbol)
+        self._by_quote.setdefault(info.quote, set()).add(info.symbol)
+        self._by_status.setdefault(info.status, set()).add(info.symbol)
+        self._pairs[(info.base, info.quote)] = info.symbol
+        self._v2[info.symbol] = info.v2_symbol
+
+    def _unindex(self, info: SymbolInfo):
+        for index, key in ((self._by_base, info.base), (self._by_quote, info.quote),
+                           (self._by_status, info.status)):
+            members = index.get(key)
+            if members is not None:
+                members.discard(info.symbol)
+                if not members:
+                    del index[key]
+        if self._pairs.get((info.base, info.quote)) == info.symbol:
+            del self._pairs[(info.base, info.quote)]
+        self._v2.pop(info.symbol, None)
+
+    def _put(self, info: SymbolInfo):
+        old = self.symbols.get(info.symbol)
+        if old is not None:
+            self._unindex(old)
+            # Рыночные данные переживают обновление exchangeInfo
+            info.quote_volume, info.last_price, info.volume_rank = old.quote_volume, old.last_price, old.volume_rank
+        self.symbols[info.symbol] = info
+        self._index(info)
+
+    def _remove(self, symbol: str):
+        info = self.symbols.pop(symbol, None)
+        if info is not None:
+            self._unindex(info)
+
+    def _make_info(self, symbol: str, base: str, quote: str, status: str, tradable: bool,
+                   raw: Optional[Dict] = None) -> SymbolInfo:
+        return SymbolInfo(symbol=symbol, base=base, quote=quote, status=status, tradable=tradable,
+                          excluded=symbol in self.excluded, v2_symbol=f"{base}_{quote}" if quote else symbol,
+                          rules=parse_symbol_rules(raw) if raw else {}, raw=raw or {})
+
+    ############################################################
+    # 🔄 ОБНОВЛЕНИЕ
+    ############################################################
+    def apply_exchange_info(self, exchange_info: Dict) -> Dict[str, int]:
+        """Влить exchangeInfo: добавить, удалить и обновить только изменившиеся пары.
+
+        Returns:
+            {'added', 'removed', 'changed'}
+        """
+        entries = (exchange_info or {}).get('symbols') or (exchange_info or {}).get('data') or []
+        incoming = {e['symbol']: e for e in entries if isinstance(e, dict) and e.get('symbol')}
+        if not incoming:
+            return {'added': 0, 'removed': 0, 'changed': 0}
+        with self._lock:
+            added = changed = 0
+            for symbol, entry in incoming.items():
+                old = self.symbols.get(symbol)
+                if old is not None and old.raw == entry:
+                    continue
+                base = entry.get('baseAsset') or split_symbol(symbol, self.quotes)[0]
+                quote = entry.get('quoteAsset') or split_symbol(symbol, self.quotes)[1]
+                status = str(entry.get('status', 'UNKNOWN'))
+                tradable = status in self.trading_statuses and entry.get('isSpotTradingAllowed', True) is not False
+                self._put(self._make_info(symbol, base, quote, status, tradable, entry))
+                if old is None:
+                    added += 1
+                else:
+                    changed += 1
+            # Делистинг: пары, пропавшие из exchangeInfo (включая добавленные по тикерам)
+            removed = [s for s in self.symbols if s not in incoming]
+            for symbol in removed:
+                self._remove(symbol)
+            self.exchange_info_loaded = True
+            self._exchange_info_at = time.time()
+            self.stats['exchange_info_refreshes'] += 1
+            for key, value in (('added', added), ('removed', len(removed)), ('changed', changed)):
+                self.stats[key] += value
+            if added or removed or changed:
+                self._rerank()
+        if removed or (added and self.stats['exchange_info_refreshes'] > 1):
+            logger.info(f"🌐 Вселенная: +{added} / -{len(removed)} пар, изменено {changed}")
+        return {'added': added, 'removed': len(removed), 'changed': changed}
+
+    def apply_tickers(self, tickers: List[Dict]):
+        """Влить 24h тикеры: объемы, цены и ранги объема"""
+        snapshot = {t['symbol']: t for t in tickers or [] if isinstance(t, dict) and 'symbol' in t}
+        with self._lock:
+            self.ticker_snapshot = snapshot
+            for symbol, ticker in snapshot.items():
+                info = self.symbols.get(symbol)
+                if info is None:
+                    if self.exchange_info_loaded:
+                        continue  # Нет в exchangeInfo - не торгуется на споте
+                    # Без exchangeInfo вселенная строится по тикерам
+                    base, quote = split_symbol(symbol, self.quotes)
+                    info = self._make_info(symbol, base, quote, 'UNKNOWN', True)
+                    self._put(info)
+                try:
+                    info.quote_volume = float(ticker.get('quoteVolume') or 0)
+                    info.last_price = float(ticker.get('lastPrice') or 0)
+                except (TypeError, ValueError):
+                    info.quote_volume, info.last_price = 0.0, 0.0
+            self._tickers_at = time.time()
+            self.stats['ticker_refreshes'] += 1
+            self._rerank()
+
+    def _rerank(self):
+        ranked: Dict[str, List[str]] = {}
+        for quote, members in self._by_quote.items():
+            order = sorted((s for s in members if self.symbols[s].scannable),
+                           key=lambda s: (-self.symbols[s].quote_volume, s))
+            for info in (self.symbols[s] for s in members):
+                info.volume_rank = None
+            for rank, symbol in enumerate(order):
+                self.symbols[symbol].volume_rank = rank
+            ranked[quote] = order
+        self._ranked = ranked
+
+    def refresh(self, force_exchange_info: bool = False, tickers: Optional[List[Dict]] = None) -> bool:
+        """Обновить вселенную: exchangeInfo по TTL, тикеры - всегда (или переданные).
+
+        Returns:
+            True, если тикеры получены
+        """
+        self._refresh_exchange_info(force_exchange_info)
+        if tickers is None:
+            try:
+                tickers = self.mex_api.get_24hr_ticker()
+            except Exception as e:
+                logger.error(f"Ошибка получения 24h тикеров: {e}")
+                return False
+        if not isinstance(tickers, list):
+            logger.error("Ошибка получения тикеров")
+            return False
+        self.apply_tickers(tickers)
+        return True
+
+    def _refresh_exchange_info(self, force: bool = False):
+        """Перечитать exchangeInfo, если истек TTL"""
+        if not force and time.time() - self._exchange_info_at < self.config.get('exchange_info_ttl_sec', 3600):
+            return
+        try:
+            self.apply_exchange_info(self.mex_api.get_exchange_info())
+        except Exception as e:
+            logger.warning(f"⚠️ Вселенная: exchangeInfo недоступен: {e}")
+        self._exchange_info_at = time.time()  # При ошибке повтор - через TTL
+
+    def ensure_loaded(self):
+        """Построить вселенную при первом обращении (дальше - exchangeInfo по TTL)"""
+        if not self.symbols:
+            self.refresh()
+        else:
+            self._refresh_exchange_info()
+
+    ############################################################
+    # 🔎 ПОИСК
+    ############################################################
+    def get(self, symbol: str) -> Optional[SymbolInfo]:
+        return self.symbols.get(symbol)
+
+    def is_tradable(self, symbol: str) -> bool:
+        info = self.symbols.get(symbol)
+        return info is not None and info.tradable
+
+    def resolve(self, asset: str, quotes: Sequence[str] = ('USDT', 'USDC')) -> Optional[str]:
+        """Торгуемая пара актива по первой подходящей котировке"""
+        for quote in quotes:
+            symbol = self._pairs.get((asset, quote))
+            if symbol is not None and self.symbols[symbol].tradable:
+                return symbol
+        return None
+
+    def symbol_rules(self, symbol: str) -> Dict:
+        """Правила торговли из закэшированного exchangeInfo ({} - нет данных)"""
+        info = self.symbols.get(symbol)
+        return info.rules if info is not None else {}
+
+    def to_v2(self, symbol: str) -> str:
+        """v3 -> v2 символ (BTCUSDT -> BTC_USDT)"""
+        if '_' in symbol:
+            return symbol
+        v2 = self._v2.get(symbol)
+        if v2:
+            return v2
+        base, quote = split_symbol(symbol, self.quotes)
+        return f"{base}_{quote}" if quote else symbol
+
+    def symbols_by_base(self, asset: str) -> List[str]:
+        return sorted(self._by_base.get(asset, ()))
+
+    def symbols_by_quote(self, quote: str, tradable_only: bool = True) -> List[str]:
+        members = self._by_quote.get(quote, ())
+        return sorted(s for s in members if not tradable_only or self.symbols[s].tradable)
+
+    def symbols_by_status(self, status: str) -> List[str]:
+        return sorted(self._by_status.get(str(status), ()))
+
+    def status_counts(self) -> Dict[str, int]:
+        return {status: len(members) for status, members in self._by_status.items()}
+
+    def top_by_volume(self, limit: int = 200, quote: str = 'USDT', min_quote_volume: float = 0.0) -> List[str]:
+        """Пары для скана (без исключенных) по убыванию 24h объема в котировке"""
+        result = []
+        for symbol in self._ranked.get(quote, ()):
+            if len(result) >= limit or self.symbols[symbol].quote_volume <= min_quote_volume:
+                break
+            result.append(symbol)
+        return result
+
+    def get_stats(self) -> Dict:
+        stats = dict(self.stats)
+        stats['symbols'] = len(self.symbols)
+        stats['tradable'] = sum(1 for info in self.symbols.values() if info.tradable)
+        stats['excluded'] = sum(1 for info in self.symbols.values() if info.excluded)
+        return stats
+
+
+# Глобальная вселенная (создается при первом обращении)
+_universe: Optional[UniverseManager] = None
+_universe_lock = threading.Lock()
+
+
+def get_universe(mex_api=None) -> UniverseManager:
+    """Получить глобальный менеджер вселенной (mex_api - клиент при первом создании)"""
+    global _universe
+    with _universe_lock:
+        if _universe is None:
+            _universe = UniverseManager(mex_api)
+        return _universe
+
+
+def current_universe() -> Optional[UniverseManager]:
+    """Глобальная вселенная, если она уже создана (без сетевых запросов)"""
+    return _universe
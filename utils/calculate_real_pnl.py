@@ -1,7 +1,7 @@
 #!/usr/bin/env python3
 """
-Расчет реального PnL на основе истории ордеров
-Анализирует покупки и продажи для точного расчета прибыли/убытка
+Расчет реального PnL на основе истории сделок
+Средняя цена закупа и реализованный PnL - из общего движка позиций
 """
 
 import time
@@ -9,6 +9,7 @@ import logging
 from datetime import datetime, timedelta
 from typing import Dict, List, Optional, Tuple
 from mex_api import MexAPI
+from position_engine import get_position_engine
 from config import TELEGRAM_BOT_TOKEN, TELEGRAM_CHAT_ID
 import requests
 
@@ -18,6 +19,7 @@ logger = logging.getLogger(__name__)
 class RealPnLCalculator:
     def __init__(self):
         self.mex_api = MexAPI()
+        self.positions = get_position_engine()  # Позиции по средней цене закупа
         self.bot_token = TELEGRAM_BOT_TOKEN
         self.chat_id = TELEGRAM_CHAT_ID
         
@@ -75,46 +77,13 @@ class RealPnLCalculator:
             return []
     
     def calculate_symbol_pnl(self, symbol: str, current_balance: float) -> Optional[Dict]:
-        """Рассчитать PnL для конкретного символа"""
+        """Рассчитать PnL для конкретного символа (средняя цена закупа из движка позиций)"""
         try:
-            # Получаем историю ордеров
-            orders = self.get_order_history_for_symbol(symbol)
-            if not orders:
+            position = self.positions.sync(symbol)
+            if position.qty <= 0:
                 return None
             
-            # Разделяем на покупки и продажи
-            buys = []
-            sells = []
-            
-            for order in orders:
-                side = order.get('side', '').upper()
-                price = float(order.get('price', 0))
-                quantity = float(order.get('executedQty', 0))
-                time_ms = int(order.get('time', 0))
-                
-                if side == 'BUY' and quantity > 0:
-                    buys.append({
-                        'price': price,
-                        'quantity': quantity,
-                        'time': time_ms,
-                        'value': price * quantity
-                    })
-                elif side == 'SELL' and quantity > 0:
-                    sells.append({
-                        'price': price,
-                        'quantity': quantity,
-                        'time': time_ms,
-                        'value': price * quantity
-                    })
-            
-            # Рассчитываем среднюю цену покупки
-            total_buy_quantity = sum(buy['quantity'] for buy in buys)
-            total_buy_value = sum(buy['value'] for buy in buys)
-            
-            if total_buy_quantity == 0:
-                return None
-            
-            avg_buy_price = total_buy_value / total_buy_quantity
+            avg_buy_price = position.avg_price
             
             # Получаем текущую цену
             current_price = self.get_current_price(symbol)
@@ -137,9 +106,10 @@ class RealPnLCalculator:
                 'total_invested': total_invested,
                 'pnl_usd': pnl_usd,
                 'pnl_percent': pnl_percent,
+                'realized_pnl': position.realized_pnl,
                 'is_profitable': pnl_usd >= self.min_profit_usd,
-                'buy_orders': len(buys),
-                'sell_orders': len(sells)
+                'buy_orders': position.buys,
+                'sell_orders': position.sells
             }
             
         except Exception as e:
@@ -3,20 +3,19 @@
 Скрипт для проверки поддерживаемых символов на бирже MEX
 """
 
-from mex_api import MexAPI
-import json
+from universe_manager import get_universe
 
 def main():
-    api = MexAPI()
+    universe = get_universe()
     
     print("🔍 Проверка поддерживаемых символов на MEX...")
     
     try:
-        # Получаем информацию о бирже
-        exchange_info = api.get_exchange_info()
+        # Информация о бирже - через вселенную (exchangeInfo + индексы)
+        universe.refresh(force_exchange_info=True)
         
-        if 'symbols' in exchange_info:
-            symbols = exchange_info['symbols']
+        if universe.exchange_info_loaded:
+            symbols = [info.raw for info in universe.symbols.values()]
             print(f"📊 Всего символов: {len(symbols)}")
             
             # Показываем первые 5 символов для понимания структуры
@@ -29,22 +28,17 @@ def main():
                 print(f"      Разрешенные ордера: {symbol.get('orderTypes', [])}")
                 print()
             
-            # Проверяем статусы
-            statuses = {}
-            for symbol in symbols:
-                status = symbol.get('status', 'UNKNOWN')
-                statuses[status] = statuses.get(status, 0) + 1
-            
+            # Проверяем статусы (индекс по статусу)
             print(f"\n📊 Статусы символов:")
-            for status, count in statuses.items():
+            for status, count in universe.status_counts().items():
                 print(f"   {status} (тип: {type(status)}): {count}")
             
-            # Ищем торговые символы (статус '1' = активная торговля)
-            trading_symbols = [s for s in symbols if s.get('status') == '1']
-            print(f"\n✅ Торговых символов: {len(trading_symbols)}")
+            # Торговые символы (статус '1' = активная торговля)
+            trading_count = sum(1 for info in universe.symbols.values() if info.tradable)
+            print(f"\n✅ Торговых символов: {trading_count}")
             
-            # Фильтруем USDT пары
-            usdt_trading_pairs = [s for s in trading_symbols if s['symbol'].endswith('USDT')]
+            # USDT пары (индекс по котировке)
+            usdt_trading_pairs = [universe.get(s).raw for s in universe.symbols_by_quote('USDT')]
             print(f"💱 USDT торговых пар: {len(usdt_trading_pairs)}")
             
             # Показываем первые 10 USDT торговых символов
@@ -56,19 +50,15 @@ def main():
             test_symbols = ['BTCUSDT', 'ETHUSDT', 'BNBUSDT', 'ADAUSDT']
             print(f"\n🔍 Проверка конкретных символов:")
             for symbol_name in test_symbols:
-                found = False
-                for symbol_info in usdt_trading_pairs:
-                    if symbol_info['symbol'] == symbol_name:
-                        found = True
-                        print(f"✅ {symbol_name}: Статус {symbol_info['status']}")
-                        print(f"   Разрешенные ордера: {symbol_info.get('orderTypes', [])}")
-                        break
-                
-                if not found:
+                info = universe.get(symbol_name)
+                if info is not None and info.tradable:
+                    print(f"✅ {symbol_name}: Статус {info.status}")
+                    print(f"   Разрешенные ордера: {info.raw.get('orderTypes', [])}")
+                else:
                     print(f"❌ {symbol_name}: НЕ НАЙДЕН")
                 
         else:
-            print(f"❌ Ошибка получения информации: {exchange_info}")
+            print("❌ Ошибка получения информации о бирже")
             
     except Exception as e:
         print(f"❌ Ошибка: {e}")
@@ -11,22 +11,16 @@ def main():
     
     print("🔍 Поиск всех пар с сделками...")
     
-    # Получаем все спот пары
-    from mex_api import MexAPI
-    api = MexAPI()
-    exchange_info = api.get_exchange_info()
+    # Торгуемые USDT пары из вселенной (exchangeInfo + индекс по котировке)
+    from universe_manager import get_universe
+    universe = get_universe()
+    universe.refresh(force_exchange_info=True)
     
-    if not isinstance(exchange_info, dict) or 'symbols' not in exchange_info:
+    if not universe.exchange_info_loaded:
         print("❌ Не удалось получить список пар")
         return
     
-    # Фильтруем только USDT пары
-    usdt_pairs = []
-    for symbol_info in exchange_info['symbols']:
-        symbol = symbol_info.get('symbol', '')
-        status = symbol_info.get('status', '')
-        if symbol.endswith('USDT') and (status == 'TRADING' or status == '1'):
-            usdt_pairs.append(symbol)
+    usdt_pairs = universe.symbols_by_quote('USDT')
     
     print(f"📊 Найдено {len(usdt_pairs)} USDT пар")
     
@@ -3,10 +3,82 @@ import time
 from datetime import datetime, timedelta
 from typing import Dict, List, Optional, Tuple
 from mex_api import MexAPI
-from neural_analyzer import NeuralAnalyzer
+from cache.kline_store import as_window
+
+
+def calculate_technical_indicators(klines) -> Dict:
+    """Рассчитать технические индикаторы (список свечей REST или KlineWindow)"""
+    window = as_window(klines)
+    if window is None or len(window) < 3:  # Снижаем требование
+        return {}
+    
+    closes = window.close.tolist()  # Цены закрытия
+    volumes = window.volume.tolist()  # Объемы
+    
+    # Простая скользящая средняя (SMA)
+    sma_period = min(len(closes), 20)
+    sma_20 = sum(closes[-sma_period:]) / sma_period
+    sma_50 = sum(closes[-min(len(closes), 50):]) / min(len(closes), 50)
+    
+    # Текущая цена
+    current_price = closes[-1]
+    
+    # Изменение цены за последние периоды
+    price_change_1h = 0
+    if len(closes) > 1 and closes[-2] > 0:
+        price_change_1h = ((current_price - closes[-2]) / closes[-2]) * 100
+        
+    price_change_24h = 0
+    if len(closes) > 1:
+        prev_price_24h = closes[-min(len(closes), 24)]
+        if prev_price_24h > 0:
+            price_change_24h = ((current_price - prev_price_24h) / prev_price_24h) * 100
+    
+    # Средний объем
+    vol_period = min(len(volumes), 20)
+    avg_volume = sum(volumes[-vol_period:]) / vol_period
+    current_volume = volumes[-1]
+    volume_ratio = current_volume / avg_volume if avg_volume > 0 else 1
+    
+    # RSI упрощенный
+    gains = []
+    losses = []
+    rsi_period = min(len(closes) - 1, 14)
+    for i in range(1, rsi_period + 1):
+        change = closes[i] - closes[i-1]
+        if change > 0:
+            gains.append(change)
+            losses.append(0)
+        else:
+            gains.append(0)
+            losses.append(abs(change))
+    
+    avg_gain = sum(gains) / len(gains) if gains else 0
+    avg_loss = sum(losses) / len(losses) if losses else 0.001
+    
+    # Защита от деления на ноль
+    if avg_loss == 0:
+        rsi = 50  # Нейтральное значение
+    else:
+        rs = avg_gain / avg_loss
+        rsi = 100 - (100 / (1 + rs))
+    
+    return {
+        'current_price': current_price,
+        'sma_20': sma_20,
+        'sma_50': sma_50,
+        'price_change_1h': price_change_1h,
+        'price_change_24h': price_change_24h,
+        'volume_ratio': volume_ratio,
+        'rsi': rsi,
+        'trend': 'UP' if current_price > sma_20 > sma_50 else 'DOWN'
+    }
+
 
 class MarketAnalyzer:
     def __init__(self):
+        # ИИ-модуль импортируется лениво: расчет индикаторов доступен и без него
+        from neural_analyzer import NeuralAnalyzer
         self.mex_api = MexAPI()
         self.neural_analyzer = NeuralAnalyzer()
         self.trading_balance = 50.0  # $50 для торговли
@@ -52,72 +124,9 @@ class MarketAnalyzer:
             print(f"Ошибка получения свечей для {symbol}: {e}")
             return []
     
-    def calculate_technical_indicators(self, klines: List[List]) -> Dict:
-        """Рассчитать технические индикаторы"""
-        if len(klines) < 3:  # Снижаем требование
-            return {}
-        
-        closes = [float(k[4]) for k in klines]  # Цены закрытия
-        volumes = [float(k[5]) for k in klines]  # Объемы
-        
-        # Простая скользящая средняя (SMA)
-        sma_period = min(len(closes), 20)
-        sma_20 = sum(closes[-sma_period:]) / sma_period
-        sma_50 = sum(closes[-min(len(closes), 50):]) / min(len(closes), 50)
-        
-        # Текущая цена
-        current_price = closes[-1]
-        
-        # Изменение цены за последние периоды
-        price_change_1h = 0
-        if len(closes) > 1 and closes[-2] > 0:
-            price_change_1h = ((current_price - closes[-2]) / closes[-2]) * 100
-            
-        price_change_24h = 0
-        if len(closes) > 1:
-            prev_price_24h = closes[-min(len(closes), 24)]
-            if prev_price_24h > 0:
-                price_change_24h = ((current_price - prev_price_24h) / prev_price_24h) * 100
-        
-        # Средний объем
-        vol_period = min(len(volumes), 20)
-        avg_volume = sum(volumes[-vol_period:]) / vol_period
-        current_volume = volumes[-1]
-        volume_ratio = current_volume / avg_volume if avg_volume > 0 else 1
-        
-        # RSI упрощенный
-        gains = []
-        losses = []
-        rsi_period = min(len(closes) - 1, 14)
-        for i in range(1, rsi_period + 1):
-            change = closes[i] - closes[i-1]
-            if change > 0:
-                gains.append(change)
-                losses.append(0)
-            else:
-                gains.append(0)
-                losses.append(abs(change))
-        
-        avg_gain = sum(gains) / len(gains) if gains else 0
-        avg_loss = sum(losses) / len(losses) if losses else 0.001
-        
-        # Защита от деления на ноль
-        if avg_loss == 0:
-            rsi = 50  # Нейтральное значение
-        else:
-            rs = avg_gain / avg_loss
-            rsi = 100 - (100 / (1 + rs))
-        
-        return {
-            'current_price': current_price,
-            'sma_20': sma_20,
-            'sma_50': sma_50,
-            'price_change_1h': price_change_1h,
-            'price_change_24h': price_change_24h,
-            'volume_ratio': volume_ratio,
-            'rsi': rsi,
-            'trend': 'UP' if current_price > sma_20 > sma_50 else 'DOWN'
-        }
+    def calculate_technical_indicators(self, klines) -> Dict:
+        """Рассчитать технические индикаторы (список свечей REST или KlineWindow)"""
+        return calculate_technical_indicators(klines)
     
     def filter_trading_candidates(self, market_data: List[Dict]) -> List[Dict]:
         """Фильтровать кандидатов для торговли"""
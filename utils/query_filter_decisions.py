@@ -0,0 +1,58 @@
+#!/usr/bin/env python3
+"""
+Сводка журнала решений анти-хайп фильтров
+Причины блокировок, частота срабатывания правил и чаще всего блокируемые
+символы за последние дни.
+
+Примеры:
+    python utils/query_filter_decisions.py --days 7
+    python utils/query_filter_decisions.py --days 3 --filter rebalancer --symbol ETHUSDC
+"""
+
+import argparse
+import os
+import sys
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from filter_decision_log import FILTERS, FilterDecisionLog
+
+
+def format_summary(summary: dict, days: int, top: int = 10) -> str:
+    """Текстовая сводка (результат FilterDecisionLog.summarize)"""
+    total = summary['total']
+    if not total:
+        return f"📭 Нет решений фильтров за {days} дн."
+    lines = [f"🧾 Решения фильтров за {days} дн.: {total}, разрешено {summary['allowed']}, "
+             f"заблокировано {summary['blocked']} ({summary['blocked'] / total * 100:.1f}%)"]
+    if summary['block_types']:
+        lines.append("\n🚫 Причины блокировок:")
+        for block_type, count in list(summary['block_types'].items())[:top]:
+            lines.append(f"   • {block_type}: {count} ({count / summary['blocked'] * 100:.1f}%)")
+    for filter_name, rules in summary['rules'].items():
+        lines.append(f"\n📐 Правила ({filter_name}): сработало / проверено")
+        for rule, stats in rules.items():
+            lines.append(f"   • {rule}: {stats['fired']}/{stats['evaluated']} ({stats['hit_rate'] * 100:.1f}%)")
+    if summary['blocked_symbols']:
+        lines.append("\n🔒 Чаще всего блокируются:")
+        for symbol, count in list(summary['blocked_symbols'].items())[:top]:
+            lines.append(f"   • {symbol}: {count}")
+    return "\n".join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Сводка журнала решений анти-хайп фильтров")
+    parser.add_argument('--days', type=int, default=1, help="За сколько последних суток (UTC)")
+    parser.add_argument('--filter', choices=FILTERS, help="Только один фильтр")
+    parser.add_argument('--symbol', help="Только один символ")
+    parser.add_argument('--path', help="Каталог журнала (по умолчанию из конфига)")
+    parser.add_argument('--top', type=int, default=10, help="Сколько причин/символов показать")
+    args = parser.parse_args()
+
+    log = FilterDecisionLog(args.path)
+    summary = log.summarize(args.days, args.filter, args.symbol)
+    print(format_summary(summary, args.days, args.top))
+
+
+if __name__ == "__main__":
+    main()
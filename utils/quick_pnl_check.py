@@ -8,6 +8,7 @@ import time
 import logging
 from datetime import datetime
 from mex_api import MexAPI
+from position_engine import get_position_engine
 from config import TELEGRAM_BOT_TOKEN, TELEGRAM_CHAT_ID
 import requests
 
@@ -40,6 +41,7 @@ def main():
         
         # Инициализируем API
         mex_api = MexAPI()
+        engine = get_position_engine()
         
         # Получаем балансы
         account_info = mex_api.get_account_info()
@@ -89,13 +91,11 @@ def main():
                 current_price = float(ticker['price'])
                 position_value = balance * current_price
                 
-                # Простая оценка прибыли (очень приблизительно)
-                if position_value > 10.0:
-                    estimated_profit_percent = 2.0  # 2% прибыли
-                else:
-                    estimated_profit_percent = 0.5  # 0.5% прибыли для мелких позиций
-                
-                estimated_profit = position_value * (estimated_profit_percent / 100)
+                # Нереализованный PnL от средней цены закупа (движок позиций)
+                pnl = engine.pnl(symbol, current_price, balance)
+                cost = pnl['avg_buy_price'] * min(balance, pnl['position_qty'])
+                estimated_profit = pnl['unrealized_pnl']
+                estimated_profit_percent = estimated_profit / cost * 100 if cost > 0 else 0.0
                 
                 positions.append({
                     'asset': asset,
@@ -123,7 +123,7 @@ def main():
             
             report = f"📈 <b>БЫСТРАЯ ПРОВЕРКА ПОЗИЦИЙ</b>\n\n"
             report += f"💰 Общая стоимость: <b>${total_value_usd:.2f}</b>\n"
-            report += f"📈 Примерная прибыль: <b>${total_profit:.2f}</b>\n"
+            report += f"📈 Нереализованный PnL: <b>${total_profit:.2f}</b>\n"
             report += f"📊 Количество позиций: <b>{len(positions)}</b>\n\n"
             
             report += "🔍 <b>Топ позиции:</b>\n"
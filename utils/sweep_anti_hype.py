@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+"""
+Перебор порогов анти-хайп фильтра на записанной истории
+Для каждого набора порогов: доля блокировок и форвардная доходность
+разрешенных и заблокированных входов.
+
+Примеры:
+    python utils/sweep_anti_hype.py --record
+    python utils/sweep_anti_hype.py --workers 8 --top 15
+    python utils/sweep_anti_hype.py --set atr_impulse_multiplier=2.4,2.7,3.0 --set rsi_overbought=55,58,61
+"""
+
+import argparse
+import logging
+import os
+import sys
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from anti_hype_filter import AntiHypeFilter
+from anti_hype_sweep import evaluate, format_results, load_entries, record_history, sweep
+from config import ANTI_HYPE_SWEEP_CONFIG
+
+
+def parse_grid(items) -> dict:
+    """--set name=v1,v2 -> {name: (v1, v2)}"""
+    grid = {}
+    for item in items or []:
+        name, _, values = item.partition('=')
+        grid[name.strip()] = tuple(float(v) for v in values.split(',') if v.strip())
+    return grid
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Перебор порогов анти-хайп фильтра")
+    parser.add_argument('--history', default=ANTI_HYPE_SWEEP_CONFIG['history_path'], help="Файл истории 1h свечей")
+    parser.add_argument('--record', action='store_true', help="Записать историю с биржи перед перебором")
+    parser.add_argument('--symbols', type=int, help="Сколько пар записывать")
+    parser.add_argument('--set', action='append', metavar='NAME=V1,V2', help="Сетка параметра (вместо конфига)")
+    parser.add_argument('--workers', type=int, help="Процессов перебора")
+    parser.add_argument('--horizon', type=int, help="Горизонт сортировки, часов")
+    parser.add_argument('--top', type=int, default=10, help="Сколько лучших наборов показать")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format='%(message)s')
+
+    if args.record:
+        record_history(args.history, args.symbols)
+    elif not os.path.exists(args.history):
+        print(f"❌ Нет истории {args.history}: запустите с --record")
+        return
+
+    entries = load_entries(args.history)
+    base_params = AntiHypeFilter().decision_params()
+    results = sweep(entries, parse_grid(args.set) or None, base_params, args.workers)
+    print(format_results(results, evaluate(entries, base_params), args.top, args.horizon))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,271 @@
+#!/usr/bin/env python3
+"""
+Таблица готовых вердиктов анти-хайп фильтра
+Пути покупки (BUY-фаза монитора альтов, этап filter скана) раньше ждали
+анти-хайп фильтр в момент решения. Фоновый поток пересчитывает вердикты
+для торговой вселенной пакетом на каждой границе свечи и публикует их
+неизменяемым снимком - заменой одной ссылки. Чтение снимка - поиск в
+словаре; синхронная проверка остается только для символов, которых в
+снимке нет (или если снимок устарел). Такие символы попадают в список
+наблюдения и войдут в следующий пересчет.
+
+Памп внутри свечи снимок не видит, поэтому разрешающий вердикт живет не
+дольше кэша результатов фильтра (result_cache_ttl): импульс, ATR и RSI в
+нем не старше, чем у самого фильтра. В эти пределы он еще перепроверяется
+защитой от дневного хая по живой цене (O(1)). Блокирующий вердикт
+действует до конца снимка.
+"""
+
+import logging
+import threading
+import time
+from dataclasses import dataclass
+from types import MappingProxyType
+from typing import Callable, Dict, Iterable, List, Mapping, Optional
+
+from candle_events import CandleClock
+from config import VERDICT_TABLE_CONFIG
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class VerdictSnapshot:
+    """Неизменяемый снимок вердиктов на границу свечи"""
+    verdicts: Mapping[str, Mapping]
+    boundary_ms: int        # Граница свечи, на которую посчитаны вердикты
+    valid_until: float      # После этого момента снимок не используется
+    built_at: float
+    build_sec: float
+    generation: int
+
+    def get(self, symbol: str, now: Optional[float] = None) -> Optional[Dict]:
+        """Вердикт символа (копия) или None, если символа нет или снимок устарел"""
+        if (time.time() if now is None else now) >= self.valid_until:
+            return None
+        verdict = self.verdicts.get(symbol)
+        return dict(verdict) if verdict is not None else None
+
+
+class VerdictTable:
+    """Фоновый пересчет вердиктов и чтение из снимка"""
+
+    def __init__(self, anti_hype_filter=None, symbols_fn: Optional[Callable[[], Iterable[str]]] = None,
+                 config: Optional[Dict] = None, price_source=None):
+        """
+        Args:
+            anti_hype_filter: Фильтр для пересчета (по умолчанию AntiHypeFilter на общем кэше рынка)
+            symbols_fn: Символы вселенной для пересчета (по умолчанию топ вселенной по объему)
+            config: Интервал, пауза после границы, размер вселенной (по умолчанию VERDICT_TABLE_CONFIG)
+            price_source: Живые цены с get_ticker_price/get_24hr_ticker (по умолчанию общий кэш рынка)
+        """
+        self.config = config or VERDICT_TABLE_CONFIG
+        self._filter = anti_hype_filter
+        self._price_source = price_source
+        self.symbols_fn = symbols_fn or self._universe_symbols
+        self.clock = CandleClock(self.config.get('interval', '15m'), self.config.get('settle_sec', 5.0))
+        self._snapshot: Optional[VerdictSnapshot] = None
+        self._watched: Dict[str, None] = {}  # Символы путей покупки (упорядоченное множество)
+        self._lock = threading.Lock()
+        self._refresh_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.stats = {'hits': 0, 'misses': 0, 'refreshes': 0, 'refresh_errors': 0,
+                      'live_checks': 0, 'live_blocks': 0, 'expired': 0}
+
+    @property
+    def anti_hype_filter(self):
+        if self._filter is None:
+            from anti_hype_filter import AntiHypeFilter
+            from cache.market_data_cache import get_market_data_cache
+            self._filter = AntiHypeFilter(kline_source=get_market_data_cache().client('verdicts'))
+        return self._filter
+
+    @property
+    def price_source(self):
+        if self._price_source is None:
+            from cache.market_data_cache import get_market_data_cache
+            self._price_source = get_market_data_cache().client('verdicts')
+        return self._price_source
+
+    def _universe_symbols(self) -> List[str]:
+        from universe_manager import current_universe
+        universe = current_universe()
+        if universe is None:
+            return []
+        return universe.top_by_volume(self.config.get('universe_limit', 100), self.config.get('quote', 'USDT'))
+
+    @property
+    def snapshot(self) -> Optional[VerdictSnapshot]:
+        return self._snapshot
+
+    def watch(self, symbols: Iterable[str]):
+        """Добавить символы в пересчет (кандидаты путей покупки)"""
+        with self._lock:
+            for symbol in symbols:
+                self._watched[symbol] = None
+            limit = self.config.get('max_watched', 500)
+            while len(self._watched) > limit:
+                self._watched.pop(next(iter(self._watched)))
+
+    ############################################################
+    # 🔄 ПЕРЕСЧЕТ
+    ############################################################
+    def refresh(self, now: Optional[float] = None) -> VerdictSnapshot:
+        """Пересчитать вердикты вселенной пакетом и опубликовать новый снимок"""
+        with self._refresh_lock:
+            started = time.time()
+            now = started if now is None else now
+            with self._lock:
+                watched = list(self._watched)
+            symbols = list(dict.fromkeys(list(self.symbols_fn()) + watched))
+            verdicts = self.anti_hype_filter.check_buy_permission_batch(symbols) if symbols else {}
+            boundary = self.clock.boundary(now)
+            previous = self._snapshot
+            snapshot = VerdictSnapshot(
+                verdicts=MappingProxyType({s: MappingProxyType(dict(v)) for s, v in verdicts.items()}),
+                boundary_ms=boundary,
+                valid_until=(boundary + self.clock.interval_ms) / 1000 + 2 * self.clock.settle_sec,
+                built_at=now,
+                build_sec=time.time() - started,
+                generation=previous.generation + 1 if previous else 1,
+            )
+            self._snapshot = snapshot  # Публикация - замена ссылки, читатели не блокируются
+            self.stats['refreshes'] += 1
+            blocked = sum(1 for v in verdicts.values() if not v.get('allowed', True))
+            logger.info(f"🗂️ Вердикты фильтра: {len(verdicts)} пар (заблокировано {blocked}) "
+                        f"за {snapshot.build_sec:.1f}с, снимок #{snapshot.generation}")
+            return snapshot
+
+    def start(self):
+        """Запустить фоновый пересчет на каждой границе свечи"""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name='verdict-table', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                self.refresh()
+            except Exception as e:
+                self.stats['refresh_errors'] += 1
+                logger.error(f"❌ Ошибка пересчета вердиктов фильтра: {e}")
+            self._stop.wait(self.clock.seconds_until_next())
+
+    ############################################################
+    # 🔍 ЧТЕНИЕ
+    ############################################################
+    def _live_price(self, symbol: str) -> Optional[float]:
+        try:
+            info = self.price_source.get_ticker_price(symbol)
+            return float(info['price']) if isinstance(info, dict) and 'price' in info else None
+        except Exception as e:
+            logger.warning(f"⚠️ Нет живой цены для {symbol}: {e}")
+            return None
+
+    def _live_prices(self) -> Dict[str, float]:
+        """Живые цены всех пар одним снимком 24h тикеров"""
+        try:
+            tickers = self.price_source.get_24hr_ticker()
+        except Exception as e:
+            logger.warning(f"⚠️ Нет снимка 24h тикеров: {e}")
+            return {}
+        prices = {}
+        for ticker in tickers if isinstance(tickers, list) else []:
+            try:
+                prices[ticker['symbol']] = float(ticker['lastPrice'])
+            except (KeyError, TypeError, ValueError):
+                continue
+        return prices
+
+    def _read(self, snapshot: Optional[VerdictSnapshot], symbol: str, now: float,
+              price: Optional[float] = None) -> Optional[Dict]:
+        """Вердикт снимка, перепроверенный по живой цене (None - нужна синхронная проверка)"""
+        verdict = snapshot.get(symbol, now) if snapshot is not None else None
+        if verdict is None or not verdict.get('allowed', True):
+            return verdict
+        anti_hype = self.anti_hype_filter
+        # Разрешение с устаревшими импульсом/ATR/RSI не выдаем - синхронная проверка
+        if now - snapshot.built_at >= getattr(anti_hype, 'result_cache_ttl', 120):
+            self.stats['expired'] += 1
+            return None
+        tracker = getattr(anti_hype, 'daily_extremes', None)
+        daily_high = tracker.high(symbol) if tracker is not None else None
+        price = price or (self._live_price(symbol) if daily_high else None)
+        if not price or not daily_high:
+            return verdict
+
+        # Защита от дневного хая по текущей цене - как в фильтре
+        self.stats['live_checks'] += 1
+        daily_high = max(daily_high, price)
+        distance = (daily_high - price) / daily_high
+        if distance < anti_hype.daily_high_block_threshold:
+            self.stats['live_blocks'] += 1
+            logger.warning(f"🚫 {symbol}: ПОЛНАЯ БЛОКИРОВКА после снимка! До дневного хая {distance * 100:.2f}%")
+            return {'allowed': False, 'multiplier': 0.0, 'reason': f'daily_high_too_close_{distance * 100:.1f}%',
+                    'daily_high': daily_high, 'current_price': price, 'distance_percent': distance * 100,
+                    'block_type': 'daily_high_full_block'}
+        restricted = verdict.get('distance_percent')
+        if distance < anti_hype.daily_high_safety_margin and \
+                (restricted is None or restricted >= anti_hype.daily_high_safety_margin * 100):
+            verdict['multiplier'] = verdict.get('multiplier', 1.0) * 0.3  # Ограничение снимок еще не учел
+        verdict.update(daily_high=daily_high, current_price=price, distance_percent=distance * 100)
+        return verdict
+
+    def check_buy_permission(self, symbol: str, fallback=None) -> Dict:
+        """Вердикт из снимка; если его нет - синхронная проверка фильтром fallback"""
+        verdict = self._read(self._snapshot, symbol, time.time())
+        if verdict is not None:
+            self.stats['hits'] += 1
+            return verdict
+        self.stats['misses'] += 1
+        self.watch([symbol])
+        return (fallback or self.anti_hype_filter).check_buy_permission(symbol)
+
+    def check_buy_permission_batch(self, symbols: List[str], max_workers: int = 8,
+                                   fallback=None) -> Dict[str, Dict]:
+        """Вердикты пачки: из снимка, недостающие - одной пакетной проверкой fallback"""
+        snapshot = self._snapshot
+        now = time.time()
+        live = snapshot is not None and getattr(self.anti_hype_filter, 'daily_extremes', None) is not None
+        prices = self._live_prices() if live else {}
+        results: Dict[str, Dict] = {}
+        missing = []
+        for symbol in dict.fromkeys(symbols):
+            verdict = self._read(snapshot, symbol, now, prices.get(symbol))
+            if verdict is None:
+                missing.append(symbol)
+            else:
+                results[symbol] = verdict
+        self.stats['hits'] += len(results)
+        self.stats['misses'] += len(missing)
+        if missing:
+            self.watch(missing)
+            results.update((fallback or self.anti_hype_filter).check_buy_permission_batch(missing, max_workers))
+        return {symbol: results[symbol] for symbol in dict.fromkeys(symbols)}
+
+    def get_stats(self) -> Dict:
+        stats = dict(self.stats)
+        snapshot = self._snapshot
+        stats['symbols'] = len(snapshot.verdicts) if snapshot else 0
+        stats['generation'] = snapshot.generation if snapshot else 0
+        stats['watched'] = len(self._watched)
+        return stats
+
+
+_verdict_table: Optional[VerdictTable] = None
+_verdict_table_lock = threading.Lock()
+
+
+def get_verdict_table() -> VerdictTable:
+    """Получить общую таблицу вердиктов процесса (фоновый пересчет запускается start())"""
+    global _verdict_table
+    with _verdict_table_lock:
+        if _verdict_table is None:
+            _verdict_table = VerdictTable()
+        return _verdict_table